@@ -0,0 +1,48 @@
+import random
+import wavelink
+from play_history import play_history
+from track_cache import track_cache
+
+# Nombre de successeurs examinés pour choisir la piste suivante.
+AUTOPLAY_CANDIDATES = 10
+# Les pistes jouées récemment sur le serveur ne sont pas reproposées (sinon l'autoplay tourne en rond).
+RECENT_EXCLUSION = 25
+
+async def pick_candidate(guild_id: int, track_uri: str, rng: random.Random = random):
+    """
+    Choisit la piste à jouer après `track_uri` dans l'index de co-occurrence : tirage pondéré parmi les pistes
+    le plus souvent jouées juste après elle, hors pistes récentes du serveur. À défaut (piste jamais suivie
+    d'une autre), tirage parmi les pistes les plus écoutées du serveur. Renvoie None si l'historique est vide.
+    """
+    recent = {entry.uri for entry in await play_history.recent(guild_id, limit=RECENT_EXCLUSION)}
+    recent.add(track_uri)
+
+    candidates = [c for c in await play_history.successors(track_uri, limit=AUTOPLAY_CANDIDATES) if c.uri not in recent]
+    weights = [c.count for c in candidates]
+    if not candidates:
+        top = await play_history.top_tracks(guild_id, limit=RECENT_EXCLUSION + AUTOPLAY_CANDIDATES)
+        candidates = [t for t in top if t.uri not in recent]
+        weights = [t.plays for t in candidates]
+    if not candidates:
+        return None
+    return rng.choices(candidates, weights=weights)[0]
+
+async def resolve_candidate(candidate) -> wavelink.Playable | None:
+    """Transforme un candidat en piste jouable via le cache des recherches (indexé par URI) : en général sans Lavalink."""
+    try:
+        tracks = await track_cache.search(candidate.uri)
+    except (wavelink.LavalinkException, wavelink.LavalinkLoadException) as e:
+        print(f"[Music] Autoplay : impossible de charger '{candidate.uri}': {e}")
+        return None
+    if isinstance(tracks, wavelink.Playlist):
+        tracks = tracks.tracks
+    if not tracks:
+        return None
+    track = tracks[0]
+    track.extras = {"requester_id": None, "autoplay": True}
+    return track
+
+async def next_autoplay_track(guild_id: int, track_uri: str, rng: random.Random = random) -> wavelink.Playable | None:
+    """Piste à enchaîner automatiquement après `track_uri` sur ce serveur, prête à être jouée (ou None)."""
+    candidate = await pick_candidate(guild_id, track_uri, rng)
+    return await resolve_candidate(candidate) if candidate else None
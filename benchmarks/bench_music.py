@@ -0,0 +1,204 @@
+"""
+Benchmarks de la musique contre de faux nœuds Lavalink locaux (voir tests/fake_lavalink.py).
+
+Mesure, avec de nombreux serveurs Discord simulés :
+- le délai entre /play et le début de la piste (recherche à froid, puis servie par le cache) ;
+- le débit d'import d'une playlist ;
+- le temps de bascule des lecteurs quand un nœud tombe.
+
+Usage : python benchmarks/bench_music.py [--guilds 200] [--playlist-size 500] [--latency 0.02] [--json]
+"""
+import argparse
+import asyncio
+import collections
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+import types
+from unittest.mock import AsyncMock
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "tests"))
+
+import wavelink
+import db_manager
+from fake_lavalink import FakeLavalink, FakeDiscordClient, close_node, connect_node, make_track, wait_until
+from commandes.music import MusicCog
+from spotify_resolver import SpotifyTrack
+from node_manager import NodeManager
+from now_playing import now_playing_updater
+from track_cache import track_cache
+
+def percentiles(samples: list[float]) -> dict:
+    samples = sorted(samples)
+    return {
+        "n": len(samples),
+        "p50_ms": round(statistics.median(samples) * 1000, 1),
+        "p95_ms": round(samples[int(len(samples) * 0.95) - 1 if len(samples) > 1 else 0] * 1000, 1),
+        "max_ms": round(samples[-1] * 1000, 1),
+    }
+
+def make_interaction(guild, user_id: int = 42):
+    return types.SimpleNamespace(
+        guild=guild, channel=guild.text_channel, user=types.SimpleNamespace(id=user_id),
+        followup=types.SimpleNamespace(send=AsyncMock()),
+    )
+
+class Cluster:
+    """Faux nœuds Lavalink démarrés et connectés au Pool wavelink, avec un bot simulé et le cog musique."""
+    def __init__(self, nodes: int, latency: float, probe_interval: float = 30.0, **server_options):
+        self.servers = [FakeLavalink(latency=latency, seed=i, **server_options) for i in range(nodes)]
+        self.probe_interval = probe_interval
+        self.client = FakeDiscordClient()
+        self.nodes = []
+        self.cog = None
+
+    async def __aenter__(self):
+        for i, server in enumerate(self.servers):
+            await server.start()
+            self.nodes.append(await connect_node(server, self.client, f"bench-{id(self)}-{i}"))
+        self.client.node_manager = NodeManager(nodes=lambda: self.nodes, probe_interval=self.probe_interval)
+        await self.client.node_manager.probe_all()
+        self.cog = MusicCog(self.client)
+        for name, listener in self.cog.get_listeners():
+            self.client.add_listener(listener, name)
+        return self
+
+    async def __aexit__(self, *exc):
+        self.cog.idle_timers.cancel_all()
+        await self.client.node_manager.close()
+        await now_playing_updater.close()
+        for node in self.nodes:
+            await close_node(node)
+        for server in self.servers:
+            await server.stop()
+
+    async def connect(self, cls=None):
+        guild = self.client.create_guild()
+        player = await guild.voice_channel.connect(cls=cls or self.client.node_manager.create_player)
+        player.home = guild.text_channel
+        return guild, player
+
+async def bench_play_latency(guilds: int, latency: float) -> dict:
+    """Délai /play -> début de piste pour `guilds` serveurs simultanés, deux fois : recherche à froid puis en cache."""
+    results = {}
+    async with Cluster(nodes=2, latency=latency) as cluster:
+        started = {}
+        async def on_track_start(payload):
+            started.setdefault(payload.player.guild.id, time.perf_counter())
+        cluster.client.add_listener(on_track_start, "on_wavelink_track_start")
+
+        for phase in ("froid", "cache"):
+            connected = [await cluster.connect() for _ in range(guilds)]
+            sent_at = {}
+
+            async def play(index: int, guild):
+                sent_at[guild.id] = time.perf_counter()
+                await cluster.cog._add_song_to_queue(make_interaction(guild), f"Artiste {index} - Titre {index} (Official Video)")
+
+            await asyncio.gather(*(play(i, guild) for i, (guild, _) in enumerate(connected)))
+            await wait_until(lambda: all(guild.id in started for guild, _ in connected), 30)
+            results[phase] = percentiles([started[guild.id] - sent_at[guild.id] for guild, _ in connected])
+            results[phase]["lecteurs_par_noeud"] = dict(collections.Counter(player.node.identifier for _, player in connected))
+            for _, player in connected:
+                await player.disconnect()
+    results["track_cache"] = track_cache.stats()
+    return results
+
+async def bench_playlist_import(size: int, latency: float) -> dict:
+    """Import d'une playlist de `size` titres : durée de la commande, délai avant la première piste, requêtes Lavalink."""
+    async with Cluster(nodes=2, latency=latency) as cluster:
+        guild, player = await cluster.connect()
+        spotify_tracks = [SpotifyTrack(f"Playlist Titre {i}", f"Playlist Artiste {i}", 180000, f"BENCH{i:07d}") for i in range(size)]
+        first_track = asyncio.get_running_loop().create_future()
+        async def on_track_start(payload):
+            if not first_track.done():
+                first_track.set_result(time.perf_counter())
+        cluster.client.add_listener(on_track_start, "on_wavelink_track_start")
+
+        start = time.perf_counter()
+        await cluster.cog._add_multiple_tracks(make_interaction(guild), spotify_tracks, add_to_top=False)
+        elapsed = time.perf_counter() - start
+        first = await asyncio.wait_for(first_track, timeout=30) - start
+        searches = sum(server.requests.get("GET /v4/loadtracks", 0) for server in cluster.servers)
+        await player.disconnect()
+
+        # Second import de la même playlist : les morceaux déjà rencontrés sont retrouvés par leur ISRC, sans recherche.
+        guild, player = await cluster.connect()
+        await cluster.cog._add_multiple_tracks(make_interaction(guild), spotify_tracks, add_to_top=False)
+        searches_again = sum(server.requests.get("GET /v4/loadtracks", 0) for server in cluster.servers) - searches
+        await player.disconnect()
+    return {
+        "titres": size,
+        "duree_s": round(elapsed, 3),
+        "titres_par_s": round(size / elapsed, 1),
+        "premiere_piste_ms": round(first * 1000, 1),
+        "recherches_lavalink": searches,
+        "recherches_lavalink_reimport": searches_again,
+    }
+
+async def bench_failover(guilds: int, latency: float, probe_interval: float) -> dict:
+    """Temps entre la perte d'un nœud et la reprise de la lecture de tous ses lecteurs sur l'autre nœud."""
+    # Mises à jour de position fréquentes : wavelink ne connaît la position d'un lecteur qu'à travers elles.
+    async with Cluster(nodes=2, latency=latency, probe_interval=probe_interval, update_interval=0.2) as cluster:
+        dying, survivor = cluster.nodes
+        players = []
+        for i in range(guilds):
+            _, player = await cluster.connect(cls=lambda client, channel: wavelink.Player(client, channel, nodes=[dying]))
+            await player.play(wavelink.Playable(make_track(f"bascule-{i}", length=600000)))
+            players.append(player)
+        await wait_until(lambda: all(player.position for player in players), 30)
+
+        cluster.client.node_manager.start()
+        killed = time.perf_counter()
+        await cluster.servers[0].kill()
+        await wait_until(lambda: all(player.node is survivor for player in players), 60)
+        migrated = time.perf_counter()
+        await wait_until(lambda: cluster.servers[1].playing_count >= guilds, 60)
+        resumed = time.perf_counter()
+        # Position de reprise vue par le nœud survivant : la piste ne doit pas recommencer au début.
+        resumed_at = [fake.base_position for session in cluster.servers[1].sessions.values() for fake in session.players.values()]
+        for player in players:
+            await player.disconnect()
+    return {
+        "lecteurs": guilds,
+        "intervalle_sondage_s": probe_interval,
+        "detection_et_bascule_ms": round((migrated - killed) * 1000, 1),
+        "reprise_lecture_ms": round((resumed - killed) * 1000, 1),
+        "position_conservee": all(position > 0 for position in resumed_at),
+    }
+
+async def main(args):
+    with tempfile.TemporaryDirectory() as tmp:
+        # Base de données jetable : le cache des recherches ne doit pas polluer (ni profiter de) la vraie base.
+        db_manager.DB_FILE = os.path.join(tmp, "bench.db")
+        await db_manager.initialize_database()
+        results = {
+            "play_latency": await bench_play_latency(args.guilds, args.latency),
+            "playlist_import": await bench_playlist_import(args.playlist_size, args.latency),
+            "failover": await bench_failover(args.guilds, args.latency, args.probe_interval),
+        }
+        await track_cache.flush()
+        return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--guilds", type=int, default=200, help="Nombre de serveurs Discord simulés")
+    parser.add_argument("--playlist-size", type=int, default=500, help="Nombre de titres de la playlist importée")
+    parser.add_argument("--latency", type=float, default=0.02, help="Latence ajoutée à chaque requête Lavalink (s)")
+    parser.add_argument("--probe-interval", type=float, default=1.0, help="Intervalle de sondage des nœuds pendant la bascule (s)")
+    parser.add_argument("--json", action="store_true", help="Affiche les résultats en JSON")
+    args = parser.parse_args()
+
+    results = asyncio.run(main(args))
+    if args.json:
+        print(json.dumps(results, indent=2, ensure_ascii=False))
+    else:
+        for name, result in results.items():
+            print(f"== {name}")
+            for key, value in result.items():
+                print(f"  {key}: {value}")
@@ -0,0 +1,93 @@
+import asyncio
+import time
+import discord
+
+# Nombre d'actions envoyées à l'API en parallèle par défaut.
+DEFAULT_CONCURRENCY = 4
+# Intervalle minimal (en secondes) entre deux rapports de progression.
+PROGRESS_INTERVAL = 2.0
+# Nombre de tentatives pour une action qui reçoit un 429.
+MAX_RATE_LIMIT_RETRIES = 3
+
+class BulkResult:
+    """Bilan d'une exécution de masse : éléments réussis et éléments en échec (avec la raison)."""
+    def __init__(self, total: int):
+        self.total = total
+        self.succeeded = []
+        self.failed = []  # (élément, message d'erreur)
+
+    @property
+    def done(self) -> int:
+        return len(self.succeeded) + len(self.failed)
+
+class BulkExecutor:
+    """
+    Exécute une même coroutine sur une liste d'éléments avec une concurrence bornée.
+    Quand Discord répond 429, tous les workers marquent une pause commune (durée `retry_after`)
+    avant de réessayer, au lieu de continuer à frapper l'API.
+    """
+    def __init__(self, concurrency: int = DEFAULT_CONCURRENCY, progress_interval: float = PROGRESS_INTERVAL):
+        self.concurrency = concurrency
+        self.progress_interval = progress_interval
+        self._resume_at = 0.0
+
+    async def run(self, items: list, action, on_progress=None) -> BulkResult:
+        """
+        Applique `action(item)` à chaque élément. `on_progress(result)` est appelé régulièrement
+        (au plus une fois par `progress_interval`) puis une dernière fois à la fin.
+        """
+        result = BulkResult(len(items))
+        queue = asyncio.Queue()
+        for item in items:
+            queue.put_nowait(item)
+        last_report = time.monotonic()
+
+        async def worker():
+            nonlocal last_report
+            while True:
+                try:
+                    item = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                error = await self._run_one(action, item)
+                if error is None:
+                    result.succeeded.append(item)
+                else:
+                    result.failed.append((item, error))
+
+                if on_progress and time.monotonic() - last_report >= self.progress_interval:
+                    last_report = time.monotonic()
+                    try:
+                        await on_progress(result)
+                    except discord.HTTPException:
+                        pass # Un rapport de progression raté ne doit pas interrompre l'opération.
+
+        await asyncio.gather(*(worker() for _ in range(min(self.concurrency, len(items)) or 1)))
+        if on_progress:
+            try:
+                await on_progress(result)
+            except discord.HTTPException:
+                pass
+        return result
+
+    async def _run_one(self, action, item) -> str | None:
+        """Exécute une action, en respectant les pauses de rate-limit. Renvoie None ou un message d'erreur."""
+        for _ in range(MAX_RATE_LIMIT_RETRIES):
+            delay = self._resume_at - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            try:
+                await action(item)
+                return None
+            except discord.RateLimited as e:
+                self._pause(e.retry_after)
+            except discord.HTTPException as e:
+                if e.status != 429:
+                    return e.text or str(e)
+                self._pause(float(e.response.headers.get("Retry-After", 1)) if e.response is not None else 1.0)
+            except Exception as e:
+                return str(e)
+        return "Rate-limit persistant"
+
+    def _pause(self, retry_after: float):
+        self._resume_at = max(self._resume_at, time.monotonic() + retry_after)
@@ -22,6 +22,7 @@ class BotSettingsCog(commands.Cog):
                 ON CONFLICT(guild_id) DO UPDATE SET receive_broadcasts = 1;
             """, (guild_id,))
             await db.commit()
+        db_manager.guild_settings.invalidate(guild_id)
         
         await interaction.response.send_message("✅ Vous recevrez de nouveau les annonces globales du bot.", ephemeral=True)
 
@@ -36,6 +37,7 @@ class BotSettingsCog(commands.Cog):
                 ON CONFLICT(guild_id) DO UPDATE SET receive_broadcasts = 0;
             """, (guild_id,))
             await db.commit()
+        db_manager.guild_settings.invalidate(guild_id)
 
         await interaction.response.send_message("❌ Vous ne recevrez plus les annonces globales du bot. Vous pouvez les réactiver à tout moment avec `/botannonce start`.", ephemeral=True)
 
@@ -3,11 +3,14 @@ from discord.ext import commands
 from discord import app_commands
 import json
 import asyncio
+import math
 import os
 import time
 import aiosqlite
 # --- Configuration principale du module ---
-from db_manager import get_db_connection
+from db_manager import get_db_connection, guild_settings
+from structure_executor import ACTION_LABELS, KIND_LABELS, StructuralExecutor, StructuralOperation
+from structure_planner import BOT, EVERYONE, PRUNE_POLICIES, CategorySpec, ChannelSpec, DesiredStructure, RoleSpec, StructurePlan, channel_name, plan_structure
 # --- Constantes de configuration ---
 CONFIG_DIR = "guild_configs"
 BACKUP_DIR = "guild_backups"
@@ -332,6 +335,7 @@ class ModLogChannelSelect(discord.ui.ChannelSelect):
         async with get_db_connection() as conn:
             await conn.execute("INSERT OR REPLACE INTO guild_settings (guild_id, mod_log_channel_id) VALUES (?, ?)", (interaction.guild.id, channel_id))
             await conn.commit()
+        guild_settings.invalidate(interaction.guild.id)
 
         message = f"✅ Salon des logs de modération défini sur : {self.values[0].mention}" if channel_id else "✅ Salon des logs de modération désactivé."
         await interaction.response.send_message(message, ephemeral=True)
@@ -352,6 +356,7 @@ class TicketCategorySelect(discord.ui.ChannelSelect):
         async with get_db_connection() as conn:
             await conn.execute("INSERT OR REPLACE INTO guild_settings (guild_id, ticket_category_id) VALUES (?, ?)", (interaction.guild.id, category_id))
             await conn.commit()
+        guild_settings.invalidate(interaction.guild.id)
 
         message = f"✅ Catégorie des tickets définie sur : **{self.values[0].name}**" if category_id else "✅ Système de tickets désactivé."
         await interaction.response.send_message(message, ephemeral=True)
@@ -427,6 +432,13 @@ class DiscordMakerCog(commands.Cog, name="DiscordMaker"):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
 
+    async def _notify_if_busy(self, interaction: discord.Interaction, guild_id: int):
+        """Prévient l'utilisateur quand son opération va attendre la fin d'une autre sur le même serveur."""
+        operation = self.bot.guild_locks.busy(guild_id)
+        if operation is not None:
+            running = f"`/discordmaker {operation}`" if operation else "Une autre opération"
+            await interaction.followup.send(f"⏳ {running} est déjà en cours sur ce serveur. La vôtre démarrera dès qu'elle sera terminée.", ephemeral=True)
+
     maker_group = app_commands.Group(name="discordmaker", description="Commandes pour construire et gérer votre serveur.")
 
     @maker_group.command(name="setup", description="Ouvre le panneau pour configurer la structure du serveur.")
@@ -442,51 +454,76 @@ class DiscordMakerCog(commands.Cog, name="DiscordMaker"):
         await interaction.response.send_message(embed=embed, view=ConfigView(interaction.guild_id), ephemeral=True)
 
     @maker_group.command(name="start", description="Construit le serveur avec la configuration actuelle.")
+    @app_commands.describe(simulation="Affiche les modifications prévues sans proposer de les appliquer.")
     @app_commands.checks.has_permissions(administrator=True)
-    async def start(self, interaction: discord.Interaction):
-        """Lance la construction (ou reconstruction) du serveur en se basant sur la configuration sauvegardée."""
+    async def start(self, interaction: discord.Interaction, simulation: bool = False):
+        """Compare la configuration sauvegardée au serveur, affiche le plan, puis n'applique que les différences."""
         await interaction.response.defer(ephemeral=True)
+        config = load_config(interaction.guild_id)
+        guild = interaction.guild
 
-        # On utilise le verrou pour s'assurer que cette opération critique ne soit pas interrompue ou lancée en double.
-        async with self.bot.critical_operation_lock:
-            config = load_config(interaction.guild_id)
-            guild = interaction.guild
+        if not config.get("roles") and not config.get("channel_categories"):
+            await interaction.followup.send("❌ Aucune configuration n'a été trouvée. Utilisez d'abord `/discordmaker setup`.", ephemeral=True)
+            return
 
-            if not config.get("roles") and not config.get("channel_categories"):
-                await interaction.followup.send("❌ Aucune configuration n'a été trouvée. Utilisez d'abord `/discordmaker setup`.", ephemeral=True)
-                return
+        plan = await self._plan_build(guild, config)
+        if not plan.total:
+            await interaction.followup.send("✅ Le serveur correspond déjà à la configuration : aucune modification n'est nécessaire.", ephemeral=True)
+            return
 
-            await interaction.followup.send("🚀 Lancement de la construction du serveur... Cela peut prendre un moment.", ephemeral=True)
+        embed = self._plan_embed(f"📋 Plan de construction de {guild.name}", plan)
+        full_delete = config.get("cleanup_policy") == "full_delete" and bool(plan.deletes)
+        if full_delete:
+            embed.add_field(name="⚠️ Suppression totale", value=f"**{len(plan.deletes)}** élément(s) absents de la configuration seront supprimés, y compris ceux créés à la main. "
+                                                              "Seul le propriétaire du serveur peut appliquer ce plan ; une sauvegarde lui est envoyée en DM avant.", inline=False)
+        if simulation:
+            await interaction.followup.send(embed=embed, ephemeral=True)
+            return
+        if full_delete and interaction.user.id != guild.owner_id:
+            await interaction.followup.send("❌ La politique de 'Suppression Totale' est sélectionnée. Seul le propriétaire du serveur peut appliquer ce plan.", embed=embed, ephemeral=True)
+            return
 
-            # Étape 1 : Nettoyage du serveur (si l'option a été choisie dans le setup).
-            cleanup_policy = config.get("cleanup_policy", "keep")
-            if cleanup_policy == "smart_delete":
-                await self._cleanup_guild(guild)
-            elif cleanup_policy == "full_delete":
-                # Vérification de sécurité pour la suppression totale
-                if interaction.user.id != guild.owner_id:
-                    await interaction.followup.send("❌ La politique de 'Suppression Totale' est sélectionnée. Seul le propriétaire du serveur peut lancer cette commande.", ephemeral=True)
+        class ApplyPlanView(discord.ui.View):
+            def __init__(self, cog_instance):
+                super().__init__(timeout=120)
+                self.cog_instance = cog_instance
+
+            @discord.ui.button(label="Appliquer le plan", style=discord.ButtonStyle.success)
+            async def confirm(self, view_interaction: discord.Interaction, button: discord.ui.Button):
+                # La limite de fréquence est comptée ici : un aperçu ou un plan annulé ne bloque pas le suivant.
+                retry_after = self.cog_instance.bot.rate_limiter.check("discordmaker start:apply", view_interaction.user.id, view_interaction.guild_id)
+                if retry_after is not None:
+                    await view_interaction.response.send_message(f"⏳ Une construction a déjà été appliquée récemment sur ce serveur. Réessayez dans {math.ceil(retry_after)} seconde(s).", ephemeral=True)
                     return
+                self.stop()
+                await view_interaction.response.edit_message(view=None)
+                await self.cog_instance._apply_build(view_interaction, config)
 
-                embed = discord.Embed(
-                    title="⚠️ CONFIRMATION DE SUPPRESSION TOTALE ⚠️",
-                    description=f"**Vous avez demandé une suppression totale du serveur `{guild.name}` via la commande `start`.**\n\n"
-                                "Pour confirmer, veuillez taper `OUI` en majuscules dans ce salon dans les 30 secondes.",
-                    color=discord.Color.dark_red()
-                )
-                await interaction.followup.send(embed=embed, ephemeral=True)
+            @discord.ui.button(label="Annuler", style=discord.ButtonStyle.secondary)
+            async def cancel(self, view_interaction: discord.Interaction, button: discord.ui.Button):
+                self.stop()
+                await view_interaction.response.edit_message(content="Opération annulée.", embed=None, view=None)
 
-                def check(m: discord.Message):
-                    return m.author == interaction.user and m.channel == interaction.channel and m.content == "OUI"
+        await interaction.followup.send(embed=embed, view=ApplyPlanView(self), ephemeral=True)
 
-                try:
-                    msg = await self.bot.wait_for('message', check=check, timeout=30.0)
-                    await msg.delete()
-                except asyncio.TimeoutError:
-                    await interaction.followup.send("❌ Délai de confirmation dépassé. Opération annulée.", ephemeral=True)
+    async def _apply_build(self, interaction: discord.Interaction, config: dict):
+        """Applique le plan de `/discordmaker start` après confirmation : seules les différences sont envoyées à Discord."""
+        guild = interaction.guild
+        # On utilise le verrou du serveur pour s'assurer que cette opération critique ne soit pas interrompue ou lancée en double.
+        # Les autres serveurs ne sont pas bloqués : chacun a son propre verrou.
+        await self._notify_if_busy(interaction, guild.id)
+        async with self.bot.guild_locks.acquire(guild.id, "start"):
+            # Le serveur a pu changer depuis l'aperçu (ou pendant l'attente du verrou) : le plan est recalculé.
+            plan = await self._plan_build(guild, config)
+            if not plan.total:
+                await interaction.followup.send("✅ Le serveur correspond déjà à la configuration : aucune modification n'est nécessaire.", ephemeral=True)
+                return
+
+            if config.get("cleanup_policy") == "full_delete" and plan.deletes:
+                # Vérification de sécurité pour la suppression totale
+                if interaction.user.id != guild.owner_id:
+                    await interaction.followup.send("❌ La politique de 'Suppression Totale' est sélectionnée. Seul le propriétaire du serveur peut appliquer ce plan.", ephemeral=True)
                     return
-                except discord.HTTPException:
-                    pass # Pas grave si on ne peut pas supprimer le message de confirmation
 
                 # Création et envoi de la sauvegarde avant la suppression
                 await interaction.followup.send("🔄 Création d'une sauvegarde du serveur avant suppression...", ephemeral=True)
@@ -499,147 +536,40 @@ class DiscordMakerCog(commands.Cog, name="DiscordMaker"):
                         await interaction.user.send(embed=embed_backup, file=discord.File(backup_file_path))
                     except discord.Forbidden:
                         await interaction.followup.send("⚠️ Impossible de vous envoyer la sauvegarde en DM. Vos messages privés sont probablement fermés.", ephemeral=True)
-                await self._full_cleanup_guild(guild) # Lancement de la suppression.
-
-            # --- Création des rôles ---
-            created_roles = {}
-            # Trier les rôles pour créer les plus hauts en premier
-            role_creation_order = sorted(
-                config.get("roles", []),
-                key=lambda r: list(ROLE_DATA.keys()).index(r) if r in ROLE_DATA else -1,
-            )
 
-            if config.get("roles"):
-                for role_name in role_creation_order:
-                    existing_role = discord.utils.get(guild.roles, name=role_name)
-                    if existing_role:
-                        created_roles[role_name] = existing_role
-                        continue
-
-                    role_data = ROLE_DATA.get(role_name, {})
-                    permissions = role_data.get("permissions", discord.Permissions.none())
-                    color = role_data.get("color", discord.Color.default())
-                    # Les rôles VIP et Muted ne sont pas affichés séparément
-                    hoist = role_name in ["Owner", "Admin", "Modérateur", "Animateur"]
-                    try:
-                        role = await guild.create_role(name=role_name, permissions=permissions, color=color, reason="DiscordMaker Setup", hoist=hoist) # noqa
-                        # On enregistre l'ID du rôle créé dans la base de données pour pouvoir le retrouver plus tard (pour le /reset).
-                        async with get_db_connection() as conn:
-                            await conn.execute("INSERT OR IGNORE INTO created_elements (guild_id, element_id, element_type) VALUES (?, ?, ?)", (guild.id, role.id, 'role'))
-                            await conn.commit()
-                        created_roles[role_name] = role
-                        await asyncio.sleep(0.5)
-                    except discord.Forbidden:
-                        await interaction.channel.send(f"⚠️ Je n'ai pas la permission de créer le rôle `{role_name}`.")
-                        continue
-
-            # --- Création des salons ---
-            if config.get("channel_categories"):
-                # Récupération des rôles clés pour les permissions
-                verified_role = created_roles.get("Vérifié") or discord.utils.get(guild.roles, name="Vérifié")
-                admin_role = created_roles.get("Admin") or discord.utils.get(guild.roles, name="Admin")
-                mod_role = created_roles.get("Modérateur") or discord.utils.get(guild.roles, name="Modérateur")
-
-                # Trier les catégories pour les créer dans le bon ordre
-                category_creation_order = sorted(
-                    config["channel_categories"],
-                    key=lambda c: list(CHANNEL_STRUCTURE.keys()).index(c) if c in CHANNEL_STRUCTURE else -1
+            # L'avancement est affiché en modifiant ce message, plutôt qu'en envoyant un message par élément.
+            progress_message = await interaction.followup.send("🚀 Application du plan de construction... Cela peut prendre un moment.", ephemeral=True, wait=True)
+            report = await StructuralExecutor().run(plan.phases, on_progress=self._progress_editor(progress_message.edit, "🏗️ Construction"))
+            # On enregistre les IDs des éléments créés dans la base de données pour pouvoir les retrouver plus tard (pour le /reset).
+            await self._track_created(guild.id, plan.tracked, plan.removed)
+
+            # Si on a créé le salon de logs, on le configure automatiquement dans les paramètres du serveur.
+            mod_log_channel = next((channel for (kind, name), channel in plan.created.items() if kind == "channel" and "logs-modération" in name), None)
+            if mod_log_channel:
+                async with get_db_connection() as conn:
+                    await conn.execute("INSERT OR REPLACE INTO guild_settings (guild_id, mod_log_channel_id) VALUES (?, ?)", (guild.id, mod_log_channel.id))
+                    await conn.commit()
+                guild_settings.invalidate(guild.id)
+
+            # --- Système de vérification --- (le message n'est posté que dans un salon qui vient d'être créé)
+            verification_channel = plan.created.get(("channel", channel_name("#✅・vérification", "text")))
+            if config.get("verification_system") == "enabled" and verification_channel:
+                embed = discord.Embed(
+                    title=f"Bienvenue sur {guild.name} !",
+                    description="Pour accéder au reste du serveur et discuter avec les autres membres, "
+                                "veuillez cliquer sur le bouton ci-dessous.\n\n"
+                                "Cela confirme que vous avez lu et accepté les règles.",
+                    color=discord.Color.green()
                 )
+                embed.set_footer(text="Si vous rencontrez un problème, contactez un membre du staff.")
+                await verification_channel.send(embed=embed, view=VerificationView())
 
-                for category_name in category_creation_order:
-                    structure = CHANNEL_STRUCTURE.get(category_name)
-                    if not structure:
-                        continue
-
-                    # Définition des permissions de base pour la catégorie (overwrites)
-                    cat_overwrites = {guild.me: discord.PermissionOverwrite(view_channel=True)}
-                    if structure.get("staff_only"):
-                        cat_overwrites[guild.default_role] = discord.PermissionOverwrite(view_channel=False)
-                        if admin_role: cat_overwrites[admin_role] = discord.PermissionOverwrite(view_channel=True)
-                        if mod_role: cat_overwrites[mod_role] = discord.PermissionOverwrite(view_channel=True)
-                    elif config.get("verification_system") == "enabled":
-                        cat_overwrites[guild.default_role] = discord.PermissionOverwrite(view_channel=False)
-                        if verified_role: cat_overwrites[verified_role] = discord.PermissionOverwrite(view_channel=True)
-                    
-                    # Cas spécial pour la catégorie ACCUEIL
-                    if "ACCUEIL" in category_name:
-                        cat_overwrites[guild.default_role] = discord.PermissionOverwrite(view_channel=True, send_messages=False, create_public_threads=False, create_private_threads=False)
-
-                    # Création de la catégorie
-                    try:
-                        category = await guild.create_category(category_name, overwrites=cat_overwrites, reason="DiscordMaker Setup")
-                        # On marque également la catégorie dans la DB.
-                        async with get_db_connection() as conn:
-                            await conn.execute("INSERT OR IGNORE INTO created_elements (guild_id, element_id, element_type) VALUES (?, ?, ?)", (guild.id, category.id, 'category'))
-                            await conn.commit()
-                        await asyncio.sleep(0.5)
-                    except discord.Forbidden:
-                        await interaction.channel.send(f"⚠️ Je n'ai pas la permission de créer la catégorie `{category_name}`.")
-                        continue
-
-                    # Salons textuels
-                    for channel_name in structure["text"]:
-                        chan_overwrites = cat_overwrites.copy() # Hérite des permissions de la catégorie
-                        # Permissions spécifiques au salon
-                        if "annonces" in channel_name and verified_role:
-                            chan_overwrites[verified_role] = discord.PermissionOverwrite(send_messages=False, create_public_threads=False, create_private_threads=False)
-                        if "vérification" in channel_name:
-                            # Visible par tous, mais personne ne peut écrire...
-                            chan_overwrites[guild.default_role] = discord.PermissionOverwrite(view_channel=True, send_messages=False, create_public_threads=False, create_private_threads=False)
-                            # ... SAUF le bot lui-même, pour qu'il puisse poster le message de bienvenue et de vérification.
-                            chan_overwrites[guild.me] = discord.PermissionOverwrite(view_channel=True, send_messages=True, embed_links=True)
-
-                        
-                        try:
-                            new_channel = await guild.create_text_channel(channel_name, category=category, overwrites=chan_overwrites, reason="DiscordMaker Setup")
-                            # Et on marque le salon.
-                            async with get_db_connection() as conn:
-                                await conn.execute("INSERT OR IGNORE INTO created_elements (guild_id, element_id, element_type) VALUES (?, ?, ?)", (guild.id, new_channel.id, 'channel'))
-                                await conn.commit()
-                            await asyncio.sleep(0.5)
-                            # Si on crée le salon de logs, on le configure automatiquement dans les paramètres du serveur.
-                            if "logs-modération" in channel_name:
-                                async with get_db_connection() as conn:
-                                    await conn.execute("INSERT OR REPLACE INTO guild_settings (guild_id, mod_log_channel_id) VALUES (?, ?)", (guild.id, new_channel.id))
-                                    await conn.commit()
-                        except discord.Forbidden:
-                            await interaction.channel.send(f"⚠️ Je n'ai pas la permission de créer le salon `{channel_name}`.")
-
-                    # Salons vocaux
-                    for channel_name in structure["voice"]:
-                        voice_overwrites = cat_overwrites.copy()
-                        try:
-                            if "AFK" in channel_name and verified_role:
-                                voice_overwrites[verified_role] = discord.PermissionOverwrite(speak=False)
-                            new_channel = await guild.create_voice_channel(channel_name, category=category, overwrites=voice_overwrites, reason="DiscordMaker Setup")
-                            # Et on marque le salon vocal.
-                            async with get_db_connection() as conn:
-                                await conn.execute("INSERT OR IGNORE INTO created_elements (guild_id, element_id, element_type) VALUES (?, ?, ?)", (guild.id, new_channel.id, 'channel'))
-                                await conn.commit()
-                            await asyncio.sleep(0.5)
-                        except discord.Forbidden:
-                            await interaction.channel.send(f"⚠️ Je n'ai pas la permission de créer le salon `{channel_name}`.")
-
-            # --- Système de vérification ---
-            if config.get("verification_system") == "enabled":
-                verification_channel = discord.utils.get(guild.text_channels, name="✅・vérification")
-                if verification_channel:
-                    embed = discord.Embed(
-                        title=f"Bienvenue sur {guild.name} !",
-                        description="Pour accéder au reste du serveur et discuter avec les autres membres, "
-                                    "veuillez cliquer sur le bouton ci-dessous.\n\n"
-                                    "Cela confirme que vous avez lu et accepté les règles.",
-                        color=discord.Color.green()
-                    )
-                    embed.set_footer(text="Si vous rencontrez un problème, contactez un membre du staff.")
-                    await verification_channel.send(embed=embed, view=VerificationView())
-            
             # On envoie la confirmation finale en DM pour être sûr que l'utilisateur la voie, même si le salon de commande a été supprimé.
             try:
-                await interaction.user.send(f"✅ La construction du serveur **{guild.name}** est terminée !")
+                await interaction.user.send(f"✅ La construction du serveur **{guild.name}** est terminée ({report.done - len(report.failed)} modification(s)) !{self._failure_summary(report)}")
             except discord.Forbidden:
                 # Si les DMs sont fermés, on tente de répondre au followup, mais ça peut échouer si le salon a été supprimé.
-                await interaction.followup.send("✅ Construction du serveur terminée ! (Impossible d'envoyer une confirmation en DM)", ephemeral=True)
+                await interaction.followup.send(f"✅ Construction du serveur terminée ! (Impossible d'envoyer une confirmation en DM){self._failure_summary(report)}", ephemeral=True)
 
     @maker_group.command(name="reset", description="Nettoie les rôles et salons créés par le bot.")
     @app_commands.checks.has_permissions(administrator=True)
@@ -656,9 +586,11 @@ class DiscordMakerCog(commands.Cog, name="DiscordMaker"):
                 self.clear_items()
                 button.disabled = True
                 await view_interaction.edit_original_response(content="🔄 Réinitialisation en cours...", view=None)
-                await self.cog_instance._cleanup_guild(view_interaction.guild)
+                await self.cog_instance._notify_if_busy(view_interaction, view_interaction.guild_id)
+                async with self.cog_instance.bot.guild_locks.acquire(view_interaction.guild_id, "reset"):
+                    report = await self.cog_instance._cleanup_guild(view_interaction.guild, on_progress=self.cog_instance._progress_editor(view_interaction.edit_original_response, "🔄 Réinitialisation"))
                 try:
-                    await view_interaction.user.send(f"✅ Le serveur **{view_interaction.guild.name}** a été réinitialisé avec succès.")
+                    await view_interaction.user.send(f"✅ Le serveur **{view_interaction.guild.name}** a été réinitialisé avec succès.{self.cog_instance._failure_summary(report)}")
                 except discord.Forbidden:
                     print(f"Impossible d'envoyer un DM à {view_interaction.user}. Leurs DMs sont probablement fermés.")
 
@@ -775,9 +707,11 @@ class DiscordMakerCog(commands.Cog, name="DiscordMaker"):
                     except discord.Forbidden:
                         await view_interaction.followup.send("⚠️ Impossible de vous envoyer la sauvegarde en DM. Vos messages privés sont probablement fermés.", ephemeral=True)
 
-                await view_interaction.followup.send("💥 Suppression totale en cours...", ephemeral=True)
-                await self.cog_instance._full_cleanup_guild(guild)
-                await view_interaction.user.send(f"✅ La suppression totale du serveur **{guild.name}** est terminée.")
+                progress_message = await view_interaction.followup.send("💥 Suppression totale en cours...", ephemeral=True, wait=True)
+                await self.cog_instance._notify_if_busy(view_interaction, guild.id)
+                async with self.bot_instance.guild_locks.acquire(guild.id, "full-reset"):
+                    report = await self.cog_instance._full_cleanup_guild(guild, on_progress=self.cog_instance._progress_editor(progress_message.edit, "💥 Suppression totale"))
+                await view_interaction.user.send(f"✅ La suppression totale du serveur **{guild.name}** est terminée.{self.cog_instance._failure_summary(report)}")
 
             @discord.ui.button(label="Annuler", style=discord.ButtonStyle.secondary)
             async def cancel(self, view_interaction: discord.Interaction, button: discord.ui.Button):
@@ -874,22 +808,24 @@ class DiscordMakerCog(commands.Cog, name="DiscordMaker"):
                 except discord.HTTPException:
                     pass
 
-                # On verrouille l'opération pour s'assurer qu'elle aille jusqu'au bout sans interruption.
-                async with self.bot_instance.critical_operation_lock:
+                # On verrouille le serveur pour s'assurer que l'opération aille jusqu'au bout sans interruption.
+                await self.cog_instance._notify_if_busy(view_interaction, guild.id)
+                async with self.bot_instance.guild_locks.acquire(guild.id, "restore"):
                     try:
                         if self.full_reset:
                             await view_interaction.followup.send("💥 Suppression totale du serveur en cours... Les prochaines étapes seront envoyées en message privé.", ephemeral=True)
                             await self.cog_instance._full_cleanup_guild(guild)
-                            await view_interaction.user.send(f"🔄 Restauration du serveur **{guild.name}** en cours... Cela peut prendre plusieurs minutes.")
+                            # Le salon de la commande n'existe plus : l'avancement est affiché dans ce message privé.
+                            progress_message = await view_interaction.user.send(f"🔄 Restauration du serveur **{guild.name}** en cours... Cela peut prendre plusieurs minutes.")
                         else:
-                            await view_interaction.followup.send("🔄 Restauration en cours... Cela peut prendre plusieurs minutes.", ephemeral=True)
+                            progress_message = await view_interaction.followup.send("🔄 Restauration en cours... Cela peut prendre plusieurs minutes.", ephemeral=True, wait=True)
 
-                        await self.cog_instance._restore_from_backup(guild, backup_data)
+                        report = await self.cog_instance._restore_from_backup(guild, backup_data, on_progress=self.cog_instance._progress_editor(progress_message.edit, "🔄 Restauration"))
 
                         if self.full_reset:
-                            await view_interaction.user.send(f"✅ La restauration du serveur **{guild.name}** est terminée.")
+                            await view_interaction.user.send(f"✅ La restauration du serveur **{guild.name}** est terminée.{self.cog_instance._failure_summary(report)}")
                         else:
-                            await view_interaction.followup.send("✅ Restauration terminée !", ephemeral=True)
+                            await view_interaction.followup.send(f"✅ Restauration terminée !{self.cog_instance._failure_summary(report)}", ephemeral=True)
                     except (discord.Forbidden, discord.HTTPException, RuntimeError) as e:
                         # On attrape aussi RuntimeError pour l'échec critique
                         await view_interaction.user.send(f"❌ Une erreur critique est survenue lors de la restauration du serveur **{guild.name}** : {e}")
@@ -975,98 +911,208 @@ class DiscordMakerCog(commands.Cog, name="DiscordMaker"):
                     except discord.Forbidden:
                         pass # L'utilisateur a aussi ses DMs fermés, on ne peut rien faire.
 
-# --- Vérification de permission personnalisée (déplacée au niveau du module) ---
-def is_admin_or_creator():
-    """Vérifie si l'utilisateur est un admin du serveur OU le créateur du bot."""
-    async def predicate(interaction: discord.Interaction) -> bool:
-        # L'ID du créateur est stocké sur l'instance du bot (client)
-        creator_id = getattr(interaction.client, 'creator_id', None)
-        
-        # L'utilisateur est le créateur du bot
-        if creator_id and str(interaction.user.id) == creator_id:
-            return True
-        # L'utilisateur a les permissions d'administrateur sur le serveur
-        return interaction.user.guild_permissions.administrator
+    # --- Opérations de structure (exécutées par phases, voir structure_executor.py) ---
+    @staticmethod
+    def _progress_editor(edit, title: str):
+        """Rapport de progression qui modifie un message existant (`edit` : sa méthode d'édition) au lieu d'en envoyer de nouveaux."""
+        async def on_progress(report):
+            failures = f", {len(report.failed)} échec(s)" if report.failed else ""
+            await edit(content=f"{title} : **{report.done}/{report.total}** opérations{failures} — {report.elapsed:.0f} s")
+        return on_progress
+
+    @staticmethod
+    def _failure_summary(report, limit: int = 10) -> str:
+        """Liste des opérations en échec, à ajouter au message de fin (vide si tout a réussi)."""
+        if not report.failed:
+            return ""
+        lines = [f"- {operation.describe()} : {error}" for operation, error in report.failed[:limit]]
+        if len(report.failed) > limit:
+            lines.append(f"- ... et {len(report.failed) - limit} autre(s)")
+        return f"\n⚠️ {len(report.failed)} opération(s) en échec :\n" + "\n".join(lines)
+
+    @staticmethod
+    def _plan_embed(title: str, plan: StructurePlan, limit: int = 30) -> discord.Embed:
+        """Résumé d'un plan : nombre d'opérations par type, puis le détail des premières."""
+        embed = discord.Embed(title=title, color=discord.Color.blurple())
+        if not plan.total:
+            embed.description = "✅ Aucune opération nécessaire."
+            return embed
+        lines = [operation.describe() for operation in plan.operations[:limit]]
+        if plan.total > limit:
+            lines.append(f"... et {plan.total - limit} autre(s)")
+        embed.description = "\n".join(lines)
+        summary = [f"{ACTION_LABELS.get(action, action)} {KIND_LABELS.get(kind, kind)} : **{count}**" for (action, kind), count in plan.counts().items()]
+        embed.add_field(name=f"{plan.total} opération(s) prévue(s)", value="\n".join(summary), inline=False)
+        embed.set_footer(text="Aperçu : rien n'a encore été modifié sur le serveur.")
+        return embed
+
+    @staticmethod
+    def _delete_operation(kind: str, target, reason: str) -> StructuralOperation:
+        async def delete():
+            try:
+                await target.delete(reason=reason)
+            except discord.NotFound:
+                pass # Déjà supprimé : le résultat est le même.
+        return StructuralOperation("delete", kind, target.name, delete)
+
+    @staticmethod
+    def _reorder_roles_operation(guild: discord.Guild, names: list[str], created: dict) -> StructuralOperation:
+        """
+        Les rôles créés en parallèle arrivent dans le désordre : un seul appel les replace tous, le premier de `names`
+        au-dessus des autres (comme s'ils avaient été créés un par un, du plus haut au plus bas).
+        """
+        async def reorder():
+            roles = [created[("role", name)] for name in names if ("role", name) in created]
+            if len(roles) > 1:
+                await guild.edit_role_positions({role: len(roles) - index for index, role in enumerate(roles)}, reason="DiscordMaker")
+        return StructuralOperation("reorder", "roles", ", ".join(names), reorder)
+
+    async def _track_created(self, guild_id: int, tracked: list[tuple[int, str]], removed: list[int] = ()):
+        """
+        Enregistre en une seule transaction les éléments créés par le bot (utilisés par /discordmaker reset),
+        et oublie ceux qu'il vient de supprimer (`removed`).
+        """
+        if not tracked and not removed:
+            return
+        async with get_db_connection() as conn:
+            await conn.executemany("INSERT OR IGNORE INTO created_elements (guild_id, element_id, element_type) VALUES (?, ?, ?)", [(guild_id, element_id, element_type) for element_id, element_type in tracked])
+            await conn.executemany("DELETE FROM created_elements WHERE guild_id = ? AND element_id = ?", [(guild_id, element_id) for element_id in removed])
+            await conn.commit()
 
-    async def _cleanup_guild(self, guild: discord.Guild):
-        """Supprime uniquement les rôles et salons créés par le bot, en se basant sur les IDs stockés dans la base de données."""
+    async def _plan_build(self, guild: discord.Guild, config: dict) -> StructurePlan:
+        """Plan de `/discordmaker start` : différence entre la configuration et le serveur (voir structure_planner.py)."""
+        async with get_db_connection() as conn:
+            async with conn.execute("SELECT element_id FROM created_elements WHERE guild_id = ?", (guild.id,)) as cursor:
+                managed_ids = {row[0] for row in await cursor.fetchall()}
+        prune = PRUNE_POLICIES.get(config.get("cleanup_policy", "keep"), "keep")
+        return plan_structure(guild, self._desired_structure(config), managed_ids, prune)
+
+    @staticmethod
+    def _desired_structure(config: dict) -> DesiredStructure:
+        """
+        Structure voulue d'après la configuration : rôles du plus haut au plus bas, catégories puis salons dans l'ordre
+        de CHANNEL_STRUCTURE. Les permissions désignent les rôles par leur nom (résolus au moment du plan ou de l'exécution).
+        """
+        # --- Rôles --- (triés du plus haut au plus bas)
+        role_names = sorted(config.get("roles", []), key=lambda r: list(ROLE_DATA.keys()).index(r) if r in ROLE_DATA else -1)
+        roles = []
+        for role_name in role_names:
+            role_data = ROLE_DATA.get(role_name, {})
+            # Les rôles VIP et Muted ne sont pas affichés séparément
+            hoist = role_name in ["Owner", "Admin", "Modérateur", "Animateur"]
+            roles.append(RoleSpec(role_name, role_data.get("permissions", discord.Permissions.none()), role_data.get("color", discord.Color.default()), hoist))
+
+        # --- Catégories et salons ---
+        def category_overwrites(category_name: str, structure: dict) -> dict:
+            # Définition des permissions de base pour la catégorie (overwrites)
+            cat_overwrites = {BOT: discord.PermissionOverwrite(view_channel=True)}
+            if structure.get("staff_only"):
+                cat_overwrites[EVERYONE] = discord.PermissionOverwrite(view_channel=False)
+                for staff_role in ("Admin", "Modérateur"):
+                    cat_overwrites[staff_role] = discord.PermissionOverwrite(view_channel=True)
+            elif config.get("verification_system") == "enabled":
+                cat_overwrites[EVERYONE] = discord.PermissionOverwrite(view_channel=False)
+                cat_overwrites["Vérifié"] = discord.PermissionOverwrite(view_channel=True)
+            # Cas spécial pour la catégorie ACCUEIL
+            if "ACCUEIL" in category_name:
+                cat_overwrites[EVERYONE] = discord.PermissionOverwrite(view_channel=True, send_messages=False, create_public_threads=False, create_private_threads=False)
+            return cat_overwrites
+
+        def channel_overwrites(category_name: str, structure: dict, channel_name: str) -> dict:
+            chan_overwrites = category_overwrites(category_name, structure) # Hérite des permissions de la catégorie
+            # Permissions spécifiques au salon
+            if "annonces" in channel_name:
+                chan_overwrites["Vérifié"] = discord.PermissionOverwrite(send_messages=False, create_public_threads=False, create_private_threads=False)
+            if "vérification" in channel_name:
+                # Visible par tous, mais personne ne peut écrire...
+                chan_overwrites[EVERYONE] = discord.PermissionOverwrite(view_channel=True, send_messages=False, create_public_threads=False, create_private_threads=False)
+                # ... SAUF le bot lui-même, pour qu'il puisse poster le message de bienvenue et de vérification.
+                chan_overwrites[BOT] = discord.PermissionOverwrite(view_channel=True, send_messages=True, embed_links=True)
+            if "AFK" in channel_name:
+                chan_overwrites["Vérifié"] = discord.PermissionOverwrite(speak=False)
+            return chan_overwrites
+
+        # Trier les catégories pour les créer dans le bon ordre
+        category_names = sorted(
+            [name for name in config.get("channel_categories", []) if name in CHANNEL_STRUCTURE],
+            key=lambda c: list(CHANNEL_STRUCTURE.keys()).index(c)
+        )
+        categories = []
+        for category_name in category_names:
+            structure = CHANNEL_STRUCTURE[category_name]
+            channels = [ChannelSpec(name, kind, channel_overwrites(category_name, structure, name)) for kind in ("text", "voice") for name in structure[kind]]
+            categories.append(CategorySpec(category_name, category_overwrites(category_name, structure), channels))
+        return DesiredStructure(roles, categories)
+
+    async def _cleanup_operations(self, guild: discord.Guild) -> list[list[StructuralOperation]]:
+        """Suppressions de `/discordmaker reset` : les rôles et salons créés par le bot, d'après les IDs de la base de données."""
         async with get_db_connection() as conn:
             conn.row_factory = aiosqlite.Row
             async with conn.execute("SELECT element_id, element_type FROM created_elements WHERE guild_id = ?", (guild.id,)) as cursor:
                 elements_to_delete = await cursor.fetchall()
 
-            # Trier pour supprimer les salons avant les catégories
-            channels = [e['element_id'] for e in elements_to_delete if e['element_type'] == 'channel']
-            categories = [e['element_id'] for e in elements_to_delete if e['element_type'] == 'category']
-            roles = [e['element_id'] for e in elements_to_delete if e['element_type'] == 'role']
-
-            # Suppression des salons
-            for channel_id in channels:
-                channel = guild.get_channel(channel_id)
-                if channel:
-                    try:
-                        await channel.delete(reason="DiscordMaker Reset")
-                        await asyncio.sleep(0.5)
-                    except discord.Forbidden:
-                        print(f"Permissions manquantes pour supprimer le salon {channel.name} ({channel.id})")
-                    except discord.HTTPException as e:
-                        print(f"Erreur HTTP lors de la suppression du salon {channel_id}: {e}")
-
-            # Suppression des catégories
-            for category_id in categories:
-                category = guild.get_channel(category_id)
-                if category:
-                    try:
-                        await category.delete(reason="DiscordMaker Reset")
-                        await asyncio.sleep(0.5)
-                    except discord.Forbidden:
-                        print(f"Permissions manquantes pour supprimer la catégorie {category.name} ({category.id})")
-                    except discord.HTTPException as e:
-                        print(f"Erreur HTTP lors de la suppression de la catégorie {category_id}: {e}")
-
-            # Suppression des rôles
-            for role_id in roles:
-                role = guild.get_role(role_id)
+        operations = []
+        for element in elements_to_delete:
+            if element['element_type'] == 'role':
+                role = guild.get_role(element['element_id'])
                 if role and not role.is_integration() and not role.is_premium_subscriber() and role < guild.me.top_role:
-                    try:
-                        await role.delete(reason="DiscordMaker Reset")
-                        await asyncio.sleep(0.5)
-                    except discord.Forbidden:
-                        print(f"Permissions manquantes pour supprimer le rôle {role.name} ({role.id})")
-                    except discord.HTTPException as e:
-                        print(f"Erreur HTTP lors de la suppression du rôle {role_id}: {e}")
-
-            # Une fois tout supprimé, on vide la table des éléments créés pour ce serveur.
-            await conn.execute("DELETE FROM created_elements WHERE guild_id = ?", (guild.id,))
-            await conn.commit()
-
-    async def _full_cleanup_guild(self, guild: discord.Guild):
-        """Supprime TOUS les rôles et salons que le bot a la permission de supprimer."""
-        # Suppression des salons
-        for channel in guild.channels:
-            try:
-                await channel.delete(reason="DiscordMaker Full Reset")
-                await asyncio.sleep(0.5)
-            except (discord.Forbidden, discord.HTTPException):
-                print(f"Impossible de supprimer le salon {channel.name} ({channel.id})")
+                    operations.append(self._delete_operation("role", role, "DiscordMaker Reset"))
+            else:
+                channel = guild.get_channel(element['element_id'])
+                if channel:
+                    operations.append(self._delete_operation(element['element_type'], channel, "DiscordMaker Reset"))
+        # Chaque suppression est indépendante (un salon a même son propre bucket de rate-limit) : une seule phase.
+        return [operations]
 
+    def _full_cleanup_operations(self, guild: discord.Guild) -> list[list[StructuralOperation]]:
+        """Suppressions de `full-reset` : tous les salons, et tous les rôles que le bot peut supprimer."""
+        operations = [self._delete_operation("channel", channel, "DiscordMaker Full Reset") for channel in guild.channels]
         # Suppression des rôles (sauf @everyone, rôles d'intégration/boost et rôles au-dessus du bot)
         for role in guild.roles:
             if role.is_default() or role.is_integration() or role.is_premium_subscriber() or role >= guild.me.top_role:
                 continue
-            try:
-                await role.delete(reason="DiscordMaker Full Reset")
-                await asyncio.sleep(0.5)
-            except (discord.Forbidden, discord.HTTPException):
-                print(f"Impossible de supprimer le rôle {role.name} ({role.id})")
+            operations.append(self._delete_operation("role", role, "DiscordMaker Full Reset"))
+        return [operations]
 
-    async def _restore_from_backup(self, guild: discord.Guild, backup_data: dict):
-        """Contient la logique de restauration d'un serveur à partir des données d'un fichier de sauvegarde."""
-        # --- Phase 1: Création des rôles ---
-        created_roles = {}
-        for role_data in reversed(backup_data.get("roles", [])): # Créer du plus haut au plus bas
-            try:
-                role = await guild.create_role(
+    async def _cleanup_guild(self, guild: discord.Guild, on_progress=None):
+        """Supprime uniquement les rôles et salons créés par le bot, en se basant sur les IDs stockés dans la base de données."""
+        report = await StructuralExecutor().run(await self._cleanup_operations(guild), on_progress=on_progress)
+        for operation, error in report.failed:
+            print(f"[DiscordMaker] {operation.describe()} sur {guild.id} : {error}")
+        # Une fois tout supprimé, on vide la table des éléments créés pour ce serveur.
+        async with get_db_connection() as conn:
+            await conn.execute("DELETE FROM created_elements WHERE guild_id = ?", (guild.id,))
+            await conn.commit()
+        return report
+
+    async def _full_cleanup_guild(self, guild: discord.Guild, on_progress=None):
+        """Supprime TOUS les rôles et salons que le bot a la permission de supprimer."""
+        report = await StructuralExecutor().run(self._full_cleanup_operations(guild), on_progress=on_progress)
+        for operation, error in report.failed:
+            print(f"[DiscordMaker] {operation.describe()} sur {guild.id} : {error}")
+        return report
+
+    def _restore_operations(self, guild: discord.Guild, backup_data: dict, created: dict) -> list[list[StructuralOperation]]:
+        """
+        Phases de la restauration : rôles, ordre des rôles, catégories, puis salons. Les permissions sont données
+        directement à la création des salons (les rôles existent déjà), sans second appel par salon.
+        """
+        def overwrites_for(channel_data: dict) -> dict:
+            overwrites = {}
+            for target_name, perms_data in channel_data.get("overwrites", {}).items():
+                # La restauration des permissions pour un membre spécifique n'est pas gérée pour rester simple et robuste.
+                if perms_data["type"] != "role":
+                    continue
+                target = created.get(("role", target_name)) or discord.utils.get(guild.roles, name=target_name)
+                if target:
+                    overwrites[target] = discord.PermissionOverwrite.from_pair(discord.Permissions(perms_data["allow"]), discord.Permissions(perms_data["deny"]))
+            return overwrites
+
+        role_operations = []
+        role_names = [role_data["name"] for role_data in backup_data.get("roles", [])] # Du plus haut au plus bas
+        for role_data in backup_data.get("roles", []):
+            async def create_role(role_data=role_data):
+                created[("role", role_data["name"])] = await guild.create_role(
                     name=role_data["name"],
                     permissions=discord.Permissions(role_data["permissions"]),
                     color=discord.Color.from_rgb(*role_data["color"]),
@@ -1074,76 +1120,35 @@ def is_admin_or_creator():
                     mentionable=role_data.get("mentionable", False),
                     reason="DiscordMaker Restore"
                 )
-                created_roles[role_data["name"]] = role
-                await asyncio.sleep(0.5)
-            except (discord.Forbidden, discord.HTTPException) as e:
-                print(f"Erreur lors de la création du rôle {role_data['name']}: {e}")
-
-        # --- Phase 2: Création des catégories et salons ---
-        created_channels = {}
-        # D'abord les catégories
-        for channel_data in backup_data.get("channels", []):
-            if channel_data["type"] == "category":
-                try:
-                    category = await guild.create_category(
-                        name=channel_data["name"],
-                        position=channel_data.get("position"),
-                        reason="DiscordMaker Restore"
-                    )
-                    created_channels[channel_data["id"]] = category
-                    await asyncio.sleep(0.5)
-                except (discord.Forbidden, discord.HTTPException) as e:
-                    print(f"Erreur lors de la création de la catégorie {channel_data['name']}: {e}")
-
-        # Ensuite les autres salons
-        for channel_data in backup_data.get("channels", []):
-            if channel_data["type"] != "category":
-                chan_type = channel_data["type"]
-                category = created_channels.get(channel_data["category_id"])
-
-                create_func = None
-                if chan_type == "text":
-                    create_func = guild.create_text_channel
-                elif chan_type == "voice":
-                    create_func = guild.create_voice_channel
-
-                if create_func:
-                    try:
-                        channel = await create_func(
-                            name=channel_data["name"],
-                            category=category,
-                            position=channel_data.get("position"),
-                            reason="DiscordMaker Restore"
-                        )
-                        created_channels[channel_data["id"]] = channel
-                        await asyncio.sleep(0.5)
-                    except (discord.Forbidden, discord.HTTPException) as e:
-                        print(f"Erreur lors de la création du salon {channel_data['name']}: {e}")
+            role_operations.append(StructuralOperation("create", "role", role_data["name"], create_role))
 
-        # --- Phase 3: Application des permissions (overwrites) ---
+        category_operations, channel_operations = [], []
         for channel_data in backup_data.get("channels", []):
-            channel = created_channels.get(channel_data["id"])
-            if not channel:
-                continue
-
-            overwrites = {}
-            for target_name, perms_data in channel_data.get("overwrites", {}).items():
-                target = None
-                if perms_data["type"] == "role":
-                    target = created_roles.get(target_name) or discord.utils.get(guild.roles, name=target_name)
-                # La restauration des permissions pour un membre spécifique n'est pas gérée pour rester simple et robuste.
-
-                if target:
-                    overwrites[target] = discord.PermissionOverwrite.from_pair(
-                        discord.Permissions(perms_data["allow"]),
-                        discord.Permissions(perms_data["deny"])
+            chan_type = channel_data["type"]
+            if chan_type == "category":
+                async def create_category(channel_data=channel_data):
+                    created[("backup", channel_data["id"])] = await guild.create_category(
+                        name=channel_data["name"], position=channel_data.get("position"),
+                        overwrites=overwrites_for(channel_data), reason="DiscordMaker Restore"
+                    )
+                category_operations.append(StructuralOperation("create", "category", channel_data["name"], create_category))
+            elif chan_type in ("text", "voice"):
+                async def create_channel(channel_data=channel_data, create_func=guild.create_text_channel if chan_type == "text" else guild.create_voice_channel):
+                    created[("backup", channel_data["id"])] = await create_func(
+                        name=channel_data["name"], category=created.get(("backup", channel_data["category_id"])),
+                        position=channel_data.get("position"), overwrites=overwrites_for(channel_data), reason="DiscordMaker Restore"
                     )
+                channel_operations.append(StructuralOperation("create", chan_type, channel_data["name"], create_channel))
 
-            try:
-                await channel.edit(overwrites=overwrites, reason="DiscordMaker Restore Permissions")
-                await asyncio.sleep(0.5)
-            except (discord.Forbidden, discord.HTTPException) as e:
-                print(f"Erreur lors de l'application des permissions pour {channel.name}: {e}")
+        reorder = [self._reorder_roles_operation(guild, role_names, created)] if len(role_names) > 1 else []
+        return [role_operations, reorder, category_operations, channel_operations]
+
+    async def _restore_from_backup(self, guild: discord.Guild, backup_data: dict, on_progress=None):
+        """Contient la logique de restauration d'un serveur à partir des données d'un fichier de sauvegarde."""
+        report = await StructuralExecutor().run(self._restore_operations(guild, backup_data, {}), on_progress=on_progress)
+        for operation, error in report.failed:
+            print(f"[DiscordMaker] {operation.describe()} sur {guild.id} : {error}")
+        return report
 
 # --- Setup du cog ---
 async def setup(bot: commands.Bot, **kwargs):
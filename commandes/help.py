@@ -61,14 +61,18 @@ class HelpSelect(discord.ui.Select):
         elif category == "Modération":
             embed.title = "🛡️ Aide - Modération"
             embed.description = "Outils pour maintenir un environnement sain sur le serveur."
-            embed.add_field(name="`/clear [nombre]`", value="Supprime un nombre de messages dans un salon.", inline=False)
+            embed.add_field(name="`/clear [nombre] [filtres]`", value="Supprime jusqu'à 5000 messages, filtrables par membre, texte, pièces jointes, bots ou position (`avant`/`apres` un message).", inline=False)
             embed.add_field(name="`/warn [membre] [raison]`", value="Avertit un membre et enregistre l'avertissement.", inline=False)
-            embed.add_field(name="`/warnings [membre ou ID]`", value="Affiche l'historique des avertissements d'un membre.", inline=False)
+            embed.add_field(name="`/warnings [membre ou ID]`", value="Affiche le résumé et l'historique (paginé) des avertissements d'un membre.", inline=False)
             embed.add_field(name="`/delwarn [id]`", value="Supprime un avertissement spécifique via son ID.", inline=False)
+            embed.add_field(name="`/escalade ajouter|liste|supprimer`", value="Sanctions automatiques à partir d'un nombre d'avertissements (ex: timeout après 3 avertissements en 30 jours).", inline=False)
             embed.add_field(name="`/mute [membre] [durée] [raison]`", value="Applique un timeout à un membre (ex: `10m`, `2h`, `7d`).", inline=False)
             embed.add_field(name="`/unmute [membre]`", value="Retire le timeout d'un membre.", inline=False)
-            embed.add_field(name="`/lock [salon] [raison]`", value="Verrouille un salon pour que les membres ne puissent plus y envoyer de messages.", inline=False)
+            embed.add_field(name="`/tempban [membre] [durée] [raison]`", value="Bannit un membre pour une durée définie (débannissement automatique).", inline=False)
+            embed.add_field(name="`/temprole [membre] [rôle] [durée]`", value="Donne un rôle à un membre pour une durée définie.", inline=False)
+            embed.add_field(name="`/lock [salon] [raison] [durée]`", value="Verrouille un salon pour que les membres ne puissent plus y envoyer de messages (durée optionnelle).", inline=False)
             embed.add_field(name="`/unlock [salon]`", value="Déverrouille un salon.", inline=False)
+            embed.add_field(name="`/masse timeout|kick|ban|warn`", value="Sanctionne plusieurs membres d'un coup (liste, rôle ou arrivées récentes), après confirmation.", inline=False)
             embed.add_field(name="`/getlog`", value="**(Admin)** Récupère la base de données des logs en message privé.", inline=False)
 
         elif category == "Tickets":
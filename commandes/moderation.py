@@ -1,10 +1,28 @@
 import discord
 from discord.ext import commands
 from discord import app_commands
+import asyncio
 import datetime
 import re
+import time
 import aiosqlite
-from db_manager import get_db_connection
+from db_manager import get_db_connection, guild_settings
+from sanction_scheduler import SanctionScheduler
+from bulk_actions import BulkExecutor
+from warning_stats import (
+    WARNINGS_PAGE_SIZE, add_escalation_rule, delete_escalation_rule, describe_escalation_rule,
+    fetch_warnings_page, find_escalation, get_escalation_rules, get_warning_summary
+)
+
+# Durée maximale d'un timeout Discord. Au-delà, le mute est prolongé automatiquement par le planificateur.
+MAX_TIMEOUT = datetime.timedelta(days=28)
+# Le timeout est renouvelé un peu avant son expiration pour éviter toute coupure.
+TIMEOUT_RENEWAL_DELAY = datetime.timedelta(days=27)
+# Nombre maximal de membres visés par une sanction de masse.
+MASS_ACTION_LIMIT = 1000
+# Limites de /clear : nombre de messages supprimés et nombre de messages analysés au maximum.
+CLEAR_MAX_MESSAGES = 5000
+CLEAR_SCAN_LIMIT = 20000
 
 def parse_duration(duration_string: str) -> datetime.timedelta | None:
     """
@@ -22,25 +40,166 @@ def parse_duration(duration_string: str) -> datetime.timedelta | None:
         
     return datetime.timedelta(**time_params)
 
+def parse_message_reference(reference: str) -> int | None:
+    """Extrait l'ID d'un message depuis un ID brut ou un lien de message Discord."""
+    match = re.search(r'(\d{15,20})/?$', reference.strip())
+    return int(match.group(1)) if match else None
+
+class MassActionConfirmView(discord.ui.View):
+    """Demande au modérateur de confirmer une sanction de masse avant de l'exécuter."""
+    def __init__(self, author_id: int, on_confirm):
+        super().__init__(timeout=60)
+        self.author_id = author_id
+        self.on_confirm = on_confirm
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        if interaction.user.id != self.author_id:
+            await interaction.response.send_message("❌ Seul l'auteur de la commande peut confirmer.", ephemeral=True)
+            return False
+        return True
+
+    @discord.ui.button(label="Confirmer", style=discord.ButtonStyle.danger)
+    async def confirm(self, interaction: discord.Interaction, button: discord.ui.Button): # noqa
+        self.stop()
+        await interaction.response.edit_message(content="⏳ Opération en cours...", embed=None, view=None)
+        await self.on_confirm(interaction)
+
+    @discord.ui.button(label="Annuler", style=discord.ButtonStyle.secondary)
+    async def cancel(self, interaction: discord.Interaction, button: discord.ui.Button): # noqa
+        self.stop()
+        await interaction.response.edit_message(content="Opération annulée.", embed=None, view=None)
+
+class WarningsPageView(discord.ui.View):
+    """Historique des avertissements page par page : seule la page affichée est lue en base."""
+    def __init__(self, guild: discord.Guild, target_user: discord.abc.User, summary):
+        super().__init__(timeout=300)
+        self.guild = guild
+        self.target_user = target_user
+        self.summary = summary
+        self.page = 0
+        self.page_count = max(1, -(-summary.total // WARNINGS_PAGE_SIZE))
+
+    async def build_embed(self) -> discord.Embed:
+        records = await fetch_warnings_page(self.guild.id, self.target_user.id, self.page)
+        embed = discord.Embed(
+            title=f"Historique des avertissements de {self.target_user.display_name}",
+            description=f"**{self.summary.total}** au total • **{self.summary.last_30_days}** sur 30 jours • **{self.summary.last_7_days}** sur 7 jours",
+            color=discord.Color.blue()
+        )
+        for warn_id, mod_id, reason, ts in records:
+            moderator = self.guild.get_member(mod_id) or f"ID: {mod_id}"
+            timestamp = discord.utils.format_dt(datetime.datetime.fromisoformat(ts), style='f')
+            embed.add_field(
+                name=f"Avertissement ID: {warn_id} (Le {timestamp.split('à')[0]})",
+                value=f"**Raison**: {reason}\n**Modérateur**: {moderator}",
+                inline=False
+            )
+        embed.set_footer(text=f"Page {self.page + 1}/{self.page_count}")
+        self.previous_page.disabled = self.page == 0
+        self.next_page.disabled = self.page >= self.page_count - 1
+        return embed
+
+    @discord.ui.button(label="◀ Précédent", style=discord.ButtonStyle.secondary)
+    async def previous_page(self, interaction: discord.Interaction, button: discord.ui.Button): # noqa
+        self.page = max(0, self.page - 1)
+        await interaction.response.edit_message(embed=await self.build_embed(), view=self)
+
+    @discord.ui.button(label="Suivant ▶", style=discord.ButtonStyle.secondary)
+    async def next_page(self, interaction: discord.Interaction, button: discord.ui.Button): # noqa
+        self.page = min(self.page_count - 1, self.page + 1)
+        await interaction.response.edit_message(embed=await self.build_embed(), view=self)
+
 class ModerationCog(commands.Cog, name="Modération"):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
+        # Planificateur des sanctions temporaires (persisté en base, une seule tâche de fond).
+        self.scheduler = SanctionScheduler({
+            "unban": self._scheduled_unban,
+            "remove_role": self._scheduled_remove_role,
+            "unlock": self._scheduled_unlock,
+            "extend_timeout": self._scheduled_extend_timeout,
+        })
+
+    async def cog_load(self):
+        """Démarre le planificateur une fois le bot connecté (les serveurs doivent être en cache)."""
+        asyncio.create_task(self._start_scheduler())
+
+    async def _start_scheduler(self):
+        await self.bot.wait_until_ready()
+        self.scheduler.start()
+
+    def cog_unload(self):
+        self.scheduler.stop()
+
+    # --- Exécution des sanctions planifiées ---
+    async def _scheduled_unban(self, action: dict):
+        """Lève un bannissement temporaire arrivé à échéance."""
+        guild = self.bot.get_guild(action["guild_id"])
+        if not guild:
+            return
+        try:
+            await guild.unban(discord.Object(id=action["target_id"]), reason="Fin du bannissement temporaire")
+        except discord.NotFound:
+            return # Déjà débanni manuellement
+
+        log_embed = discord.Embed(title="⏰ Bannissement Temporaire Terminé", color=discord.Color.green(), timestamp=datetime.datetime.now())
+        log_embed.add_field(name="Utilisateur", value=f"<@{action['target_id']}> (`{action['target_id']}`)", inline=False)
+        self.bot.mod_log.enqueue(guild.id, log_embed)
+
+    async def _scheduled_remove_role(self, action: dict):
+        """Retire un rôle temporaire arrivé à échéance."""
+        guild = self.bot.get_guild(action["guild_id"])
+        if not guild:
+            return
+        member = guild.get_member(action["target_id"])
+        role = guild.get_role(action["payload"].get("role_id"))
+        if not member or not role or role not in member.roles:
+            return
+
+        await member.remove_roles(role, reason="Fin du rôle temporaire")
+        log_embed = discord.Embed(title="⏰ Rôle Temporaire Retiré", color=discord.Color.green(), timestamp=datetime.datetime.now())
+        log_embed.add_field(name="Membre", value=f"{member.mention} (`{member.id}`)", inline=False)
+        log_embed.add_field(name="Rôle", value=role.mention, inline=False)
+        self.bot.mod_log.enqueue(guild.id, log_embed)
+
+    async def _scheduled_unlock(self, action: dict):
+        """Déverrouille un salon verrouillé temporairement."""
+        guild = self.bot.get_guild(action["guild_id"])
+        channel = guild.get_channel(action["target_id"]) if guild else None
+        if not channel:
+            return
+        overwrite = channel.overwrites_for(guild.default_role)
+        if overwrite.send_messages is not False:
+            return # Déjà déverrouillé manuellement
+
+        overwrite.send_messages = None
+        await channel.set_permissions(guild.default_role, overwrite=overwrite, reason="Fin du verrouillage temporaire")
+        await channel.send("🔓 **SALON DÉVERROUILLÉ** (fin du verrouillage temporaire).")
+        log_embed = discord.Embed(title="⏰ Verrouillage Temporaire Terminé", color=discord.Color.from_rgb(124, 252, 0), timestamp=datetime.datetime.now())
+        log_embed.add_field(name="Salon", value=channel.mention, inline=False)
+        self.bot.mod_log.enqueue(guild.id, log_embed)
+
+    async def _scheduled_extend_timeout(self, action: dict):
+        """Renouvelle le timeout d'un mute plus long que la limite de 28 jours de Discord."""
+        guild = self.bot.get_guild(action["guild_id"])
+        member = guild.get_member(action["target_id"]) if guild else None
+        if not member:
+            return
+        remaining = action["payload"]["until"] - time.time()
+        if remaining <= 0:
+            return
+
+        await member.timeout(min(datetime.timedelta(seconds=remaining), MAX_TIMEOUT), reason="Prolongation automatique du mute")
+        if remaining > MAX_TIMEOUT.total_seconds():
+            await self.scheduler.schedule(guild.id, "extend_timeout", member.id, time.time() + TIMEOUT_RENEWAL_DELAY.total_seconds(), action["payload"])
 
     @commands.Cog.listener()
     async def on_member_join(self, member: discord.Member):
         """Gère l'arrivée d'un nouveau membre, en lui envoyant un message de bienvenue et/ou en lui attribuant un rôle automatique."""
         guild = member.guild
 
-        # Récupérer les paramètres du serveur depuis la base de données
-        settings = None
-        async with get_db_connection() as conn:
-            conn.row_factory = aiosqlite.Row
-            async with conn.execute("""
-                SELECT welcome_enabled, welcome_channel_id, welcome_message, autorole_id 
-                FROM guild_settings 
-                WHERE guild_id = ?
-            """, (guild.id,)) as cursor:
-                settings = await cursor.fetchone()
+        # Récupérer les paramètres du serveur (depuis le cache mémoire, la DB n'est lue qu'une fois par serveur)
+        settings = await guild_settings.get(guild.id)
 
         if not settings:
             return # Pas de paramètres pour ce serveur
@@ -50,15 +209,8 @@ class ModerationCog(commands.Cog, name="Modération"):
             welcome_channel = guild.get_channel(settings['welcome_channel_id'])
             if welcome_channel and isinstance(welcome_channel, discord.TextChannel):
                 
-                # On remplace les placeholders comme {user.mention} par les vraies valeurs.
-                message = settings['welcome_message'] or "Bienvenue {user.mention} sur {server.name} !"
-                formatted_message = message.replace('{user.mention}', member.mention).replace('{user.name}', member.name).replace('{server.name}', guild.name).format(
-                    user=member,
-                    server=guild,
-                    user_mention=member.mention,
-                    user_name=member.name,
-                    server_name=guild.name
-                )
+                # Le modèle a été validé et compilé à l'enregistrement : le rendu est une simple substitution.
+                formatted_message = settings['welcome_template'].render(member)
 
                 try:
                     await welcome_channel.send(formatted_message)
@@ -75,40 +227,118 @@ class ModerationCog(commands.Cog, name="Modération"):
                     print(f"Permissions manquantes pour donner l'autorole {role_to_give.name} ({guild.name})")
 
     async def _log_action(self, interaction: discord.Interaction, embed: discord.Embed):
-        """Fonction interne pour envoyer un embed de log dans le salon de modération configuré pour le serveur."""
-        async with get_db_connection() as conn:
-            conn.row_factory = aiosqlite.Row
-            async with conn.execute("SELECT mod_log_channel_id FROM guild_settings WHERE guild_id = ?", (interaction.guild.id,)) as cursor:
-                record = await cursor.fetchone()
-        
-        if record and record['mod_log_channel_id']:
-            log_channel = self.bot.get_channel(record['mod_log_channel_id'])
-            if log_channel:
-                try:
-                    await log_channel.send(embed=embed)
-                except discord.Forbidden:
-                    print(f"Permissions manquantes pour envoyer des logs dans le salon {log_channel.id} du serveur {interaction.guild.id}")
-                except discord.HTTPException as e:
-                    print(f"Erreur HTTP lors de l'envoi des logs: {e}")
+        """Met un embed de log en file d'attente pour le salon de modération du serveur (envoi groupé, non bloquant)."""
+        self.bot.mod_log.enqueue(interaction.guild.id, embed)
 
-    @app_commands.command(name="clear", description="Supprime un nombre de messages dans le salon.")
-    @app_commands.describe(nombre="Le nombre de messages à supprimer (entre 1 et 100).")
+    @app_commands.command(name="clear", description="Supprime des messages dans le salon, avec des filtres optionnels.")
+    @app_commands.describe(
+        nombre=f"Le nombre de messages à supprimer (entre 1 et {CLEAR_MAX_MESSAGES}).",
+        membre="Ne supprimer que les messages de ce membre.",
+        contient="Ne supprimer que les messages contenant ce texte.",
+        pieces_jointes="Ne supprimer que les messages avec des pièces jointes.",
+        bots="Ne supprimer que les messages de bots.",
+        avant="ID ou lien d'un message : ne supprimer que les messages plus anciens.",
+        apres="ID ou lien d'un message : ne supprimer que les messages plus récents."
+    )
     @app_commands.checks.has_permissions(manage_messages=True)
-    async def clear(self, interaction: discord.Interaction, nombre: app_commands.Range[int, 1, 100]):
-        """Supprime un certain nombre de messages dans le salon actuel."""
+    async def clear(self, interaction: discord.Interaction, nombre: app_commands.Range[int, 1, CLEAR_MAX_MESSAGES],
+                    membre: discord.User = None, contient: str = None, pieces_jointes: bool = False, bots: bool = False,
+                    avant: str = None, apres: str = None):
+        """
+        Supprime des messages dans le salon actuel. Les messages de moins de 14 jours sont supprimés par paquets
+        de 100 (suppression groupée), les plus anciens un par un (Discord n'autorise pas la suppression groupée).
+        """
         await interaction.response.defer(ephemeral=True)
-        deleted = await interaction.channel.purge(limit=nombre)
-        await interaction.followup.send(f"✅ {len(deleted)} messages ont été supprimés.", ephemeral=True)
+        channel = interaction.channel
 
-        # Journalisation de l'action
+        before_id = parse_message_reference(avant) if avant else None
+        after_id = parse_message_reference(apres) if apres else None
+        if (avant and before_id is None) or (apres and after_id is None):
+            await interaction.followup.send("❌ Référence de message invalide. Utilisez l'ID ou le lien d'un message.", ephemeral=True)
+            return
+
+        def matches(message: discord.Message) -> bool:
+            if membre and message.author.id != membre.id:
+                return False
+            if bots and not message.author.bot:
+                return False
+            if pieces_jointes and not message.attachments:
+                return False
+            if contient and contient.lower() not in message.content.lower():
+                return False
+            return True
+
+        bulk_deleted, single_candidates, scanned = 0, [], 0
+        chunk = []
+        last_report = time.monotonic()
+        # Marge d'une minute pour ne pas envoyer à la suppression groupée un message qui dépasserait 14 jours entre-temps.
+        bulk_limit = discord.utils.utcnow() - datetime.timedelta(days=14) + datetime.timedelta(minutes=1)
+
+        async def report_progress(force: bool = False):
+            nonlocal last_report
+            if force or time.monotonic() - last_report >= 2.0:
+                last_report = time.monotonic()
+                await interaction.edit_original_response(content=f"⏳ Suppression en cours : {bulk_deleted} message(s) supprimé(s), {scanned} analysé(s)...")
+
+        history = channel.history(
+            limit=CLEAR_SCAN_LIMIT,
+            before=discord.Object(id=before_id) if before_id else None,
+            after=discord.Object(id=after_id) if after_id else None,
+            oldest_first=False
+        )
+        async for message in history:
+            scanned += 1
+            if not matches(message):
+                continue
+            if message.created_at > bulk_limit:
+                chunk.append(message)
+                if len(chunk) == 100:
+                    await channel.delete_messages(chunk, reason=f"Clear par {interaction.user}")
+                    bulk_deleted += len(chunk)
+                    chunk = []
+                    await report_progress()
+            else:
+                single_candidates.append(message)
+            if bulk_deleted + len(chunk) + len(single_candidates) >= nombre:
+                break
+
+        if chunk:
+            # `delete_messages` n'accepte pas un seul message : dans ce cas, discord.py utilise la suppression simple.
+            await channel.delete_messages(chunk, reason=f"Clear par {interaction.user}")
+            bulk_deleted += len(chunk)
+
+        single_deleted = 0
+        if single_candidates:
+            await report_progress(force=True)
+            # Chemin lent : une requête par message, une seule à la fois pour respecter le bucket du salon.
+            async def single_progress(result):
+                await interaction.edit_original_response(content=f"⏳ Suppression des anciens messages : {result.done}/{result.total}...")
+            result = await BulkExecutor(concurrency=1).run(single_candidates, lambda message: message.delete(), on_progress=single_progress)
+            single_deleted = len(result.succeeded)
+
+        total_deleted = bulk_deleted + single_deleted
+        await interaction.edit_original_response(content=f"✅ {total_deleted} messages ont été supprimés.")
+
+        # Journalisation de l'action (un seul enregistrement pour toute l'opération)
         log_embed = discord.Embed(
             title="🗑️ Messages Supprimés (Clear)",
             color=discord.Color.light_grey(),
             timestamp=datetime.datetime.now()
         )
-        log_embed.add_field(name="Salon", value=interaction.channel.mention, inline=True)
-        log_embed.add_field(name="Nombre", value=f"{len(deleted)} messages", inline=True)
+        log_embed.add_field(name="Salon", value=channel.mention, inline=True)
+        log_embed.add_field(name="Nombre", value=f"{total_deleted} messages", inline=True)
         log_embed.add_field(name="Exécuté par", value=interaction.user.mention, inline=True)
+        if single_candidates:
+            log_embed.add_field(name="Détail", value=f"{bulk_deleted} par suppression groupée, {single_deleted} de plus de 14 jours", inline=False)
+        filters = []
+        if membre: filters.append(f"Membre : {membre.mention}")
+        if contient: filters.append(f"Contient : `{contient[:100]}`")
+        if pieces_jointes: filters.append("Avec pièces jointes")
+        if bots: filters.append("Bots uniquement")
+        if before_id: filters.append(f"Avant le message `{before_id}`")
+        if after_id: filters.append(f"Après le message `{after_id}`")
+        if filters:
+            log_embed.add_field(name="Filtres", value="\n".join(filters), inline=False)
         await self._log_action(interaction, log_embed)
 
     @app_commands.command(name="warn", description="Avertit un membre.")
@@ -136,6 +366,8 @@ class ModerationCog(commands.Cog, name="Modération"):
             await interaction.response.send_message("❌ Je ne peux pas avertir ce membre car son rôle est supérieur ou égal au mien. Veuillez remonter mon rôle dans la hiérarchie.", ephemeral=True)
             return
 
+        # Le DM, l'escalade (sanction et planification) et le bilan peuvent dépasser les 3 s accordées pour répondre.
+        await interaction.response.defer()
         async with get_db_connection() as conn:
             await conn.execute("INSERT INTO warnings (guild_id, user_id, moderator_id, reason) VALUES (?, ?, ?, ?)",
                                (interaction.guild.id, membre.id, interaction.user.id, raison))
@@ -152,9 +384,17 @@ class ModerationCog(commands.Cog, name="Modération"):
         try:
             await membre.send(embed=embed)
         except discord.Forbidden:
-            await interaction.response.send_message(f"✅ {membre.mention} a été averti. (Impossible de lui envoyer un DM)", ephemeral=False)
+            dm_status = "Impossible de lui envoyer un DM"
         else:
-            await interaction.response.send_message(f"✅ {membre.mention} a été averti. (DM envoyé)", ephemeral=False)
+            dm_status = "DM envoyé"
+
+        # Le DM est envoyé avant l'escalade : après une expulsion ou un bannissement, il ne pourrait plus l'être.
+        escalation = await self._apply_escalation(membre, interaction.user)
+        summary = await get_warning_summary(interaction.guild.id, membre.id)
+        message = f"✅ {membre.mention} a été averti. ({dm_status})\n📊 {summary.last_30_days} avertissement(s) sur 30 jours, {summary.total} au total."
+        if escalation:
+            message += f"\n📈 Escalade automatique : {escalation}"
+        await interaction.followup.send(message, ephemeral=False)
 
         # Journalisation de l'action
         log_embed = discord.Embed(
@@ -165,8 +405,45 @@ class ModerationCog(commands.Cog, name="Modération"):
         log_embed.add_field(name="Membre", value=f"{membre.mention} (`{membre.id}`)", inline=False)
         log_embed.add_field(name="Modérateur", value=interaction.user.mention, inline=False)
         log_embed.add_field(name="Raison", value=raison, inline=False)
+        log_embed.add_field(name="Avertissements", value=f"{summary.last_30_days} sur 30 jours, {summary.total} au total", inline=False)
         await self._log_action(interaction, log_embed)
 
+    async def _apply_escalation(self, membre: discord.Member, moderator: discord.abc.User, rules: list | None = None) -> str | None:
+        """
+        Applique la sanction de la règle d'escalade atteinte par le membre, s'il y en a une.
+        Renvoie la description de la règle appliquée, ou None.
+        """
+        guild = membre.guild
+        rule = await find_escalation(guild.id, membre.id, rules=rules)
+        if rule is None:
+            return None
+
+        description = describe_escalation_rule(rule)
+        reason = f"Escalade automatique : {description}"
+        try:
+            if rule["action"] == "timeout":
+                delta = min(datetime.timedelta(seconds=rule["duration_seconds"]), MAX_TIMEOUT)
+                # On ne raccourcit jamais un mute déjà en cours.
+                if membre.timed_out_until and membre.timed_out_until >= discord.utils.utcnow() + delta:
+                    return None
+                await membre.timeout(delta, reason=reason)
+            elif rule["action"] == "kick":
+                await membre.kick(reason=reason)
+            else:
+                await membre.ban(reason=reason, delete_message_seconds=0)
+                if rule["duration_seconds"]:
+                    await self.scheduler.schedule(guild.id, "unban", membre.id, time.time() + rule["duration_seconds"])
+        except discord.HTTPException as e:
+            print(f"[Escalade] Impossible de sanctionner {membre} ({guild.name}): {e}")
+            return None
+
+        log_embed = discord.Embed(title="📈 Escalade Automatique", color=discord.Color.dark_orange(), timestamp=datetime.datetime.now())
+        log_embed.add_field(name="Membre", value=f"{membre.mention} (`{membre.id}`)", inline=False)
+        log_embed.add_field(name="Règle", value=description, inline=False)
+        log_embed.add_field(name="Dernier avertissement par", value=moderator.mention, inline=False)
+        self.bot.mod_log.enqueue(guild.id, log_embed)
+        return description
+
     @app_commands.command(name="warnings", description="Affiche l'historique des avertissements d'un membre.")
     @app_commands.describe(utilisateur="Le membre (ou son ID) dont vous voulez voir les avertissements.")
     @app_commands.checks.has_permissions(moderate_members=True)
@@ -184,31 +461,18 @@ class ModerationCog(commands.Cog, name="Modération"):
                 await interaction.response.send_message(f"❌ Utilisateur `{utilisateur}` introuvable.", ephemeral=True)
                 return
 
-        records = []
-        async with get_db_connection() as conn:
-            conn.row_factory = aiosqlite.Row
-            async with conn.execute("SELECT id, moderator_id, reason, timestamp FROM warnings WHERE guild_id = ? AND user_id = ? ORDER BY timestamp DESC", (interaction.guild.id, target_user.id)) as cursor:
-                records = await cursor.fetchall()
-
-        if not records:
+        # Le résumé vient des compteurs journaliers ; l'historique n'est lu qu'une page à la fois.
+        summary = await get_warning_summary(interaction.guild.id, target_user.id)
+        if not summary.total:
             await interaction.response.send_message(f"✅ `{target_user.display_name}` n'a aucun avertissement sur ce serveur.", ephemeral=True)
             return
 
-        embed = discord.Embed(
-            title=f"Historique des avertissements de {target_user.display_name}",
-            color=discord.Color.blue()
-        )
-
-        for warn_id, mod_id, reason, ts in records[:25]: # On limite à 25 pour ne pas surcharger l'embed.
-            moderator = interaction.guild.get_member(mod_id) or f"ID: {mod_id}"
-            timestamp = discord.utils.format_dt(datetime.datetime.fromisoformat(ts), style='f')
-            embed.add_field(
-                name=f"Avertissement ID: {warn_id} (Le {timestamp.split('à')[0]})",
-                value=f"**Raison**: {reason}\n**Modérateur**: {moderator}",
-                inline=False
-            )
-        
-        await interaction.response.send_message(embed=embed, ephemeral=True)
+        view = WarningsPageView(interaction.guild, target_user, summary)
+        embed = await view.build_embed()
+        if view.page_count > 1:
+            await interaction.response.send_message(embed=embed, view=view, ephemeral=True)
+        else:
+            await interaction.response.send_message(embed=embed, ephemeral=True)
 
     @app_commands.command(name="delwarn", description="Supprime un avertissement par son ID.")
     @app_commands.describe(warn_id="L'ID de l'avertissement à supprimer (visible avec /warnings).")
@@ -256,7 +520,7 @@ class ModerationCog(commands.Cog, name="Modération"):
     @app_commands.command(name="mute", description="Empêche un membre de parler pour une durée définie.")
     @app_commands.describe(
         membre="Le membre à rendre muet.",
-        duree="La durée du mute (ex: 10s, 5m, 2h, 1d). Max 28 jours.",
+        duree="La durée du mute (ex: 10s, 5m, 2h, 1d). Au-delà de 28 jours, le mute est prolongé automatiquement.",
         raison="La raison du mute."
     )
     @app_commands.checks.has_permissions(moderate_members=True)
@@ -281,12 +545,12 @@ class ModerationCog(commands.Cog, name="Modération"):
             await interaction.response.send_message("❌ Format de durée invalide. Utilisez `s`, `m`, `h`, ou `d` (ex: `10m`, `2h30m`).", ephemeral=True)
             return
         
-        if delta > datetime.timedelta(days=28):
-            await interaction.response.send_message("❌ La durée du mute ne peut pas dépasser 28 jours.", ephemeral=True)
-            return
-
         try:
-            await membre.timeout(delta, reason=raison)
+            await membre.timeout(min(delta, MAX_TIMEOUT), reason=raison)
+            # Discord limite les timeouts à 28 jours : le planificateur renouvellera le timeout jusqu'à la fin du mute.
+            await self.scheduler.cancel(interaction.guild.id, "extend_timeout", membre.id)
+            if delta > MAX_TIMEOUT:
+                await self.scheduler.schedule(interaction.guild.id, "extend_timeout", membre.id, time.time() + TIMEOUT_RENEWAL_DELAY.total_seconds(), {"until": time.time() + delta.total_seconds()})
             
             embed = discord.Embed(
                 title="Membre rendu muet",
@@ -322,6 +586,7 @@ class ModerationCog(commands.Cog, name="Modération"):
         """Retire le 'timeout' d'un membre, lui permettant de parler à nouveau."""
         if membre.is_timed_out():
             await membre.timeout(None, reason=f"Unmute par {interaction.user.name}")
+            await self.scheduler.cancel(interaction.guild.id, "extend_timeout", membre.id)
             await interaction.response.send_message(f"✅ {membre.mention} n'est plus muet.", ephemeral=False)
 
             # Journalisation de l'action
@@ -337,11 +602,17 @@ class ModerationCog(commands.Cog, name="Modération"):
             await interaction.response.send_message(f"❌ Ce membre n'est pas muet.", ephemeral=True)
 
     @app_commands.command(name="lock", description="Verrouille un salon, empêchant les membres de parler.")
-    @app_commands.describe(salon="Le salon à verrouiller (par défaut, le salon actuel).", raison="Raison du verrouillage.")
+    @app_commands.describe(salon="Le salon à verrouiller (par défaut, le salon actuel).", raison="Raison du verrouillage.", duree="Durée du verrouillage (ex: 30m, 2h). Par défaut, jusqu'à /unlock.")
     @app_commands.checks.has_permissions(manage_channels=True)
-    async def lock(self, interaction: discord.Interaction, salon: discord.TextChannel = None, raison: str = "Aucune raison spécifiée"):
+    async def lock(self, interaction: discord.Interaction, salon: discord.TextChannel = None, raison: str = "Aucune raison spécifiée", duree: str = None):
         """Verrouille un salon, empêchant les membres (rôle @everyone) d'y envoyer des messages."""
         target_channel = salon or interaction.channel
+        delta = None
+        if duree:
+            delta = parse_duration(duree)
+            if delta is None:
+                await interaction.response.send_message("❌ Format de durée invalide. Utilisez `s`, `m`, `h`, ou `d` (ex: `10m`, `2h30m`).", ephemeral=True)
+                return
         overwrite = target_channel.overwrites_for(interaction.guild.default_role)
 
         if overwrite.send_messages is False:
@@ -351,7 +622,11 @@ class ModerationCog(commands.Cog, name="Modération"):
         overwrite.send_messages = False
         try:
             await target_channel.set_permissions(interaction.guild.default_role, overwrite=overwrite, reason=f"Lock par {interaction.user}: {raison}")
-            await interaction.response.send_message(f"🔒 Le salon {target_channel.mention} a été verrouillé.", ephemeral=True)
+            if delta:
+                await self.scheduler.schedule(interaction.guild.id, "unlock", target_channel.id, time.time() + delta.total_seconds())
+                await interaction.response.send_message(f"🔒 Le salon {target_channel.mention} a été verrouillé pour **{duree}**.", ephemeral=True)
+            else:
+                await interaction.response.send_message(f"🔒 Le salon {target_channel.mention} a été verrouillé.", ephemeral=True)
             await target_channel.send(f"🔒 **SALON VERROUILLÉ** par {interaction.user.mention}.")
 
             # Journalisation de l'action
@@ -359,6 +634,8 @@ class ModerationCog(commands.Cog, name="Modération"):
             log_embed.add_field(name="Salon", value=target_channel.mention, inline=False)
             log_embed.add_field(name="Modérateur", value=interaction.user.mention, inline=False)
             log_embed.add_field(name="Raison", value=raison, inline=False)
+            if delta:
+                log_embed.add_field(name="Durée", value=duree, inline=False)
             await self._log_action(interaction, log_embed)
         except discord.Forbidden:
             await interaction.response.send_message("❌ Je n'ai pas les permissions pour modifier ce salon.", ephemeral=True)
@@ -378,6 +655,7 @@ class ModerationCog(commands.Cog, name="Modération"):
         overwrite.send_messages = None  # `None` rétablit la permission par défaut (héritée de la catégorie).
         try:
             await target_channel.set_permissions(interaction.guild.default_role, overwrite=overwrite, reason=f"Unlock par {interaction.user}: {raison}")
+            await self.scheduler.cancel(interaction.guild.id, "unlock", target_channel.id)
             await interaction.response.send_message(f"🔓 Le salon {target_channel.mention} a été déverrouillé.", ephemeral=True)
             await target_channel.send(f"🔓 **SALON DÉVERROUILLÉ**.")
 
@@ -389,6 +667,355 @@ class ModerationCog(commands.Cog, name="Modération"):
         except discord.Forbidden:
             await interaction.response.send_message("❌ Je n'ai pas les permissions pour modifier ce salon.", ephemeral=True)
 
+    @app_commands.command(name="tempban", description="Bannit un membre pour une durée définie.")
+    @app_commands.describe(
+        membre="Le membre à bannir.",
+        duree="La durée du bannissement (ex: 12h, 7d, 30d).",
+        raison="La raison du bannissement."
+    )
+    @app_commands.checks.has_permissions(ban_members=True)
+    async def tempban(self, interaction: discord.Interaction, membre: discord.Member, duree: str, raison: str):
+        """Bannit un membre, puis lève automatiquement le bannissement à la fin de la durée (même après un redémarrage)."""
+        if membre.id == interaction.user.id:
+            await interaction.response.send_message("❌ Vous ne pouvez pas vous bannir vous-même.", ephemeral=True)
+            return
+
+        # --- Vérification de la hiérarchie des rôles ---
+        is_owner = interaction.user.id == interaction.guild.owner_id
+        if not is_owner and membre.top_role >= interaction.user.top_role:
+            await interaction.response.send_message("❌ Vous ne pouvez pas bannir un membre ayant un rôle égal ou supérieur au vôtre.", ephemeral=True)
+            return
+        if membre.top_role >= interaction.guild.me.top_role:
+            await interaction.response.send_message("❌ Je ne peux pas bannir ce membre car son rôle est supérieur ou égal au mien. Veuillez remonter mon rôle dans la hiérarchie.", ephemeral=True)
+            return
+
+        delta = parse_duration(duree)
+        if delta is None:
+            await interaction.response.send_message("❌ Format de durée invalide. Utilisez `s`, `m`, `h`, ou `d` (ex: `10m`, `2h30m`).", ephemeral=True)
+            return
+
+        # On prévient le membre avant le bannissement (après, il ne partage plus de serveur avec le bot).
+        embed = discord.Embed(
+            title="Bannissement temporaire",
+            description=f"Vous avez été banni du serveur **{interaction.guild.name}**.",
+            color=discord.Color.dark_red()
+        )
+        embed.add_field(name="Raison", value=raison)
+        embed.add_field(name="Durée", value=duree)
+        try:
+            await membre.send(embed=embed)
+        except discord.HTTPException:
+            pass
+
+        try:
+            await membre.ban(reason=f"Tempban ({duree}) par {interaction.user}: {raison}", delete_message_seconds=0)
+        except discord.Forbidden:
+            await interaction.response.send_message("❌ Je n'ai pas les permissions pour bannir ce membre.", ephemeral=True)
+            return
+
+        await self.scheduler.schedule(interaction.guild.id, "unban", membre.id, time.time() + delta.total_seconds())
+        await interaction.response.send_message(f"✅ {membre.mention} a été banni pour **{duree}**.", ephemeral=False)
+
+        # Journalisation de l'action
+        log_embed = discord.Embed(title="⛔ Bannissement Temporaire", color=discord.Color.dark_red(), timestamp=datetime.datetime.now())
+        log_embed.add_field(name="Membre", value=f"{membre.mention} (`{membre.id}`)", inline=False)
+        log_embed.add_field(name="Modérateur", value=interaction.user.mention, inline=False)
+        log_embed.add_field(name="Durée", value=duree, inline=True)
+        log_embed.add_field(name="Raison", value=raison, inline=True)
+        await self._log_action(interaction, log_embed)
+
+    @app_commands.command(name="temprole", description="Donne un rôle à un membre pour une durée définie.")
+    @app_commands.describe(membre="Le membre qui recevra le rôle.", role="Le rôle à donner.", duree="La durée (ex: 1h, 7d).")
+    @app_commands.checks.has_permissions(manage_roles=True)
+    async def temprole(self, interaction: discord.Interaction, membre: discord.Member, role: discord.Role, duree: str):
+        """Donne un rôle à un membre, puis le retire automatiquement à la fin de la durée."""
+        is_owner = interaction.user.id == interaction.guild.owner_id
+        if not is_owner and role >= interaction.user.top_role:
+            await interaction.response.send_message("❌ Vous ne pouvez pas donner un rôle égal ou supérieur au vôtre.", ephemeral=True)
+            return
+        if role >= interaction.guild.me.top_role or role.managed:
+            await interaction.response.send_message("❌ Je ne peux pas gérer ce rôle. Veuillez remonter mon rôle dans la hiérarchie.", ephemeral=True)
+            return
+
+        delta = parse_duration(duree)
+        if delta is None:
+            await interaction.response.send_message("❌ Format de durée invalide. Utilisez `s`, `m`, `h`, ou `d` (ex: `10m`, `2h30m`).", ephemeral=True)
+            return
+
+        await membre.add_roles(role, reason=f"Rôle temporaire ({duree}) par {interaction.user}")
+        await self.scheduler.schedule(interaction.guild.id, "remove_role", membre.id, time.time() + delta.total_seconds(), {"role_id": role.id})
+        await interaction.response.send_message(f"✅ {membre.mention} a reçu le rôle {role.mention} pour **{duree}**.", ephemeral=True)
+
+        log_embed = discord.Embed(title="⏳ Rôle Temporaire Attribué", color=discord.Color.blurple(), timestamp=datetime.datetime.now())
+        log_embed.add_field(name="Membre", value=f"{membre.mention} (`{membre.id}`)", inline=False)
+        log_embed.add_field(name="Rôle", value=role.mention, inline=True)
+        log_embed.add_field(name="Durée", value=duree, inline=True)
+        log_embed.add_field(name="Modérateur", value=interaction.user.mention, inline=False)
+        await self._log_action(interaction, log_embed)
+
+    # --- Sanctions de masse (raids) ---
+    masse_group = app_commands.Group(name="masse", description="Sanctions de masse, pour gérer les raids.")
+
+    def _sanction_block_reason(self, moderator: discord.Member, membre: discord.Member) -> str | None:
+        """Indique pourquoi un membre ne peut pas être sanctionné par ce modérateur (ou None s'il le peut)."""
+        guild = membre.guild
+        if membre.id in (moderator.id, guild.me.id, guild.owner_id):
+            return "membre protégé"
+        if moderator.id != guild.owner_id and membre.top_role >= moderator.top_role:
+            return "rôle supérieur ou égal à celui du modérateur"
+        if membre.top_role >= guild.me.top_role:
+            return "rôle supérieur ou égal à celui du bot"
+        return None
+
+    def _resolve_mass_targets(self, interaction: discord.Interaction, membres: str | None, role: discord.Role | None, arrives_depuis: str | None) -> tuple[list, int]:
+        """
+        Construit la liste des membres visés à partir d'une liste de mentions/IDs, d'un rôle
+        et/ou d'un filtre "arrivés depuis". Renvoie (membres sanctionnables, nombre de membres ignorés).
+        Lève ValueError avec un message lisible si les paramètres sont invalides.
+        """
+        guild = interaction.guild
+        if not (membres or role or arrives_depuis):
+            raise ValueError("Indiquez au moins une liste de membres, un rôle ou une durée d'arrivée.")
+
+        candidates = {}
+        if membres:
+            for member_id in re.findall(r'\d{15,20}', membres):
+                member = guild.get_member(int(member_id))
+                if member:
+                    candidates[member.id] = member
+        if role:
+            for member in role.members:
+                candidates[member.id] = member
+        if arrives_depuis:
+            delta = parse_duration(arrives_depuis)
+            if delta is None:
+                raise ValueError("Format de durée invalide. Utilisez `s`, `m`, `h`, ou `d` (ex: `10m`, `2h30m`).")
+            threshold = discord.utils.utcnow() - delta
+            # Utilisé seul, le filtre porte sur tout le serveur ; sinon il restreint la liste/le rôle.
+            pool = candidates.values() if (membres or role) else guild.members
+            candidates = {m.id: m for m in pool if m.joined_at and m.joined_at >= threshold}
+
+        targets, skipped = [], 0
+        for member in candidates.values():
+            if self._sanction_block_reason(interaction.user, member):
+                skipped += 1
+            else:
+                targets.append(member)
+        if len(targets) > MASS_ACTION_LIMIT:
+            raise ValueError(f"Trop de membres visés ({len(targets)}). La limite est de {MASS_ACTION_LIMIT} par opération.")
+        return targets, skipped
+
+    async def _prepare_mass_action(self, interaction: discord.Interaction, label: str, membres, role, arrives_depuis, run):
+        """Résout les cibles puis demande une confirmation. `run(interaction, targets, skipped)` est appelé après confirmation."""
+        try:
+            targets, skipped = self._resolve_mass_targets(interaction, membres, role, arrives_depuis)
+        except ValueError as e:
+            await interaction.response.send_message(f"❌ {e}", ephemeral=True)
+            return
+        if not targets:
+            await interaction.response.send_message(f"❌ Aucun membre sanctionnable ne correspond à ces critères ({skipped} ignoré(s)).", ephemeral=True)
+            return
+
+        preview = ", ".join(m.mention for m in targets[:20])
+        if len(targets) > 20:
+            preview += f" et {len(targets) - 20} autre(s)"
+        embed = discord.Embed(
+            title=f"🚨 {label} : confirmation requise",
+            description=f"**{len(targets)}** membre(s) visé(s), {skipped} ignoré(s) (hiérarchie des rôles ou membres protégés).\n\n{preview}",
+            color=discord.Color.red()
+        )
+        view = MassActionConfirmView(interaction.user.id, lambda confirm_interaction: run(confirm_interaction, targets, skipped))
+        await interaction.response.send_message(embed=embed, view=view, ephemeral=True)
+
+    async def _execute_mass_action(self, interaction: discord.Interaction, label: str, targets: list, skipped: int, action, raison: str, extra_fields: dict | None = None):
+        """Exécute une sanction de masse via l'exécuteur borné, met à jour la progression puis journalise un seul résumé."""
+        async def report_progress(result):
+            await interaction.edit_original_response(content=f"⏳ {label} : {result.done}/{result.total} membre(s) traité(s)...")
+
+        result = await BulkExecutor().run(targets, action, on_progress=report_progress)
+        await self._finish_mass_action(interaction, label, result.succeeded, result.failed, skipped, raison, extra_fields)
+
+    async def _finish_mass_action(self, interaction: discord.Interaction, label: str, succeeded: list, failed: list, skipped: int, raison: str, extra_fields: dict | None = None):
+        """Affiche le bilan d'une sanction de masse et envoie une seule entrée dans les logs de modération."""
+        summary = f"✅ {label} terminé : **{len(succeeded)}** réussi(s), **{len(failed)}** échec(s), **{skipped}** ignoré(s)."
+        if failed:
+            summary += "\n" + "\n".join(f"- {member.mention} : {error}" for member, error in failed[:5])
+        await interaction.edit_original_response(content=summary)
+
+        log_embed = discord.Embed(title=f"🚨 {label}", color=discord.Color.dark_red(), timestamp=datetime.datetime.now())
+        log_embed.add_field(name="Modérateur", value=interaction.user.mention, inline=True)
+        log_embed.add_field(name="Bilan", value=f"{len(succeeded)} réussi(s) / {len(failed)} échec(s) / {skipped} ignoré(s)", inline=True)
+        for name, value in (extra_fields or {}).items():
+            log_embed.add_field(name=name, value=value, inline=True)
+        log_embed.add_field(name="Raison", value=raison, inline=False)
+        if succeeded:
+            members_list = ", ".join(f"{m.mention}" for m in succeeded)
+            log_embed.add_field(name="Membres", value=members_list if len(members_list) <= 1024 else members_list[:1000].rsplit(",", 1)[0] + ", ...", inline=False)
+        await self._log_action(interaction, log_embed)
+
+    @masse_group.command(name="timeout", description="Applique un timeout à plusieurs membres.")
+    @app_commands.describe(
+        duree="La durée du timeout (ex: 10m, 2h, 1d). Max 28 jours.",
+        raison="La raison de la sanction.",
+        membres="Mentions ou IDs des membres, séparés par des espaces.",
+        role="Sanctionner tous les membres ayant ce rôle.",
+        arrives_depuis="Sanctionner les membres arrivés depuis cette durée (ex: 15m)."
+    )
+    @app_commands.checks.has_permissions(moderate_members=True)
+    async def mass_timeout(self, interaction: discord.Interaction, duree: str, raison: str, membres: str = None, role: discord.Role = None, arrives_depuis: str = None):
+        """Timeout de masse, exécuté avec une concurrence limitée."""
+        delta = parse_duration(duree)
+        if delta is None or delta > MAX_TIMEOUT:
+            await interaction.response.send_message("❌ Durée invalide. Utilisez `s`, `m`, `h`, ou `d` (ex: `10m`), 28 jours maximum.", ephemeral=True)
+            return
+
+        async def run(confirm_interaction, targets, skipped):
+            await self._execute_mass_action(
+                confirm_interaction, "Timeout de masse", targets, skipped,
+                lambda member: member.timeout(delta, reason=f"Timeout de masse par {interaction.user}: {raison}"),
+                raison, {"Durée": duree}
+            )
+        await self._prepare_mass_action(interaction, "Timeout de masse", membres, role, arrives_depuis, run)
+
+    @masse_group.command(name="kick", description="Expulse plusieurs membres.")
+    @app_commands.describe(
+        raison="La raison de l'expulsion.",
+        membres="Mentions ou IDs des membres, séparés par des espaces.",
+        role="Expulser tous les membres ayant ce rôle.",
+        arrives_depuis="Expulser les membres arrivés depuis cette durée (ex: 15m)."
+    )
+    @app_commands.checks.has_permissions(kick_members=True)
+    async def mass_kick(self, interaction: discord.Interaction, raison: str, membres: str = None, role: discord.Role = None, arrives_depuis: str = None):
+        """Expulsion de masse, exécutée avec une concurrence limitée."""
+        async def run(confirm_interaction, targets, skipped):
+            await self._execute_mass_action(
+                confirm_interaction, "Expulsion de masse", targets, skipped,
+                lambda member: member.kick(reason=f"Expulsion de masse par {interaction.user}: {raison}"),
+                raison
+            )
+        await self._prepare_mass_action(interaction, "Expulsion de masse", membres, role, arrives_depuis, run)
+
+    @masse_group.command(name="ban", description="Bannit plusieurs membres.")
+    @app_commands.describe(
+        raison="La raison du bannissement.",
+        membres="Mentions ou IDs des membres, séparés par des espaces.",
+        role="Bannir tous les membres ayant ce rôle.",
+        arrives_depuis="Bannir les membres arrivés depuis cette durée (ex: 15m).",
+        supprimer_messages="Supprimer les messages des X derniers jours (0 à 7)."
+    )
+    @app_commands.checks.has_permissions(ban_members=True)
+    async def mass_ban(self, interaction: discord.Interaction, raison: str, membres: str = None, role: discord.Role = None, arrives_depuis: str = None, supprimer_messages: app_commands.Range[int, 0, 7] = 0):
+        """Bannissement de masse, exécuté avec une concurrence limitée."""
+        async def run(confirm_interaction, targets, skipped):
+            await self._execute_mass_action(
+                confirm_interaction, "Bannissement de masse", targets, skipped,
+                lambda member: member.ban(reason=f"Bannissement de masse par {interaction.user}: {raison}", delete_message_seconds=supprimer_messages * 86400),
+                raison
+            )
+        await self._prepare_mass_action(interaction, "Bannissement de masse", membres, role, arrives_depuis, run)
+
+    @masse_group.command(name="warn", description="Avertit plusieurs membres.")
+    @app_commands.describe(
+        raison="La raison de l'avertissement.",
+        membres="Mentions ou IDs des membres, séparés par des espaces.",
+        role="Avertir tous les membres ayant ce rôle.",
+        arrives_depuis="Avertir les membres arrivés depuis cette durée (ex: 15m)."
+    )
+    @app_commands.checks.has_permissions(moderate_members=True)
+    async def mass_warn(self, interaction: discord.Interaction, raison: str, membres: str = None, role: discord.Role = None, arrives_depuis: str = None):
+        """Avertissement de masse : tous les avertissements sont écrits en une seule requête (pas de DM individuel)."""
+        async def run(confirm_interaction, targets, skipped):
+            async with get_db_connection() as conn:
+                await conn.executemany(
+                    "INSERT INTO warnings (guild_id, user_id, moderator_id, reason) VALUES (?, ?, ?, ?)",
+                    [(interaction.guild.id, member.id, interaction.user.id, raison) for member in targets]
+                )
+                await conn.commit()
+
+            # Les règles d'escalade sont lues une seule fois pour tous les membres avertis.
+            rules = await get_escalation_rules(interaction.guild.id)
+            escalated = []
+            if rules:
+                async def escalate(member):
+                    if await self._apply_escalation(member, interaction.user, rules):
+                        escalated.append(member)
+                await BulkExecutor().run(targets, escalate)
+            extra_fields = {"Escalades": str(len(escalated))} if escalated else None
+            await self._finish_mass_action(confirm_interaction, "Avertissement de masse", targets, [], skipped, raison, extra_fields)
+        await self._prepare_mass_action(interaction, "Avertissement de masse", membres, role, arrives_depuis, run)
+
+    # --- Escalade automatique des avertissements ---
+    escalade_group = app_commands.Group(name="escalade", description="Sanctions automatiques selon le nombre d'avertissements.")
+
+    @escalade_group.command(name="ajouter", description="Ajoute une règle d'escalade automatique.")
+    @app_commands.describe(
+        avertissements="Nombre d'avertissements à partir duquel la sanction s'applique.",
+        action="La sanction à appliquer.",
+        periode="Ne compter que les avertissements de cette période (ex: 30d). Par défaut : tout l'historique.",
+        duree="Durée du timeout (obligatoire, 28 jours max) ou du bannissement (optionnelle, définitif sinon)."
+    )
+    @app_commands.choices(action=[
+        app_commands.Choice(name="Timeout", value="timeout"),
+        app_commands.Choice(name="Expulsion", value="kick"),
+        app_commands.Choice(name="Bannissement", value="ban"),
+    ])
+    @app_commands.checks.has_permissions(manage_guild=True)
+    async def escalade_add(self, interaction: discord.Interaction, avertissements: app_commands.Range[int, 1, 100], action: app_commands.Choice[str], periode: str = None, duree: str = None):
+        """Enregistre une règle : à partir de N avertissements (sur une période), la sanction est appliquée au membre averti."""
+        window_days = None
+        if periode:
+            period_delta = parse_duration(periode)
+            if period_delta is None or period_delta < datetime.timedelta(days=1):
+                await interaction.response.send_message("❌ Période invalide. Indiquez au moins un jour (ex: `7d`, `30d`).", ephemeral=True)
+                return
+            window_days = -(-int(period_delta.total_seconds()) // 86400)
+
+        duration_seconds = None
+        if duree and action.value != "kick":
+            delta = parse_duration(duree)
+            if delta is None:
+                await interaction.response.send_message("❌ Format de durée invalide. Utilisez `s`, `m`, `h`, ou `d` (ex: `10m`, `2h30m`).", ephemeral=True)
+                return
+            duration_seconds = int(delta.total_seconds())
+        if action.value == "timeout" and (duration_seconds is None or duration_seconds > MAX_TIMEOUT.total_seconds()):
+            await interaction.response.send_message("❌ Un timeout nécessite une durée de 28 jours maximum (ex: `1h`).", ephemeral=True)
+            return
+
+        rule_id = await add_escalation_rule(interaction.guild.id, avertissements, window_days, action.value, duration_seconds)
+        description = describe_escalation_rule({"threshold": avertissements, "window_days": window_days, "action": action.value, "duration_seconds": duration_seconds})
+        await interaction.response.send_message(f"✅ Règle `{rule_id}` ajoutée : {description}", ephemeral=True)
+
+        log_embed = discord.Embed(title="📈 Règle d'Escalade Ajoutée", color=discord.Color.dark_orange(), timestamp=datetime.datetime.now())
+        log_embed.add_field(name="Règle", value=f"`{rule_id}` : {description}", inline=False)
+        log_embed.add_field(name="Modérateur", value=interaction.user.mention, inline=False)
+        await self._log_action(interaction, log_embed)
+
+    @escalade_group.command(name="liste", description="Affiche les règles d'escalade du serveur.")
+    @app_commands.checks.has_permissions(moderate_members=True)
+    async def escalade_list(self, interaction: discord.Interaction):
+        rules = await get_escalation_rules(interaction.guild.id)
+        if not rules:
+            await interaction.response.send_message("Aucune règle d'escalade n'est configurée sur ce serveur.", ephemeral=True)
+            return
+        embed = discord.Embed(title="📈 Règles d'escalade", color=discord.Color.dark_orange())
+        embed.description = "\n".join(f"`{rule['id']}` : {describe_escalation_rule(rule)}" for rule in rules)
+        embed.set_footer(text="Si plusieurs règles sont atteintes, celle au seuil le plus élevé s'applique.")
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+
+    @escalade_group.command(name="supprimer", description="Supprime une règle d'escalade.")
+    @app_commands.describe(regle_id="L'ID de la règle (visible avec /escalade liste).")
+    @app_commands.checks.has_permissions(manage_guild=True)
+    async def escalade_remove(self, interaction: discord.Interaction, regle_id: int):
+        if not await delete_escalation_rule(interaction.guild.id, regle_id):
+            await interaction.response.send_message(f"❌ Aucune règle avec l'ID `{regle_id}` sur ce serveur.", ephemeral=True)
+            return
+        await interaction.response.send_message(f"🗑️ Règle `{regle_id}` supprimée.", ephemeral=True)
+
+        log_embed = discord.Embed(title="♻️ Règle d'Escalade Supprimée", color=discord.Color.dark_green(), timestamp=datetime.datetime.now())
+        log_embed.description = f"La règle `{regle_id}` a été supprimée."
+        log_embed.add_field(name="Modérateur", value=interaction.user.mention, inline=False)
+        await self._log_action(interaction, log_embed)
+
     @clear.error
     @warn.error
     @warnings.error
@@ -397,6 +1024,15 @@ class ModerationCog(commands.Cog, name="Modération"):
     @unmute.error
     @lock.error
     @unlock.error
+    @tempban.error
+    @temprole.error
+    @mass_timeout.error
+    @mass_kick.error
+    @mass_ban.error
+    @mass_warn.error
+    @escalade_add.error
+    @escalade_list.error
+    @escalade_remove.error
     async def moderation_error(self, interaction: discord.Interaction, error: app_commands.AppCommandError):
         """Gestionnaire d'erreurs centralisé pour le cog de modération."""
         if isinstance(error, app_commands.MissingPermissions):
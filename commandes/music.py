@@ -1,19 +1,36 @@
+import asyncio
 import discord
+import itertools
 import os
-import json
 import wavelink
 from discord.ext import commands
-from discord.ext import tasks
 from discord import app_commands
 import re
+import time
 from urllib.parse import urlparse
 import spotipy
 from datetime import timedelta
-
-# --- Constantes ---
-STATE_BACKUP_DIR = "music_state_backups"
-
-# --- Structures de données pour la sauvegarde ---
+from track_cache import track_cache
+from playlist_resolver import PER_NODE_CONCURRENCY, resolve_in_order
+from lazy_queue import PREFETCH_WINDOW, LazyQueue, LazyTrack
+from indexed_queue import entry_length
+from music_state import build_session, decode_entries, delete_state, load_sessions, load_state, save_sessions, save_state, write_state_file
+from idle_timer import IDLE_TIMEOUT, QUEUE_END_TIMEOUT, IdleTimers
+from now_playing import PROGRESS_BAR_CELLS, now_playing_updater, progress_cell
+from play_history import play_history
+from autoplay import next_autoplay_track
+from spotify_resolver import SpotifyResolver, SpotifyTrack, parse_spotify_link
+from music_metrics import music_metrics
+
+# Nombre de morceaux par page de la file d'attente.
+QUEUE_PAGE_SIZE = 10
+# Écart (en secondes) entre deux reconnexions vocales lors de la reprise des lecteurs au démarrage.
+# Chaque connexion est une commande envoyée à la passerelle Discord, limitée à 120 par minute et par shard.
+RESUME_STAGGER = 0.6
+# Délai maximal d'attente d'un nœud Lavalink connecté avant de renoncer à la reprise automatique.
+RESUME_NODE_TIMEOUT = 60
+
+# --- Fonctions utilitaires ---
 def is_valid_url(url: str) -> bool:
     """Vérifie si une chaîne est une URL valide."""
     try:
@@ -22,54 +39,60 @@ def is_valid_url(url: str) -> bool:
     except (ValueError, AttributeError):
         return False
 
-def track_to_dict(track: wavelink.Playable) -> dict:
-    """Convertit un objet piste Wavelink en un dictionnaire simple, facile à sauvegarder en JSON."""
-    return { # noqa
-        "uri": track.uri,
-        "title": track.title,
-        "author": track.author,
-        "duration": track.length,
-        "requester_id": track.extras["requester_id"] if "requester_id" in track.extras else None
-    }
-
-# --- Fonctions de gestion de la sauvegarde de la file d'attente ---
-async def _save_state(player: wavelink.Player, guild_id: int):
-    """Sauvegarde l'état actuel du lecteur (file d'attente, volume, boucle) dans un fichier JSON dédié au serveur."""
-    if not os.path.exists(STATE_BACKUP_DIR):
-        os.makedirs(STATE_BACKUP_DIR)
-    filepath = os.path.join(STATE_BACKUP_DIR, f"{guild_id}.json")
-    
-    queue_data = [track_to_dict(track) for track in player.queue]
-    if player.current:
-        queue_data.insert(0, track_to_dict(player.current))
-
-    with open(filepath, 'w', encoding='utf-8') as f:
-        state_data = {
-            "queue": queue_data,
-            "loop_mode": str(player.queue.mode).split('.')[-1].lower(),
-            "volume": player.volume,
-        }
-        json.dump(state_data, f, indent=4)
-
-def _load_state_data(guild_id: int) -> dict | None:
-    """Charge les données de l'état sauvegardé pour un serveur, s'il en existe."""
-    filepath = os.path.join(STATE_BACKUP_DIR, f"{guild_id}.json")
-    if os.path.exists(filepath):
-        try:
-            with open(filepath, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except (json.JSONDecodeError, TypeError):
-            # Si le fichier est corrompu ou ancien format, on le supprime
-            os.remove(filepath)
-            return None
-    return None
-
-def _delete_state_backup(guild_id: int):
-    """Supprime le fichier de sauvegarde d'un serveur, généralement après restauration ou si l'utilisateur l'ignore."""
-    filepath = os.path.join(STATE_BACKUP_DIR, f"{guild_id}.json")
-    if os.path.exists(filepath):
-        os.remove(filepath)
-
+def queued_entries(player: wavelink.Player):
+    """Toutes les entrées à venir : les pistes déjà résolues, puis celles en attente de résolution."""
+    lazy = getattr(player, "lazy_queue", None)
+    return itertools.chain(player.queue, lazy) if lazy else iter(player.queue)
+
+def queue_length(player: wavelink.Player) -> int:
+    lazy = getattr(player, "lazy_queue", None)
+    return len(player.queue) + (len(lazy) if lazy else 0)
+
+def clear_queue(player: wavelink.Player):
+    player.queue.clear()
+    if getattr(player, "lazy_queue", None):
+        player.lazy_queue.clear()
+
+def queue_window(player: wavelink.Player, start: int, stop: int) -> list:
+    """Entrées d'index `start` à `stop` (exclu) de la file complète, sans parcourir le reste de la file."""
+    lazy = getattr(player, "lazy_queue", None)
+    if lazy:
+        return lazy.slice(start, stop)
+    return [player.queue[i] for i in range(max(start, 0), min(stop, len(player.queue)))]
+
+def queue_duration(player: wavelink.Player) -> tuple[int, int]:
+    """(durée connue en millisecondes, nombre d'entrées de durée inconnue) de la file complète, d'après les compteurs."""
+    lazy = getattr(player, "lazy_queue", None)
+    if lazy:
+        return lazy.total_length, lazy.unknown_length
+    lengths = [entry_length(track) for track in player.queue]
+    return sum(length or 0 for length in lengths), lengths.count(None)
+
+def format_duration(seconds) -> str:
+    m, s = divmod(int(seconds), 60)
+    h, m = divmod(m, 60)
+    return f"{h:02d}:{m:02d}:{s:02d}" if h > 0 else f"{m:02d}:{s:02d}"
+
+def build_queue_embed(player: wavelink.Player, page: int) -> tuple[discord.Embed, int, int]:
+    """Construit la page `page` (à partir de 0) de la file d'attente. Renvoie l'embed, la page affichée et le nombre de pages."""
+    count = queue_length(player)
+    page_count = max(1, -(-count // QUEUE_PAGE_SIZE))
+    page = min(max(page, 0), page_count - 1)
+    start = page * QUEUE_PAGE_SIZE
+
+    lines = []
+    for i, track in enumerate(queue_window(player, start, start + QUEUE_PAGE_SIZE), start=start + 1):
+        length = entry_length(track)
+        duration = f" `{format_duration(length / 1000)}`" if length else ""
+        lines.append(f"`{i}.` {track.title[:200]}{duration}")
+    embed = discord.Embed(title="🎶 File d'attente", description="\n".join(lines) or "La file d'attente est vide.", color=discord.Color.blue())
+
+    total, unknown = queue_duration(player)
+    footer = f"Page {page + 1}/{page_count} • {count} morceau(x) • {format_duration(total / 1000)}"
+    if unknown:
+        footer += f" (+ {unknown} de durée inconnue)"
+    embed.set_footer(text=footer)
+    return embed, page, page_count
 
 class MusicControls(discord.ui.View):
     """Définit la vue persistante avec tous les boutons de contrôle pour la musique."""
@@ -88,6 +111,7 @@ class MusicControls(discord.ui.View):
         else:
             await player.pause(True)
             await interaction.response.send_message("⏸️ Musique mise en pause.", ephemeral=True)
+        now_playing_updater.request_update(interaction.guild.id)
 
     @discord.ui.button(label="⏭️ Passer", style=discord.ButtonStyle.secondary, custom_id="music_skip")
     async def skip(self, interaction: discord.Interaction, button: discord.ui.Button): # noqa
@@ -102,7 +126,9 @@ class MusicControls(discord.ui.View):
     async def stop(self, interaction: discord.Interaction, button: discord.ui.Button): # noqa
         player: wavelink.Player = interaction.guild.voice_client
         if player and player.connected:
-            player.queue.clear()
+            clear_queue(player)
+            # Arrêter, c'est aussi arrêter l'autoplay : sinon une piste suggérée prendrait le relais.
+            player.autoplay_radio = False
             await player.stop()
             await interaction.response.send_message("⏹️ Lecture arrêtée et file d'attente vidée.", ephemeral=True) # noqa
         else:
@@ -112,7 +138,7 @@ class MusicControls(discord.ui.View):
     async def leave(self, interaction: discord.Interaction, button: discord.ui.Button): # noqa
         player: wavelink.Player = interaction.guild.voice_client
         if player and player.connected:
-            await _save_state(player, interaction.guild.id)
+            await save_state(player, interaction.guild.id, queued_entries(player))
             await player.disconnect()
             await interaction.response.send_message("👋 Le bot a quitté le salon vocal.", ephemeral=True)
         else:
@@ -122,29 +148,38 @@ class MusicControls(discord.ui.View):
     async def queue(self, interaction: discord.Interaction, button: discord.ui.Button): # noqa
         player: wavelink.Player = interaction.guild.voice_client
 
-        if not player or player.queue.is_empty:
+        if not player or not queue_length(player):
             await interaction.response.send_message("🎶 La file d'attente est vide.", ephemeral=True)
             return
 
-        embed = discord.Embed(title="🎶 File d'attente", color=discord.Color.blue())
-        description = []
-        total_length = 0
-        displayed_count = 0
-        
-        for i, track in enumerate(player.queue):
-            line = f"`{i+1}.` {track.title}\n"
-            if displayed_count < 10 and total_length + len(line) < 4000:
-                description.append(line)
-                total_length += len(line)
-                displayed_count += 1
-            else:
-                break
+        view = QueuePageView(player)
+        await interaction.response.send_message(embed=view.render(), view=view, ephemeral=True)
+
+class QueuePageView(discord.ui.View):
+    """
+    File d'attente paginée (boutons précédent/suivant). Chaque page est reconstruite à partir de la file actuelle,
+    en ne lisant que les entrées affichées : le coût ne dépend pas de la longueur de la file.
+    """
+    def __init__(self, player: wavelink.Player, page: int = 0):
+        super().__init__(timeout=180)
+        self.player = player
+        self.page = page
+
+    def render(self) -> discord.Embed:
+        embed, self.page, page_count = build_queue_embed(self.player, self.page)
+        self.previous.disabled = self.page == 0
+        self.next.disabled = self.page >= page_count - 1
+        return embed
 
-        embed.description = "".join(description)
-        if len(player.queue) > displayed_count:
-            embed.set_footer(text=f"et {len(player.queue) - displayed_count} autre(s) morceau(x).")
+    @discord.ui.button(label="◀️", style=discord.ButtonStyle.secondary)
+    async def previous(self, interaction: discord.Interaction, button: discord.ui.Button): # noqa
+        self.page -= 1
+        await interaction.response.edit_message(embed=self.render(), view=self)
 
-        await interaction.response.send_message(embed=embed, ephemeral=True)
+    @discord.ui.button(label="▶️", style=discord.ButtonStyle.secondary)
+    async def next(self, interaction: discord.Interaction, button: discord.ui.Button): # noqa
+        self.page += 1
+        await interaction.response.edit_message(embed=self.render(), view=self)
 
 class RestoreQueueView(discord.ui.View): # noqa
     """Vue temporaire qui demande à l'utilisateur s'il veut restaurer une ancienne file d'attente."""
@@ -157,7 +192,7 @@ class RestoreQueueView(discord.ui.View): # noqa
 
     async def on_timeout(self):
         """Si l'utilisateur ne répond pas à temps, on ignore la sauvegarde et on continue."""
-        _delete_state_backup(self.guild_id)
+        delete_state(self.guild_id)
         # On retire le serveur de la liste d'attente
         self.music_cog.waiting_for_restore.pop(self.guild_id, None)
         await self.interaction.edit_original_response(content="Délai dépassé. La sauvegarde a été ignorée.", view=None)
@@ -170,34 +205,20 @@ class RestoreQueueView(discord.ui.View): # noqa
             item.disabled = True
         await interaction.response.edit_message(view=self)
 
-        loaded_state_data = _load_state_data(self.guild_id)
+        loaded_state_data = await load_state(self.guild_id)
         player: wavelink.Player = interaction.guild.voice_client
         
         # Vérification de sécurité : si le bot a été déconnecté entre-temps
         if not player:
             await self.interaction.edit_original_response(content="❌ Le bot n'est plus connecté. Veuillez relancer la commande.", view=None)
-            _delete_state_backup(self.guild_id)
+            delete_state(self.guild_id)
             return
         
         if loaded_state_data and loaded_state_data.get("queue"):
             self.music_cog.waiting_for_restore.pop(self.guild_id, None) # On indique que la restauration est gérée.
-            # Restaurer le volume et la boucle
-            await player.set_volume(loaded_state_data.get("volume", 100))
-            loop_mode_str = loaded_state_data.get("loop_mode", "normal").lower() # Utiliser lower()
-            player.queue.mode = getattr(wavelink.QueueMode, loop_mode_str, wavelink.QueueMode.normal)
-
-            # On ajoute les anciennes pistes à la file d'attente.
-            for track_data in loaded_state_data["queue"]:
-                try:
-                    # On recherche par URI pour être précis
-                    tracks = await wavelink.Playable.search(track_data["uri"])
-                    if tracks:
-                        track = tracks[0]
-                        track.extras = {"requester_id": track_data.get("requester_id")}
-                        await player.queue.put_wait(track)
-                except Exception:
-                    continue # Ignorer les pistes qui ne peuvent pas être restaurées
-            
+            # Volume, boucle et file d'attente ; la piste qui était en cours reprend là où elle s'était arrêtée.
+            await self.music_cog._apply_state(player, loaded_state_data)
+
             await self.music_cog._add_song_to_queue(interaction, self.query)
             await self.interaction.edit_original_response(content="✅ État précédent (file d'attente, volume, boucle) restauré ! La lecture va commencer.", view=None)
         else:
@@ -206,14 +227,14 @@ class RestoreQueueView(discord.ui.View): # noqa
             await self.interaction.edit_original_response(content="❌ Impossible de trouver la sauvegarde. Lancement d'une nouvelle file d'attente.", view=None)
             await self.music_cog._add_song_to_queue(interaction, self.query)
         
-        _delete_state_backup(self.guild_id)
+        delete_state(self.guild_id)
         self.stop()
 
     @discord.ui.button(label="🗑️ Ignorer", style=discord.ButtonStyle.secondary)
     async def ignore(self, interaction: discord.Interaction, button: discord.ui.Button): # noqa
         """Ignore la sauvegarde et lance une nouvelle file d'attente."""
         await interaction.response.defer()
-        _delete_state_backup(self.guild_id)
+        delete_state(self.guild_id)
         self.music_cog.waiting_for_restore.pop(self.guild_id, None)
         await self.interaction.edit_original_response(content="🗑️ Sauvegarde ignorée. Lancement d'une nouvelle file d'attente.", view=None)
         await self.music_cog._add_song_to_queue(self.interaction, self.query)
@@ -224,6 +245,9 @@ class MusicCog(commands.Cog):
         self.bot = bot
         # Ce dictionnaire permet de savoir pour quels serveurs on attend une réponse de l'utilisateur pour la restauration.
         self.waiting_for_restore = {}
+        # Minuteurs de déconnexion pour inactivité, un par serveur (voir `_check_idle`).
+        self.idle_timers = IdleTimers()
+        self._resume_task = None
         try:
             spotify_client_id = os.getenv("SPOTIFY_CLIENT_ID")
             spotify_client_secret = os.getenv("SPOTIFY_CLIENT_SECRET")
@@ -234,15 +258,106 @@ class MusicCog(commands.Cog):
         except Exception as e:
             print(f"[Spotify Init Error] Could not initialize Spotipy: {e}")
             self.sp = None
-        self.update_now_playing_loop.start()
+        self.spotify = SpotifyResolver(self.sp) if self.sp else None
 
-    def cog_unload(self):
-        """Appelé lorsque le cog est déchargé, pour arrêter proprement la boucle de mise à jour."""
-        self.update_now_playing_loop.cancel()
+    async def cog_unload(self):
+        """Appelé lorsque le cog est déchargé, pour arrêter proprement les minuteurs et les mises à jour en cours."""
+        if self._resume_task:
+            self._resume_task.cancel()
+        self.idle_timers.cancel_all()
+        await now_playing_updater.close()
+        await play_history.close()
 
     async def cog_load(self):
         """Appelé lorsque le cog est chargé, on en profite pour ajouter la vue persistante des contrôles."""
         self.bot.add_view(MusicControls())
+        # Les lecteurs actifs au dernier arrêt reprennent d'eux-mêmes dès que le bot est prêt.
+        self._resume_task = asyncio.create_task(self.resume_sessions())
+
+    async def _apply_state(self, player: wavelink.Player, state_data: dict, paused: bool = False):
+        """Remet un lecteur dans un état sauvegardé : volume, boucle, file d'attente, et piste en cours à sa position."""
+        await player.set_volume(state_data.get("volume", 100))
+        loop_mode_str = state_data.get("loop_mode", "normal").lower() # Utiliser lower()
+        player.queue.mode = getattr(wavelink.QueueMode, loop_mode_str, wavelink.QueueMode.normal)
+
+        # Les pistes sauvegardées sont décodées en une seule requête, sans aucune recherche.
+        entries = await decode_entries(player.node, state_data["queue"])
+        lazy_queue = self._lazy_queue(player)
+        lazy_queue.extend(entries)
+        if not player.playing and await lazy_queue.wait_next():
+            track = player.queue.get()
+            start = state_data.get("position", 0) if entries and track is entries[0] else 0
+            await player.play(track, start=start, paused=paused)
+
+    async def snapshot_sessions(self) -> int:
+        """
+        Instantané de tous les lecteurs actifs (salon, file, position, volume, boucle), pris à l'arrêt du bot
+        pour être repris automatiquement au démarrage suivant. Renvoie le nombre de lecteurs sauvegardés.
+        """
+        sessions = [
+            build_session(player, queued_entries(player)) for player in self.bot.voice_clients
+            if isinstance(player, wavelink.Player) and player.channel and (player.current or queue_length(player))
+        ]
+        if sessions:
+            await save_sessions(sessions)
+        return len(sessions)
+
+    async def resume_sessions(self):
+        """
+        Reconnecte les lecteurs de l'instantané pris au dernier arrêt et reprend leur lecture.
+        Les connexions sont étalées de `RESUME_STAGGER` secondes pour ne pas saturer la passerelle Discord.
+        """
+        await self.bot.wait_until_ready()
+        sessions = await load_sessions()
+        if not sessions:
+            return
+        async def wait_for_node():
+            while not self.bot.node_manager.healthy_nodes():
+                await asyncio.sleep(0.5)
+        try:
+            await asyncio.wait_for(wait_for_node(), timeout=RESUME_NODE_TIMEOUT)
+        except asyncio.TimeoutError:
+            print(f"[Music] Aucun nœud Lavalink disponible : {len(sessions)} lecteur(s) ne seront pas repris automatiquement.")
+            for session in sessions:
+                await asyncio.to_thread(write_state_file, session["guild_id"], session["state"])
+            return
+
+        results = await asyncio.gather(*(
+            self._resume_session(session, delay=index * RESUME_STAGGER) for index, session in enumerate(sessions)
+        ))
+        print(f"[Music] {sum(results)}/{len(sessions)} lecteur(s) repris après le redémarrage.")
+
+    async def _resume_session(self, session: dict, delay: float) -> bool:
+        """
+        Reprend un lecteur de l'instantané. En cas d'échec (salon supprimé ou vide, connexion impossible), sa file
+        est enregistrée comme sauvegarde classique : elle sera proposée à la restauration au prochain /play.
+        """
+        await asyncio.sleep(delay)
+        guild_id = session["guild_id"]
+        channel = self.bot.get_channel(session["channel_id"])
+        if channel is None or channel.guild.voice_client is not None or not any(not member.bot for member in channel.members):
+            await asyncio.to_thread(write_state_file, guild_id, session["state"])
+            return False
+
+        try:
+            player: wavelink.Player = await channel.connect(cls=self.bot.node_manager.create_player, timeout=60)
+            player.home = self.bot.get_channel(session.get("home_channel_id")) or channel
+            player.autoplay_radio = session.get("autoplay", False)
+            await self._apply_state(player, session["state"], paused=session.get("paused", False))
+        except Exception as e:
+            print(f"[Music] Reprise impossible sur le serveur {guild_id} : {e}")
+            await asyncio.to_thread(write_state_file, guild_id, session["state"])
+            if channel.guild.voice_client is not None:
+                await channel.guild.voice_client.disconnect(force=True)
+            return False
+
+        delete_state(guild_id)
+        self._check_idle(player)
+        try:
+            await player.home.send("🔄 Le bot a redémarré : la lecture reprend là où elle s'était arrêtée.")
+        except discord.HTTPException:
+            pass
+        return True
 
     @commands.Cog.listener()
     async def on_wavelink_node_ready(self, payload: wavelink.NodeReadyEventPayload):
@@ -255,6 +370,19 @@ class MusicCog(commands.Cog):
         player = payload.player
         if not player:
             return
+        if getattr(player, "migrating", False):
+            # Reprise de la même piste après un changement de nœud : le message, l'historique et l'autoplay sont déjà en place.
+            player.migrating = False
+            return
+        self._record_track_start(player)
+
+        # Une piste vient de quitter la file : on résout la suivante en attente pour garder la fenêtre pleine.
+        if getattr(player, "lazy_queue", None):
+            player.lazy_queue.refill()
+        self._check_idle(player)
+        play_history.track_started(player.guild.id, payload.track)
+        # Dernière piste de la file en mode autoplay : la suivante est choisie et chargée pendant la lecture.
+        self._prepare_autoplay(player, payload.track)
 
         embed = self.build_now_playing_embed(player)
         # On s'assure que l'attribut existe. S'il est déjà défini par une autre opération,
@@ -262,6 +390,8 @@ class MusicCog(commands.Cog):
         if not hasattr(player, "now_playing_message"):
             player.now_playing_message = None
         player.now_playing_message = await player.home.send(embed=embed, view=MusicControls(self.bot))
+        # Les mises à jour (barre de progression, prochain titre...) passent par l'ordonnanceur global.
+        now_playing_updater.register(player, self.build_now_playing_embed)
 
     @commands.Cog.listener()
     async def on_wavelink_track_end(self, payload: wavelink.TrackEndEventPayload):
@@ -269,8 +399,12 @@ class MusicCog(commands.Cog):
         player = payload.player
         if not player:
             return
+        # Une reprise après changement de nœud qui n'a pas démarré ne doit pas masquer le prochain track_start.
+        player.migrating = False
 
+        play_history.track_ended(player.guild.id, payload.track, payload.reason)
         # Nettoyer l'ancien message "En cours de lecture"
+        now_playing_updater.unregister(player.guild.id)
         if hasattr(player, "now_playing_message") and player.now_playing_message:
             try:
                 await player.now_playing_message.delete()
@@ -278,24 +412,30 @@ class MusicCog(commands.Cog):
                 pass
 
         # Wavelink gère automatiquement le passage à la piste suivante, mais on peut ajouter une logique personnalisée ici.
-        if not player.queue.is_empty:
+        # Si la fenêtre préchargée est vide alors qu'il reste des entrées en attente, on attend leur résolution.
+        has_next = not player.queue.is_empty or (getattr(player, "lazy_queue", None) is not None and await player.lazy_queue.wait_next())
+        if has_next:
             # La méthode play() va automatiquement prendre la prochaine chanson de la file d'attente
             # si aucune piste n'est fournie.
             next_track = player.queue.get()
             await player.play(next_track)
-        # Si la file est vide, on peut déconnecter le bot après un délai.
-        elif payload.reason == "FINISHED":
-             if player.home:
-                 await player.home.send("✅ File d'attente terminée.")
-             # On attend un court instant pour que le message soit visible avant de déconnecter.
-             await asyncio.sleep(10) # Un délai un peu plus long pour éviter les déconnexions trop rapides
-             await player.disconnect()
+        elif payload.reason in ("finished", "stopped") and (autoplay_track := await self._take_autoplay(player, payload.track)):
+            await player.play(autoplay_track)
+        # Si la file est vide, le bot sera déconnecté après un délai (sauf si une musique est ajoutée entre-temps).
+        elif payload.reason == "finished": # Lavalink v4 envoie les raisons en minuscules
+            if player.home:
+                await player.home.send("✅ File d'attente terminée.")
+            self._check_idle(player, delay=QUEUE_END_TIMEOUT, announce=False)
+        else:
+            self._check_idle(player)
 
     @commands.Cog.listener()
     async def on_wavelink_player_destroy(self, player: wavelink.Player):
         """Lorsque le lecteur est détruit (déconnexion), on sauvegarde son état."""
-        if not player.queue.is_empty or player.current:
-            await _save_state(player, player.guild.id)
+        self.idle_timers.disarm(player.guild.id)
+        now_playing_updater.unregister(player.guild.id)
+        if queue_length(player) or player.current:
+            await save_state(player, player.guild.id, queued_entries(player))
             print(f"État de la musique sauvegardé pour le serveur {player.guild.id}")
 
     @commands.Cog.listener()
@@ -326,7 +466,10 @@ class MusicCog(commands.Cog):
         if not track:
             return discord.Embed(title="Rien n'est en cours de lecture", color=discord.Color.greyple())
 
-        embed = discord.Embed(title="🎵 En cours de lecture", color=discord.Color.green())
+        if player.paused:
+            embed = discord.Embed(title="⏸️ En pause", color=discord.Color.orange())
+        else:
+            embed = discord.Embed(title="🎵 En cours de lecture", color=discord.Color.green())
         embed.description = f"**{track.title}**"
 
         if track.artwork:
@@ -335,13 +478,8 @@ class MusicCog(commands.Cog):
         # Barre de progression
         if track.length > 0:
             position = player.position
-            progress = int((position / track.length) * 20)
-            bar = '▬' * progress + '🔘' + '▬' * (19 - progress)
-            
-            def format_duration(seconds):
-                m, s = divmod(int(seconds), 60)
-                h, m = divmod(m, 60)
-                return f"{h:02d}:{m:02d}:{s:02d}" if h > 0 else f"{m:02d}:{s:02d}"
+            progress = progress_cell(position, track.length)
+            bar = '▬' * progress + '🔘' + '▬' * (PROGRESS_BAR_CELLS - 1 - progress)
 
             embed.add_field(name="Progression", value=f"`{format_duration(position / 1000)}` {bar} `{format_duration(track.length / 1000)}`", inline=False)
 
@@ -349,13 +487,17 @@ class MusicCog(commands.Cog):
         next_song_title = "Rien"
         if not player.queue.is_empty:
             next_song_title = player.queue[0].title
+        elif getattr(player, "autoplay_radio", False):
+            next_song_title = "📻 Autoplay"
         embed.add_field(name="Prochain titre", value=next_song_title, inline=True)
 
         # Demandé par
-        requester_id = track.extras["requester_id"] if "requester_id" in track.extras else None
+        requester_id = dict(track.extras).get("requester_id")
         requester = self.bot.get_user(requester_id)
         if requester:
             embed.add_field(name="Demandé par", value=requester.mention, inline=True)
+        elif dict(track.extras).get("autoplay"):
+            embed.add_field(name="Demandé par", value="📻 Autoplay", inline=True)
 
         return embed
 
@@ -399,45 +541,87 @@ class MusicCog(commands.Cog):
         title = re.sub(r'[^\w\s-]', '', title)
         return f"ytsearch:{artist.strip()} - {title.strip()}"
 
-    @tasks.loop(seconds=20.0) # Augmentation de l'intervalle pour réduire la charge
-    async def update_now_playing_loop(self):
-        """Boucle qui s'exécute en arrière-plan pour mettre à jour les messages 'En cours de lecture' et gérer l'inactivité."""
-        for node in wavelink.Pool.nodes.values():
-            if node.status != wavelink.NodeStatus.CONNECTED:
-                continue
-            for player in node.players.values():
-                # Mise à jour de l'embed "En cours de lecture"
-                if player.playing and hasattr(player, "now_playing_message") and player.now_playing_message:
-                    try:
-                        embed = self.build_now_playing_embed(player)
-                        await player.now_playing_message.edit(embed=embed)
-                    except (discord.HTTPException, AttributeError):
-                        player.now_playing_message = None
-                
-                # Déconnecte le bot s'il est inactif depuis trop longtemps.
-                elif not player.playing and player.connected and player.queue.is_empty and player.guild.id not in self.waiting_for_restore: # noqa
-                    # Ajout d'un délai de grâce avant la déconnexion
-                    if not hasattr(player, 'inactive_since'):
-                        player.inactive_since = discord.utils.utcnow()
-                    
-                    # Si le bot est inactif depuis plus de 30 secondes, on le déconnecte
-                    if (discord.utils.utcnow() - player.inactive_since).total_seconds() > 30:
-                        if hasattr(player, 'home') and player.home:
-                            await player.home.send("✅ Inactif et file d'attente vide. Déconnexion.")
-                        await player.disconnect()
-                
-                # Si le bot recommence à jouer, on réinitialise le timer d'inactivité
-                elif player.playing and hasattr(player, 'inactive_since'):
-                    del player.inactive_since
+    def _prepare_autoplay(self, player: wavelink.Player, track: wavelink.Playable):
+        """Lance en arrière-plan le choix de la piste qui suivra `track`, si l'autoplay est actif et la file vide."""
+        if not getattr(player, "autoplay_radio", False) or queue_length(player) or not track or not track.uri:
+            return
+        previous = getattr(player, "autoplay_next", None)
+        if previous:
+            previous[1].cancel()
+        task = asyncio.create_task(next_autoplay_track(player.guild.id, track.uri))
+        player.autoplay_next = (track.uri, task)
+
+    async def _take_autoplay(self, player: wavelink.Player, ended: wavelink.Playable | None) -> wavelink.Playable | None:
+        """Piste d'autoplay à jouer après `ended` : celle préparée pendant sa lecture, ou choisie maintenant à défaut."""
+        prepared = getattr(player, "autoplay_next", None)
+        player.autoplay_next = None
+        if not getattr(player, "autoplay_radio", False) or not ended or not ended.uri:
+            if prepared:
+                prepared[1].cancel()
+            return None
+        try:
+            if prepared and prepared[0] == ended.uri:
+                return await prepared[1]
+            if prepared:
+                prepared[1].cancel()
+            return await next_autoplay_track(player.guild.id, ended.uri)
+        except Exception as e:
+            print(f"[Music] Autoplay impossible (serveur {player.guild.id}): {e}")
+            return None
+
+    def _has_listeners(self, player: wavelink.Player) -> bool:
+        """Vrai si au moins un membre (hors bots) est dans le salon vocal du lecteur."""
+        return player.channel is not None and any(not member.bot for member in player.channel.members)
+
+    def _check_idle(self, player: wavelink.Player, delay: float = IDLE_TIMEOUT, announce: bool = True):
+        """
+        Arme le minuteur d'inactivité si le lecteur n'a plus rien à jouer ou plus personne à qui jouer, le désarme sinon.
+        Appelée à chaque événement qui peut changer cet état (début/fin de piste, arrivée/départ d'un membre).
+        """
+        guild_id = player.guild.id
+        if (player.playing or queue_length(player)) and self._has_listeners(player):
+            self.idle_timers.disarm(guild_id)
+        else:
+            self.idle_timers.arm(guild_id, delay, lambda: self._idle_disconnect(guild_id, announce))
+
+    async def _idle_disconnect(self, guild_id: int, announce: bool):
+        """Échéance du minuteur : déconnecte le lecteur s'il est toujours inactif."""
+        guild = self.bot.get_guild(guild_id)
+        player: wavelink.Player = guild.voice_client if guild else None
+        if not player or not player.connected:
+            return
+        # L'utilisateur est encore en train de choisir s'il restaure son ancienne file : on lui laisse le temps.
+        if guild_id in self.waiting_for_restore:
+            self.idle_timers.arm(guild_id, IDLE_TIMEOUT, lambda: self._idle_disconnect(guild_id, announce))
+            return
+        listeners = self._has_listeners(player)
+        if (player.playing or queue_length(player)) and listeners:
+            return
 
+        if announce and getattr(player, "home", None):
+            if listeners:
+                await player.home.send("✅ Inactif et file d'attente vide. Déconnexion.")
+            else:
+                await player.home.send("👋 Plus personne dans le salon vocal. Déconnexion.")
+        await player.disconnect()
 
+    @commands.Cog.listener()
+    async def on_voice_state_update(self, member: discord.Member, before: discord.VoiceState, after: discord.VoiceState):
+        """Réarme ou désarme le minuteur d'inactivité quand quelqu'un rejoint ou quitte le salon du lecteur."""
+        player: wavelink.Player = member.guild.voice_client
+        if not isinstance(player, wavelink.Player) or before.channel == after.channel:
+            return
+        if player.channel in (before.channel, after.channel) or member.id == self.bot.user.id:
+            self._check_idle(player)
 
     music_group = app_commands.Group(name="musique", description="Commandes liées à la musique")
 
     @music_group.command(name="play", description="Joue une musique depuis YouTube/Spotify ou l'ajoute à la liste.")
     async def play(self, interaction: discord.Interaction, recherche: str):
         """Commande principale pour jouer de la musique."""
-        await interaction.response.defer(ephemeral=True)
+        requested_at = time.perf_counter()
+        with music_metrics.span("defer"):
+            await interaction.response.defer(ephemeral=True)
 
         if not interaction.user.voice:
             await interaction.followup.send("❌ Il faut être dans un salon vocal pour que je puisse vous rejoindre !", ephemeral=True)
@@ -449,7 +633,8 @@ class MusicCog(commands.Cog):
         if not player:
             try:
                 # Si le bot n'est pas connecté, on le connecte au salon vocal de l'utilisateur.
-                player: wavelink.Player = await voice_channel.connect(cls=wavelink.Player, timeout=60)
+                with music_metrics.span("connect"):
+                    player: wavelink.Player = await voice_channel.connect(cls=self.bot.node_manager.create_player, timeout=60)
             except (discord.ClientException, asyncio.TimeoutError, wavelink.exceptions.ChannelTimeoutException):
                 await interaction.followup.send("❌ Je suis déjà connecté à un autre salon vocal.")
                 return
@@ -457,25 +642,32 @@ class MusicCog(commands.Cog):
             if player.playing or player.paused:
                 await interaction.followup.send(f"❌ Je suis déjà en train de jouer de la musique dans le salon {player.channel.mention}. Veuillez me stopper ou attendre la fin avant de m'appeler ailleurs.", ephemeral=True)
                 return
-            await player.move_to(voice_channel)
+            with music_metrics.span("connect"):
+                await player.move_to(voice_channel)
 
         # On garde en mémoire le salon où la commande a été lancée pour y envoyer les messages.
         player.home = interaction.channel
         await player.set_volume(30)
+        # Si rien ne démarre (recherche infructueuse, restauration ignorée...), le lecteur sera déconnecté après le délai d'inactivité.
+        self._check_idle(player)
 
         # S'il y a une sauvegarde, on demande à l'utilisateur s'il veut la restaurer.
-        saved_state = _load_state_data(interaction.guild.id)
-        if saved_state and saved_state.get("queue") and player.queue.is_empty and not player.playing:
+        saved_state = await load_state(interaction.guild.id)
+        if saved_state and saved_state.get("queue") and not queue_length(player) and not player.playing:
             self.waiting_for_restore[interaction.guild.id] = True # Lever le drapeau d'attente
             view = RestoreQueueView(self, interaction, recherche)
             await interaction.followup.send("🔎 J'ai trouvé une file d'attente précédente pour ce serveur. Voulez-vous la restaurer avant d'ajouter votre nouvelle musique ?", view=view, ephemeral=True)
             return
 
         # On ajoute la chanson demandée à la file d'attente.
-        is_first_song = player.queue.is_empty and not player.playing
+        is_first_song = not queue_length(player) and not player.playing
+        if is_first_song:
+            # Le temps total (commande -> début de la lecture) est relevé par `on_wavelink_track_start`.
+            player.play_requested_at = requested_at
         added_count = await self._add_song_to_queue(interaction, recherche)
 
         if added_count == 0:
+            player.play_requested_at = None
             return
 
         # Si ce n'est pas la première chanson, on envoie une confirmation. Sinon, l'événement on_track_start s'en chargera.
@@ -495,7 +687,7 @@ class MusicCog(commands.Cog):
             return
 
         # Si la file est vide, cette commande se comporte comme un /play normal.
-        if player.queue.is_empty:
+        if not queue_length(player):
             await interaction.followup.send("ℹ️ La file d'attente était vide, la musique est ajoutée normalement.", ephemeral=True)
             await self._add_song_to_queue(interaction, recherche)
             return
@@ -522,19 +714,28 @@ class MusicCog(commands.Cog):
 
         await interaction.response.send_message(f"⏩ Avance à `{temps}`...", ephemeral=True)
         await player.seek(seek_seconds * 1000)
+        now_playing_updater.request_update(interaction.guild.id)
 
     async def _add_song_to_queue(self, interaction: discord.Interaction, query: str, add_to_top: bool = False) -> int:
         """Fonction interne pour rechercher et ajouter une ou plusieurs chansons à la file d'attente. Renvoie le nombre de pistes ajoutées."""
         player: wavelink.Player = interaction.guild.voice_client
 
         # --- Traitement spécial pour Spotify ---
-        if self.sp and "open.spotify.com" in query:
-            # On désactive temporairement la fonctionnalité Spotify pour stabiliser le bot.
-            await interaction.followup.send(
-                "⚠️ Les liens Spotify sont temporairement désactivés pour maintenance. Veuillez utiliser des termes de recherche YouTube (ex: nom de l'artiste - titre de la chanson).",
-                ephemeral=True
-            )
-            return 0 # On arrête le traitement et on indique qu'aucune piste n'a été ajoutée.
+        if parse_spotify_link(query):
+            if not self.spotify:
+                await interaction.followup.send("❌ Les liens Spotify ne sont pas configurés sur ce bot. Utilisez le nom de l'artiste et le titre de la chanson.", ephemeral=True)
+                return 0
+            try:
+                with music_metrics.span("spotify"):
+                    name, spotify_tracks = await self.spotify.fetch(query)
+            except spotipy.SpotifyException as e:
+                print(f"[Spotify Error] Guild: {interaction.guild.id}, Query: '{query}', Error: {e}")
+                await interaction.followup.send("❌ Impossible de lire ce lien Spotify. La playlist est peut-être privée ou le lien est invalide.", ephemeral=True)
+                return 0
+            if not spotify_tracks:
+                await interaction.followup.send(f"❌ Aucune musique jouable dans **{name}**.", ephemeral=True)
+                return 0
+            return await self._add_multiple_tracks(interaction, spotify_tracks, add_to_top, name=name)
 
         # --- Logique de recherche améliorée ---
         try:
@@ -551,8 +752,9 @@ class MusicCog(commands.Cog):
             else:
                 search_query = query
 
-            # 2. Lancement de la recherche
-            tracks: wavelink.Search = await wavelink.Playable.search(search_query)
+            # 2. Lancement de la recherche (via le cache : pas d'aller-retour Lavalink pour une recherche déjà faite)
+            with music_metrics.span("search"):
+                tracks: wavelink.Search = await track_cache.search(search_query)
 
 
         except (wavelink.LavalinkException, wavelink.LavalinkLoadException) as e:
@@ -564,125 +766,260 @@ class MusicCog(commands.Cog):
             await interaction.followup.send(f"❌ Impossible de trouver une correspondance pour `{query.replace('ytsearch:', '')}`.", ephemeral=True)
             return 0
 
+        # Tant que des entrées attendent d'être résolues, les nouvelles pistes passent derrière elles pour respecter l'ordre.
+        lazy_queue = self._lazy_queue(player)
         added_count = 0
-        if isinstance(tracks, wavelink.Playlist):
-            added_count = len(tracks.tracks)
-            for track in tracks.tracks:
+        with music_metrics.span("queue"):
+            if isinstance(tracks, wavelink.Playlist):
+                added_count = len(tracks.tracks)
+                for track in tracks.tracks:
+                    track.extras = {"requester_id": interaction.user.id}
+                # Au-delà de la fenêtre, les pistes attendent dans la file paresseuse (indexée) et non dans la file wavelink.
+                lazy_queue.extend(tracks.tracks)
+            else:
+                track = tracks[0]
                 track.extras = {"requester_id": interaction.user.id}
-            player.queue.put(tracks.tracks)
+                added_count = 1
+                if add_to_top:
+                    player.queue.put_at_front(track)
+                elif len(lazy_queue) or len(player.queue) >= lazy_queue.window:
+                    lazy_queue.extend([track])
+                else:
+                    await player.queue.put_wait(track)
+            ready = not player.playing and await lazy_queue.wait_next()
+
+        if ready:
+            await self._start_playback(player, player.queue.get())
         else:
-            track = tracks[0]
-            track.extras = {"requester_id": interaction.user.id}
-            added_count = 1
-            if add_to_top:
-                player.queue.put_at_front(track)
-            else:
-                await player.queue.put_wait(track)
-        
-        if not player.playing:
-            await player.play(player.queue.get())
+            now_playing_updater.request_update(interaction.guild.id) # Le prochain titre a pu changer
 
         return added_count
 
-    async def _add_multiple_tracks(self, interaction: discord.Interaction, queries: list[str], add_to_top: bool):
-        """Fonction interne pour ajouter une liste de pistes (typiquement depuis une playlist) à la file d'attente."""
+    async def _start_playback(self, player: wavelink.Player, track: wavelink.Playable):
+        """`player.play`, chronométré : l'événement track_start mesurera ensuite le délai jusqu'au début de l'audio."""
+        player.play_sent_at = time.perf_counter()
+        try:
+            with music_metrics.span("play"):
+                await player.play(track)
+        except Exception:
+            player.play_sent_at = player.play_requested_at = None
+            raise
+
+    def _record_track_start(self, player: wavelink.Player):
+        """Clôt les mesures en cours du lecteur (voir `_start_playback` et la commande play) au début d'une piste."""
+        now = time.perf_counter()
+        sent_at = getattr(player, "play_sent_at", None)
+        if sent_at is not None:
+            music_metrics.observe("track_start", now - sent_at)
+            player.play_sent_at = None
+        requested_at = getattr(player, "play_requested_at", None)
+        if requested_at is not None:
+            music_metrics.observe("total", now - requested_at)
+            player.play_requested_at = None
+
+    def _lazy_queue(self, player: wavelink.Player) -> LazyQueue:
+        """Renvoie la file des entrées en attente de résolution du lecteur (créée à la première utilisation)."""
+        if getattr(player, "lazy_queue", None) is None:
+            player.lazy_queue = LazyQueue(player, self._resolve_lazy_track)
+        return player.lazy_queue
+
+    async def _resolve_query(self, query: str, requester_id: int | None, node: wavelink.Node | None = None) -> wavelink.Playable | None:
+        """Recherche une requête et renvoie la première piste trouvée (ou None), avec une recherche de secours sur le titre seul."""
+        tracks = await track_cache.search(query, node=node)
+
+        # Stratégie de secours : "ytsearch:Artiste - Titre" -> "ytsearch:Titre"
+        if not tracks and query.startswith("ytsearch:"):
+            parts = query.split(' - ', 1)
+            if len(parts) > 1:
+                simple_query = f"ytsearch:{parts[1].strip()}"
+                tracks = await track_cache.search(simple_query, node=node)
+
+        if not tracks:
+            print(f"[Music Search Error] Échec de la recherche pour la piste : '{query}'")
+            return None
+        track = tracks[0]
+        track.extras = {"requester_id": requester_id}
+        return track
+
+    async def _resolve_lazy_track(self, entry: LazyTrack) -> wavelink.Playable | None:
+        spotify_key = entry.extras.get("spotify_key")
+        if spotify_key:
+            return await self._resolve_spotify_track(spotify_key, entry.uri, entry.extras.get("requester_id"))
+        return await self._resolve_query(entry.uri, entry.extras.get("requester_id"))
+
+    async def _resolve_spotify_track(self, key: str, query: str, requester_id: int | None, node: wavelink.Node | None = None) -> wavelink.Playable | None:
+        """
+        Piste Lavalink d'un morceau Spotify : d'abord la correspondance déjà connue (par ISRC, à défaut par artiste et titre),
+        sinon une recherche, dont le résultat est mémorisé. Un morceau déjà rencontré ne coûte ni recherche ni appel Lavalink.
+        """
+        track = await track_cache.get_alias(key)
+        if track is not None:
+            track.extras = {"requester_id": requester_id}
+            return track
+        track = await self._resolve_query(query, requester_id, node=node)
+        if track is not None:
+            track_cache.remember(key, track)
+        return track
+
+    async def _add_multiple_tracks(self, interaction: discord.Interaction, spotify_tracks: list[SpotifyTrack], add_to_top: bool, name: str = "la playlist Spotify") -> int:
+        """
+        Fonction interne pour ajouter une liste de morceaux Spotify (titre, album ou playlist) à la file d'attente.
+        Seules les premières pistes (la fenêtre de préchargement) sont recherchées tout de suite, en parallèle et réparties
+        sur les nœuds Lavalink sains : la première trouvée est jouée immédiatement. Les suivantes restent des entrées
+        légères (LazyTrack), résolues juste avant leur lecture. Renvoie le nombre de pistes ajoutées.
+        """
+        queries = [self._clean_search_query(track.artists, track.title) for track in spotify_tracks]
         player: wavelink.Player = interaction.guild.voice_client
-        added_count = 0
-        failed_tracks = []
-        
-        # Pour ajouter en haut, on doit inverser la liste des requêtes
-        track_list_for_queue = []
+        lazy_queue = self._lazy_queue(player)
+        nodes = self.bot.node_manager.healthy_nodes()
+        insert_at = 0 # Position d'insertion quand on ajoute en haut de la file
 
-        for query in queries:
-            try:
-                await asyncio.sleep(0.2)
-                tracks = await wavelink.Playable.search(query) # noqa
-
-                # Stratégie de secours également pour les playlists
-                if not tracks and query.startswith("ytsearch:"):
-                    parts = query.split(' - ', 1)
-                    if len(parts) > 1:
-                        simple_query = f"ytsearch:{parts[1].strip()}"
-                        tracks = await wavelink.Playable.search(simple_query)
-
-                if tracks:
-                    track = tracks[0]
-                    track.extras = {"requester_id": interaction.user.id}
-                    track_list_for_queue.append(track)
-                    added_count += 1
-                else:
-                    print(f"[Music Search Error] Échec de la recherche pour la piste de playlist : '{query}'")
-                    # La recherche n'a rien donné, on note le nom pour le rapport
-                    failed_tracks.append(query.replace("ytsearch:", "").strip())
-            except Exception as e:
-                print(f"[Music Search Error] Failed to process query '{query}': {e}")
-                failed_tracks.append(query.replace("ytsearch:", "").strip())
-                continue # On ignore les pistes qui ne peuvent pas être trouvées
+        # Si des entrées attendent déjà d'être résolues, tout passe derrière elles (sauf ajout en haut de file).
+        if add_to_top or not len(lazy_queue):
+            head, rest = queries[:PREFETCH_WINDOW], queries[PREFETCH_WINDOW:]
+        else:
+            head, rest = [], queries
+
+        async def resolve(query: str, index: int):
+            # `head` est toujours le début de la liste : l'index est aussi celui du morceau Spotify.
+            return await self._resolve_spotify_track(spotify_tracks[index].cache_key, query, interaction.user.id, node=nodes[index % len(nodes)] if nodes else None)
+
+        async def play_first(track: wavelink.Playable):
+            await self._start_playback(player, track)
+
+        async def enqueue(tracks: list[wavelink.Playable]):
+            nonlocal insert_at
+            if add_to_top:
+                for track in tracks:
+                    player.queue.put_at(insert_at, track)
+                    insert_at += 1
+            else:
+                player.queue.put(tracks)
+
+        failed_queries = []
+        if head:
+            failed_queries = await resolve_in_order(
+                head, resolve,
+                concurrency=PER_NODE_CONCURRENCY * max(len(nodes), 1),
+                on_first=play_first if not player.playing else None,
+                on_ready=enqueue
+            )
 
+        lazy_entries = []
+        for query, track in zip(rest, spotify_tracks[len(spotify_tracks) - len(rest):]):
+            entry = LazyTrack(query, title=track.title, author=track.artists, length=track.length, requester_id=interaction.user.id)
+            entry.extras["spotify_key"] = track.cache_key
+            lazy_entries.append(entry)
         if add_to_top:
-            player.queue.put_at_front(reversed(track_list_for_queue))
+            lazy_queue.insert(insert_at, lazy_entries)
         else:
-            player.queue.put(track_list_for_queue)
+            lazy_queue.extend(lazy_entries)
+        if not player.playing and await lazy_queue.wait_next():
+            await self._start_playback(player, player.queue.get())
 
-        if not player.playing and not player.queue.is_empty:
-            await player.play(player.queue.get())
+        failed_tracks = [query.replace("ytsearch:", "").strip() for query in failed_queries]
+        added_count = len(queries) - len(failed_tracks)
 
         # Envoyer un message de confirmation final
-        final_message = f"✅ **{added_count} / {len(queries)}** musiques de la playlist Spotify ont été ajoutées à la file d'attente."
+        final_message = f"✅ **{added_count} / {len(queries)}** musiques de **{name}** ont été ajoutées à la file d'attente."
+        if rest:
+            final_message += f"\nℹ️ {len(rest)} d'entre elles seront recherchées au fur et à mesure de la lecture."
         if failed_tracks:
             failed_list = "\n".join([f"- `{name}`" for name in failed_tracks[:5]]) # Affiche les 5 premiers échecs
             final_message += f"\n\n❌ Impossible de trouver une correspondance pour **{len(failed_tracks)}** musique(s), dont :\n{failed_list}"
             if len(failed_tracks) > 5:
                 final_message += f"\n...et {len(failed_tracks) - 5} autres."
         await interaction.channel.send(final_message)
+        return added_count
 
     @music_group.command(name="queue", description="Affiche la file d'attente actuelle")
-    async def queue(self, interaction: discord.Interaction):
-        """Affiche les 10 prochaines chansons de la file d'attente."""
+    @app_commands.describe(page="La page à afficher (10 morceaux par page).")
+    async def queue(self, interaction: discord.Interaction, page: app_commands.Range[int, 1, 100000] = 1):
+        """Affiche la file d'attente page par page, avec le nombre de morceaux et la durée totale."""
         player: wavelink.Player = interaction.guild.voice_client # noqa
-        if not player or player.queue.is_empty:
+        if not player or not queue_length(player):
             await interaction.response.send_message("🎶 La file d'attente est vide.", ephemeral=True)
             return
 
-        embed = discord.Embed(title="🎶 File d'attente", color=discord.Color.blue())
-        description = []
-        total_length = 0
-        displayed_count = 0
-
-        for i, track in enumerate(player.queue):
-            line = f"`{i+1}.` {track.title}\n"
-            if displayed_count < 10 and total_length + len(line) < 4000:
-                description.append(line)
-                total_length += len(line)
-                displayed_count += 1
-            else:
-                break
+        view = QueuePageView(player, page - 1)
+        await interaction.response.send_message(embed=view.render(), view=view)
+
+    def _check_queue_position(self, player: wavelink.Player, *positions: int) -> str | None:
+        """Message d'erreur si une position (numérotée à partir de 1, comme dans /musique queue) sort de la file."""
+        length = queue_length(player) if player else 0
+        if not length:
+            return "🎶 La file d'attente est vide."
+        for position in positions:
+            if position > length:
+                return f"❌ Position {position} invalide : la file d'attente contient {length} morceau(x)."
+        return None
+
+    @music_group.command(name="remove", description="Retire un morceau de la file d'attente.")
+    @app_commands.describe(position="La position du morceau dans /musique queue.")
+    async def remove(self, interaction: discord.Interaction, position: app_commands.Range[int, 1, 100000]):
+        """Retire le morceau à la position donnée."""
+        player: wavelink.Player = interaction.guild.voice_client
+        if error := self._check_queue_position(player, position):
+            return await interaction.response.send_message(error, ephemeral=True)
 
-        embed.description = "".join(description)
-        if len(player.queue) > displayed_count:
-            embed.set_footer(text=f"et {len(player.queue) - displayed_count} autre(s) morceau(x).")
+        entry = self._lazy_queue(player).pop(position - 1)
+        now_playing_updater.request_update(interaction.guild.id)
+        await interaction.response.send_message(f"🗑️ **{entry.title}** a été retirée de la file d'attente.")
 
-        await interaction.response.send_message(embed=embed)
+    @music_group.command(name="move", description="Déplace un morceau dans la file d'attente.")
+    @app_commands.describe(de="La position actuelle du morceau.", vers="Sa nouvelle position.")
+    async def move(self, interaction: discord.Interaction, de: app_commands.Range[int, 1, 100000], vers: app_commands.Range[int, 1, 100000]):
+        """Déplace le morceau de la position `de` à la position `vers`."""
+        player: wavelink.Player = interaction.guild.voice_client
+        if error := self._check_queue_position(player, de, vers):
+            return await interaction.response.send_message(error, ephemeral=True)
+
+        entry = self._lazy_queue(player).move(de - 1, vers - 1)
+        now_playing_updater.request_update(interaction.guild.id)
+        await interaction.response.send_message(f"↕️ **{entry.title}** est maintenant en position {vers}.")
+
+    @music_group.command(name="jump", description="Joue immédiatement un morceau de la file d'attente.")
+    @app_commands.describe(position="La position du morceau dans /musique queue.")
+    async def jump(self, interaction: discord.Interaction, position: app_commands.Range[int, 1, 100000]):
+        """Passe directement au morceau demandé ; les morceaux qui le précédaient restent dans la file."""
+        player: wavelink.Player = interaction.guild.voice_client
+        if error := self._check_queue_position(player, position):
+            return await interaction.response.send_message(error, ephemeral=True)
+        await interaction.response.defer()
+
+        entry = self._lazy_queue(player).pop(position - 1)
+        track = entry if isinstance(entry, wavelink.Playable) else await self._resolve_lazy_track(entry)
+        if track is None:
+            await interaction.followup.send(f"❌ Impossible de trouver une correspondance pour `{entry.title}`.", ephemeral=True)
+            return
+        player.queue.put_at_front(track)
+        if player.playing:
+            await player.skip(force=True)  # La fin de la piste actuelle lance la tête de file
+        else:
+            await player.play(player.queue.get())
+        await interaction.followup.send(f"⏭️ Lecture de **{track.title}**.")
 
     @music_group.command(name="clear", description="Vide la file d'attente")
     async def clear(self, interaction: discord.Interaction): # noqa
         """Supprime toutes les chansons de la file d'attente."""
         player: wavelink.Player = interaction.guild.voice_client
-        if not player or player.queue.is_empty:
+        if not player or not queue_length(player):
             await interaction.response.send_message("🎶 La file d'attente est déjà vide.", ephemeral=True)
             return
-        player.queue.clear()
+        clear_queue(player)
+        now_playing_updater.request_update(interaction.guild.id)
         await interaction.response.send_message("🧹 La file d'attente a été vidée.")
 
     @music_group.command(name="shuffle", description="Mélange la file d'attente.")
     async def shuffle(self, interaction: discord.Interaction): # noqa
         """Mélange aléatoirement l'ordre des chansons dans la file d'attente."""
         player: wavelink.Player = interaction.guild.voice_client
-        if not player or len(player.queue) < 2:
+        if not player or queue_length(player) < 2:
             await interaction.response.send_message("❌ Il n'y a pas assez de musiques dans la file d'attente pour les mélanger.", ephemeral=True)
             return
         
-        player.queue.shuffle()
+        self._lazy_queue(player).shuffle()
+        now_playing_updater.request_update(interaction.guild.id)
         await interaction.response.send_message("🔀 La file d'attente a été mélangée !")
 
     @music_group.command(name="loop", description="Répète la musique ou la file d'attente.")
@@ -724,5 +1061,92 @@ class MusicCog(commands.Cog):
         await player.set_volume(niveau)
         await interaction.response.send_message(f"🔊 Volume de la musique réglé à **{niveau}%**.")
 
+    @music_group.command(name="autoplay", description="Enchaîne automatiquement des musiques quand la file d'attente est vide.")
+    @app_commands.describe(actif="Activer ou désactiver l'autoplay.")
+    async def autoplay(self, interaction: discord.Interaction, actif: bool):
+        """Mode radio : à la fin de la file, le bot choisit la suite d'après ce qui a déjà été écouté à la suite de la piste."""
+        player: wavelink.Player = interaction.guild.voice_client
+        if not player or not player.connected:
+            await interaction.response.send_message("❌ Le bot n'est pas connecté. Utilisez `/musique play` d'abord.", ephemeral=True)
+            return
+
+        player.autoplay_radio = actif
+        if actif:
+            self._prepare_autoplay(player, player.current)
+            await interaction.response.send_message("📻 Autoplay activé : la lecture continuera à la fin de la file d'attente.")
+        else:
+            prepared = getattr(player, "autoplay_next", None)
+            if prepared:
+                prepared[1].cancel()
+            player.autoplay_next = None
+            await interaction.response.send_message("📻 Autoplay désactivé.")
+        now_playing_updater.request_update(interaction.guild.id)
+
+    @music_group.command(name="historique", description="Affiche les dernières musiques jouées sur ce serveur.")
+    @app_commands.describe(membre="Seulement les musiques demandées par ce membre.")
+    async def history(self, interaction: discord.Interaction, membre: discord.Member = None):
+        """Affiche les 10 dernières écoutes du serveur, numérotées pour /musique rejouer."""
+        entries = await play_history.recent(interaction.guild.id, requester_id=membre.id if membre else None)
+        if not entries:
+            await interaction.response.send_message("📭 Aucune musique n'a encore été jouée ici.", ephemeral=True)
+            return
+
+        embed = discord.Embed(title="🕘 Dernières musiques jouées", color=discord.Color.blue())
+        lines = []
+        for i, entry in enumerate(entries):
+            status = "" if entry.finished else " ⏭️"
+            lines.append(f"`{i+1}.` {entry.title} — {entry.author or 'Inconnu'} (<t:{entry.played_at}:R>){status}")
+        embed.description = "\n".join(lines)
+        if membre:
+            embed.set_footer(text=f"Demandées par {membre.display_name}")
+        else:
+            embed.set_footer(text="Utilisez /musique rejouer <numéro> pour relancer une musique.")
+        await interaction.response.send_message(embed=embed)
+
+    @music_group.command(name="top", description="Affiche les musiques les plus écoutées sur ce serveur.")
+    async def top(self, interaction: discord.Interaction):
+        """Affiche les 10 musiques les plus jouées du serveur."""
+        tracks = await play_history.top_tracks(interaction.guild.id)
+        if not tracks:
+            await interaction.response.send_message("📭 Aucune musique n'a encore été jouée ici.", ephemeral=True)
+            return
+
+        embed = discord.Embed(title="🏆 Musiques les plus écoutées", color=discord.Color.gold())
+        embed.description = "\n".join(
+            f"`{i+1}.` {track.title} — {track.author or 'Inconnu'} ({track.plays} écoute{'s' if track.plays > 1 else ''})"
+            for i, track in enumerate(tracks)
+        )
+        await interaction.response.send_message(embed=embed)
+
+    @music_group.command(name="rejouer", description="Remet dans la file une musique de l'historique.")
+    @app_commands.describe(numero="Le numéro affiché par /musique historique (1 = la plus récente).")
+    async def play_again(self, interaction: discord.Interaction, numero: app_commands.Range[int, 1, 1000] = 1):
+        """Ajoute à la file une musique déjà jouée, sans nouvelle recherche (la piste encodée est conservée)."""
+        player: wavelink.Player = interaction.guild.voice_client
+        if not player or not player.connected:
+            await interaction.response.send_message("❌ Le bot n'est pas connecté. Utilisez `/musique play` d'abord.", ephemeral=True)
+            return
+
+        entry = await play_history.get_entry(interaction.guild.id, numero)
+        if entry is None:
+            await interaction.response.send_message(f"❌ Aucune musique n°{numero} dans l'historique.", ephemeral=True)
+            return
+        await interaction.response.defer(ephemeral=True)
+
+        saved = {"encoded": entry.encoded, "uri": entry.uri, "title": entry.title, "author": entry.author, "duration": entry.length, "requester_id": interaction.user.id}
+        track = (await decode_entries(player.node, [saved]))[0]
+        # Même règle que pour /play : derrière les entrées en attente de résolution, s'il y en a.
+        lazy_queue = self._lazy_queue(player)
+        if isinstance(track, wavelink.Playable) and not len(lazy_queue) and len(player.queue) < lazy_queue.window:
+            await player.queue.put_wait(track)
+        else:
+            lazy_queue.extend([track])
+
+        if not player.playing and await lazy_queue.wait_next():
+            await player.play(player.queue.get())
+        else:
+            now_playing_updater.request_update(interaction.guild.id)
+        await interaction.followup.send(f"🔁 **{entry.title}** a été ajoutée à la file d'attente.", ephemeral=True)
+
 async def setup(bot: commands.Bot, **kwargs):
     await bot.add_cog(MusicCog(bot))
\ No newline at end of file
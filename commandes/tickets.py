@@ -4,7 +4,7 @@ from discord import app_commands
 import datetime
 import re
 import aiosqlite
-from db_manager import get_db_connection
+from db_manager import get_db_connection, guild_settings
 import asyncio
 
 class CloseTicketView(discord.ui.View):
@@ -68,6 +68,7 @@ class TicketsCog(commands.Cog, name="Tickets"):
                 async with get_db_connection() as conn:
                     await conn.execute("INSERT OR REPLACE INTO guild_settings (guild_id, ticket_category_id) VALUES (?, ?)", (interaction.guild.id, ticket_category.id))
                     await conn.commit()
+                guild_settings.invalidate(interaction.guild.id)
             except discord.Forbidden:
                 await interaction.followup.send("❌ Je n'ai pas la permission de créer une catégorie. Un admin doit me donner la permission 'Gérer les salons' ou configurer la catégorie via `/discordmaker setup`.", ephemeral=True)
                 return
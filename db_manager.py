@@ -1,5 +1,6 @@
 import aiosqlite
 import os
+from welcome_template import compile_welcome_template_or_default
 
 DB_FILE = "bot_database.db"
 
@@ -10,6 +11,75 @@ def get_db_connection():
     # On ne peut pas définir row_factory ici, on le fera après la connexion.
     return aiosqlite.connect(DB_FILE)
 
+class GlobalSettingsCache:
+    """
+    Copie en mémoire de la table `global_settings`.
+    Elle est chargée une seule fois au démarrage, puis tenue à jour par "push" :
+    celui qui modifie un paramètre (ex: le panel admin) appelle `apply()` juste après l'écriture en base.
+    Les vérifications à chaud (comme le mode maintenance) se résument donc à une simple lecture d'attribut.
+    """
+    def __init__(self):
+        self.values = {}
+        self.maintenance_mode = False
+        # Compteur incrémenté à chaque modification, pratique pour détecter un changement sans relire les valeurs.
+        self.version = 0
+
+    def apply(self, key: str, value: str | None):
+        """Met à jour une valeur du cache (et les attributs dérivés) après une écriture en base."""
+        self.values[key] = value
+        if key == 'maintenance_mode':
+            self.maintenance_mode = value == '1'
+        self.version += 1
+
+    def get(self, key: str, default: str | None = None) -> str | None:
+        return self.values.get(key, default)
+
+    async def load(self):
+        """Charge l'intégralité de la table `global_settings` dans le cache."""
+        async with get_db_connection() as conn:
+            async with conn.execute("SELECT key, value FROM global_settings") as cursor:
+                rows = await cursor.fetchall()
+        for key, value in rows:
+            self.apply(key, value)
+
+class GuildSettingsCache:
+    """
+    Cache mémoire des lignes de `guild_settings`, chargées à la demande (une requête par serveur au maximum).
+    Le modèle de bienvenue est compilé une seule fois et conservé avec les paramètres (clé `welcome_template`).
+    Toute écriture dans `guild_settings` doit être suivie d'un `invalidate()` ou d'un `store()`.
+    """
+    def __init__(self):
+        self._entries = {}
+
+    async def get(self, guild_id: int) -> dict | None:
+        """Retourne les paramètres d'un serveur (ou `None` s'il n'en a pas), en les chargeant si nécessaire."""
+        if guild_id in self._entries:
+            return self._entries[guild_id]
+
+        async with get_db_connection() as conn:
+            conn.row_factory = aiosqlite.Row
+            async with conn.execute("SELECT * FROM guild_settings WHERE guild_id = ?", (guild_id,)) as cursor:
+                row = await cursor.fetchone()
+        return self.store(guild_id, row)
+
+    def store(self, guild_id: int, row, welcome_template=None) -> dict | None:
+        """Place une ligne fraîchement lue/écrite dans le cache. Un modèle déjà compilé peut être fourni."""
+        if row is None:
+            self._entries[guild_id] = None
+            return None
+        settings = dict(row)
+        settings['welcome_template'] = welcome_template or compile_welcome_template_or_default(settings.get('welcome_message'))
+        self._entries[guild_id] = settings
+        return settings
+
+    def invalidate(self, guild_id: int):
+        """Oublie les paramètres d'un serveur : ils seront relus à la prochaine demande."""
+        self._entries.pop(guild_id, None)
+
+# Instances uniques partagées par le bot et le panel web (qui tournent dans le même processus).
+global_settings = GlobalSettingsCache()
+guild_settings = GuildSettingsCache()
+
 async def initialize_database():
     """
     Initialise toutes les tables nécessaires pour le bot si elles n'existent pas.
@@ -30,6 +100,56 @@ async def initialize_database():
             timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
         )
     ''')
+        await cursor.execute("CREATE INDEX IF NOT EXISTS idx_warnings_user ON warnings (guild_id, user_id, id)")
+
+        # Compteurs d'avertissements par (serveur, membre, jour), tenus à jour par des triggers.
+        # Ils permettent d'obtenir "combien d'avertissements sur les 30 derniers jours" sans relire l'historique.
+        await cursor.execute('''
+        CREATE TABLE IF NOT EXISTS warning_counts (
+            guild_id INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            day INTEGER NOT NULL, -- nombre de jours depuis le 01/01/1970 (UTC)
+            count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (guild_id, user_id, day)
+        )
+    ''')
+        await cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_warning_counts_insert AFTER INSERT ON warnings
+        BEGIN
+            INSERT INTO warning_counts (guild_id, user_id, day, count)
+            VALUES (NEW.guild_id, NEW.user_id, CAST(strftime('%s', NEW.timestamp) AS INTEGER) / 86400, 1)
+            ON CONFLICT (guild_id, user_id, day) DO UPDATE SET count = count + 1;
+        END
+    ''')
+        await cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_warning_counts_delete AFTER DELETE ON warnings
+        BEGIN
+            UPDATE warning_counts SET count = count - 1
+            WHERE guild_id = OLD.guild_id AND user_id = OLD.user_id AND day = CAST(strftime('%s', OLD.timestamp) AS INTEGER) / 86400;
+            DELETE FROM warning_counts
+            WHERE guild_id = OLD.guild_id AND user_id = OLD.user_id AND day = CAST(strftime('%s', OLD.timestamp) AS INTEGER) / 86400 AND count <= 0;
+        END
+    ''')
+        # Migration : les avertissements enregistrés avant l'ajout des compteurs sont comptabilisés une seule fois.
+        await cursor.execute("SELECT EXISTS (SELECT 1 FROM warning_counts)")
+        if not (await cursor.fetchone())[0]:
+            await cursor.execute('''
+            INSERT INTO warning_counts (guild_id, user_id, day, count)
+            SELECT guild_id, user_id, CAST(strftime('%s', timestamp) AS INTEGER) / 86400 AS day, COUNT(*)
+            FROM warnings GROUP BY guild_id, user_id, day
+        ''')
+
+        # Règles d'escalade automatique : à partir de `threshold` avertissements sur `window_days` jours, une sanction est appliquée.
+        await cursor.execute('''
+        CREATE TABLE IF NOT EXISTS warning_escalations (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            guild_id INTEGER NOT NULL,
+            threshold INTEGER NOT NULL,
+            window_days INTEGER, -- NULL = tout l'historique
+            action TEXT NOT NULL, -- 'timeout', 'kick', 'ban'
+            duration_seconds INTEGER -- durée du timeout ou du bannissement (NULL = bannissement définitif)
+        )
+    ''')
 
         # Table pour les logs de messages (du cog Logger)
         await cursor.execute('''
@@ -144,6 +264,115 @@ async def initialize_database():
         # Initialiser la valeur par défaut du mode maintenance s'il n'existe pas
         await cursor.execute("INSERT OR IGNORE INTO global_settings (key, value) VALUES ('maintenance_mode', '0')")
 
+        # Table des sanctions temporaires à exécuter plus tard (tempban, rôle temporaire, déverrouillage...)
+        await cursor.execute('''
+        CREATE TABLE IF NOT EXISTS scheduled_actions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            guild_id INTEGER NOT NULL,
+            action_type TEXT NOT NULL, -- 'unban', 'remove_role', 'unlock', 'extend_timeout'
+            target_id INTEGER NOT NULL,
+            due_at INTEGER NOT NULL, -- timestamp Unix (secondes)
+            payload TEXT -- données complémentaires en JSON
+        )
+        ''')
+        await cursor.execute("CREATE INDEX IF NOT EXISTS idx_scheduled_actions_due ON scheduled_actions (due_at, id)")
+        await cursor.execute("CREATE INDEX IF NOT EXISTS idx_scheduled_actions_target ON scheduled_actions (guild_id, action_type, target_id)")
+
+        # Cache persistant des recherches de musique : pistes encodées de Lavalink, par requête normalisée ou URI.
+        await cursor.execute('''
+        CREATE TABLE IF NOT EXISTS track_search_cache (
+            query TEXT PRIMARY KEY,
+            payload TEXT NOT NULL, -- JSON : pistes brutes (dont la chaîne encodée) et infos de playlist
+            created_at INTEGER NOT NULL -- timestamp Unix (secondes)
+        )
+        ''')
+        await cursor.execute("CREATE INDEX IF NOT EXISTS idx_track_search_cache_created ON track_search_cache (created_at)")
+
+        # Métadonnées des pistes jouées, une ligne par URI : l'historique n'y fait référence que par `id`.
+        await cursor.execute('''
+        CREATE TABLE IF NOT EXISTS track_metadata (
+            id INTEGER PRIMARY KEY,
+            uri TEXT NOT NULL UNIQUE,
+            title TEXT NOT NULL,
+            author TEXT,
+            length INTEGER NOT NULL DEFAULT 0, -- en millisecondes (0 pour un direct)
+            source TEXT,
+            encoded TEXT, -- piste encodée Lavalink : permet de la rejouer sans nouvelle recherche
+            updated_at INTEGER NOT NULL -- timestamp Unix (secondes)
+        )
+        ''')
+
+        # Historique d'écoute par serveur, en ajout seul (une ligne par piste terminée ou passée).
+        await cursor.execute('''
+        CREATE TABLE IF NOT EXISTS play_history (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            guild_id INTEGER NOT NULL,
+            track_id INTEGER NOT NULL REFERENCES track_metadata (id),
+            requester_id INTEGER,
+            played_at INTEGER NOT NULL, -- début de la lecture, timestamp Unix (secondes)
+            listened_ms INTEGER NOT NULL,
+            finished INTEGER NOT NULL -- 1 si la piste a été écoutée jusqu'au bout, 0 si elle a été passée ou arrêtée
+        )
+        ''')
+        await cursor.execute("CREATE INDEX IF NOT EXISTS idx_play_history_guild ON play_history (guild_id, id)")
+        await cursor.execute("CREATE INDEX IF NOT EXISTS idx_play_history_requester ON play_history (guild_id, requester_id, id)")
+
+        # Nombre d'écoutes par (serveur, piste), tenu à jour par un trigger : le "top" ne relit jamais l'historique.
+        await cursor.execute('''
+        CREATE TABLE IF NOT EXISTS track_play_counts (
+            guild_id INTEGER NOT NULL,
+            track_id INTEGER NOT NULL,
+            plays INTEGER NOT NULL DEFAULT 0,
+            last_played_at INTEGER NOT NULL,
+            PRIMARY KEY (guild_id, track_id)
+        )
+        ''')
+        await cursor.execute("CREATE INDEX IF NOT EXISTS idx_track_play_counts_top ON track_play_counts (guild_id, plays, last_played_at)")
+        await cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_track_play_counts_insert AFTER INSERT ON play_history
+        BEGIN
+            INSERT INTO track_play_counts (guild_id, track_id, plays, last_played_at)
+            VALUES (NEW.guild_id, NEW.track_id, 1, NEW.played_at)
+            ON CONFLICT (guild_id, track_id) DO UPDATE SET plays = plays + 1, last_played_at = MAX(last_played_at, NEW.played_at);
+        END
+        ''')
+
+        # Index de co-occurrence pour l'autoplay : combien de fois `next_track_id` a été jouée juste après `track_id`
+        # (tous serveurs confondus). Tenu à jour par un trigger à chaque écoute ajoutée à l'historique.
+        await cursor.execute('''
+        CREATE TABLE IF NOT EXISTS track_transitions (
+            track_id INTEGER NOT NULL,
+            next_track_id INTEGER NOT NULL,
+            count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (track_id, next_track_id)
+        ) WITHOUT ROWID
+        ''')
+        await cursor.execute("CREATE INDEX IF NOT EXISTS idx_track_transitions_top ON track_transitions (track_id, count)")
+        # Seules les écoutes enchaînées comptent : la précédente écoute du serveur a commencé moins d'une heure avant.
+        await cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_track_transitions_insert AFTER INSERT ON play_history
+        BEGIN
+            INSERT INTO track_transitions (track_id, next_track_id, count)
+            SELECT track_id, NEW.track_id, 1 FROM (
+                SELECT track_id, played_at FROM play_history WHERE guild_id = NEW.guild_id AND id < NEW.id ORDER BY id DESC LIMIT 1
+            ) WHERE track_id != NEW.track_id AND NEW.played_at - played_at < 3600
+            ON CONFLICT (track_id, next_track_id) DO UPDATE SET count = count + 1;
+        END
+        ''')
+        # Migration : les écoutes enregistrées avant l'ajout de l'index sont comptabilisées une seule fois.
+        await cursor.execute("SELECT EXISTS (SELECT 1 FROM track_transitions)")
+        if not (await cursor.fetchone())[0]:
+            await cursor.execute('''
+            INSERT INTO track_transitions (track_id, next_track_id, count)
+            SELECT previous_track_id, track_id, COUNT(*) FROM (
+                SELECT track_id, played_at,
+                       LAG(track_id) OVER (PARTITION BY guild_id ORDER BY id) AS previous_track_id,
+                       LAG(played_at) OVER (PARTITION BY guild_id ORDER BY id) AS previous_played_at
+                FROM play_history
+            ) WHERE previous_track_id IS NOT NULL AND previous_track_id != track_id AND played_at - previous_played_at < 3600
+            GROUP BY previous_track_id, track_id
+            ''')
+
         # NOUVEAU : Table pour l'historique du journal des mises à jour
         await cursor.execute('''
         CREATE TABLE IF NOT EXISTS update_vlog_history (
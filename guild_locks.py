@@ -0,0 +1,171 @@
+import asyncio
+import time
+import weakref
+from collections import deque
+from contextlib import asynccontextmanager
+from music_metrics import LatencyHistogram, prometheus_histogram
+
+# Opérations lourdes (construction, réinitialisation, restauration de la structure d'un serveur) menées en même temps,
+# tous serveurs confondus : chacune enchaîne des centaines d'appels à l'API Discord.
+MAX_HEAVY_OPERATIONS = 3
+# Bornes des temps d'attente d'un verrou, en secondes : une opération de structure dure souvent plusieurs minutes.
+LOCK_WAIT_BUCKETS = (0.001, 0.01, 0.1, 1.0, 5.0, 15.0, 30.0, 60.0, 120.0, 300.0, 600.0)
+
+class FifoSemaphore:
+    """
+    Sémaphore strictement FIFO : une place libérée est remise directement au plus ancien demandeur,
+    un nouveau venu ne peut jamais la prendre avant lui.
+    """
+    def __init__(self, value: int):
+        self._value = value
+        self._waiters = deque()
+
+    def locked(self) -> bool:
+        return self._value == 0
+
+    @property
+    def waiting(self) -> int:
+        return sum(1 for waiter in self._waiters if not waiter.done())
+
+    async def acquire(self):
+        if self._value > 0 and not self.waiting:
+            self._value -= 1
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            # La place a pu nous être remise juste avant l'annulation : on la transmet au suivant.
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            raise
+
+    def release(self):
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self._value += 1
+
+class _GuildLock:
+    """Verrou d'un serveur. Référencé faiblement par le gestionnaire : il disparaît dès que plus personne ne l'utilise."""
+    __slots__ = ("lock", "waiting", "operation", "__weakref__")
+
+    def __init__(self):
+        self.lock = asyncio.Lock()
+        self.waiting = 0
+        self.operation = None  # Nom de l'opération en cours, pour les messages d'attente
+
+class GuildLockManager:
+    """
+    Verrous des opérations critiques, un par serveur : deux serveurs différents ne s'attendent jamais l'un l'autre,
+    deux opérations sur le même serveur s'exécutent l'une après l'autre, dans leur ordre d'arrivée.
+    - Les verrous sont créés à la demande et conservés dans un `WeakValueDictionary` : aucun nettoyage à faire.
+    - Les opérations lourdes (`heavy=True`) prennent en plus une place parmi `max_heavy` (plafond global). Avec
+      `fair=True`, ces places sont attribuées strictement dans l'ordre d'arrivée (voir `FifoSemaphore`).
+    - Les temps d'attente alimentent un histogramme (page /metrics) avec les compteurs de `stats()`.
+    """
+    def __init__(self, max_heavy: int = MAX_HEAVY_OPERATIONS, fair: bool = True):
+        self.max_heavy = max_heavy
+        self.fair = fair
+        self._locks = weakref.WeakValueDictionary()  # guild_id -> _GuildLock
+        self._heavy = FifoSemaphore(max_heavy) if fair else asyncio.Semaphore(max_heavy)
+        self.wait_times = LatencyHistogram(LOCK_WAIT_BUCKETS)
+        self.acquisitions = 0
+        self.contended = 0  # Acquisitions qui ont dû attendre (serveur occupé ou plafond global atteint)
+        self.timeouts = 0
+        self.active_heavy = 0
+
+    def __len__(self) -> int:
+        """Nombre de serveurs dont le verrou est encore utilisé (tenu ou attendu)."""
+        return len(self._locks)
+
+    def _lock_for(self, guild_id: int) -> _GuildLock:
+        guild_lock = self._locks.get(guild_id)
+        if guild_lock is None:
+            guild_lock = self._locks[guild_id] = _GuildLock()
+        return guild_lock
+
+    def busy(self, guild_id: int) -> str | None:
+        """Nom de l'opération en cours sur ce serveur (ou "" si elle n'en a pas), None si le serveur est libre."""
+        guild_lock = self._locks.get(guild_id)
+        if guild_lock is None or not guild_lock.lock.locked():
+            return None
+        return guild_lock.operation or ""
+
+    @asynccontextmanager
+    async def acquire(self, guild_id: int, operation: str = "", heavy: bool = True, timeout: float | None = None):
+        """
+        `async with manager.acquire(guild.id, "start"):` — exclusif sur le serveur pendant tout le bloc.
+        Lève asyncio.TimeoutError si le verrou n'est pas obtenu en `timeout` secondes (None : attente illimitée).
+        """
+        # Cette référence forte garde le verrou en vie tant que la tâche l'attend ou le tient.
+        guild_lock = self._lock_for(guild_id)
+        started = time.perf_counter()
+        contended = guild_lock.lock.locked() or (heavy and self._heavy.locked())
+        guild_lock.waiting += 1
+        heavy_acquired = False
+
+        async def take():
+            nonlocal heavy_acquired
+            await guild_lock.lock.acquire()
+            guild_lock.operation = operation
+            try:
+                # Le verrou du serveur est pris avant la place globale : un serveur en attente de lui-même
+                # n'occupe jamais une place dont un autre serveur aurait besoin.
+                if heavy:
+                    await self._heavy.acquire()
+                    heavy_acquired = True
+            except BaseException:
+                guild_lock.operation = None
+                guild_lock.lock.release()
+                raise
+
+        try:
+            await asyncio.wait_for(take(), timeout=timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            raise
+        finally:
+            guild_lock.waiting -= 1
+
+        self.wait_times.observe(time.perf_counter() - started)
+        self.acquisitions += 1
+        self.contended += contended
+        if heavy_acquired:
+            self.active_heavy += 1
+        try:
+            yield
+        finally:
+            guild_lock.operation = None
+            if heavy_acquired:
+                self.active_heavy -= 1
+                self._heavy.release()
+            guild_lock.lock.release()
+
+    def stats(self) -> dict:
+        return {
+            "guilds": len(self._locks),
+            "waiting": sum(guild_lock.waiting for guild_lock in list(self._locks.values())),
+            "active_heavy": self.active_heavy,
+            "max_heavy": self.max_heavy,
+            "acquisitions": self.acquisitions,
+            "contended": self.contended,
+            "timeouts": self.timeouts,
+            "wait": self.wait_times.snapshot(),
+        }
+
+    def prometheus(self) -> str:
+        lines = prometheus_histogram("guild_lock_wait_seconds", "Attente des verrous d'opérations critiques par serveur.",
+                                     [('scope="guild"', self.wait_times)])
+        stats = self.stats()
+        for name, kind, help_text, value in (
+            ("guild_lock_waiting", "gauge", "Opérations en attente d'un verrou de serveur.", stats["waiting"]),
+            ("guild_lock_active_heavy", "gauge", "Opérations lourdes en cours.", stats["active_heavy"]),
+            ("guild_lock_contended_total", "counter", "Acquisitions qui ont dû attendre.", stats["contended"]),
+            ("guild_lock_timeouts_total", "counter", "Verrous non obtenus dans le délai.", stats["timeouts"]),
+        ):
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}", f"{name} {value}"]
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,50 @@
+import asyncio
+
+# Délai (en secondes) avant de déconnecter un lecteur inactif (plus rien à jouer, ou plus personne dans le salon).
+IDLE_TIMEOUT = 30
+# Délai plus court après la fin normale de la file d'attente (le message "File d'attente terminée" est déjà envoyé).
+QUEUE_END_TIMEOUT = 10
+
+class IdleTimers:
+    """
+    Minuteurs d'inactivité, un par serveur, armés et désarmés par les événements (fin/début de piste, changements vocaux).
+    Un minuteur armé ne coûte rien jusqu'à son échéance (`loop.call_later`) : aucun parcours périodique des lecteurs.
+    """
+    def __init__(self):
+        self._handles = {}  # guild_id -> TimerHandle
+        self._tasks = set()  # Rappels en cours d'exécution (gardés en référence jusqu'à leur fin)
+
+    def arm(self, guild_id: int, delay: float, callback):
+        """
+        Programme `callback()` (coroutine) dans `delay` secondes. Un minuteur déjà armé n'est pas repoussé :
+        de nouveaux événements d'inactivité ne doivent pas retarder indéfiniment la déconnexion.
+        """
+        if guild_id in self._handles:
+            return
+        loop = asyncio.get_running_loop()
+        self._handles[guild_id] = loop.call_later(delay, self._fire, guild_id, callback)
+
+    def disarm(self, guild_id: int):
+        handle = self._handles.pop(guild_id, None)
+        if handle:
+            handle.cancel()
+
+    def is_armed(self, guild_id: int) -> bool:
+        return guild_id in self._handles
+
+    def cancel_all(self):
+        for handle in self._handles.values():
+            handle.cancel()
+        self._handles.clear()
+
+    def _fire(self, guild_id: int, callback):
+        self._handles.pop(guild_id, None)
+        task = asyncio.create_task(self._run(guild_id, callback))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, guild_id: int, callback):
+        try:
+            await callback()
+        except Exception as e:
+            print(f"[Music] Erreur lors de la déconnexion pour inactivité (serveur {guild_id}): {e}")
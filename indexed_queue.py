@@ -0,0 +1,150 @@
+import itertools
+
+# Taille cible des blocs. Une insertion ou une suppression ne décale qu'un bloc ; au-delà du double, le bloc est coupé.
+CHUNK_SIZE = 256
+
+def entry_length(entry) -> int | None:
+    """Durée d'une entrée en millisecondes, ou None si elle est inconnue (recherche pas encore résolue, flux en direct)."""
+    if getattr(entry, "is_stream", False):
+        return None
+    return getattr(entry, "length", 0) or None
+
+class IndexedQueue:
+    """
+    Séquence d'entrées de file d'attente pensée pour les très longues files (playlists de plusieurs milliers de pistes).
+    - Les entrées sont rangées par blocs d'environ `CHUNK_SIZE` ; un arbre de Fenwick sur la taille des blocs retrouve
+      le bloc d'un index en O(log n). Accès, insertion et suppression par index coûtent O(log n + CHUNK_SIZE),
+      au lieu d'un décalage de toute la file.
+    - Le nombre d'entrées et la durée totale sont des compteurs tenus à jour à chaque ajout et retrait :
+      l'affichage des totaux ne parcourt jamais la file.
+    """
+    def __init__(self, entries=()):
+        self._chunks = []
+        self._tree = [0]  # Arbre de Fenwick (indexé à partir de 1) des tailles de blocs
+        self._len = 0
+        self.total_length = 0  # Somme des durées connues, en millisecondes
+        self.unknown_length = 0  # Nombre d'entrées de durée inconnue
+        self.extend(entries)
+
+    def __len__(self) -> int:
+        return self._len
+
+    def __iter__(self):
+        return itertools.chain.from_iterable(self._chunks)
+
+    def __getitem__(self, index: int):
+        chunk, offset = self._locate(self._normalize(index))
+        return self._chunks[chunk][offset]
+
+    def slice(self, start: int, stop: int) -> list:
+        """Entrées d'index `start` (inclus) à `stop` (exclu) : seuls les blocs concernés sont parcourus."""
+        start, stop = max(start, 0), min(stop, self._len)
+        if start >= stop:
+            return []
+        chunk, offset = self._locate(start)
+        entries = []
+        while len(entries) < stop - start:
+            entries.extend(self._chunks[chunk][offset:offset + stop - start - len(entries)])
+            chunk, offset = chunk + 1, 0
+        return entries
+
+    def extend(self, entries):
+        """Ajoute des entrées en fin de séquence."""
+        entries = list(entries)
+        if not entries:
+            return
+        self._account(entries, 1)
+        if self._chunks and len(self._chunks[-1]) < CHUNK_SIZE:
+            room = CHUNK_SIZE - len(self._chunks[-1])
+            self._chunks[-1].extend(entries[:room])
+            self._update(len(self._chunks) - 1, len(entries[:room]))
+            entries = entries[room:]
+        if entries:
+            self._chunks.extend(entries[i:i + CHUNK_SIZE] for i in range(0, len(entries), CHUNK_SIZE))
+            self._rebuild()
+
+    def insert(self, index: int, entries):
+        """Insère des entrées avant l'index `index` (au-delà de la fin : ajout en fin de séquence)."""
+        entries = list(entries)
+        if index >= self._len:
+            return self.extend(entries)
+        if not entries:
+            return
+        chunk, offset = self._locate(max(index, 0))
+        self._chunks[chunk][offset:offset] = entries
+        self._account(entries, 1)
+        if len(self._chunks[chunk]) > 2 * CHUNK_SIZE:
+            block = self._chunks[chunk]
+            self._chunks[chunk:chunk + 1] = [block[i:i + CHUNK_SIZE] for i in range(0, len(block), CHUNK_SIZE)]
+            self._rebuild()
+        else:
+            self._update(chunk, len(entries))
+
+    def pop(self, index: int = 0):
+        """Retire et renvoie l'entrée d'index `index` (par défaut la première)."""
+        chunk, offset = self._locate(self._normalize(index))
+        entry = self._chunks[chunk].pop(offset)
+        self._account((entry,), -1)
+        if self._chunks[chunk]:
+            self._update(chunk, -1)
+        else:
+            del self._chunks[chunk]
+            self._rebuild()
+        return entry
+
+    def popleft(self):
+        return self.pop(0)
+
+    def move(self, source: int, destination: int):
+        """Déplace l'entrée d'index `source` pour qu'elle se retrouve à l'index `destination`. Renvoie l'entrée."""
+        entry = self.pop(source)
+        self.insert(destination, (entry,))
+        return entry
+
+    def clear(self):
+        self._chunks, self._tree, self._len = [], [0], 0
+        self.total_length = self.unknown_length = 0
+
+    # --- Interne ---
+    def _normalize(self, index: int) -> int:
+        if index < 0:
+            index += self._len
+        if not 0 <= index < self._len:
+            raise IndexError("index hors de la file d'attente")
+        return index
+
+    def _account(self, entries, sign: int):
+        for entry in entries:
+            length = entry_length(entry)
+            if length is None:
+                self.unknown_length += sign
+            else:
+                self.total_length += sign * length
+            self._len += sign
+
+    def _rebuild(self):
+        """Reconstruit l'arbre de Fenwick en O(nombre de blocs) : seulement quand un bloc apparaît ou disparaît."""
+        tree = [0] + [len(chunk) for chunk in self._chunks]
+        for i in range(1, len(tree)):
+            parent = i + (i & -i)
+            if parent < len(tree):
+                tree[parent] += tree[i]
+        self._tree = tree
+
+    def _update(self, chunk: int, delta: int):
+        i = chunk + 1
+        while i < len(self._tree):
+            self._tree[i] += delta
+            i += i & -i
+
+    def _locate(self, index: int) -> tuple[int, int]:
+        """(bloc, position dans le bloc) de l'entrée d'index `index`, par descente dans l'arbre de Fenwick."""
+        position, remaining = 0, index
+        step = 1 << (len(self._tree) - 1).bit_length()
+        while step:
+            following = position + step
+            if following < len(self._tree) and self._tree[following] <= remaining:
+                position = following
+                remaining -= self._tree[following]
+            step >>= 1
+        return position, remaining
@@ -0,0 +1,146 @@
+import asyncio
+import random
+import re
+import wavelink
+from indexed_queue import IndexedQueue, entry_length
+
+# Nombre de pistes gardées résolues (prêtes à jouer) en tête de file. Le reste n'est résolu qu'à l'approche de la lecture.
+PREFETCH_WINDOW = 5
+
+class LazyTrack:
+    """
+    Entrée de file d'attente non résolue : seulement la requête (ou l'URI) et de quoi l'afficher.
+    Elle expose les mêmes attributs qu'une piste pour l'affichage et la sauvegarde (`uri`, `title`, `author`, `length`, `extras`).
+    """
+    __slots__ = ("uri", "title", "author", "length", "extras")
+
+    def __init__(self, query: str, title: str | None = None, author: str | None = None, length: int = 0, requester_id: int | None = None):
+        self.uri = query
+        self.title = title or re.sub(r'^\w+search:', '', query).strip()
+        self.author = author
+        self.length = length
+        self.extras = {"requester_id": requester_id} if requester_id else {}
+
+class LazyQueue:
+    """
+    Suite de la file d'attente d'un lecteur, au-delà de la fenêtre de préchargement.
+    La file wavelink (`player.queue`) ne contient que les `window` prochaines pistes, déjà résolues ;
+    les entrées suivantes (LazyTrack, ou pistes déjà résolues repoussées en attente) restent ici.
+    Dès que la file wavelink se vide sous la fenêtre, les entrées suivantes sont résolues en tâche de fond :
+    la mémoire et la charge Lavalink suivent la lecture, pas la longueur de la file.
+    Les index des méthodes `window`, `pop`, `move` et `insert` désignent la file complète (pistes résolues, puis en attente).
+    """
+    def __init__(self, player: wavelink.Player, resolve, window: int = PREFETCH_WINDOW):
+        self.player = player
+        # resolve(entry: LazyTrack) -> wavelink.Playable | None
+        self.resolve = resolve
+        self.window = window
+        self.pending = IndexedQueue()
+        self._task = None
+
+    def __len__(self) -> int:
+        return len(self.pending)
+
+    def __iter__(self):
+        return iter(self.pending)
+
+    def extend(self, entries):
+        """Ajoute des entrées en fin de file."""
+        self.pending.extend(entries)
+        self.refill()
+
+    def insert(self, index: int, entries: list):
+        """Insère des entrées à la position `index` de la file complète (pistes résolues puis entrées en attente)."""
+        queue = self.player.queue
+        if index < len(queue):
+            # Les pistes résolues situées après le point d'insertion repassent en attente, derrière les nouvelles entrées.
+            tail = [queue[i] for i in range(index, len(queue))]
+            for i in range(len(queue) - 1, index - 1, -1):
+                queue.delete(i)
+            self.pending.insert(0, tail)
+            index = len(queue)
+        self.pending.insert(index - len(queue), entries)
+        self.refill()
+
+    def slice(self, start: int, stop: int) -> list:
+        """Entrées d'index `start` à `stop` (exclu) de la file complète, sans parcourir le reste de la file."""
+        queue = self.player.queue
+        resolved = [queue[i] for i in range(max(start, 0), min(stop, len(queue)))]
+        return resolved + self.pending.slice(start - len(queue), stop - len(queue))
+
+    def pop(self, index: int):
+        """Retire et renvoie l'entrée d'index `index` de la file complète."""
+        queue = self.player.queue
+        if index < len(queue):
+            entry = queue[index]
+            queue.delete(index)
+        else:
+            entry = self.pending.pop(index - len(queue))
+        self.refill()
+        return entry
+
+    def move(self, source: int, destination: int):
+        """Déplace l'entrée d'index `source` à l'index `destination` de la file complète. Renvoie l'entrée."""
+        entry = self.pop(source)
+        self.insert(destination, [entry])
+        return entry
+
+    @property
+    def total_length(self) -> int:
+        """Durée connue de la file complète en millisecondes (compteur de l'attente + fenêtre résolue, bornée)."""
+        return self.pending.total_length + sum(entry_length(track) or 0 for track in self.player.queue)
+
+    @property
+    def unknown_length(self) -> int:
+        """Nombre d'entrées de la file complète dont la durée est inconnue."""
+        return self.pending.unknown_length + sum(entry_length(track) is None for track in self.player.queue)
+
+    def clear(self):
+        self.pending.clear()
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    def shuffle(self):
+        """Mélange la file complète ; seules les entrées qui arrivent dans la fenêtre sont ensuite résolues."""
+        entries = list(self.player.queue) + list(self.pending)
+        random.shuffle(entries)
+        self.player.queue.clear()
+        self.pending = IndexedQueue(entries)
+        self.refill()
+
+    def refill(self):
+        """Lance (si besoin) la résolution en tâche de fond des entrées qui entrent dans la fenêtre."""
+        if self.pending and len(self.player.queue) < self.window and (self._task is None or self._task.done()):
+            self._task = asyncio.create_task(self.fill())
+
+    async def fill(self):
+        """Résout les entrées en attente jusqu'à remplir la fenêtre (les entrées introuvables sont ignorées)."""
+        while self.pending and len(self.player.queue) < self.window:
+            # L'entrée reste en tête de l'attente pendant sa recherche : les index, `pop`, `move`, `shuffle`
+            # et `clear` la voient toujours. Elle n'est retirée qu'une fois la recherche terminée.
+            entry = self.pending[0]
+            if isinstance(entry, wavelink.Playable):
+                track = entry
+            else:
+                try:
+                    track = await self.resolve(entry)
+                except Exception as e:
+                    print(f"[Music] Impossible de résoudre '{entry.uri}': {e}")
+                    track = None
+            if not self.pending or self.pending[0] is not entry:
+                # Retirée, déplacée, mélangée ou devancée par une insertion pendant la recherche :
+                # le résultat est ignoré et c'est la nouvelle tête de l'attente qui est résolue.
+                continue
+            self.pending.popleft()
+            if track is not None:
+                self.player.queue.put(track)
+
+    async def wait_next(self) -> bool:
+        """Attend qu'une piste soit prête en tête de file. Renvoie False s'il n'y a plus rien à jouer."""
+        # On passe toujours par la tâche de fond : deux remplissages simultanés pourraient inverser l'ordre des pistes.
+        # `asyncio.wait` n'annule pas la tâche si l'appelant est annulé, et ne lève rien si `clear` l'annule.
+        while self.player.queue.is_empty and self.pending:
+            self.refill()
+            await asyncio.wait([self._task])
+        return not self.player.queue.is_empty
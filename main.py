@@ -4,6 +4,7 @@ import os
 import aiosqlite
 import asyncio # noqa
 import datetime # noqa
+import math
 
 #chargement des variables d'environnement depuis le fichier .env (DOIT ÊTRE FAIT AVANT LES AUTRES IMPORTS)
 # C'est crucial de charger les variables d'environnement AVANT d'importer les modules qui en dépendent.
@@ -15,6 +16,13 @@ import wavelink
 from discord.ext import commands
 from discord.ext import tasks
 import db_manager # Notre gestionnaire pour la base de données
+from mod_log import ModLogDispatcher
+from rate_limiter import CommandRateLimiter
+from track_cache import track_cache
+from play_history import play_history
+from music_metrics import music_metrics
+from guild_locks import GuildLockManager
+from node_manager import NodeManager
 
 #chargement des variables d'environnement
 DISCORD_TOKEN = os.getenv("DISCORD_TOKEN")
@@ -39,9 +47,25 @@ print("[Startup] Initialisation de la base de données...")
 # Pour un bot public à grande échelle, il serait plus optimisé de n'activer que les intents nécessaires.
 intents = discord.Intents.all()
 bot = commands.Bot(command_prefix="!", intents=intents, help_command=None)
-# Ce verrou est utilisé pour protéger les opérations critiques (comme la reconstruction d'un serveur)
-# afin d'éviter que plusieurs commandes conflictuelles ne s'exécutent en même temps.
-bot.critical_operation_lock = asyncio.Lock()
+# Verrous des opérations critiques (comme la reconstruction d'un serveur), un par serveur : deux commandes
+# conflictuelles ne s'exécutent pas en même temps sur un serveur, mais les autres serveurs ne les attendent pas.
+bot.guild_locks = GuildLockManager()
+# Cache mémoire des paramètres globaux (mode maintenance, etc.), mis à jour par le panel admin.
+bot.global_settings = db_manager.global_settings
+# Cache mémoire des paramètres par serveur (salon de logs, bienvenue pré-compilée, etc.).
+bot.guild_settings = db_manager.guild_settings
+# Répartiteur des logs de modération : regroupe les embeds par serveur et les envoie par paquets.
+bot.mod_log = ModLogDispatcher(bot)
+# Limiteur de fréquence des commandes slash (par utilisateur, par serveur ou global), voir rate_limiter.py.
+bot.rate_limiter = CommandRateLimiter()
+# Cache des recherches de musique (mémoire + base de données), avec ses compteurs de hits/misses.
+bot.track_cache = track_cache
+# Historique d'écoute par serveur (écritures groupées), pour /musique historique, top et rejouer.
+bot.play_history = play_history
+# Histogrammes de latence de la lecture (étapes de /musique play, recherches par nœud), affichés sur /status et /metrics.
+bot.music_metrics = music_metrics
+# Surveillance des nœuds Lavalink (latence, charge) : choix du nœud des nouveaux lecteurs et migration si un nœud se dégrade.
+bot.node_manager = NodeManager()
 
 bot.creator_id = CREATOR_ID
 # --- Configuration Lavalink ---
@@ -70,6 +94,10 @@ async def cleanup_old_logs():
             await db.commit()
             if rows_deleted > 0:
                 print(f"[Log Cleanup] Tâche de nettoyage terminée. {rows_deleted} log(s) de message de plus de 12 mois ont été supprimés.")
+
+        expired_searches = await bot.track_cache.purge_expired()
+        if expired_searches > 0:
+            print(f"[Log Cleanup] {expired_searches} résultat(s) de recherche musicale expiré(s) supprimé(s) du cache.")
     except Exception as e:
         print(f"[ERREUR - Log Cleanup] Une erreur est survenue lors du nettoyage des anciens logs : {e}")
 
@@ -79,6 +107,9 @@ async def cleanup_old_logs():
 async def on_wavelink_inactive_node(node: wavelink.Node):
     """Gère le cas où un nœud Lavalink (pour la musique) devient subitement inactif."""
     print(f"[Lavalink - ERREUR] Le nœud '{node.identifier}' est devenu inactif. Wavelink tentera de se reconnecter.")
+    # Les lecteurs du nœud sont déplacés vers un nœud sain (même piste, même position, même file d'attente).
+    bot.node_manager.record_failure(node)
+    await bot.node_manager.migrate_players(node)
     if CREATOR_ID:
         creator = await bot.fetch_user(int(CREATOR_ID))
         if creator:
@@ -96,10 +127,11 @@ async def setup_hook():
     """Cette fonction spéciale est appelée par discord.py avant que le bot ne soit complètement en ligne.
     C'est l'endroit idéal pour initialiser les services asynchrones comme la base de données et Lavalink."""
     await db_manager.initialize_database()
+    await bot.global_settings.load()
     print("[Startup] Base de données initialisée.")
     
     # On prépare la connexion à tous les nœuds Lavalink définis dans la configuration.
-    # Wavelink gérera ensuite la répartition de la charge et les reconnexions.
+    # Wavelink gère les reconnexions ; la répartition des lecteurs est confiée à `bot.node_manager`.
     nodes = []
     for config in LAVALINK_NODES:
         nodes.append(wavelink.Node(
@@ -107,7 +139,10 @@ async def setup_hook():
             password=config['password'],
             identifier=config.get('region', config['host']) # Utilise la région comme identifiant pour plus de clarté
         ))
-    await wavelink.Pool.connect(nodes=nodes, client=bot, cache_capacity=100)
+    # Pas de cache interne à wavelink : il renvoie les mêmes objets piste à tous les serveurs.
+    # Les recherches passent par `bot.track_cache`, qui reconstruit des pistes neuves à chaque accès.
+    await wavelink.Pool.connect(nodes=nodes, client=bot)
+    bot.node_manager.start()
 
     # On charge toutes les extensions (cogs) qui se trouvent dans le dossier 'commandes'.
     print("[Startup] Chargement des Cogs...")
@@ -123,33 +158,38 @@ async def setup_hook():
     synced = await bot.tree.sync()
     print(f"[Startup] {len(synced)} commande(s) synchronisée(s) globalement.")
 
-@bot.tree.interaction_check
-async def maintenance_check(interaction: discord.Interaction):
-    """Ce 'check' est exécuté avant chaque commande slash pour vérifier si le mode maintenance est actif."""
+async def global_interaction_check(interaction: discord.Interaction) -> bool:
+    """
+    Ce 'check' est exécuté avant chaque commande slash : il vérifie le mode maintenance,
+    puis la limite de fréquence de la commande.
+    """
     # Ne s'applique pas aux interactions de composants (boutons, menus) pour que les vues persistantes continuent de fonctionner
     # C'est important pour que les boutons de musique ou de rôles marchent même en mode maintenance.
     if interaction.type != discord.InteractionType.application_command:
         return True
 
-    try:
-        async with db_manager.get_db_connection() as db:
-            cursor = await db.execute("SELECT value FROM global_settings WHERE key = 'maintenance_mode'")
-            maintenance_mode = await cursor.fetchone()
-        
-        if maintenance_mode and maintenance_mode['value'] == '1':
-            # Vérifie si l'utilisateur est un admin du bot
-            user_id_str = str(interaction.user.id) # On compare des chaînes pour éviter les erreurs de type
-            if user_id_str in ADMIN_BOT_IDS:
-                return True  # Les admins peuvent utiliser le bot
-            else:
-                await interaction.response.send_message("🔧 Le bot est actuellement en maintenance. Veuillez réessayer plus tard.", ephemeral=True)
-                return False  # Bloque la commande pour les autres
-        return True
-    except Exception as e:
-        print(f"[ERREUR] Échec de la vérification du mode maintenance : {e}")
-        # En cas d'erreur (ex: DB inaccessible), on autorise la commande par sécurité pour ne pas bloquer tout le bot.
+    # Les admins du bot ne sont soumis ni à la maintenance ni aux limites de fréquence.
+    user_id_str = str(interaction.user.id) # On compare des chaînes pour éviter les erreurs de type
+    if user_id_str in ADMIN_BOT_IDS:
         return True
 
+    # Lecture directe du cache mémoire : aucun accès à la base de données ici.
+    # Le panel admin pousse les changements dans `bot.global_settings` dès qu'il les enregistre.
+    if bot.global_settings.maintenance_mode:
+        await interaction.response.send_message("🔧 Le bot est actuellement en maintenance. Veuillez réessayer plus tard.", ephemeral=True)
+        return False  # Bloque la commande pour les autres
+
+    if interaction.command is not None:
+        command_name = interaction.command.qualified_name
+        retry_after = bot.rate_limiter.check(command_name, interaction.user.id, interaction.guild_id)
+        if retry_after is not None:
+            await interaction.response.send_message(f"⏳ Doucement ! Vous pourrez réutiliser `/{command_name}` dans {math.ceil(retry_after)} seconde(s).", ephemeral=True)
+            return False
+    return True
+
+# `interaction_check` est une méthode de CommandTree : on la remplace sur l'instance pour qu'elle soit appelée avant chaque commande.
+bot.tree.interaction_check = global_interaction_check
+
 @bot.event
 async def on_interaction(interaction: discord.Interaction):
     """
@@ -239,11 +279,24 @@ async def on_ready():
 @bot.event
 async def close():
     """Cette fonction est appelée lorsque le bot s'arrête, pour un nettoyage propre."""
+    # Les lecteurs de musique actifs sont sauvegardés en premier (positions exactes) pour reprendre au prochain démarrage.
+    music_cog = bot.get_cog("MusicCog")
+    if music_cog:
+        saved_players = await music_cog.snapshot_sessions()
+        print(f"[Shutdown] {saved_players} lecteur(s) de musique sauvegardé(s) pour la reprise automatique.")
+
     # On s'assure que tous les logs en attente sont bien écrits dans la base de données.
     logger_cog = bot.get_cog("LoggerCog")
     if logger_cog:
         print("[Shutdown] Écriture des logs restants...")
         await logger_cog.flush_logs()
+
+    # On envoie les logs de modération encore en attente.
+    await bot.mod_log.close()
+    # Et les résultats de recherche pas encore enregistrés dans le cache persistant.
+    await bot.track_cache.flush()
+    await bot.play_history.close()
     
+    await bot.node_manager.close()
     await wavelink.Pool.close()
     print("[Shutdown] Connexions aux noeuds Lavalink fermées.")
\ No newline at end of file
@@ -0,0 +1,122 @@
+import asyncio
+import discord
+from db_manager import guild_settings
+
+# Limites imposées par Discord pour un seul message.
+MAX_EMBEDS_PER_MESSAGE = 10
+MAX_EMBED_CHARS_PER_MESSAGE = 6000
+# Délai maximal (en secondes) entre la mise en file d'un log et son envoi.
+FLUSH_DEADLINE = 2.0
+WEBHOOK_NAME = "Logs de modération"
+
+class ModLogDispatcher:
+    """
+    Regroupe les embeds de logs de modération par serveur et les envoie par paquets (jusqu'à 10 embeds par message).
+    Les commandes se contentent d'appeler `enqueue()` et n'attendent jamais l'envoi.
+    Les envois d'un même serveur sont faits l'un après l'autre ; les buckets de rate-limit par route
+    (salon ou webhook) et les réponses 429 sont gérés par le client HTTP de discord.py.
+    """
+    def __init__(self, bot, use_webhooks: bool = True, flush_deadline: float = FLUSH_DEADLINE):
+        self.bot = bot
+        self.use_webhooks = use_webhooks
+        self.flush_deadline = flush_deadline
+        self._pending = {}   # guild_id -> liste d'embeds en attente
+        self._wakeups = {}   # guild_id -> Event levé quand un message complet est prêt
+        self._tasks = {}     # guild_id -> tâche d'envoi programmée
+        self._webhooks = {}  # channel_id -> Webhook (ou None si indisponible)
+
+    def enqueue(self, guild_id: int, embed: discord.Embed):
+        """Ajoute un embed à la file du serveur. L'envoi a lieu au plus tard après `flush_deadline` secondes."""
+        pending = self._pending.setdefault(guild_id, [])
+        pending.append(embed)
+
+        if guild_id not in self._tasks:
+            self._wakeups[guild_id] = asyncio.Event()
+            self._tasks[guild_id] = asyncio.create_task(self._deliver_after_deadline(guild_id))
+        # Inutile d'attendre la fin du délai si on a déjà de quoi remplir un message.
+        if len(pending) >= MAX_EMBEDS_PER_MESSAGE:
+            self._wakeups[guild_id].set()
+
+    async def _deliver_after_deadline(self, guild_id: int):
+        try:
+            try:
+                await asyncio.wait_for(self._wakeups[guild_id].wait(), timeout=self.flush_deadline)
+            except asyncio.TimeoutError:
+                pass
+            await self.flush(guild_id)
+        except Exception as e:
+            print(f"[ModLog] Erreur lors de l'envoi des logs du serveur {guild_id}: {e}")
+        finally:
+            self._tasks.pop(guild_id, None)
+            self._wakeups.pop(guild_id, None)
+
+    async def flush(self, guild_id: int):
+        """Envoie immédiatement tous les logs en attente d'un serveur."""
+        pending = self._pending.get(guild_id)
+        if not pending:
+            return
+
+        settings = await guild_settings.get(guild_id)
+        channel_id = settings['mod_log_channel_id'] if settings else None
+        log_channel = self.bot.get_channel(channel_id) if channel_id else None
+        if not log_channel:
+            # Aucun salon de logs configuré (ou salon supprimé) : les logs sont abandonnés.
+            self._pending.pop(guild_id, None)
+            return
+
+        # Les logs ajoutés pendant un envoi sont pris en compte par les tours suivants de la boucle.
+        while pending:
+            await self._send(log_channel, self._take_batch(pending))
+        self._pending.pop(guild_id, None)
+
+    async def close(self):
+        """Annule les envois programmés et vide toutes les files (appelé à l'arrêt du bot)."""
+        for task in list(self._tasks.values()):
+            task.cancel()
+        for guild_id in list(self._pending):
+            try:
+                await self.flush(guild_id)
+            except Exception as e:
+                print(f"[ModLog] Impossible de vider les logs du serveur {guild_id}: {e}")
+
+    @staticmethod
+    def _take_batch(pending: list) -> list:
+        """Retire du début de la file autant d'embeds que peut en contenir un seul message."""
+        batch = [pending.pop(0)]
+        total_chars = len(batch[0])
+        while pending and len(batch) < MAX_EMBEDS_PER_MESSAGE and total_chars + len(pending[0]) <= MAX_EMBED_CHARS_PER_MESSAGE:
+            total_chars += len(pending[0])
+            batch.append(pending.pop(0))
+        return batch
+
+    async def _send(self, log_channel: discord.TextChannel, embeds: list):
+        webhook = await self._get_webhook(log_channel) if self.use_webhooks else None
+        try:
+            if webhook:
+                try:
+                    await webhook.send(embeds=embeds, username=self.bot.user.name, avatar_url=self.bot.user.display_avatar.url)
+                    return
+                except discord.NotFound:
+                    # Le webhook a été supprimé entre-temps : on repasse par le salon.
+                    self._webhooks.pop(log_channel.id, None)
+            await log_channel.send(embeds=embeds)
+        except discord.Forbidden:
+            print(f"Permissions manquantes pour envoyer des logs dans le salon {log_channel.id} du serveur {log_channel.guild.id}")
+        except discord.HTTPException as e:
+            print(f"Erreur HTTP lors de l'envoi des logs: {e}")
+
+    async def _get_webhook(self, log_channel: discord.TextChannel) -> discord.Webhook | None:
+        """Récupère (ou crée) le webhook du bot dans le salon de logs. Renvoie None si ce n'est pas possible."""
+        if log_channel.id in self._webhooks:
+            return self._webhooks[log_channel.id]
+
+        webhook = None
+        if log_channel.permissions_for(log_channel.guild.me).manage_webhooks:
+            try:
+                webhook = discord.utils.get(await log_channel.webhooks(), name=WEBHOOK_NAME, user=self.bot.user)
+                if webhook is None:
+                    webhook = await log_channel.create_webhook(name=WEBHOOK_NAME, reason="Envoi groupé des logs de modération")
+            except discord.HTTPException:
+                webhook = None
+        self._webhooks[log_channel.id] = webhook
+        return webhook
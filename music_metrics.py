@@ -0,0 +1,123 @@
+import bisect
+import time
+from contextlib import contextmanager
+
+# Bornes supérieures des intervalles des histogrammes, en secondes (la dernière classe, +Inf, est implicite).
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Étapes mesurées d'un `/musique play`, dans l'ordre du parcours.
+STAGES = {
+    "defer": "Accusé de réception de l'interaction (defer)",
+    "connect": "Connexion au salon vocal",
+    "spotify": "Lecture d'un lien Spotify",
+    "search": "Recherche (cache ou Lavalink)",
+    "queue": "Ajout à la file d'attente",
+    "play": "Envoi de la piste à Lavalink (player.play)",
+    "track_start": "Entre player.play et l'événement track_start",
+    "total": "De la commande au début de la lecture",
+}
+
+class LatencyHistogram:
+    """Histogramme à intervalles fixes : mémoire constante, enregistrement en O(log n), percentiles approchés."""
+    def __init__(self, buckets: tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds: float):
+        seconds = max(seconds, 0.0)
+        self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+        self.max = max(self.max, seconds)
+
+    def percentile(self, q: float) -> float | None:
+        """
+        Borne supérieure de l'intervalle qui contient le q-ième percentile (0 < q <= 100), ou None sans mesure.
+        Au-delà du dernier intervalle, c'est le maximum observé qui est renvoyé.
+        """
+        if not self.count:
+            return None
+        rank = q / 100 * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank and count:
+                return min(self.buckets[index], self.max) if index < len(self.buckets) else self.max
+        return self.max
+
+    def snapshot(self) -> dict:
+        return {
+            "count": self.count,
+            "mean": self.sum / self.count if self.count else None,
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99),
+            "max": self.max if self.count else None,
+        }
+
+def prometheus_histogram(name: str, help_text: str, series: list[tuple[str, LatencyHistogram]]) -> list[str]:
+    """Lignes d'exposition Prometheus d'une famille d'histogrammes (`series` : étiquettes, histogramme)."""
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+    for labels, histogram in series:
+        cumulative = 0
+        for bound, count in zip((*histogram.buckets, "+Inf"), histogram.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+        lines.append(f"{name}_sum{{{labels}}} {histogram.sum:.6f}")
+        lines.append(f"{name}_count{{{labels}}} {histogram.count}")
+    return lines
+
+class MusicMetrics:
+    """
+    Durées des étapes de la lecture (voir `STAGES`) et des recherches envoyées à chaque nœud Lavalink.
+    Tout se passe dans la boucle asyncio du bot : pas de verrou, et une mesure ne coûte qu'un appel à `perf_counter`.
+    """
+    def __init__(self):
+        self.stages = {stage: LatencyHistogram() for stage in STAGES}
+        self.node_searches = {}  # identifiant du nœud -> LatencyHistogram
+        self.node_search_errors = {}  # identifiant du nœud -> nombre de recherches en échec
+
+    def observe(self, stage: str, seconds: float):
+        self.stages[stage].observe(seconds)
+
+    @contextmanager
+    def span(self, stage: str):
+        """Mesure la durée du bloc `with`, y compris s'il se termine par une exception (un délai dépassé reste une latence)."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - started)
+
+    def observe_search(self, node_id: str, seconds: float, failed: bool = False):
+        self.node_searches.setdefault(node_id, LatencyHistogram()).observe(seconds)
+        if failed:
+            self.node_search_errors[node_id] = self.node_search_errors.get(node_id, 0) + 1
+
+    def snapshot(self) -> dict:
+        """Résumé (nombre, moyenne, percentiles, en secondes) pour la page de statut et le point d'accès JSON."""
+        return {
+            "stages": {stage: {"label": label, **self.stages[stage].snapshot()} for stage, label in STAGES.items()},
+            "nodes": {
+                node_id: {**histogram.snapshot(), "errors": self.node_search_errors.get(node_id, 0)}
+                for node_id, histogram in sorted(self.node_searches.items())
+            },
+        }
+
+    def prometheus(self) -> str:
+        """Histogrammes au format texte d'exposition de Prometheus (compteurs cumulés par borne `le`)."""
+        lines = prometheus_histogram("music_stage_duration_seconds", "Durée des étapes de /musique play.",
+                                     [(f'stage="{stage}"', self.stages[stage]) for stage in STAGES])
+        lines += prometheus_histogram("lavalink_search_duration_seconds", "Durée des recherches envoyées à chaque nœud Lavalink.",
+                                      [(f'node="{node_id}"', hist) for node_id, hist in sorted(self.node_searches.items())])
+        lines.append("# HELP lavalink_search_errors_total Recherches Lavalink en échec.")
+        lines.append("# TYPE lavalink_search_errors_total counter")
+        for node_id, errors in sorted(self.node_search_errors.items()):
+            lines.append(f'lavalink_search_errors_total{{node="{node_id}"}} {errors}')
+        return "\n".join(lines) + "\n"
+
+# Instance partagée (exposée sur `bot.music_metrics`).
+music_metrics = MusicMetrics()
@@ -0,0 +1,175 @@
+import asyncio
+import json
+import os
+import tempfile
+import time
+import wavelink
+from lazy_queue import LazyTrack
+
+# --- Constantes ---
+STATE_BACKUP_DIR = "music_state_backups"
+# Version du format de sauvegarde (1 : URI et titre seulement ; 2 : pistes encodées Lavalink + position de lecture).
+STATE_FORMAT_VERSION = 2
+# Instantané de tous les lecteurs actifs, écrit à l'arrêt du bot et relu (puis supprimé) au démarrage.
+SESSIONS_FILE = "sessions.json"
+# Au-delà, l'instantané est trop vieux pour une reprise automatique (les auditeurs sont partis, la position n'a plus de sens).
+SESSIONS_MAX_AGE = 15 * 60
+
+def _state_path(guild_id: int) -> str:
+    return os.path.join(STATE_BACKUP_DIR, f"{guild_id}.json")
+
+def _sessions_path() -> str:
+    return os.path.join(STATE_BACKUP_DIR, SESSIONS_FILE)
+
+def entry_to_dict(entry) -> dict:
+    """Convertit une entrée de file (piste wavelink ou LazyTrack) en dictionnaire sauvegardable."""
+    return {
+        "encoded": getattr(entry, "encoded", None),  # Absent pour les entrées jamais résolues
+        "uri": entry.uri,
+        "title": entry.title,
+        "author": entry.author,
+        "duration": entry.length,
+        # `extras` est un dict pour une LazyTrack, un ExtrasNamespace (itérable en paires clé/valeur) pour une piste wavelink.
+        "requester_id": dict(entry.extras).get("requester_id"),
+    }
+
+def build_state(player: wavelink.Player, entries) -> dict:
+    """
+    Capture l'état du lecteur (piste en cours et sa position, file d'attente, volume, boucle).
+    Doit être appelée sur la boucle d'événements : elle lit le lecteur, l'écriture du fichier se fait ailleurs.
+    """
+    queue_data = [entry_to_dict(entry) for entry in entries]
+    position = 0
+    if player.current:
+        queue_data.insert(0, entry_to_dict(player.current))
+        position = int(player.position)
+    return {
+        "version": STATE_FORMAT_VERSION,
+        "queue": queue_data,
+        "position": position,
+        "loop_mode": str(player.queue.mode).split('.')[-1].lower(),
+        "volume": player.volume,
+    }
+
+def build_session(player: wavelink.Player, entries) -> dict:
+    """État d'un lecteur (voir `build_state`) et de quoi le reconnecter : salon vocal, salon des messages, pause."""
+    home = getattr(player, "home", None)
+    return {
+        "guild_id": player.guild.id,
+        "channel_id": player.channel.id,
+        "home_channel_id": home.id if home else None,
+        "paused": player.paused,
+        "autoplay": getattr(player, "autoplay_radio", False),
+        "state": build_state(player, entries),
+    }
+
+def _write_json_atomic(path: str, data: dict, prefix: str):
+    """
+    Écrit un fichier JSON de façon atomique : fichier temporaire dans le même dossier puis `os.replace`.
+    Un arrêt brutal en pleine écriture laisse l'ancien fichier intact au lieu d'un JSON tronqué.
+    """
+    os.makedirs(STATE_BACKUP_DIR, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=STATE_BACKUP_DIR, prefix=prefix, suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f, separators=(',', ':'), ensure_ascii=False)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+def write_state_file(guild_id: int, state_data: dict):
+    _write_json_atomic(_state_path(guild_id), state_data, prefix=f".{guild_id}.")
+
+def read_state_file(guild_id: int) -> dict | None:
+    filepath = _state_path(guild_id)
+    if not os.path.exists(filepath):
+        return None
+    try:
+        with open(filepath, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (json.JSONDecodeError, TypeError, UnicodeDecodeError):
+        # Si le fichier est corrompu, on le supprime
+        os.remove(filepath)
+        return None
+
+async def save_state(player: wavelink.Player, guild_id: int, entries):
+    """Sauvegarde l'état du lecteur ; la sérialisation et l'écriture disque se font hors de la boucle d'événements."""
+    state_data = build_state(player, entries)
+    await asyncio.to_thread(write_state_file, guild_id, state_data)
+
+async def load_state(guild_id: int) -> dict | None:
+    """Charge les données de l'état sauvegardé pour un serveur, s'il en existe."""
+    return await asyncio.to_thread(read_state_file, guild_id)
+
+def write_sessions_file(sessions: list[dict]):
+    _write_json_atomic(_sessions_path(), {"version": STATE_FORMAT_VERSION, "saved_at": time.time(), "sessions": sessions}, prefix=".sessions.")
+
+def take_sessions_file(max_age: float = SESSIONS_MAX_AGE) -> list[dict]:
+    """
+    Lit puis supprime l'instantané des lecteurs : une reprise qui planterait le bot ne serait pas rejouée
+    à chaque redémarrage. Renvoie une liste vide s'il n'y en a pas, s'il est illisible ou trop ancien ;
+    dans ce dernier cas, chaque file devient une sauvegarde classique, proposée à la restauration au prochain /play.
+    """
+    filepath = _sessions_path()
+    if not os.path.exists(filepath):
+        return []
+    try:
+        with open(filepath, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (json.JSONDecodeError, TypeError, UnicodeDecodeError):
+        data = {}
+    finally:
+        os.remove(filepath)
+    if time.time() - data.get("saved_at", 0) > max_age:
+        for session in data.get("sessions", []):
+            write_state_file(session["guild_id"], session["state"])
+        return []
+    return data.get("sessions", [])
+
+async def save_sessions(sessions: list[dict]):
+    await asyncio.to_thread(write_sessions_file, sessions)
+
+async def load_sessions() -> list[dict]:
+    return await asyncio.to_thread(take_sessions_file)
+
+def delete_state(guild_id: int):
+    """Supprime le fichier de sauvegarde d'un serveur, généralement après restauration ou si l'utilisateur l'ignore."""
+    filepath = _state_path(guild_id)
+    if os.path.exists(filepath):
+        os.remove(filepath)
+
+async def decode_entries(node: wavelink.Node, queue_data: list[dict]) -> list:
+    """
+    Reconstruit les entrées d'une file sauvegardée, dans l'ordre, sans aucune recherche :
+    toutes les pistes encodées sont décodées en une seule requête Lavalink (`/v4/decodetracks`).
+    Les entrées sans piste encodée (ancien format, entrées jamais résolues) ou que Lavalink ne sait plus
+    décoder redeviennent des LazyTrack, recherchées par URI à l'approche de leur lecture.
+    """
+    def lazy(data: dict) -> LazyTrack:
+        return LazyTrack(data["uri"], data.get("title"), data.get("author"), data.get("duration") or 0, data.get("requester_id"))
+
+    queue_data = [data for data in queue_data if data.get("uri") or data.get("encoded")]
+    encoded = [data["encoded"] for data in queue_data if data.get("encoded")]
+    decoded = []
+    if encoded:
+        try:
+            decoded = await node.send("POST", path="v4/decodetracks", data=encoded)
+        except Exception as e:
+            print(f"[Music] Décodage des pistes sauvegardées impossible, recherche par URI à la place : {e}")
+        if not isinstance(decoded, list) or len(decoded) != len(encoded):
+            decoded = []
+
+    decoded_iter = iter(decoded)
+    entries = []
+    for data in queue_data:
+        payload = next(decoded_iter, None) if decoded and data.get("encoded") else None
+        if payload is None:
+            if data.get("uri"):
+                entries.append(lazy(data))
+            continue
+        track = wavelink.Playable(payload)
+        track.extras = {"requester_id": data.get("requester_id")}
+        entries.append(track)
+    return entries
@@ -0,0 +1,178 @@
+import asyncio
+import time
+import wavelink
+
+# Intervalle (en secondes) entre deux sondages de l'état des nœuds Lavalink.
+PROBE_INTERVAL = 30
+# Poids de la dernière mesure dans la moyenne glissante du temps de réponse.
+RTT_SMOOTHING = 0.3
+# Seuils au-delà desquels un nœud est considéré comme dégradé (ses lecteurs sont alors déplacés).
+MAX_RTT = 2.0
+MAX_FRAME_LOSS = 0.10
+MAX_CONSECUTIVE_FAILURES = 2
+# Lavalink envoie 50 paquets audio par seconde et par lecteur, ses statistiques de trames portent sur une minute.
+FRAMES_PER_MINUTE = 3000
+
+class NodeHealth:
+    """Dernières mesures connues pour un nœud : temps de réponse, lecteurs, charge CPU et trames audio perdues."""
+    __slots__ = ("rtt", "players", "playing", "assigned", "system_load", "lavalink_load", "frames_nulled", "frames_deficit", "failures", "last_probe")
+
+    def __init__(self):
+        self.rtt = None  # Moyenne glissante, en secondes
+        self.players = 0
+        self.playing = 0
+        self.assigned = 0  # Lecteurs envoyés sur ce nœud depuis le dernier sondage
+        self.system_load = 0.0
+        self.lavalink_load = 0.0
+        self.frames_nulled = 0
+        self.frames_deficit = 0
+        self.failures = 0
+        self.last_probe = None
+
+    @property
+    def frame_loss(self) -> float:
+        """Part des trames audio de la dernière minute qui n'ont pas pu être envoyées à temps."""
+        if not self.playing:
+            return 0.0
+        return (self.frames_nulled + self.frames_deficit) / (self.playing * FRAMES_PER_MINUTE)
+
+    @property
+    def degraded(self) -> bool:
+        return (
+            self.failures >= MAX_CONSECUTIVE_FAILURES
+            or (self.rtt is not None and self.rtt > MAX_RTT)
+            or self.frame_loss > MAX_FRAME_LOSS
+        )
+
+    def penalty(self) -> float:
+        """
+        Score de charge (plus il est bas, mieux c'est), sur le modèle des pénalités des clients Lavalink :
+        un point par lecteur actif, une pénalité exponentielle pour la charge CPU et les trames perdues,
+        plus le temps de réponse (100 ms comptent autant que 10 lecteurs).
+        """
+        penalty = self.playing + self.assigned
+        penalty += 1.05 ** (100 * self.system_load) * 10 - 10
+        if self.playing:
+            penalty += 1.03 ** (500 * self.frames_deficit / FRAMES_PER_MINUTE) * 600 - 600
+            penalty += (1.03 ** (500 * self.frames_nulled / FRAMES_PER_MINUTE) * 300 - 300) * 2
+        if self.rtt is not None:
+            penalty += self.rtt * 100
+        return penalty
+
+class NodeManager:
+    """
+    Surveille les nœuds Lavalink et répartit les lecteurs entre eux.
+    - Chaque nœud est sondé régulièrement (`/v4/stats`) : le temps de réponse de la requête sert de mesure de latence,
+      et la réponse donne le nombre de lecteurs, la charge CPU et les trames perdues.
+    - Les nouveaux lecteurs sont créés sur le nœud sain le moins pénalisé (`create_player`, à passer à `connect(cls=...)`).
+    - Quand un nœud se dégrade ou tombe, ses lecteurs sont déplacés vers un nœud sain ; wavelink reprend la piste
+      en cours à la même position, et la file d'attente (portée par le lecteur) est conservée.
+    """
+    def __init__(self, nodes=None, probe_interval: float = PROBE_INTERVAL):
+        # nodes() -> liste des nœuds gérés (par défaut, ceux du Pool wavelink)
+        self._nodes = nodes or (lambda: list(wavelink.Pool.nodes.values()))
+        self.probe_interval = probe_interval
+        self.health = {}  # identifiant du nœud -> NodeHealth
+        self._task = None
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._probe_loop())
+
+    async def close(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    def _health(self, node: wavelink.Node) -> NodeHealth:
+        return self.health.setdefault(node.identifier, NodeHealth())
+
+    def is_healthy(self, node: wavelink.Node) -> bool:
+        return node.status == wavelink.NodeStatus.CONNECTED and not self._health(node).degraded
+
+    def healthy_nodes(self) -> list[wavelink.Node]:
+        """Nœuds connectés et non dégradés ; à défaut, tous les nœuds connectés (mieux vaut un nœud lent que rien)."""
+        connected = [node for node in self._nodes() if node.status == wavelink.NodeStatus.CONNECTED]
+        return [node for node in connected if not self._health(node).degraded] or connected
+
+    def best_node(self, exclude: wavelink.Node | None = None) -> wavelink.Node | None:
+        candidates = [node for node in self.healthy_nodes() if exclude is None or node.identifier != exclude.identifier]
+        if not candidates:
+            return None
+        return min(candidates, key=lambda node: self._health(node).penalty())
+
+    def create_player(self, client, channel) -> wavelink.Player:
+        """À passer à `channel.connect(cls=...)` : crée le lecteur sur le meilleur nœud disponible."""
+        node = self.best_node()
+        if node is None:
+            return wavelink.Player(client, channel)
+        # Compté tout de suite : les connexions suivantes ne doivent pas toutes viser le même nœud d'ici le prochain sondage.
+        self._health(node).assigned += 1
+        return wavelink.Player(client, channel, nodes=[node])
+
+    def record_probe(self, node: wavelink.Node, rtt: float, stats):
+        health = self._health(node)
+        health.rtt = rtt if health.rtt is None else RTT_SMOOTHING * rtt + (1 - RTT_SMOOTHING) * health.rtt
+        health.players = stats.players
+        health.playing = stats.playing
+        health.assigned = 0
+        health.system_load = stats.cpu.system_load
+        health.lavalink_load = stats.cpu.lavalink_load
+        health.frames_nulled = stats.frames.nulled if stats.frames else 0
+        health.frames_deficit = stats.frames.deficit if stats.frames else 0
+        health.failures = 0
+        health.last_probe = time.time()
+
+    def record_failure(self, node: wavelink.Node):
+        self._health(node).failures += 1
+
+    async def probe(self, node: wavelink.Node):
+        """Sonde un nœud : une requête `/v4/stats` chronométrée."""
+        if node.status != wavelink.NodeStatus.CONNECTED:
+            self.record_failure(node)
+            return
+        started = time.perf_counter()
+        try:
+            stats = await asyncio.wait_for(node.fetch_stats(), timeout=MAX_RTT * 2)
+        except Exception as e:
+            print(f"[Lavalink - ERREUR] Le sondage du nœud '{node.identifier}' a échoué : {e!r}")
+            self.record_failure(node)
+            return
+        self.record_probe(node, time.perf_counter() - started, stats)
+
+    async def probe_all(self):
+        """Sonde tous les nœuds en parallèle, puis évacue les lecteurs des nœuds dégradés."""
+        nodes = self._nodes()
+        await asyncio.gather(*(self.probe(node) for node in nodes))
+        for node in nodes:
+            if node.players and not self.is_healthy(node):
+                await self.migrate_players(node)
+
+    async def migrate_players(self, node: wavelink.Node) -> int:
+        """Déplace tous les lecteurs d'un nœud vers le meilleur nœud sain. Renvoie le nombre de lecteurs déplacés."""
+        moved = 0
+        for player in list(node.players.values()):
+            target = self.best_node(exclude=node)
+            if target is None or not self.is_healthy(target):
+                print(f"[Lavalink - ERREUR] Aucun nœud sain pour accueillir les lecteurs de '{node.identifier}'.")
+                break
+            # `switch_node` relance la piste en cours sur le nouveau nœud : son track_start n'est pas une nouvelle lecture.
+            player.migrating = getattr(player, "current", None) is not None
+            try:
+                await player.switch_node(target)
+                self._health(target).assigned += 1
+                moved += 1
+            except (RuntimeError, wavelink.InvalidNodeException) as e:
+                player.migrating = False
+                print(f"[Lavalink - ERREUR] Impossible de déplacer le lecteur du serveur {player.guild.id} vers '{target.identifier}': {e}")
+        if moved:
+            print(f"[Lavalink - INFO] {moved} lecteur(s) déplacé(s) depuis le nœud '{node.identifier}'.")
+        return moved
+
+    async def _probe_loop(self):
+        while True:
+            try:
+                await self.probe_all()
+            except Exception as e:
+                print(f"[Lavalink - ERREUR] Erreur lors de la surveillance des nœuds : {e}")
+            await asyncio.sleep(self.probe_interval)
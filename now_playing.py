@@ -0,0 +1,198 @@
+import asyncio
+import heapq
+import itertools
+import random
+import time
+import discord
+import wavelink
+from rate_limiter import CommandRateLimiter, RateLimit
+
+# Nombre de cases de la barre de progression du message "En cours de lecture".
+PROGRESS_BAR_CELLS = 20
+# Bornes de l'intervalle entre deux rafraîchissements d'un même message (en secondes).
+# Une piste courte avance d'une case plus vite qu'une longue ; on ne rafraîchit jamais plus souvent que MIN_REFRESH.
+MIN_REFRESH = 10.0
+MAX_REFRESH = 60.0
+# Budget de modifications de messages : par salon (seau "message edit" de Discord, avec une marge pour les autres
+# messages du bot) et global (pour laisser de la place aux commandes dans la limite globale de l'API).
+EDITS_PER_CHANNEL = RateLimit(4, 5)
+EDITS_PER_SECOND = RateLimit(10, 1, "global")
+EDIT_BUCKET = "now_playing_edit"
+
+def progress_cell(position: float, length: float) -> int:
+    """Case de la barre de progression correspondant à une position (en ms) dans une piste."""
+    if length <= 0:
+        return 0
+    return min(int(position / length * PROGRESS_BAR_CELLS), PROGRESS_BAR_CELLS - 1)
+
+def refresh_delay(position: float, length: float) -> float | None:
+    """
+    Délai (en secondes) avant le prochain changement visible de la barre de progression : le passage à la case suivante.
+    Renvoie None pour un direct (rien ne bouge) : le message n'est alors modifié que sur demande.
+    """
+    if length <= 0:
+        return None
+    cell_length = length / PROGRESS_BAR_CELLS
+    until_next_cell = (progress_cell(position, length) + 1) * cell_length - position
+    return min(max(until_next_cell / 1000, MIN_REFRESH), MAX_REFRESH)
+
+def now_playing_signature(player: wavelink.Player) -> tuple:
+    """
+    Ce qui est visible dans le message "En cours de lecture", hors horodatage : tant que cette signature ne change pas,
+    modifier le message est inutile.
+    """
+    track = player.current
+    if not track:
+        return (None,)
+    next_title = player.queue[0].title if not player.queue.is_empty else None
+    return (
+        track.encoded,
+        progress_cell(player.position, track.length),
+        player.paused,
+        next_title,
+        getattr(player, "autoplay_radio", False),
+        dict(track.extras).get("requester_id"),
+    )
+
+class _Entry:
+    __slots__ = ("player", "render", "signature", "generation", "due")
+
+    def __init__(self, player, render, signature):
+        self.player = player
+        self.render = render
+        self.signature = signature
+        self.generation = 0
+        self.due = None  # Échéance programmée (None : aucune)
+
+class NowPlayingUpdater:
+    """
+    Ordonnanceur global des modifications des messages "En cours de lecture".
+    - Chaque lecteur est reprogrammé au prochain changement visible de sa barre de progression (donc moins souvent
+      pour les longues pistes), avec un décalage aléatoire pour étaler les lecteurs démarrés en même temps.
+    - Avant chaque modification, la signature de ce qui est affiché est comparée à la précédente : pas de requête
+      si rien n'a changé (pause, direct...).
+    - Les modifications passent par des seaux de jetons par salon et global ; une modification refusée est
+      simplement reprogrammée, et les demandes répétées pour un même lecteur se fusionnent en une seule.
+    """
+    def __init__(self, limits: dict | None = None):
+        self.limiter = CommandRateLimiter(limits if limits is not None else {EDIT_BUCKET: [EDITS_PER_CHANNEL, EDITS_PER_SECOND]})
+        self._entries = {}  # guild_id -> _Entry
+        self._heap = []     # (échéance, génération, guild_id) ; les entrées périmées sont ignorées à la sortie
+        self._wakeup = asyncio.Event()
+        self._task = None
+        self._edits = set()
+        self._counter = itertools.count()
+        self.edits = 0
+        self.skipped = 0
+        self.deferred = 0
+
+    def register(self, player: wavelink.Player, render, signature=None):
+        """
+        Suit le message "En cours de lecture" d'un lecteur (`player.now_playing_message`), qui vient d'être envoyé.
+        `render(player) -> discord.Embed` construit l'embed à jour.
+        """
+        entry = _Entry(player, render, now_playing_signature(player) if signature is None else signature)
+        self._entries[player.guild.id] = entry
+        delay = self._next_delay(player)
+        if delay is not None:
+            # Décalage aléatoire : des centaines de lecteurs lancés ensemble ne rafraîchissent pas tous à la même seconde.
+            self._schedule(entry, delay * random.uniform(0.5, 1.0))
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    def unregister(self, guild_id: int):
+        self._entries.pop(guild_id, None)
+
+    def request_update(self, guild_id: int):
+        """Demande une mise à jour rapide (pause, file modifiée...) ; fusionnée avec celle déjà prévue si elle est plus proche."""
+        entry = self._entries.get(guild_id)
+        if entry:
+            self._schedule(entry, 0)
+
+    def stats(self) -> dict:
+        return {"tracked": len(self._entries), "edits": self.edits, "skipped": self.skipped, "deferred": self.deferred}
+
+    async def close(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+        self._entries.clear()
+        self._heap.clear()
+        # L'événement est lié à la boucle qui l'a attendu : on repart d'un neuf (rechargement du cog, nouvelle boucle).
+        self._wakeup = asyncio.Event()
+
+    def _next_delay(self, player: wavelink.Player) -> float | None:
+        track = player.current
+        if not track or player.paused:
+            return None
+        return refresh_delay(player.position, track.length)
+
+    def _schedule(self, entry: _Entry, delay: float):
+        due = time.monotonic() + delay
+        # Une seule échéance par lecteur : la plus proche l'emporte, la précédente devient périmée.
+        if entry.due is not None and entry.due <= due:
+            return
+        entry.due = due
+        entry.generation = next(self._counter)
+        heapq.heappush(self._heap, (due, entry.generation, entry.player.guild.id))
+        self._wakeup.set()
+
+    async def _run(self):
+        while True:
+            while self._heap:
+                due, generation, guild_id = self._heap[0]
+                entry = self._entries.get(guild_id)
+                if entry is None or entry.generation != generation:
+                    heapq.heappop(self._heap)
+                    continue
+                if due > time.monotonic():
+                    break
+                heapq.heappop(self._heap)
+                entry.due = None
+                self._process(entry)
+
+            self._wakeup.clear()
+            timeout = self._heap[0][0] - time.monotonic() if self._heap else None
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    def _process(self, entry: _Entry):
+        player = entry.player
+        message = getattr(player, "now_playing_message", None)
+        if message is None or not player.connected or not player.current:
+            self.unregister(player.guild.id)
+            return
+
+        signature = now_playing_signature(player)
+        if signature == entry.signature:
+            self.skipped += 1
+        else:
+            retry_after = self.limiter.check(EDIT_BUCKET, message.channel.id, None)  # Seau "utilisateur" = salon
+            if retry_after is not None:
+                self.deferred += 1
+                self._schedule(entry, retry_after)
+                return
+            entry.signature = signature
+            task = asyncio.create_task(self._edit(entry, message))
+            self._edits.add(task)
+            task.add_done_callback(self._edits.discard)
+
+        delay = self._next_delay(player)
+        if delay is not None:
+            self._schedule(entry, delay)
+
+    async def _edit(self, entry: _Entry, message: discord.Message):
+        try:
+            await message.edit(embed=entry.render(entry.player))
+            self.edits += 1
+        except discord.NotFound:
+            # Message supprimé : plus rien à mettre à jour pour ce lecteur.
+            entry.player.now_playing_message = None
+            self.unregister(entry.player.guild.id)
+        except discord.HTTPException as e:
+            print(f"[Music] Impossible de mettre à jour le message 'En cours de lecture' (serveur {entry.player.guild.id}): {e}")
+
+# Instance partagée par le cog musique et ses boutons.
+now_playing_updater = NowPlayingUpdater()
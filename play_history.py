@@ -0,0 +1,211 @@
+import asyncio
+import time
+from typing import NamedTuple
+import wavelink
+from db_manager import get_db_connection
+
+# Délai maximal (en secondes) entre un événement de lecture et son écriture en base.
+FLUSH_DEADLINE = 5.0
+# Au-delà de ce nombre d'écoutes en attente, l'écriture part sans attendre la fin du délai.
+MAX_PENDING_PLAYS = 200
+# Nombre de pistes affichées par /musique historique et /musique top.
+HISTORY_PAGE_SIZE = 10
+
+class HistoryEntry(NamedTuple):
+    """Une écoute de l'historique, avec les métadonnées de sa piste."""
+    id: int
+    uri: str
+    title: str
+    author: str | None
+    length: int
+    encoded: str | None
+    requester_id: int | None
+    played_at: int
+    listened_ms: int
+    finished: bool
+
+class TopTrack(NamedTuple):
+    uri: str
+    title: str
+    author: str | None
+    length: int
+    encoded: str | None
+    plays: int
+    last_played_at: int
+
+class Successor(NamedTuple):
+    """Piste jouée juste après une autre, et combien de fois (index de co-occurrence `track_transitions`)."""
+    uri: str
+    title: str
+    author: str | None
+    length: int
+    encoded: str | None
+    count: int
+
+def track_metadata_row(track: wavelink.Playable, now: int) -> tuple:
+    return (track.uri, track.title, track.author, track.length, track.source, track.encoded, now)
+
+class PlayHistory:
+    """
+    Historique d'écoute par serveur (tables `track_metadata`, `play_history` et `track_play_counts`).
+    - Le début d'une piste (`track_started`) et sa fin (`track_ended`) ne font que remplir des files en mémoire ;
+      une écoute n'est ajoutée à l'historique qu'à sa fin, avec sa durée de lecture.
+    - Les files sont écrites par paquets, dans une seule transaction, au plus tard `flush_deadline` secondes après
+      le premier événement en attente.
+    - Les lectures passent par des index : les dernières écoutes par (serveur, id), le top par les compteurs
+      tenus à jour par trigger. Aucune ne parcourt l'historique complet.
+    """
+    def __init__(self, flush_deadline: float = FLUSH_DEADLINE, max_pending: int = MAX_PENDING_PLAYS):
+        self.flush_deadline = flush_deadline
+        self.max_pending = max_pending
+        self._playing = {}  # guild_id -> (piste, demandeur, début en timestamp Unix, début en monotonic)
+        self._pending_tracks = {}  # uri -> ligne de `track_metadata`
+        self._pending_plays = []  # lignes de `play_history` (avec l'URI à la place de l'id de piste)
+        self._wakeup = asyncio.Event()
+        self._task = None
+        self._write_lock = asyncio.Lock()
+
+    def track_started(self, guild_id: int, track: wavelink.Playable):
+        if not track or not track.uri:
+            return
+        previous = self._playing.get(guild_id)
+        if previous is not None and previous[0].uri != track.uri:
+            # Fin de la piste précédente pas encore reçue (événements dans le désordre) : elle a été remplacée.
+            self.track_ended(guild_id, previous[0], "replaced")
+        now = time.time()
+        self._playing[guild_id] = (track, dict(track.extras).get("requester_id"), int(now), time.monotonic())
+        self._pending_tracks[track.uri] = track_metadata_row(track, int(now))
+        self._schedule()
+
+    def track_ended(self, guild_id: int, track: wavelink.Playable | None, reason: str):
+        started = self._playing.get(guild_id)
+        if started is None or (track is not None and track.uri != started[0].uri):
+            return
+        del self._playing[guild_id]
+        started_track, requester_id, played_at, started_monotonic = started
+        listened_ms = int((time.monotonic() - started_monotonic) * 1000)
+        if started_track.length:
+            listened_ms = min(listened_ms, started_track.length)
+        finished = reason == "finished"  # Lavalink v4 envoie les raisons en minuscules
+        # Les métadonnées partent avec l'écoute : la ligne de `track_metadata` doit exister avant celle de l'historique.
+        self._pending_tracks.setdefault(started_track.uri, track_metadata_row(started_track, played_at))
+        self._pending_plays.append((guild_id, started_track.uri, requester_id, played_at, listened_ms, int(finished)))
+        self._schedule()
+        if len(self._pending_plays) >= self.max_pending:
+            self._wakeup.set()
+
+    def _schedule(self):
+        if self._task is None or self._task.done():
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._flush_after_deadline())
+
+    async def _flush_after_deadline(self):
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_deadline)
+        except asyncio.TimeoutError:
+            pass
+        try:
+            await self.flush()
+        except Exception as e:
+            print(f"[Music] Impossible d'enregistrer l'historique d'écoute : {e}")
+
+    async def flush(self):
+        """Écrit immédiatement tout ce qui est en attente, en une transaction."""
+        async with self._write_lock:
+            tracks, self._pending_tracks = list(self._pending_tracks.values()), {}
+            plays, self._pending_plays = self._pending_plays, []
+            if not tracks and not plays:
+                return
+            try:
+                async with get_db_connection() as conn:
+                    await conn.executemany(
+                        """
+                        INSERT INTO track_metadata (uri, title, author, length, source, encoded, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?)
+                        ON CONFLICT (uri) DO UPDATE SET title = excluded.title, author = excluded.author, length = excluded.length,
+                            source = excluded.source, encoded = COALESCE(excluded.encoded, encoded), updated_at = excluded.updated_at
+                        """,
+                        tracks
+                    )
+                    await conn.executemany(
+                        """
+                        INSERT INTO play_history (guild_id, track_id, requester_id, played_at, listened_ms, finished)
+                        SELECT ?, id, ?, ?, ?, ? FROM track_metadata WHERE uri = ?
+                        """,
+                        [(guild_id, requester_id, played_at, listened_ms, finished, uri) for guild_id, uri, requester_id, played_at, listened_ms, finished in plays]
+                    )
+                    await conn.commit()
+            except Exception:
+                # Rien n'est perdu : les lignes repartent avec la prochaine écriture.
+                self._pending_plays[:0] = plays
+                for row in tracks:
+                    self._pending_tracks.setdefault(row[0], row)
+                raise
+
+    async def close(self):
+        """Écrit les écoutes en attente (appelé à l'arrêt du bot ou au déchargement du cog)."""
+        if self._task and not self._task.done():
+            # Pas d'annulation : une écriture interrompue en pleine transaction perdrait ses lignes.
+            self._wakeup.set()
+            await self._task
+        await self.flush()
+
+    async def recent(self, guild_id: int, limit: int = HISTORY_PAGE_SIZE, offset: int = 0, requester_id: int | None = None) -> list[HistoryEntry]:
+        """Dernières écoutes d'un serveur (éventuellement d'un seul demandeur), de la plus récente à la plus ancienne."""
+        await self.flush()
+        where, params = "h.guild_id = ?", [guild_id]
+        if requester_id is not None:
+            where += " AND h.requester_id = ?"
+            params.append(requester_id)
+        async with get_db_connection() as conn:
+            async with conn.execute(
+                f"""
+                SELECT h.id, t.uri, t.title, t.author, t.length, t.encoded, h.requester_id, h.played_at, h.listened_ms, h.finished
+                FROM play_history h JOIN track_metadata t ON t.id = h.track_id
+                WHERE {where} ORDER BY h.id DESC LIMIT ? OFFSET ?
+                """,
+                (*params, limit, offset)
+            ) as cursor:
+                rows = await cursor.fetchall()
+        return [HistoryEntry(*row[:-1], bool(row[-1])) for row in rows]
+
+    async def top_tracks(self, guild_id: int, limit: int = HISTORY_PAGE_SIZE) -> list[TopTrack]:
+        """Pistes les plus écoutées d'un serveur (à égalité, la plus récemment écoutée d'abord)."""
+        await self.flush()
+        async with get_db_connection() as conn:
+            async with conn.execute(
+                """
+                SELECT t.uri, t.title, t.author, t.length, t.encoded, c.plays, c.last_played_at
+                FROM track_play_counts c JOIN track_metadata t ON t.id = c.track_id
+                WHERE c.guild_id = ? ORDER BY c.plays DESC, c.last_played_at DESC LIMIT ?
+                """,
+                (guild_id, limit)
+            ) as cursor:
+                return [TopTrack(*row) for row in await cursor.fetchall()]
+
+    async def get_entry(self, guild_id: int, number: int) -> HistoryEntry | None:
+        """Écoute n° `number` (1 = la plus récente) de l'historique d'un serveur, pour "rejouer"."""
+        if number < 1:
+            return None
+        entries = await self.recent(guild_id, limit=1, offset=number - 1)
+        return entries[0] if entries else None
+
+    async def successors(self, uri: str, limit: int = HISTORY_PAGE_SIZE) -> list[Successor]:
+        """
+        Pistes le plus souvent jouées juste après `uri`, tous serveurs confondus.
+        Une recherche par clé primaire puis un parcours de l'index (track_id, count) : le coût ne dépend pas
+        de la taille de l'historique.
+        """
+        async with get_db_connection() as conn:
+            async with conn.execute(
+                """
+                SELECT t.uri, t.title, t.author, t.length, t.encoded, tr.count
+                FROM track_transitions tr JOIN track_metadata t ON t.id = tr.next_track_id
+                WHERE tr.track_id = (SELECT id FROM track_metadata WHERE uri = ?)
+                ORDER BY tr.count DESC LIMIT ?
+                """,
+                (uri, limit)
+            ) as cursor:
+                return [Successor(*row) for row in await cursor.fetchall()]
+
+# Instance partagée (exposée sur `bot.play_history`).
+play_history = PlayHistory()
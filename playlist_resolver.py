@@ -0,0 +1,60 @@
+import asyncio
+
+# Nombre de recherches simultanées envoyées à chaque nœud Lavalink connecté.
+PER_NODE_CONCURRENCY = 4
+
+async def resolve_in_order(items: list, resolve, concurrency: int, on_first=None, on_ready=None) -> list:
+    """
+    Résout une liste d'éléments avec une concurrence bornée tout en livrant les résultats dans l'ordre d'origine.
+
+    - `resolve(item, index)` renvoie le résultat, ou None si l'élément est introuvable ;
+    - `on_first(result)` reçoit le tout premier résultat obtenu (quel que soit son rang), pour démarrer la lecture
+      sans attendre le reste ; ce résultat n'est ensuite pas relivré ;
+    - `on_ready(results)` reçoit, dès qu'ils sont disponibles, les résultats consécutifs suivants dans l'ordre.
+
+    Renvoie la liste des éléments qui n'ont pas pu être résolus, dans l'ordre d'origine.
+    """
+    queue = asyncio.Queue()
+    for index, item in enumerate(items):
+        queue.put_nowait((index, item))
+
+    pending = {}  # rang -> résultat (None = échec ou déjà livré via on_first)
+    failed = []
+    next_index = 0
+    first_delivered = on_first is None
+    # Les rappels sont sérialisés : sans cela, deux lots pourraient s'intercaler dans la file d'attente.
+    delivery_lock = asyncio.Lock()
+
+    async def worker():
+        nonlocal next_index, first_delivered
+        while True:
+            try:
+                index, item = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            try:
+                result = await resolve(item, index)
+            except Exception as e:
+                print(f"[Playlist] Échec de la résolution de '{item}': {e}")
+                result = None
+
+            async with delivery_lock:
+                if result is None:
+                    failed.append(index)
+                elif not first_delivered:
+                    first_delivered = True
+                    await on_first(result)
+                    result = None
+                pending[index] = result
+
+                ready = []
+                while next_index in pending:
+                    value = pending.pop(next_index)
+                    next_index += 1
+                    if value is not None:
+                        ready.append(value)
+                if ready and on_ready:
+                    await on_ready(ready)
+
+    await asyncio.gather(*(worker() for _ in range(min(concurrency, len(items)) or 1)))
+    return [items[index] for index in sorted(failed)]
@@ -0,0 +1,86 @@
+import time
+from typing import NamedTuple
+
+class RateLimit(NamedTuple):
+    """`capacity` utilisations autorisées par `per` secondes, comptées par utilisateur, par serveur ou globalement."""
+    capacity: int
+    per: float
+    scope: str = "user"  # 'user', 'guild' ou 'global'
+
+# Limites par commande (nom qualifié, ex: "musique play"). "*" s'applique à toutes les commandes sans règle dédiée.
+# Plusieurs limites peuvent se cumuler : la commande n'est acceptée que si toutes ont encore un jeton.
+DEFAULT_COMMAND_LIMITS = {
+    "*": [RateLimit(8, 10)],
+    "musique play": [RateLimit(5, 20), RateLimit(20, 60, "guild")],
+    "musique playnext": [RateLimit(5, 20), RateLimit(20, 60, "guild")],
+    "getlog": [RateLimit(1, 300), RateLimit(2, 300, "guild")],
+    "discordmaker backup": [RateLimit(1, 300, "guild")],
+    "discordmaker restore": [RateLimit(1, 600, "guild")],
+    # `start` n'affiche qu'un plan (limite générale) : c'est son application, au clic sur le bouton, qui est limitée.
+    "discordmaker start:apply": [RateLimit(1, 600, "guild")],
+    "discordmaker full-reset": [RateLimit(1, 600, "guild")],
+    "clear": [RateLimit(3, 60, "guild")],
+    "masse timeout": [RateLimit(3, 60, "guild")],
+    "masse kick": [RateLimit(3, 60, "guild")],
+    "masse ban": [RateLimit(3, 60, "guild")],
+    "masse warn": [RateLimit(3, 60, "guild")],
+}
+# Au-delà de ce nombre de seaux en mémoire, les seaux pleins (inactifs) sont supprimés.
+MAX_BUCKETS = 10000
+
+class CommandRateLimiter:
+    """
+    Limiteur à seaux de jetons (token bucket), entièrement en mémoire. Les seaux sont créés à la première
+    utilisation et remplis paresseusement : le nombre de jetons est recalculé au moment de la vérification,
+    à partir du temps écoulé, sans aucune tâche de fond.
+    """
+    def __init__(self, limits: dict | None = None, max_buckets: int = MAX_BUCKETS):
+        self.limits = DEFAULT_COMMAND_LIMITS if limits is None else limits
+        self.max_buckets = max_buckets
+        self._buckets = {}  # (commande, portée, clé) -> [jetons, dernière mise à jour]
+
+    def _limits_for(self, command_name: str) -> list:
+        return self.limits.get(command_name, self.limits.get("*", []))
+
+    def check(self, command_name: str, user_id: int, guild_id: int | None, now: float | None = None) -> float | None:
+        """
+        Consomme un jeton dans chaque seau concerné. Renvoie None si la commande est autorisée,
+        sinon le délai (en secondes) avant qu'elle le soit ; dans ce cas aucun jeton n'est consommé.
+        """
+        now = time.monotonic() if now is None else now
+        buckets = []
+        retry_after = 0.0
+        for limit in self._limits_for(command_name):
+            if limit.scope == "guild":
+                key = guild_id if guild_id is not None else f"dm:{user_id}"
+            elif limit.scope == "global":
+                key = None
+            else:
+                key = user_id
+            bucket_key = (command_name, limit.scope, key, limit.capacity, limit.per)
+            bucket = self._buckets.get(bucket_key)
+            rate = limit.capacity / limit.per
+            if bucket is None:
+                bucket = [float(limit.capacity), now]
+            else:
+                bucket[0] = min(limit.capacity, bucket[0] + (now - bucket[1]) * rate)
+                bucket[1] = now
+            if bucket[0] < 1:
+                retry_after = max(retry_after, (1 - bucket[0]) / rate)
+            buckets.append((bucket_key, bucket))
+
+        if retry_after > 0:
+            return retry_after
+        for bucket_key, bucket in buckets:
+            bucket[0] -= 1
+            self._buckets[bucket_key] = bucket
+        if len(self._buckets) > self.max_buckets:
+            self._prune(now)
+        return None
+
+    def _prune(self, now: float):
+        """Supprime les seaux redevenus pleins : les recréer plus tard donne exactement le même résultat."""
+        for bucket_key, (tokens, updated) in list(self._buckets.items()):
+            capacity, per = bucket_key[3], bucket_key[4]
+            if tokens + (now - updated) * capacity / per >= capacity:
+                del self._buckets[bucket_key]
@@ -0,0 +1,138 @@
+import asyncio
+import heapq
+import json
+import time
+from db_manager import get_db_connection
+
+# Nombre maximal d'actions gardées en mémoire : seules les plus proches de leur échéance y sont.
+HEAP_WINDOW = 100
+# Nombre maximal d'actions échues exécutées en même temps (utile après un redémarrage).
+OVERDUE_BATCH_SIZE = 10
+
+class SanctionScheduler:
+    """
+    Planificateur durable des sanctions temporaires (tempban, rôle temporaire, déverrouillage, mute long...).
+    Toutes les actions sont stockées dans la table `scheduled_actions` ; seule une fenêtre des actions
+    les plus proches est chargée dans un tas (heap) en mémoire. Une seule tâche dort jusqu'à la prochaine
+    échéance, et se réveille plus tôt si une action plus urgente est planifiée entre-temps.
+    """
+    def __init__(self, handlers: dict, window: int = HEAP_WINDOW, batch_size: int = OVERDUE_BATCH_SIZE):
+        # action_type -> coroutine(action: dict) chargée d'exécuter l'action
+        self.handlers = handlers
+        self.window = window
+        self.batch_size = batch_size
+        self._heap = []  # (due_at, id, action)
+        # Échéance de la dernière action chargée quand la fenêtre est pleine (None = toute la table est en mémoire).
+        self._horizon = None
+        self._wakeup = asyncio.Event()
+        self._task = None
+
+    def start(self):
+        """Lance la tâche de fond (qui commence par recharger les actions en attente depuis la DB)."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    def stop(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    async def schedule(self, guild_id: int, action_type: str, target_id: int, due_at: float, payload: dict | None = None) -> int:
+        """Enregistre une action à exécuter au timestamp `due_at` (en secondes). Renvoie son ID."""
+        due_at = int(due_at)
+        payload_json = json.dumps(payload or {})
+        async with get_db_connection() as conn:
+            cursor = await conn.execute(
+                "INSERT INTO scheduled_actions (guild_id, action_type, target_id, due_at, payload) VALUES (?, ?, ?, ?, ?)",
+                (guild_id, action_type, target_id, due_at, payload_json)
+            )
+            action_id = cursor.lastrowid
+            await conn.commit()
+
+        # Au-delà de l'horizon, l'action reste uniquement en base : elle sera chargée lors d'un prochain remplissage.
+        if self._horizon is None or due_at <= self._horizon:
+            action = {"id": action_id, "guild_id": guild_id, "action_type": action_type, "target_id": target_id, "due_at": due_at, "payload": payload or {}}
+            heapq.heappush(self._heap, (due_at, action_id, action))
+            if len(self._heap) > self.window:
+                # On retire l'action la plus lointaine de la mémoire (elle reste en base).
+                self._heap.remove(max(self._heap))
+                heapq.heapify(self._heap)
+                self._horizon = max(self._heap)[0]
+            if self._heap[0][1] == action_id:
+                self._wakeup.set()
+        return action_id
+
+    async def cancel(self, guild_id: int, action_type: str, target_id: int) -> int:
+        """Annule les actions en attente d'un type donné pour une cible. Renvoie le nombre d'actions annulées."""
+        async with get_db_connection() as conn:
+            cursor = await conn.execute(
+                "DELETE FROM scheduled_actions WHERE guild_id = ? AND action_type = ? AND target_id = ?",
+                (guild_id, action_type, target_id)
+            )
+            deleted = cursor.rowcount
+            await conn.commit()
+
+        remaining = [entry for entry in self._heap if not (entry[2]["guild_id"] == guild_id and entry[2]["action_type"] == action_type and entry[2]["target_id"] == target_id)]
+        if len(remaining) != len(self._heap):
+            self._heap = remaining
+            heapq.heapify(self._heap)
+        return deleted
+
+    async def _refill(self):
+        """Recharge depuis la base la fenêtre des actions les plus proches."""
+        async with get_db_connection() as conn:
+            async with conn.execute(
+                "SELECT id, guild_id, action_type, target_id, due_at, payload FROM scheduled_actions ORDER BY due_at, id LIMIT ?",
+                (self.window,)
+            ) as cursor:
+                rows = await cursor.fetchall()
+
+        self._heap = []
+        for action_id, guild_id, action_type, target_id, due_at, payload in rows:
+            action = {"id": action_id, "guild_id": guild_id, "action_type": action_type, "target_id": target_id, "due_at": due_at, "payload": json.loads(payload or "{}")}
+            self._heap.append((due_at, action_id, action))
+        heapq.heapify(self._heap)
+        self._horizon = rows[-1][4] if len(rows) >= self.window else None
+
+    async def _run(self):
+        await self._refill()
+        while True:
+            if not self._heap:
+                if self._horizon is not None:
+                    # La fenêtre est épuisée mais il reste des actions plus lointaines en base.
+                    await self._refill()
+                    continue
+                await self._wakeup.wait()
+                self._wakeup.clear()
+                continue
+
+            delay = self._heap[0][0] - time.time()
+            if delay > 0:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+                continue
+
+            # On exécute les actions échues par lots de taille bornée.
+            now = time.time()
+            batch = []
+            while self._heap and self._heap[0][0] <= now and len(batch) < self.batch_size:
+                batch.append(heapq.heappop(self._heap)[2])
+            await asyncio.gather(*(self._execute(action) for action in batch))
+
+            async with get_db_connection() as conn:
+                await conn.executemany("DELETE FROM scheduled_actions WHERE id = ?", [(action["id"],) for action in batch])
+                await conn.commit()
+
+    async def _execute(self, action: dict):
+        handler = self.handlers.get(action["action_type"])
+        if handler is None:
+            print(f"[Scheduler] Type d'action inconnu ignoré : {action['action_type']} (ID {action['id']})")
+            return
+        try:
+            await handler(action)
+        except Exception as e:
+            # Une action en échec n'est pas retentée, pour ne pas bloquer la file indéfiniment.
+            print(f"[Scheduler] Échec de l'action {action['action_type']} (ID {action['id']}, serveur {action['guild_id']}): {e}")
@@ -0,0 +1,107 @@
+import asyncio
+import re
+from typing import NamedTuple
+from track_cache import normalize_query
+
+# Tailles de page maximales de l'API Spotify.
+PLAYLIST_PAGE_SIZE = 100
+ALBUM_PAGE_SIZE = 50
+TRACKS_BATCH_SIZE = 50
+# Appels Spotify simultanés. spotipy est synchrone : chaque appel tourne dans un thread, hors de la boucle asyncio.
+SPOTIFY_CONCURRENCY = 4
+# Les playlists Spotify sont limitées à 10 000 titres : au-delà, la fin est ignorée.
+MAX_SPOTIFY_TRACKS = 10000
+
+SPOTIFY_LINK = re.compile(r'(?:open\.spotify\.com/(?:intl-[\w-]+/)?|spotify:)(track|album|playlist)[/:]([A-Za-z0-9]+)')
+# Champs demandés pour chaque piste d'une playlist (réponses plus légères que l'objet complet).
+PLAYLIST_TRACK_FIELDS = "track(name,type,is_local,duration_ms,external_ids(isrc),artists(name))"
+
+class SpotifyTrack(NamedTuple):
+    """Un morceau Spotify, réduit à ce qu'il faut pour le retrouver sur Lavalink et l'afficher."""
+    title: str
+    artists: str
+    length: int
+    isrc: str | None
+
+    @property
+    def cache_key(self) -> str:
+        """Clé de correspondance vers la piste Lavalink : l'ISRC (identique d'une playlist à l'autre), à défaut l'artiste et le titre."""
+        if self.isrc:
+            return f"spotify:isrc:{self.isrc}"
+        return "spotify:title:" + normalize_query(f"{self.artists} - {self.title}")
+
+def parse_spotify_link(link: str) -> tuple[str, str] | None:
+    """("track" | "album" | "playlist", identifiant) d'un lien ou d'une URI Spotify, ou None."""
+    match = SPOTIFY_LINK.search(link)
+    return (match.group(1), match.group(2)) if match else None
+
+def _track_from_api(data: dict | None) -> SpotifyTrack | None:
+    # Les fichiers locaux et les épisodes de podcast n'existent pas sur les sources de Lavalink.
+    if not data or data.get("is_local") or data.get("type", "track") != "track":
+        return None
+    return SpotifyTrack(
+        title=data["name"],
+        artists=", ".join(artist["name"] for artist in data.get("artists", [])),
+        length=data.get("duration_ms") or 0,
+        isrc=(data.get("external_ids") or {}).get("isrc"),
+    )
+
+class SpotifyResolver:
+    """
+    Lecture des liens Spotify (titre, album, playlist) via spotipy.
+    - Chaque appel spotipy (bloquant, avec ses propres nouvelles tentatives en cas de 429) tourne dans un thread.
+    - Les pages d'une playlist ou d'un album sont demandées en parallèle dès que la première donne le total,
+      et les ISRC des titres d'album sont récupérés par lots de 50.
+    """
+    def __init__(self, client, concurrency: int = SPOTIFY_CONCURRENCY):
+        self.client = client
+        self._semaphore = asyncio.Semaphore(concurrency)
+
+    async def _call(self, method: str, *args, **kwargs):
+        async with self._semaphore:
+            return await asyncio.to_thread(getattr(self.client, method), *args, **kwargs)
+
+    async def fetch(self, link: str) -> tuple[str, list[SpotifyTrack]]:
+        """(nom, morceaux dans l'ordre) d'un lien Spotify. Lève ValueError si le lien n'est pas reconnu."""
+        parsed = parse_spotify_link(link)
+        if parsed is None:
+            raise ValueError(f"Lien Spotify non reconnu : {link}")
+        kind, spotify_id = parsed
+        if kind == "track":
+            data = await self._call("track", spotify_id)
+            track = _track_from_api(data)
+            return data["name"], [track] if track else []
+        if kind == "album":
+            return await self._fetch_album(spotify_id)
+        return await self._fetch_playlist(spotify_id)
+
+    async def _remaining_pages(self, total: int, page_size: int, fetch_page) -> list[dict]:
+        """Toutes les pages après la première, demandées en parallèle et renvoyées dans l'ordre."""
+        total = min(total, MAX_SPOTIFY_TRACKS)
+        return await asyncio.gather(*(fetch_page(offset) for offset in range(page_size, total, page_size)))
+
+    async def _fetch_playlist(self, playlist_id: str) -> tuple[str, list[SpotifyTrack]]:
+        first = await self._call(
+            "playlist", playlist_id, additional_types=("track",),
+            fields=f"name,tracks(total,items({PLAYLIST_TRACK_FIELDS}))"
+        )
+        pages = await self._remaining_pages(first["tracks"]["total"], PLAYLIST_PAGE_SIZE, lambda offset: self._call(
+            "playlist_items", playlist_id, fields=f"items({PLAYLIST_TRACK_FIELDS})",
+            limit=PLAYLIST_PAGE_SIZE, offset=offset, additional_types=("track",)
+        ))
+        items = [item for page in [first["tracks"], *pages] for item in page["items"]]
+        tracks = [_track_from_api(item.get("track")) for item in items[:MAX_SPOTIFY_TRACKS]]
+        return first["name"], [track for track in tracks if track]
+
+    async def _fetch_album(self, album_id: str) -> tuple[str, list[SpotifyTrack]]:
+        first = await self._call("album", album_id)
+        pages = await self._remaining_pages(first["tracks"]["total"], ALBUM_PAGE_SIZE, lambda offset: self._call(
+            "album_tracks", album_id, limit=ALBUM_PAGE_SIZE, offset=offset
+        ))
+        # Les titres d'un album sont des objets simplifiés, sans ISRC : on les complète par lots.
+        ids = [item["id"] for page in [first["tracks"], *pages] for item in page["items"] if item.get("id")]
+        batches = await asyncio.gather(*(
+            self._call("tracks", ids[i:i + TRACKS_BATCH_SIZE]) for i in range(0, len(ids), TRACKS_BATCH_SIZE)
+        ))
+        tracks = [_track_from_api(data) for batch in batches for data in batch["tracks"]]
+        return first["name"], [track for track in tracks if track]
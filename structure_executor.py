@@ -0,0 +1,70 @@
+import time
+from typing import Awaitable, Callable, NamedTuple
+from bulk_actions import BulkExecutor, PROGRESS_INTERVAL
+
+# Requêtes de structure envoyées en parallèle. discord.py répartit ensuite ces requêtes par bucket de rate-limit
+# (en-têtes X-RateLimit-*) : les créations partagent le bucket du serveur, les suppressions de salons ont chacune le leur.
+STRUCTURE_CONCURRENCY = 10
+
+ACTION_LABELS = {"create": "Créer", "edit": "Modifier", "delete": "Supprimer", "reorder": "Réordonner"}
+KIND_LABELS = {
+    "role": "le rôle", "roles": "les rôles", "category": "la catégorie", "text": "le salon textuel",
+    "voice": "le salon vocal", "channel": "le salon", "channels": "les salons",
+}
+
+class StructuralOperation(NamedTuple):
+    """Un appel à l'API Discord qui modifie la structure d'un serveur (rôle, catégorie ou salon)."""
+    action: str  # "create", "edit", "delete" ou "reorder"
+    kind: str  # "role", "category", "text", "voice"...
+    name: str
+    call: Callable[[], Awaitable]
+
+    def describe(self) -> str:
+        return f"{ACTION_LABELS.get(self.action, self.action)} {KIND_LABELS.get(self.kind, self.kind)} `{self.name}`"
+
+class StructureReport:
+    """Avancement d'une exécution : opérations terminées et échecs, toutes phases confondues."""
+    def __init__(self, phases: list[list[StructuralOperation]]):
+        self.operations = [operation for phase in phases for operation in phase]
+        self.done = 0
+        self.failed = []  # (opération, message d'erreur)
+        self.started_at = time.monotonic()
+
+    @property
+    def total(self) -> int:
+        return len(self.operations)
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started_at
+
+class StructuralExecutor:
+    """
+    Exécute des opérations de structure par phases : les phases s'enchaînent (les salons attendent leurs catégories
+    et les rôles de leurs permissions), les opérations d'une même phase partent en parallèle via `BulkExecutor`.
+    Pas de pause fixe entre deux appels : discord.py n'envoie une requête que si son bucket a encore de la place,
+    et `BulkExecutor` suspend tous les workers puis réessaie quand Discord répond 429.
+    L'aperçu des opérations, lui, est donné par le plan (voir `StructurePlan`), sans passer par l'exécuteur.
+    """
+    def __init__(self, concurrency: int = STRUCTURE_CONCURRENCY, progress_interval: float = PROGRESS_INTERVAL):
+        # Une seule instance pour toutes les phases : une pause de rate-limit s'applique aussi à la phase suivante.
+        self._bulk = BulkExecutor(concurrency=concurrency, progress_interval=progress_interval)
+
+    async def run(self, phases: list[list[StructuralOperation]], on_progress=None) -> StructureReport:
+        """Exécute les phases dans l'ordre. `on_progress(report)` est appelé régulièrement, puis à la fin de chaque phase."""
+        phases = [phase for phase in phases if phase]
+        report = StructureReport(phases)
+
+        for phase in phases:
+            done_before, failed_before = report.done, len(report.failed)
+
+            async def phase_progress(result):
+                report.done = done_before + result.done
+                report.failed[failed_before:] = result.failed
+                if on_progress:
+                    await on_progress(report)
+
+            result = await self._bulk.run(phase, lambda operation: operation.call(), on_progress=phase_progress)
+            report.done = done_before + result.done
+            report.failed[failed_before:] = result.failed
+        return report
@@ -0,0 +1,264 @@
+from typing import NamedTuple
+import discord
+from structure_executor import StructuralOperation
+
+# Cibles spéciales des permissions d'un salon (les autres clés sont des noms de rôles).
+EVERYONE = "@everyone"
+BOT = "@bot"
+# Politiques de suppression : rien, seulement les éléments créés par le bot, ou tout ce qui n'est pas dans la configuration.
+PRUNE_POLICIES = {"keep": "keep", "smart_delete": "managed", "full_delete": "all"}
+
+class RoleSpec(NamedTuple):
+    name: str
+    permissions: discord.Permissions
+    color: discord.Color
+    hoist: bool = False
+
+class ChannelSpec(NamedTuple):
+    name: str
+    kind: str  # "text" ou "voice"
+    overwrites: dict  # cible (nom de rôle, EVERYONE ou BOT) -> PermissionOverwrite
+
+class CategorySpec(NamedTuple):
+    name: str
+    overwrites: dict
+    channels: list
+
+class DesiredStructure(NamedTuple):
+    """Structure voulue : rôles du plus haut au plus bas, catégories (et leurs salons) dans l'ordre d'affichage."""
+    roles: list
+    categories: list
+
+def channel_name(name: str, kind: str) -> str:
+    """Nom tel que Discord l'enregistre : les salons textuels perdent le `#`, passent en minuscules et sans espaces."""
+    if kind != "text":
+        return name
+    return name.strip().lstrip("#").lower().replace(" ", "-")
+
+def _overwrite_values(overwrites: dict) -> dict:
+    return {target.id: tuple(permissions.value for permissions in overwrite.pair()) for target, overwrite in overwrites.items()}
+
+def _in_order(items: list) -> bool:
+    """Vrai si les éléments (déjà présents) apparaissent sur Discord dans l'ordre de la liste."""
+    keys = [(item.position, item.id) for item in items]
+    return keys == sorted(keys)
+
+class StructurePlan:
+    """
+    Différence entre la structure voulue et le serveur, sous forme de phases d'opérations (voir `StructuralExecutor`) :
+    suppressions, rôles, ordre des rôles, catégories, ordre des catégories, salons, ordre des salons.
+    Après exécution, `created` contient les éléments créés ((type, nom) -> objet), `tracked` leurs IDs
+    (à enregistrer en base) et `removed` les IDs des éléments supprimés.
+    """
+    def __init__(self):
+        self.deletes, self.roles, self.role_order = [], [], []
+        self.categories, self.category_order, self.channels, self.channel_order = [], [], [], []
+        self.created = {}
+        self.tracked = []
+        self.removed = []
+
+    @property
+    def phases(self) -> list[list[StructuralOperation]]:
+        return [self.deletes, self.roles, self.role_order, self.categories, self.category_order, self.channels, self.channel_order]
+
+    @property
+    def operations(self) -> list[StructuralOperation]:
+        return [operation for phase in self.phases for operation in phase]
+
+    @property
+    def total(self) -> int:
+        return len(self.operations)
+
+    def counts(self) -> dict[tuple[str, str], int]:
+        """Nombre d'opérations par (action, type), pour les résumés."""
+        counts = {}
+        for operation in self.operations:
+            counts[operation.action, operation.kind] = counts.get((operation.action, operation.kind), 0) + 1
+        return counts
+
+class StructurePlanner:
+    """
+    Calcule le plan minimal pour amener `guild` à la structure `desired`, en un seul passage sur des index par nom.
+    Seuls les éléments « possédés » sont modifiés, réordonnés ou supprimés : ceux que le bot a créés (`managed_ids`),
+    ou tous avec la politique "all". Un rôle ou un salon du même nom créé à la main est réutilisé tel quel.
+    Sur un serveur déjà conforme, le plan est vide : aucun appel à l'API.
+    """
+    def __init__(self, guild: discord.Guild, desired: DesiredStructure, managed_ids: set[int], prune: str = "keep"):
+        self.guild = guild
+        self.desired = desired
+        self.managed_ids = managed_ids
+        self.prune = prune
+        self.plan = StructurePlan()
+
+        # --- Index du serveur (premier élément de chaque nom) ---
+        self.roles_by_name = {}
+        for role in guild.roles:
+            self.roles_by_name.setdefault(role.name, role)
+        self.categories_by_name = {}
+        self.channels_by_key = {}  # (nom de catégorie ou None, type, nom) -> salon
+        self.channels_by_name = {}  # (type, nom) -> salon, pour retrouver un salon déplacé
+        for channel in guild.channels:
+            if channel.type == discord.ChannelType.category:
+                self.categories_by_name.setdefault(channel.name, channel)
+            elif channel.type.name in ("text", "voice"):
+                self.channels_by_key.setdefault((channel.category.name if channel.category else None, channel.type.name, channel.name), channel)
+                self.channels_by_name.setdefault((channel.type.name, channel.name), channel)
+        self.new_roles = set()
+
+    def _owned(self, element) -> bool:
+        return self.prune == "all" or element.id in self.managed_ids
+
+    def _role(self, name: str):
+        return self.plan.created.get(("role", name)) or self.roles_by_name.get(name)
+
+    def _resolve(self, overwrites: dict) -> dict:
+        """Remplace les noms des cibles par les rôles (existants ou créés plus tôt dans l'exécution)."""
+        resolved = {}
+        for key, overwrite in overwrites.items():
+            target = self.guild.default_role if key == EVERYONE else self.guild.me if key == BOT else self._role(key)
+            if target is not None:
+                resolved[target] = overwrite
+        return resolved
+
+    def _overwrites_differ(self, element, overwrites: dict) -> bool:
+        # Une permission qui vise un rôle encore à créer ne peut être posée qu'après sa création.
+        if any(key in self.new_roles for key in overwrites):
+            return True
+        return _overwrite_values(element.overwrites) != _overwrite_values(self._resolve(overwrites))
+
+    def _track(self, element, element_type: str):
+        self.plan.created[(element_type, element.name)] = element
+        self.plan.tracked.append((element.id, element_type))
+
+    def build(self) -> StructurePlan:
+        kept = set()
+        self._plan_roles(kept)
+        self._plan_channels(kept)
+        self._plan_deletes(kept)
+        return self.plan
+
+    # --- Rôles ---
+    def _plan_roles(self, kept: set):
+        ordered = []  # Rôles possédés ou créés, dans l'ordre voulu (du plus haut au plus bas)
+        for spec in self.desired.roles:
+            role = self.roles_by_name.get(spec.name)
+            if role is None:
+                self.new_roles.add(spec.name)
+                ordered.append(spec.name)
+
+                async def create(spec=spec):
+                    self._track(await self.guild.create_role(name=spec.name, permissions=spec.permissions, color=spec.color, hoist=spec.hoist, reason="DiscordMaker Setup"), "role")
+                self.plan.roles.append(StructuralOperation("create", "role", spec.name, create))
+                continue
+            kept.add(role.id)
+            if not self._owned(role):
+                continue
+            ordered.append(spec.name)
+            if (role.permissions.value, role.color.value, role.hoist) != (spec.permissions.value, spec.color.value, spec.hoist):
+                async def update(role=role, spec=spec):
+                    await role.edit(permissions=spec.permissions, color=spec.color, hoist=spec.hoist, reason="DiscordMaker Setup")
+                self.plan.roles.append(StructuralOperation("edit", "role", spec.name, update))
+
+        existing = [self.roles_by_name[name] for name in ordered if name in self.roles_by_name]
+        # Discord classe les rôles du plus bas (position 1) au plus haut : l'ordre voulu est l'inverse.
+        if len(ordered) > 1 and (self.new_roles or not _in_order(existing[::-1])):
+            async def reorder():
+                roles = [self._role(name) for name in ordered if self._role(name) is not None]
+                await self.guild.edit_role_positions({role: len(roles) - index for index, role in enumerate(roles)}, reason="DiscordMaker Setup")
+            self.plan.role_order.append(StructuralOperation("reorder", "roles", ", ".join(ordered), reorder))
+
+    # --- Catégories et salons ---
+    def _plan_channels(self, kept: set):
+        ordered_categories = []
+        for index, spec in enumerate(self.desired.categories):
+            category = self.categories_by_name.get(spec.name)
+            if category is None:
+                async def create_category(spec=spec, position=index):
+                    self._track(await self.guild.create_category(spec.name, overwrites=self._resolve(spec.overwrites), position=position, reason="DiscordMaker Setup"), "category")
+                self.plan.categories.append(StructuralOperation("create", "category", spec.name, create_category))
+            else:
+                kept.add(category.id)
+                if self._owned(category):
+                    ordered_categories.append(category)
+                    if self._overwrites_differ(category, spec.overwrites):
+                        async def update_category(category=category, spec=spec):
+                            await category.edit(overwrites=self._resolve(spec.overwrites), reason="DiscordMaker Setup")
+                        self.plan.categories.append(StructuralOperation("edit", "category", spec.name, update_category))
+            for kind in ("text", "voice"):
+                self._plan_category_channels(spec, category, [channel for channel in spec.channels if channel.kind == kind], kept)
+
+        if not _in_order(ordered_categories):
+            self.plan.category_order.append(self._reorder_operation("categories", ordered_categories))
+
+    def _plan_category_channels(self, category_spec: CategorySpec, category, specs: list, kept: set):
+        ordered = []
+        for position, spec in enumerate(specs):
+            name = channel_name(spec.name, spec.kind)
+            channel = self.channels_by_key.get((category_spec.name, spec.kind, name))
+            moved = False
+            if channel is None:
+                # Un salon possédé qui se trouve dans une autre catégorie est déplacé plutôt que recréé.
+                channel = self.channels_by_name.get((spec.kind, name))
+                moved = channel is not None and self._owned(channel) and channel.id not in kept
+                if not moved:
+                    channel = None
+            if channel is None:
+                async def create_channel(spec=spec, name=name, position=position):
+                    # Sans sa catégorie (création refusée), le salon n'est pas créé non plus.
+                    category = self.plan.created.get(("category", category_spec.name)) or self.categories_by_name.get(category_spec.name)
+                    if category is None:
+                        raise RuntimeError("catégorie non créée")
+                    create = self.guild.create_text_channel if spec.kind == "text" else self.guild.create_voice_channel
+                    self._track(await create(name, category=category, overwrites=self._resolve(spec.overwrites), position=position, reason="DiscordMaker Setup"), "channel")
+                self.plan.channels.append(StructuralOperation("create", spec.kind, name, create_channel))
+                continue
+            kept.add(channel.id)
+            if not self._owned(channel):
+                continue
+            ordered.append(channel)
+            if moved or self._overwrites_differ(channel, spec.overwrites):
+                async def update_channel(channel=channel, spec=spec, moved=moved):
+                    fields = {"overwrites": self._resolve(spec.overwrites)}
+                    if moved:
+                        fields["category"] = self.plan.created.get(("category", category_spec.name)) or self.categories_by_name.get(category_spec.name)
+                    await channel.edit(reason="DiscordMaker Setup", **fields)
+                self.plan.channels.append(StructuralOperation("edit", spec.kind, name, update_channel))
+
+        if category is not None and not _in_order(ordered):
+            self.plan.channel_order.append(self._reorder_operation("channels", ordered))
+
+    @staticmethod
+    def _reorder_operation(kind: str, elements: list) -> StructuralOperation:
+        async def reorder():
+            # Chaque déplacement décale les voisins sur Discord : ils sont faits l'un après l'autre, dans l'ordre.
+            for position, element in enumerate(elements):
+                if element.position != position:
+                    await element.edit(position=position, reason="DiscordMaker Setup")
+        return StructuralOperation("reorder", kind, ", ".join(element.name for element in elements), reorder)
+
+    # --- Suppressions ---
+    def _plan_deletes(self, kept: set):
+        if self.prune == "keep":
+            return
+        for channel in self.guild.channels:
+            if channel.id not in kept and self._owned(channel):
+                self.plan.deletes.append(self._delete_operation("category" if channel.type == discord.ChannelType.category else channel.type.name, channel))
+        for role in self.guild.roles:
+            if role.id in kept or not self._owned(role):
+                continue
+            # Jamais @everyone, les rôles d'intégration/boost ni ceux au-dessus du bot.
+            if role.is_default() or role.is_integration() or role.is_premium_subscriber() or role >= self.guild.me.top_role:
+                continue
+            self.plan.deletes.append(self._delete_operation("role", role))
+
+    def _delete_operation(self, kind: str, element) -> StructuralOperation:
+        async def delete():
+            try:
+                await element.delete(reason="DiscordMaker Setup")
+            except discord.NotFound:
+                pass # Déjà supprimé : le résultat est le même.
+            self.plan.removed.append(element.id)
+        return StructuralOperation("delete", kind, element.name, delete)
+
+def plan_structure(guild: discord.Guild, desired: DesiredStructure, managed_ids: set[int], prune: str = "keep") -> StructurePlan:
+    return StructurePlanner(guild, desired, managed_ids, prune).build()
@@ -0,0 +1,15 @@
+import pytest
+import sys
+import os
+
+# Ajoute le répertoire racine du projet au path pour permettre les imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import db_manager
+
+@pytest.fixture
+async def temp_db(tmp_path, monkeypatch):
+    """Redirige la base de données vers un fichier temporaire et l'initialise."""
+    monkeypatch.setattr(db_manager, "DB_FILE", str(tmp_path / "test.db"))
+    await db_manager.initialize_database()
+    return db_manager.DB_FILE
@@ -0,0 +1,180 @@
+"""
+Faux serveur Discord pour les tests de DiscordMaker : rôles, catégories et salons en mémoire, avec les mêmes
+méthodes de création/suppression que `discord.Guild` (sans réseau). Chaque appel à l'API est compté dans `calls`.
+"""
+import asyncio
+import itertools
+import discord
+
+_ids = itertools.count(1000)
+
+class FakeRole:
+    def __init__(self, guild, name: str, position: int, permissions=None, color=None, hoist=False, mentionable=False, managed=False):
+        self.guild = guild
+        self.id = next(_ids)
+        self.name = name
+        self.position = position
+        self.permissions = permissions or discord.Permissions.none()
+        self.color = color or discord.Color.default()
+        self.hoist = hoist
+        self.mentionable = mentionable
+        self.managed = managed
+
+    def __repr__(self):
+        return f"<FakeRole {self.name!r} position={self.position}>"
+
+    def __hash__(self):
+        return hash(self.id)
+
+    def __lt__(self, other):
+        return self.position < other.position
+
+    def __ge__(self, other):
+        return self.position >= other.position
+
+    def is_default(self) -> bool:
+        return self.position == 0
+
+    def is_integration(self) -> bool:
+        return False
+
+    def is_premium_subscriber(self) -> bool:
+        return False
+
+    def is_bot_managed(self) -> bool:
+        return self.managed
+
+    async def delete(self, reason=None):
+        await self.guild._api("delete_role")
+        self.guild._roles.remove(self)
+
+    async def edit(self, reason=None, **fields):
+        await self.guild._api("edit_role")
+        for name, value in fields.items():
+            setattr(self, name, value)
+
+class FakeChannel:
+    def __init__(self, guild, name: str, kind: str, category=None, position: int = 0, overwrites=None):
+        self.guild = guild
+        self.id = next(_ids)
+        self.name = name
+        self.type = discord.ChannelType.category if kind == "category" else discord.ChannelType[kind]
+        self.category = category
+        self.position = position
+        self.overwrites = dict(overwrites or {})
+
+    def __repr__(self):
+        return f"<FakeChannel {self.name!r} {self.type.name}>"
+
+    def __hash__(self):
+        return hash(self.id)
+
+    async def delete(self, reason=None):
+        await self.guild._api("delete_channel")
+        if self not in self.guild.channels:
+            raise discord.NotFound(_response(404), "Unknown Channel")
+        self.guild.channels.remove(self)
+
+    async def edit(self, reason=None, **fields):
+        await self.guild._api("edit_channel")
+        for name, value in fields.items():
+            setattr(self, name, value)
+
+def _response(status: int):
+    class Response:
+        reason = "simulé"
+        headers = {}
+    response = Response()
+    response.status = status
+    return response
+
+class FakeGuild:
+    """Un serveur : `@everyone` (position 0) et le rôle du bot (le plus haut), sans salon. `latency` ralentit chaque appel."""
+    def __init__(self, latency: float = 0.0):
+        self.id = next(_ids)
+        self.name = "Serveur de test"
+        self.latency = latency
+        self.calls = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._roles = []
+        self.channels = []
+        self.default_role = self._add_role("@everyone")
+        self.me = FakeRole(self, "FunBot", 0, managed=True)
+        self.me.top_role = self.me
+        self._roles.append(self.me)
+        self._restack()
+
+    # --- Accès en lecture (mêmes noms que discord.Guild) ---
+    @property
+    def roles(self) -> list:
+        return sorted(self._roles, key=lambda role: role.position)
+
+    @property
+    def categories(self) -> list:
+        return [channel for channel in self.channels if channel.type == discord.ChannelType.category]
+
+    @property
+    def text_channels(self) -> list:
+        return [channel for channel in self.channels if channel.type == discord.ChannelType.text]
+
+    def get_role(self, role_id: int):
+        return next((role for role in self._roles if role.id == role_id), None)
+
+    def get_channel(self, channel_id: int):
+        return next((channel for channel in self.channels if channel.id == channel_id), None)
+
+    # --- Appels à l'API ---
+    async def _api(self, name: str):
+        self.calls.append(name)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.latency)
+        finally:
+            self.in_flight -= 1
+
+    def _add_role(self, name: str, **fields) -> FakeRole:
+        role = FakeRole(self, name, 1, **fields)
+        self._roles.append(role)
+        return role
+
+    def _restack(self):
+        """Comme Discord : @everyone en bas, le bot tout en haut, les positions sans trou."""
+        others = sorted((role for role in self._roles if role is not self.default_role and role is not getattr(self, "me", None)), key=lambda role: role.position)
+        self.default_role.position = 0
+        for position, role in enumerate(others, start=1):
+            role.position = position
+        if getattr(self, "me", None):
+            self.me.position = len(others) + 1
+
+    async def create_role(self, name: str, reason=None, **fields) -> FakeRole:
+        await self._api("create_role")
+        # Un nouveau rôle arrive juste au-dessus de @everyone.
+        for role in self._roles:
+            if role is not self.default_role:
+                role.position += 1
+        role = self._add_role(name, **fields)
+        self._restack()
+        return role
+
+    async def edit_role_positions(self, positions: dict, reason=None):
+        await self._api("edit_role_positions")
+        for role, position in positions.items():
+            role.position = position - 0.5  # Les rôles déplacés passent devant ceux qui occupaient déjà la position.
+        self._restack()
+
+    async def _create_channel(self, kind: str, name: str, category=None, position=None, overwrites=None, reason=None) -> FakeChannel:
+        await self._api(f"create_{kind}")
+        channel = FakeChannel(self, name, kind, category, position if position is not None else len(self.channels), overwrites)
+        self.channels.append(channel)
+        return channel
+
+    async def create_category(self, name: str, **kwargs) -> FakeChannel:
+        return await self._create_channel("category", name, **kwargs)
+
+    async def create_text_channel(self, name: str, **kwargs) -> FakeChannel:
+        return await self._create_channel("text", name, **kwargs)
+
+    async def create_voice_channel(self, name: str, **kwargs) -> FakeChannel:
+        return await self._create_channel("voice", name, **kwargs)
@@ -0,0 +1,530 @@
+"""
+Faux serveur Lavalink v4 pour les tests et les benchmarks de la musique, sans nœud Lavalink réel.
+
+Il parle le protocole REST et websocket de Lavalink v4 (le sous-ensemble utilisé par wavelink) avec des pistes
+synthétiques, et permet de simuler la latence, des erreurs et la perte complète d'un nœud.
+Le module fournit aussi de quoi simuler des serveurs Discord (client, serveur, salon vocal) pour connecter
+de vrais `wavelink.Player` au faux nœud.
+
+Identifiants reconnus par `/v4/loadtracks` :
+- `<source>search:<texte>` : 5 résultats (aucun si le texte contient "introuvable") ;
+- `fakeplaylist:<nom>:<n>` : une playlist de n pistes ;
+- `fakeerror:<texte>` : un chargement en erreur ;
+- tout le reste (URL...) : une piste unique.
+"""
+import asyncio
+import base64
+import itertools
+import json
+import random
+import time
+import types
+import uuid
+import wavelink
+from aiohttp import web, WSMsgType
+
+DEFAULT_PASSWORD = "youshallnotpass"
+DEFAULT_TRACK_LENGTH = 180000
+
+def make_track(identifier: str, title: str | None = None, author: str = "Artiste Synthétique", length: int = DEFAULT_TRACK_LENGTH,
+               source: str = "soundcloud") -> dict:
+    """Piste au format Lavalink v4. La piste encodée contient ses propres infos : aucun état n'est nécessaire pour la décoder."""
+    info = {
+        "identifier": identifier,
+        "isSeekable": True,
+        "author": author,
+        "length": length,
+        "isStream": length == 0,
+        "position": 0,
+        "title": title or identifier,
+        "uri": f"https://fake.lavalink/{source}/{identifier}",
+        "artworkUrl": None,
+        "isrc": None,
+        "sourceName": source,
+    }
+    encoded = "FAKE" + base64.urlsafe_b64encode(json.dumps(info).encode()).decode()
+    return {"encoded": encoded, "info": info, "pluginInfo": {}, "userData": {}}
+
+def decode_track(encoded: str) -> dict | None:
+    if not encoded or not encoded.startswith("FAKE"):
+        return None
+    try:
+        info = json.loads(base64.urlsafe_b64decode(encoded[4:].encode()))
+    except (ValueError, json.JSONDecodeError):
+        return None
+    return {"encoded": encoded, "info": info, "pluginInfo": {}, "userData": {}}
+
+class _FakePlayer:
+    """État d'un lecteur côté serveur : piste en cours, position simulée, pause, volume, voix."""
+    def __init__(self, guild_id: str):
+        self.guild_id = guild_id
+        self.track = None
+        self.volume = 100
+        self.paused = False
+        self.voice = {}
+        self.filters = {}
+        self.started_at = 0.0  # Instant (monotonic) correspondant à `base_position`
+        self.base_position = 0
+        self.end_handle = None
+
+    def position(self, time_scale: float) -> int:
+        if not self.track:
+            return 0
+        if self.paused:
+            return self.base_position
+        elapsed = (time.monotonic() - self.started_at) * 1000 * time_scale
+        return min(int(self.base_position + elapsed), self.track["info"]["length"] or int(self.base_position + elapsed))
+
+    def to_json(self, time_scale: float) -> dict:
+        return {
+            "guildId": self.guild_id,
+            "track": self.track,
+            "volume": self.volume,
+            "paused": self.paused,
+            "state": {"time": int(time.time() * 1000), "position": self.position(time_scale), "connected": bool(self.voice), "ping": 1},
+            "voice": self.voice,
+            "filters": self.filters,
+        }
+
+class _Session:
+    def __init__(self, session_id: str, ws: web.WebSocketResponse, request: web.Request):
+        self.session_id = session_id
+        self.ws = ws
+        self.request = request
+        self.players = {}  # guild_id (str) -> _FakePlayer
+        self.tasks = []
+
+class FakeLavalink:
+    """
+    Nœud Lavalink v4 simulé, servi en local par aiohttp.
+    - `latency` : délai ajouté à chaque requête REST et avant chaque début de piste (en secondes) ;
+    - `failure_rate` : probabilité qu'une requête REST réponde 500 ;
+    - `time_scale` : vitesse de lecture simulée (1000 = une piste de 3 min dure 0,18 s) ;
+    - `kill()` / `revive()` : coupe le nœud (websockets fermés, REST en 503) puis le rétablit.
+    """
+    def __init__(self, password: str = DEFAULT_PASSWORD, latency: float = 0.0, failure_rate: float = 0.0,
+                 time_scale: float = 1.0, track_length: int = DEFAULT_TRACK_LENGTH, stats_interval: float = 60.0,
+                 update_interval: float = 5.0, seed: int | None = None):
+        self.password = password
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.time_scale = time_scale
+        self.track_length = track_length
+        self.stats_interval = stats_interval
+        self.update_interval = update_interval
+        self.random = random.Random(seed)
+        self.down = False
+        self.sessions = {}  # session_id -> _Session
+        self.requests = {}  # "MÉTHODE /route" -> nombre d'appels
+        self._started = time.monotonic()
+        self._runner = None
+        self._site = None
+        self.port = None
+
+        self.app = web.Application(middlewares=[self._middleware])
+        self.app.router.add_get("/version", self._version)
+        self.app.router.add_get("/v4/info", self._info)
+        self.app.router.add_get("/v4/stats", self._stats_route)
+        self.app.router.add_get("/v4/loadtracks", self._load_tracks)
+        self.app.router.add_get("/v4/decodetrack", self._decode_track)
+        self.app.router.add_post("/v4/decodetracks", self._decode_tracks)
+        self.app.router.add_get("/v4/websocket", self._websocket)
+        self.app.router.add_patch("/v4/sessions/{session_id}", self._update_session)
+        self.app.router.add_get("/v4/sessions/{session_id}/players", self._get_players)
+        self.app.router.add_get("/v4/sessions/{session_id}/players/{guild_id}", self._get_player)
+        self.app.router.add_patch("/v4/sessions/{session_id}/players/{guild_id}", self._update_player)
+        self.app.router.add_delete("/v4/sessions/{session_id}/players/{guild_id}", self._destroy_player)
+
+    # --- Cycle de vie ---
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        self._runner = web.AppRunner(self.app)
+        await self._runner.setup()
+        self._site = web.TCPSite(self._runner, host, port)
+        await self._site.start()
+        self.port = self._site._server.sockets[0].getsockname()[1]
+        return self.uri
+
+    @property
+    def uri(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    async def stop(self):
+        await self._close_sessions()
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def kill(self):
+        """Simule la perte du nœud : connexions coupées net (comme un crash), lecteurs perdus, requêtes en erreur 503."""
+        self.down = True
+        await self._close_sessions(abort=True)
+
+    def revive(self):
+        self.down = False
+
+    async def _close_sessions(self, abort: bool = False):
+        for session in list(self.sessions.values()):
+            for task in session.tasks:
+                task.cancel()
+            for player in session.players.values():
+                if player.end_handle:
+                    player.end_handle.cancel()
+            if abort and session.request.transport:
+                session.request.transport.abort()
+            else:
+                await session.ws.close()
+        self.sessions.clear()
+
+    @property
+    def player_count(self) -> int:
+        return sum(len(session.players) for session in self.sessions.values())
+
+    @property
+    def playing_count(self) -> int:
+        return sum(1 for session in self.sessions.values() for player in session.players.values() if player.track and not player.paused)
+
+    # --- Outils ---
+    @web.middleware
+    async def _middleware(self, request: web.Request, handler):
+        route = request.match_info.route.resource.canonical if request.match_info.route.resource else request.path
+        key = f"{request.method} {route}"
+        self.requests[key] = self.requests.get(key, 0) + 1
+
+        if self.down:
+            return self._error(request, 503, "Service Unavailable", "Nœud simulé hors service.")
+        if request.headers.get("Authorization") != self.password:
+            return self._error(request, 401, "Unauthorized", "Mot de passe invalide.")
+        if self.latency and not request.path.endswith("/websocket"):
+            await asyncio.sleep(self.latency)
+        if self.failure_rate and not request.path.endswith("/websocket") and self.random.random() < self.failure_rate:
+            return self._error(request, 500, "Internal Server Error", "Erreur simulée.")
+        return await handler(request)
+
+    def _error(self, request: web.Request, status: int, error: str, message: str) -> web.Response:
+        return web.json_response(
+            {"timestamp": int(time.time() * 1000), "status": status, "error": error, "message": message, "path": request.path},
+            status=status,
+        )
+
+    def _session(self, request: web.Request) -> _Session | None:
+        return self.sessions.get(request.match_info["session_id"])
+
+    def stats(self) -> dict:
+        return {
+            "players": self.player_count,
+            "playingPlayers": self.playing_count,
+            "uptime": int((time.monotonic() - self._started) * 1000),
+            "memory": {"free": 256 << 20, "used": 128 << 20, "allocated": 384 << 20, "reservable": 1 << 30},
+            "cpu": {"cores": 4, "systemLoad": min(0.05 + self.playing_count * 0.001, 1.0), "lavalinkLoad": 0.02},
+            "frameStats": {"sent": 3000 * self.playing_count, "nulled": 0, "deficit": 0} if self.playing_count else None,
+        }
+
+    # --- REST ---
+    async def _version(self, request):
+        return web.Response(text="4.0.0-fake")
+
+    async def _info(self, request):
+        return web.json_response({
+            "version": {"semver": "4.0.0-fake", "major": 4, "minor": 0, "patch": 0, "preRelease": "fake", "build": None},
+            "buildTime": 0,
+            "git": {"branch": "main", "commit": "fake", "commitTime": 0},
+            "jvm": "fake",
+            "lavaplayer": "fake",
+            "sourceManagers": ["youtube", "soundcloud", "http"],
+            "filters": ["volume", "equalizer", "timescale"],
+            "plugins": [],
+        })
+
+    async def _stats_route(self, request):
+        return web.json_response(self.stats())
+
+    async def _load_tracks(self, request):
+        identifier = request.query.get("identifier", "")
+        if identifier.startswith("fakeerror:"):
+            return web.json_response({"loadType": "error", "data": {"message": "Erreur de chargement simulée.", "severity": "common", "cause": "fake"}})
+        if identifier.startswith("fakeplaylist:"):
+            _, name, count = (identifier.split(":", 2) + ["10"])[:3]
+            tracks = [make_track(f"{name}-{i}", f"{name} #{i}", length=self.track_length) for i in range(int(count))]
+            return web.json_response({"loadType": "playlist", "data": {"info": {"name": name, "selectedTrack": -1}, "pluginInfo": {}, "tracks": tracks}})
+        prefix, sep, text = identifier.partition("search:")
+        if sep and prefix.isalpha():
+            if "introuvable" in text.lower():
+                return web.json_response({"loadType": "empty", "data": {}})
+            slug = "-".join(text.lower().split()) or "vide"
+            tracks = [make_track(f"{slug}-{i}", f"{text.strip()} ({i})", length=self.track_length, source=prefix or "youtube") for i in range(5)]
+            return web.json_response({"loadType": "search", "data": tracks})
+        slug = identifier.rstrip("/").rsplit("/", 1)[-1] or "piste"
+        return web.json_response({"loadType": "track", "data": make_track(slug, length=self.track_length)})
+
+    async def _decode_track(self, request):
+        track = decode_track(request.query.get("encodedTrack", ""))
+        if track is None:
+            return self._error(request, 400, "Bad Request", "Piste encodée invalide.")
+        return web.json_response(track)
+
+    async def _decode_tracks(self, request):
+        tracks = [decode_track(encoded) for encoded in await request.json()]
+        if any(track is None for track in tracks):
+            return self._error(request, 400, "Bad Request", "Piste encodée invalide.")
+        return web.json_response(tracks)
+
+    async def _update_session(self, request):
+        if not self._session(request):
+            return self._error(request, 404, "Not Found", "Session inconnue.")
+        data = await request.json()
+        return web.json_response({"resuming": data.get("resuming", False), "timeout": data.get("timeout", 60)})
+
+    async def _get_players(self, request):
+        session = self._session(request)
+        if not session:
+            return self._error(request, 404, "Not Found", "Session inconnue.")
+        return web.json_response([player.to_json(self.time_scale) for player in session.players.values()])
+
+    async def _get_player(self, request):
+        session = self._session(request)
+        player = session.players.get(request.match_info["guild_id"]) if session else None
+        if not player:
+            return self._error(request, 404, "Not Found", "Lecteur inconnu.")
+        return web.json_response(player.to_json(self.time_scale))
+
+    async def _update_player(self, request):
+        session = self._session(request)
+        if not session:
+            return self._error(request, 404, "Not Found", "Session inconnue.")
+        guild_id = request.match_info["guild_id"]
+        player = session.players.setdefault(guild_id, _FakePlayer(guild_id))
+        data = await request.json()
+        no_replace = request.query.get("noReplace", "false").lower() == "true"
+
+        if "voice" in data:
+            player.voice = data["voice"]
+        if "volume" in data:
+            player.volume = data["volume"]
+        if "filters" in data:
+            player.filters = data["filters"] or {}
+        if "paused" in data and data["paused"] != player.paused:
+            player.base_position = player.position(self.time_scale)
+            player.started_at = time.monotonic()
+            player.paused = data["paused"]
+            self._schedule_end(session, player)
+
+        if "track" in data:
+            encoded = (data["track"] or {}).get("encoded")
+            if encoded is None:
+                if player.track:
+                    await self._end_track(session, player, "stopped")
+            elif not (no_replace and player.track):
+                track = decode_track(encoded)
+                if track is None:
+                    return self._error(request, 400, "Bad Request", "Piste encodée invalide.")
+                track["userData"] = data["track"].get("userData") or {}
+                if player.track:
+                    await self._end_track(session, player, "replaced")
+                player.track = track
+                player.base_position = data.get("position") or 0
+                player.started_at = time.monotonic()
+                asyncio.create_task(self._start_track(session, player, track))
+        elif "position" in data and player.track:
+            player.base_position = data["position"]
+            player.started_at = time.monotonic()
+            self._schedule_end(session, player)
+
+        return web.json_response(player.to_json(self.time_scale))
+
+    async def _destroy_player(self, request):
+        session = self._session(request)
+        player = session.players.pop(request.match_info["guild_id"], None) if session else None
+        if player and player.end_handle:
+            player.end_handle.cancel()
+        return web.Response(status=204)
+
+    # --- Lecture simulée ---
+    async def _send(self, session: _Session, payload: dict):
+        if not session.ws.closed:
+            await session.ws.send_json(payload)
+
+    async def _start_track(self, session: _Session, player: _FakePlayer, track: dict):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if player.track is not track:
+            return
+        await self._send(session, {"op": "event", "type": "TrackStartEvent", "guildId": player.guild_id, "track": track})
+        self._schedule_end(session, player)
+
+    def _schedule_end(self, session: _Session, player: _FakePlayer):
+        if player.end_handle:
+            player.end_handle.cancel()
+            player.end_handle = None
+        if not player.track or player.paused or not player.track["info"]["length"]:
+            return
+        remaining = (player.track["info"]["length"] - player.position(self.time_scale)) / 1000 / self.time_scale
+        loop = asyncio.get_running_loop()
+        player.end_handle = loop.call_later(max(remaining, 0), lambda: asyncio.create_task(self._end_track(session, player, "finished")))
+
+    async def _end_track(self, session: _Session, player: _FakePlayer, reason: str):
+        track = player.track
+        if track is None:
+            return
+        if player.end_handle:
+            player.end_handle.cancel()
+            player.end_handle = None
+        player.track = None
+        player.base_position = 0
+        await self._send(session, {"op": "event", "type": "TrackEndEvent", "guildId": player.guild_id, "track": track, "reason": reason})
+
+    # --- Websocket ---
+    async def _websocket(self, request):
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        session = _Session(uuid.uuid4().hex[:16], ws, request)
+        self.sessions[session.session_id] = session
+        await ws.send_json({"op": "ready", "resumed": False, "sessionId": session.session_id})
+        session.tasks = [asyncio.create_task(self._stats_loop(session)), asyncio.create_task(self._player_update_loop(session))]
+        try:
+            async for message in ws:
+                if message.type == WSMsgType.ERROR:
+                    break
+        finally:
+            for task in session.tasks:
+                task.cancel()
+            self.sessions.pop(session.session_id, None)
+        return ws
+
+    async def _stats_loop(self, session: _Session):
+        while not session.ws.closed:
+            await self._send(session, {"op": "stats", **self.stats()})
+            await asyncio.sleep(self.stats_interval)
+
+    async def _player_update_loop(self, session: _Session):
+        while not session.ws.closed:
+            await asyncio.sleep(self.update_interval)
+            for player in list(session.players.values()):
+                await self._send(session, {"op": "playerUpdate", "guildId": player.guild_id, "state": player.to_json(self.time_scale)["state"]})
+
+# --- Connexion de wavelink ---
+async def wait_until(predicate, timeout: float = 5.0):
+    """Attend que `predicate()` soit vrai ; asyncio.TimeoutError au-delà de `timeout` secondes."""
+    async def poll():
+        while not predicate():
+            await asyncio.sleep(0.01)
+    await asyncio.wait_for(poll(), timeout=timeout)
+
+async def connect_node(server: FakeLavalink, client, identifier: str, timeout: float = 5.0) -> wavelink.Node:
+    """Ajoute au Pool wavelink un nœud pointant vers le faux serveur et attend qu'il soit connecté."""
+    node = wavelink.Node(uri=server.uri, password=server.password, identifier=identifier, retries=1)
+    await wavelink.Pool.connect(nodes=[node], client=client)
+    await wait_until(lambda: node.status == wavelink.NodeStatus.CONNECTED, timeout)
+    return node
+
+async def close_node(node: wavelink.Node):
+    """Retire le nœud du Pool et ferme sa session HTTP (wavelink ne la ferme pas lui-même à l'éjection)."""
+    await node.close(eject=True)
+    await node._session.close()
+
+# --- Simulation de Discord ---
+_ids = itertools.count(10**17)
+
+class FakeDiscordClient:
+    """
+    Client Discord minimal pour wavelink : un utilisateur, `dispatch` des événements vers des écouteurs enregistrés,
+    et des salons vocaux simulés.
+    """
+    def __init__(self):
+        self.user = types.SimpleNamespace(id=next(_ids), bot=True)
+        self.listeners = {}  # nom d'événement -> liste de coroutines
+        self.channels = {}
+        self.guilds = {}
+
+    def add_listener(self, coroutine, name: str):
+        self.listeners.setdefault(name, []).append(coroutine)
+
+    def dispatch(self, event: str, *args, **kwargs):
+        for coroutine in self.listeners.get(f"on_{event}", []):
+            asyncio.create_task(coroutine(*args, **kwargs))
+
+    def get_channel(self, channel_id: int):
+        return self.channels.get(channel_id)
+
+    @property
+    def voice_clients(self) -> list:
+        return [guild.voice_client for guild in self.guilds.values() if guild.voice_client is not None]
+
+    async def wait_until_ready(self):
+        pass
+
+    def get_guild(self, guild_id: int):
+        return self.guilds.get(guild_id)
+
+    def get_user(self, user_id: int):
+        return None
+
+    def create_guild(self, listeners: int = 1):
+        """Crée un serveur simulé avec un salon vocal occupé par `listeners` membres humains et un salon textuel."""
+        guild = FakeGuild(self)
+        channel = FakeVoiceChannel(guild, listeners)
+        guild.voice_channel = channel
+        self.guilds[guild.id] = guild
+        self.channels[channel.id] = channel
+        self.channels[guild.text_channel.id] = guild.text_channel
+        return guild
+
+class FakeTextChannel:
+    def __init__(self):
+        self.id = next(_ids)
+        self.sent = []
+
+    async def send(self, content=None, **kwargs):
+        message = FakeMessage(self, content, kwargs.get("embed"))
+        self.sent.append(message)
+        return message
+
+class FakeMessage:
+    def __init__(self, channel, content, embed):
+        self.id = next(_ids)
+        self.channel = channel
+        self.content = content
+        self.embed = embed
+        self.edits = 0
+
+    async def edit(self, **kwargs):
+        self.edits += 1
+        self.embed = kwargs.get("embed", self.embed)
+
+    async def delete(self):
+        pass
+
+class FakeGuild:
+    def __init__(self, client: FakeDiscordClient):
+        self.id = next(_ids)
+        self.name = f"Serveur simulé {self.id}"
+        self.client = client
+        self.voice_client = None
+        self.voice_channel = None
+        self.text_channel = FakeTextChannel()
+
+    async def change_voice_state(self, *, channel, self_mute: bool = False, self_deaf: bool = False):
+        """Répond comme la passerelle Discord : VOICE_STATE_UPDATE puis VOICE_SERVER_UPDATE pour le lecteur."""
+        player = self.voice_client
+        if player is None:
+            return
+        if channel is None:
+            self.voice_client = None
+            await player.on_voice_state_update({"channel_id": None, "session_id": "", "guild_id": str(self.id)})
+            return
+        await player.on_voice_state_update({"channel_id": str(channel.id), "session_id": uuid.uuid4().hex, "guild_id": str(self.id)})
+        await player.on_voice_server_update({"token": uuid.uuid4().hex, "endpoint": "fake.discord.media", "guild_id": str(self.id)})
+
+class FakeVoiceChannel:
+    def __init__(self, guild: FakeGuild, listeners: int):
+        self.id = next(_ids)
+        self.guild = guild
+        self.name = "Salon vocal simulé"
+        self.mention = f"<#{self.id}>"
+        self.members = [types.SimpleNamespace(id=next(_ids), bot=False) for _ in range(listeners)]
+
+    async def connect(self, *, cls, timeout: float = 60.0, reconnect: bool = True, self_deaf: bool = False, self_mute: bool = False):
+        """Équivalent de `discord.VoiceChannel.connect(cls=...)`."""
+        player = cls(self.guild.client, self)
+        self.guild.voice_client = player
+        await player.connect(timeout=timeout, reconnect=reconnect, self_deaf=self_deaf, self_mute=self_mute)
+        return player
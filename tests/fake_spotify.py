@@ -0,0 +1,88 @@
+"""
+Faux client spotipy pour les tests : mêmes méthodes et mêmes formes de réponse que l'API Web
+de Spotify (pages, totaux, objets simplifiés des albums), sans réseau ni identifiants.
+"""
+import threading
+import spotipy
+
+def make_spotify_track(index: int, isrc: bool = True, prefix: str = "Titre") -> dict:
+    return {
+        "id": f"track{index}", "type": "track", "is_local": False, "name": f"{prefix} {index}",
+        "duration_ms": 180000 + index, "artists": [{"name": f"Artiste {index}"}, {"name": "Invité"}],
+        "external_ids": {"isrc": f"FRZ0{index:08d}"} if isrc else {},
+    }
+
+class FakeSpotify:
+    """
+    Sous-ensemble de `spotipy.Spotify` utilisé par le bot. `playlists` et `albums` : identifiant -> (nom, pistes complètes).
+    Chaque appel est noté dans `calls` (méthode, offset) avec le thread qui l'a fait (`threads`).
+    """
+    def __init__(self, playlists: dict | None = None, albums: dict | None = None):
+        self.playlists = playlists or {}
+        self.albums = albums or {}
+        self.calls = []
+        self.threads = set()
+
+    def _record(self, method: str, offset: int = 0):
+        self.calls.append((method, offset))
+        self.threads.add(threading.get_ident())
+
+    def _not_found(self, kind: str, spotify_id: str):
+        return spotipy.SpotifyException(404, -1, f"Non existing id: 'spotify:{kind}:{spotify_id}'")
+
+    @staticmethod
+    def _page(items: list, limit: int, offset: int) -> dict:
+        return {"items": items[offset:offset + limit], "total": len(items), "limit": limit, "offset": offset}
+
+    def _all_tracks(self) -> dict:
+        tracks = {}
+        for _, items in [*self.playlists.values(), *self.albums.values()]:
+            tracks.update((track["id"], track) for track in items if track.get("id"))
+        return tracks
+
+    def track(self, track_id, market=None):
+        self._record("track")
+        track = self._all_tracks().get(track_id)
+        if track is None:
+            raise self._not_found("track", track_id)
+        return track
+
+    def tracks(self, tracks, market=None):
+        self._record("tracks")
+        if len(tracks) > 50:
+            raise spotipy.SpotifyException(400, -1, "Too many ids requested")
+        known = self._all_tracks()
+        return {"tracks": [known.get(track_id) for track_id in tracks]}
+
+    def playlist(self, playlist_id, fields=None, market=None, additional_types=("track",)):
+        self._record("playlist")
+        if playlist_id not in self.playlists:
+            raise self._not_found("playlist", playlist_id)
+        name, items = self.playlists[playlist_id]
+        return {"name": name, "tracks": self._page([{"track": track} for track in items], 100, 0)}
+
+    def playlist_items(self, playlist_id, fields=None, limit=50, offset=0, market=None, additional_types=("track", "episode")):
+        self._record("playlist_items", offset)
+        if limit > 100:
+            raise spotipy.SpotifyException(400, -1, "Invalid limit")
+        _, items = self.playlists[playlist_id]
+        return self._page([{"track": track} for track in items], limit, offset)
+
+    def album(self, album_id, market=None):
+        self._record("album")
+        if album_id not in self.albums:
+            raise self._not_found("album", album_id)
+        name, items = self.albums[album_id]
+        return {"name": name, "tracks": self._page([self._simplified(track) for track in items], 50, 0)}
+
+    def album_tracks(self, album_id, limit=50, offset=0, market=None):
+        self._record("album_tracks", offset)
+        if limit > 50:
+            raise spotipy.SpotifyException(400, -1, "Invalid limit")
+        _, items = self.albums[album_id]
+        return self._page([self._simplified(track) for track in items], limit, offset)
+
+    @staticmethod
+    def _simplified(track: dict) -> dict:
+        # Les titres d'un album n'ont pas d'ISRC dans l'API Spotify.
+        return {key: value for key, value in track.items() if key != "external_ids"}
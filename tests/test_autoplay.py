@@ -0,0 +1,125 @@
+import pytest
+import sys
+import os
+import random
+import wavelink
+
+# Ajoute le répertoire racine du projet au path pour permettre les imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import db_manager
+import play_history as play_history_module
+from play_history import play_history
+from autoplay import next_autoplay_track, pick_candidate
+from track_cache import track_cache
+
+pytestmark = pytest.mark.anyio
+
+@pytest.fixture
+def anyio_backend():
+    return 'asyncio'
+
+@pytest.fixture
+async def music_db(temp_db):
+    """Base temporaire (voir conftest.py), puis écriture des caches de la musique avant la fin de la boucle du test."""
+    yield
+    await play_history.close()
+    await track_cache.flush()
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Horloge contrôlée pour les dates d'écoute (les enchaînements de plus d'une heure ne comptent pas)."""
+    now = [1_700_000_000.0]
+    monkeypatch.setattr(play_history_module.time, "time", lambda: now[0])
+    return now
+
+def track_payload(identifier: str) -> dict:
+    return {
+        "encoded": f"QAAA{identifier}",
+        "info": {
+            "identifier": identifier, "isSeekable": True, "author": "Artiste", "length": 180000, "isStream": False,
+            "position": 0, "title": f"Titre {identifier}", "uri": f"https://soundcloud.com/artiste/{identifier}", "sourceName": "soundcloud",
+        },
+        "pluginInfo": {},
+    }
+
+def uri(identifier: str) -> str:
+    return f"https://soundcloud.com/artiste/{identifier}"
+
+def play_sequence(guild_id: int, identifiers: str, clock=None, gap: float = 200):
+    for identifier in identifiers:
+        track = wavelink.Playable(track_payload(identifier))
+        play_history.track_started(guild_id, track)
+        play_history.track_ended(guild_id, track, "finished")
+        if clock:
+            clock[0] += gap
+
+async def test_transitions_are_counted_incrementally(music_db, clock):
+    play_sequence(1, "abc", clock)
+    play_sequence(1, "ab", clock)
+    play_sequence(2, "ac", clock)
+    # Une reprise le lendemain n'est pas un enchaînement.
+    clock[0] += 86400
+    play_sequence(2, "d", clock)
+    await play_history.flush()
+
+    successors = await play_history.successors(uri("a"))
+    assert [(s.title, s.count) for s in successors] == [("Titre b", 2), ("Titre c", 1)]
+    assert [s.title for s in await play_history.successors(uri("b"))] == ["Titre c"]
+    assert [s.title for s in await play_history.successors(uri("c"))] == ["Titre a"]  # c -> d est hors délai
+    assert await play_history.successors(uri("d")) == []
+
+async def test_index_is_rebuilt_from_existing_history(music_db, clock):
+    play_sequence(1, "abab", clock)
+    await play_history.flush()
+    async with db_manager.get_db_connection() as conn:
+        await conn.execute("DELETE FROM track_transitions")
+        await conn.commit()
+
+    await db_manager.initialize_database()
+
+    assert [(s.title, s.count) for s in await play_history.successors(uri("a"))] == [("Titre b", 2)]
+    assert [(s.title, s.count) for s in await play_history.successors(uri("b"))] == [("Titre a", 1)]
+
+async def test_candidates_skip_recent_tracks_and_fall_back_to_favourites(music_db, clock):
+    play_sequence(1, "ab", clock)
+    play_sequence(2, "acd", clock)
+
+    # Serveur 1 : "b" vient d'être jouée, il reste "c" parmi les successeurs de "a".
+    assert (await pick_candidate(1, uri("a"), random.Random(0))).title == "Titre c"
+    # "z" n'a jamais été suivie d'une autre piste (les répétitions ne comptent pas) : on pioche dans les favoris
+    # du serveur, hors pistes récentes. Ici, les 25 dernières écoutes sont "z" : "a", "b" et "e" sont éligibles.
+    play_sequence(3, "abe", clock)
+    for _ in range(25):
+        play_sequence(3, "z", clock)
+    candidate = await pick_candidate(3, uri("z"), random.Random(0))
+    assert candidate.title in {"Titre a", "Titre b", "Titre e"}
+    assert await pick_candidate(4, uri("inconnue")) is None
+
+async def test_next_track_is_resolved_through_search_cache(music_db, clock, monkeypatch):
+    play_sequence(1, "ab", clock)
+    play_sequence(2, "a", clock)
+    calls = []
+    async def fake_search(query, **kwargs):
+        calls.append(query)
+        return [wavelink.Playable(track_payload(query.rsplit("/", 1)[-1]))]
+    monkeypatch.setattr(wavelink.Playable, "search", fake_search)
+
+    first = await next_autoplay_track(2, uri("a"))
+    second = await next_autoplay_track(2, uri("a"))
+
+    assert first.title == second.title == "Titre b"
+    assert dict(first.extras).get("autoplay") is True
+    assert calls == [uri("b")]  # Le second choix est servi par le cache
+
+async def test_successor_query_does_not_scan(music_db):
+    async with db_manager.get_db_connection() as conn:
+        async with conn.execute(
+            """
+            EXPLAIN QUERY PLAN SELECT t.uri FROM track_transitions tr JOIN track_metadata t ON t.id = tr.next_track_id
+            WHERE tr.track_id = (SELECT id FROM track_metadata WHERE uri = 'x') ORDER BY tr.count DESC LIMIT 10
+            """
+        ) as cursor:
+            plan = [row[-1] for row in await cursor.fetchall()]
+    assert any("idx_track_transitions_top" in step for step in plan), plan
+    assert not any(step.startswith("SCAN") or "TEMP B-TREE" in step for step in plan), plan
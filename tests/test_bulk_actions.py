@@ -0,0 +1,57 @@
+import pytest
+import sys
+import os
+import asyncio
+import discord
+from unittest.mock import MagicMock
+
+# Ajoute le répertoire racine du projet au path pour permettre les imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from bulk_actions import BulkExecutor
+
+pytestmark = pytest.mark.anyio
+
+@pytest.fixture
+def anyio_backend():
+    return 'asyncio'
+
+def make_http_exception(status: int, headers: dict | None = None) -> discord.HTTPException:
+    response = MagicMock()
+    response.status = status
+    response.headers = headers or {}
+    return discord.HTTPException(response, "erreur simulée")
+
+async def test_concurrency_is_bounded_and_progress_reported():
+    running, max_running = 0, 0
+    async def action(item):
+        nonlocal running, max_running
+        running += 1
+        max_running = max(max_running, running)
+        await asyncio.sleep(0.005)
+        running -= 1
+
+    reports = []
+    async def on_progress(result):
+        reports.append(result.done)
+
+    result = await BulkExecutor(concurrency=3, progress_interval=0).run(list(range(20)), action, on_progress=on_progress)
+
+    assert len(result.succeeded) == 20
+    assert max_running <= 3
+    assert reports[-1] == 20
+
+async def test_rate_limited_action_is_retried_and_errors_are_collected():
+    attempts = {}
+    async def action(item):
+        attempts[item] = attempts.get(item, 0) + 1
+        if item == "limité" and attempts[item] == 1:
+            raise make_http_exception(429, {"Retry-After": "0.01"})
+        if item == "interdit":
+            raise make_http_exception(403)
+
+    result = await BulkExecutor(concurrency=2).run(["ok", "limité", "interdit"], action)
+
+    assert sorted(result.succeeded) == ["limité", "ok"]
+    assert [item for item, _ in result.failed] == ["interdit"]
+    assert attempts["limité"] == 2
@@ -0,0 +1,50 @@
+import pytest
+import sys
+import os
+
+# Ajoute le répertoire racine du projet au path pour permettre les imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import db_manager
+
+pytestmark = pytest.mark.anyio
+
+@pytest.fixture
+def anyio_backend():
+    """aiosqlite repose sur asyncio, on n'exécute donc pas ces tests avec trio."""
+    return 'asyncio'
+
+async def test_global_settings_load_reads_maintenance_mode(temp_db):
+    """Le cache chargé au démarrage reflète la valeur par défaut de la base."""
+    cache = db_manager.GlobalSettingsCache()
+    await cache.load()
+
+    assert cache.maintenance_mode is False
+    assert cache.get('maintenance_mode') == '0'
+
+async def test_global_settings_apply_pushes_change():
+    """Un `apply` (push du panel admin) met à jour l'attribut et incrémente la version."""
+    cache = db_manager.GlobalSettingsCache()
+    version_before = cache.version
+
+    cache.apply('maintenance_mode', '1')
+    assert cache.maintenance_mode is True
+    assert cache.version == version_before + 1
+
+    cache.apply('maintenance_mode', '0')
+    assert cache.maintenance_mode is False
+
+async def test_guild_settings_cache_compiles_welcome_template_once(temp_db):
+    """Les paramètres d'un serveur sont lus une fois, avec le modèle de bienvenue déjà compilé."""
+    async with db_manager.get_db_connection() as conn:
+        await conn.execute("INSERT INTO guild_settings (guild_id, welcome_message) VALUES (?, ?)", (1, "Salut {user.name}"))
+        await conn.commit()
+
+    cache = db_manager.GuildSettingsCache()
+    settings = await cache.get(1)
+    assert settings['welcome_template'].source == "Salut {user.name}"
+    assert await cache.get(1) is settings
+
+    cache.invalidate(1)
+    assert await cache.get(1) is not settings
+    assert await cache.get(2) is None
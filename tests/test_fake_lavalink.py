@@ -0,0 +1,262 @@
+import pytest
+import sys
+import os
+import types
+from unittest.mock import AsyncMock
+import wavelink
+
+# Ajoute le répertoire racine du projet au path pour permettre les imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from fake_lavalink import FakeLavalink, FakeDiscordClient, close_node, connect_node, make_track, wait_until
+from fake_spotify import FakeSpotify, make_spotify_track
+from commandes.music import MusicCog
+import music_state
+import commandes.music as music_module
+from music_state import decode_entries, load_state
+from lazy_queue import LazyTrack
+from spotify_resolver import SpotifyResolver
+from node_manager import NodeManager, MAX_CONSECUTIVE_FAILURES
+from now_playing import now_playing_updater
+from track_cache import track_cache
+from play_history import play_history
+import track_cache as track_cache_module
+from music_metrics import MusicMetrics
+
+pytestmark = pytest.mark.anyio
+
+@pytest.fixture
+def anyio_backend():
+    return 'asyncio'
+
+@pytest.fixture
+async def music_db(temp_db):
+    """Base temporaire (voir conftest.py), puis écriture des caches de la musique avant la fin de la boucle du test."""
+    yield
+    await track_cache.flush()
+    await play_history.close()
+
+@pytest.fixture
+async def lavalink():
+    """Deux faux nœuds Lavalink (lecture accélérée) connectés au Pool wavelink, avec un client Discord simulé."""
+    servers = [FakeLavalink(time_scale=1000, seed=i) for i in range(2)]
+    for server in servers:
+        await server.start()
+    client = FakeDiscordClient()
+    nodes = [await connect_node(server, client, f"fake-{i}") for i, server in enumerate(servers)]
+    client.node_manager = NodeManager(nodes=lambda: nodes)
+    yield types.SimpleNamespace(client=client, servers=servers, nodes=nodes)
+    await now_playing_updater.close()
+    for node in nodes:
+        await close_node(node)
+    for server in servers:
+        await server.stop()
+
+def make_cog(client: FakeDiscordClient) -> MusicCog:
+    cog = MusicCog(client)
+    for name, listener in cog.get_listeners():
+        client.add_listener(listener, name)
+    return cog
+
+def make_interaction(guild, user_id: int = 42):
+    return types.SimpleNamespace(
+        guild=guild, channel=guild.text_channel, user=types.SimpleNamespace(id=user_id),
+        followup=types.SimpleNamespace(send=AsyncMock()),
+    )
+
+async def test_play_starts_track_and_announces_it(lavalink, music_db, monkeypatch):
+    metrics = MusicMetrics()
+    monkeypatch.setattr(music_module, "music_metrics", metrics)
+    monkeypatch.setattr(track_cache_module, "music_metrics", metrics)
+    cog = make_cog(lavalink.client)
+    guild = lavalink.client.create_guild()
+    player = await guild.voice_channel.connect(cls=lavalink.client.node_manager.create_player)
+    player.home = guild.text_channel
+
+    assert await cog._add_song_to_queue(make_interaction(guild), "Daft Punk - One More Time (Official Video)") == 1
+
+    await wait_until(lambda: guild.text_channel.sent)
+    message = guild.text_channel.sent[0]
+    assert message.embed.title == "🎵 En cours de lecture"
+    assert dict(player.current.extras).get("requester_id") == 42
+    server = lavalink.servers[lavalink.nodes.index(player.node)]
+    assert server.playing_count == 1
+    # Chaque étape du parcours a été chronométrée, et la recherche attribuée à un nœud.
+    assert [metrics.stages[stage].count for stage in ("search", "queue", "play", "track_start")] == [1, 1, 1, 1]
+    assert sum(histogram.count for histogram in metrics.node_searches.values()) <= 1
+    assert set(metrics.node_searches) <= {"fake-0", "fake-1"}
+    cog.idle_timers.cancel_all()
+
+async def test_queue_plays_through_and_reports_end(lavalink, music_db):
+    cog = make_cog(lavalink.client)
+    guild = lavalink.client.create_guild()
+    player = await guild.voice_channel.connect(cls=lavalink.client.node_manager.create_player)
+    player.home = guild.text_channel
+    interaction = make_interaction(guild)
+
+    await cog._add_song_to_queue(interaction, "premier titre")
+    await cog._add_song_to_queue(interaction, "second titre")
+
+    await wait_until(lambda: any(m.content == "✅ File d'attente terminée." for m in guild.text_channel.sent))
+    announced = [m.embed for m in guild.text_channel.sent if m.embed]
+    assert len(announced) == 2
+    assert cog.idle_timers.is_armed(guild.id)
+    history = await play_history.recent(guild.id)
+    assert [entry.title for entry in history] == ["second titre (0)", "premier titre (0)"]
+    assert all(entry.finished and entry.requester_id == 42 for entry in history)
+    cog.idle_timers.cancel_all()
+
+async def test_autoplay_continues_after_the_queue(lavalink, music_db):
+    # Historique d'un autre serveur : "y" a déjà été écoutée juste après "x".
+    for identifier in ("x", "y"):
+        track = wavelink.Playable(make_track(identifier))
+        play_history.track_started(1, track)
+        play_history.track_ended(1, track, "finished")
+    await play_history.flush()
+
+    cog = make_cog(lavalink.client)
+    guild = lavalink.client.create_guild()
+    player = await guild.voice_channel.connect(cls=lavalink.client.node_manager.create_player)
+    player.home = guild.text_channel
+    player.autoplay_radio = True
+    await player.play(wavelink.Playable(make_track("x")))
+
+    await wait_until(lambda: len([m for m in guild.text_channel.sent if m.embed]) == 2)
+    player.autoplay_radio = False
+    await wait_until(lambda: any(m.content == "✅ File d'attente terminée." for m in guild.text_channel.sent))
+
+    announced = [m.embed for m in guild.text_channel.sent if m.embed]
+    assert [embed.description for embed in announced] == ["**x**", "**y**"]
+    assert ("Demandé par", "📻 Autoplay") in [(field.name, field.value) for field in announced[1].fields]
+    cog.idle_timers.cancel_all()
+
+async def test_spotify_playlist_is_imported_and_remembered(lavalink, music_db):
+    cog = make_cog(lavalink.client)
+    cog.spotify = SpotifyResolver(FakeSpotify(playlists={"liste": ("Ma playlist", [make_spotify_track(i) for i in range(30)])}))
+    searches = lambda: sum(server.requests.get("GET /v4/loadtracks", 0) for server in lavalink.servers)
+    players = []
+    for _ in range(2):
+        guild = lavalink.client.create_guild()
+        player = await guild.voice_channel.connect(cls=lavalink.client.node_manager.create_player)
+        player.home = guild.text_channel
+        players.append(player)
+
+    assert await cog._add_song_to_queue(make_interaction(players[0].guild), "https://open.spotify.com/playlist/liste") == 30
+    first_import = searches()
+    # Seule la fenêtre de préchargement est recherchée ; le reste attend, avec sa durée Spotify.
+    assert first_import == 5
+    # La première piste trouvée démarre sans attendre les autres : n'importe laquelle de la fenêtre.
+    head_titles = {f"Artiste {i} Invité - Titre {i} (0)" for i in range(5)}
+    assert players[0].current.title in head_titles
+    assert len(players[0].lazy_queue) == 25 and players[0].lazy_queue.pending.total_length == sum(180000 + i for i in range(5, 30))
+    assert "**30 / 30** musiques de **Ma playlist**" in players[0].guild.text_channel.sent[-1].content
+
+    # Même playlist sur un autre serveur : les morceaux déjà résolus sont retrouvés par ISRC, sans recherche.
+    await cog._add_song_to_queue(make_interaction(players[1].guild), "https://open.spotify.com/playlist/liste")
+    assert searches() == first_import
+    assert players[1].current.title in head_titles
+    assert [track.title for track in players[1].queue] == sorted(head_titles - {players[1].current.title})
+    for player in players:
+        await player.disconnect()
+    cog.idle_timers.cancel_all()
+
+async def test_players_are_resumed_after_a_restart(lavalink, music_db, tmp_path, monkeypatch):
+    monkeypatch.setattr(music_state, "STATE_BACKUP_DIR", str(tmp_path / "backups"))
+    monkeypatch.setattr(music_module, "RESUME_STAGGER", 0.05)
+    cog = make_cog(lavalink.client)
+    guilds = [lavalink.client.create_guild() for _ in range(2)]
+    for guild in guilds:
+        player = await guild.voice_channel.connect(cls=lavalink.client.node_manager.create_player)
+        player.home = guild.text_channel
+        await player.set_volume(40)
+        player.queue.mode = wavelink.QueueMode.loop_all
+        player.queue.put([wavelink.Playable(make_track(identifier)) for identifier in ("b", "c")])
+        await player.play(wavelink.Playable(make_track("a")), paused=True)
+
+    # Arrêt du bot : instantané des lecteurs, puis déconnexion.
+    assert await cog.snapshot_sessions() == 2
+    for guild in guilds:
+        await guild.voice_client.disconnect()
+    sessions = music_state.take_sessions_file()
+    sessions[0]["state"]["position"] = 60000
+    music_state.write_sessions_file(sessions)
+    guilds[1].voice_channel.members = []  # Plus personne dans le second salon
+
+    await cog.resume_sessions()
+
+    player = guilds[0].voice_client
+    assert player.current.title == "a" and player.paused and player.volume == 40
+    assert player.queue.mode == wavelink.QueueMode.loop_all
+    assert [track.title for track in player.queue] == ["b", "c"]
+    server = lavalink.servers[lavalink.nodes.index(player.node)]
+    fake_player = next(p for session in server.sessions.values() for p in session.players.values() if p.track)
+    assert fake_player.base_position == 60000 and fake_player.paused
+    assert any(m.content and m.content.startswith("🔄") for m in guilds[0].text_channel.sent)
+    assert await load_state(guilds[0].id) is None
+    # Salon vide : pas de reconnexion, la file reste proposée à la restauration au prochain /play.
+    assert guilds[1].voice_client is None
+    assert [entry["title"] for entry in (await load_state(guilds[1].id))["queue"]] == ["a", "b", "c"]
+    assert music_state.take_sessions_file() == []
+    await player.disconnect()
+    cog.idle_timers.cancel_all()
+
+async def test_saved_entries_are_decoded_by_the_node(lavalink):
+    tracks = [make_track(identifier, title=f"Titre {identifier}") for identifier in ("abc", "def")]
+    queue_data = [{"encoded": t["encoded"], "uri": t["info"]["uri"], "title": t["info"]["title"], "requester_id": 7} for t in tracks]
+
+    entries = await decode_entries(lavalink.nodes[0], queue_data)
+
+    assert all(isinstance(entry, wavelink.Playable) for entry in entries)
+    assert [entry.title for entry in entries] == ["Titre abc", "Titre def"]
+    assert dict(entries[0].extras).get("requester_id") == 7
+    assert lavalink.servers[0].requests["POST /v4/decodetracks"] == 1
+
+    # Lavalink refuse tout le lot si une piste est illisible : tout redevient des entrées à rechercher, dans l'ordre.
+    queue_data.insert(1, {"encoded": "illisible", "uri": "https://fake.lavalink/soundcloud/xyz", "title": "Perdu"})
+    entries = await decode_entries(lavalink.nodes[0], queue_data)
+    assert all(isinstance(entry, LazyTrack) for entry in entries)
+    assert [entry.title for entry in entries] == ["Titre abc", "Perdu", "Titre def"]
+
+async def test_players_fail_over_when_a_node_dies(lavalink):
+    dying, survivor = lavalink.nodes
+    players = []
+    for _ in range(3):
+        guild = lavalink.client.create_guild()
+        player = await guild.voice_channel.connect(cls=lambda client, channel: wavelink.Player(client, channel, nodes=[dying]))
+        await player.play(wavelink.Playable(make_track(f"piste-{guild.id}", length=600000)))
+        players.append(player)
+    await wait_until(lambda: lavalink.servers[0].playing_count == 3)
+
+    await lavalink.servers[0].kill()
+    for _ in range(MAX_CONSECUTIVE_FAILURES):
+        await lavalink.client.node_manager.probe_all()
+
+    assert all(player.node is survivor for player in players)
+    await wait_until(lambda: lavalink.servers[1].playing_count == 3)
+    for player in players:
+        await player.disconnect()
+
+async def test_failover_does_not_announce_the_track_again(lavalink, music_db):
+    cog = make_cog(lavalink.client)
+    dying, survivor = lavalink.nodes
+    guild = lavalink.client.create_guild()
+    player = await guild.voice_channel.connect(cls=lambda client, channel: wavelink.Player(client, channel, nodes=[dying]))
+    player.home = guild.text_channel
+    await player.play(wavelink.Playable(make_track("longue", length=600000)))
+    await wait_until(lambda: guild.text_channel.sent)
+    announcement = player.now_playing_message
+    started = play_history._playing[guild.id]
+
+    await lavalink.servers[0].kill()
+    for _ in range(MAX_CONSECUTIVE_FAILURES):
+        await lavalink.client.node_manager.probe_all()
+    await wait_until(lambda: lavalink.servers[1].playing_count == 1)
+    await wait_until(lambda: not player.migrating)
+
+    # La piste reprise sur le nœud survivant garde son unique message et son début d'écoute.
+    assert player.node is survivor
+    assert len([m for m in guild.text_channel.sent if m.embed]) == 1
+    assert player.now_playing_message is announcement
+    assert play_history._playing[guild.id] is started
+    cog.idle_timers.cancel_all()
+    await player.disconnect()
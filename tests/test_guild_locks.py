@@ -0,0 +1,93 @@
+import pytest
+import sys
+import os
+import asyncio
+import gc
+
+# Ajoute le répertoire racine du projet au path pour permettre les imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from guild_locks import FifoSemaphore, GuildLockManager
+
+pytestmark = pytest.mark.anyio
+
+@pytest.fixture
+def anyio_backend():
+    return 'asyncio'
+
+async def test_guilds_run_in_parallel_and_each_guild_in_order():
+    manager = GuildLockManager(max_heavy=10)
+    events = []
+
+    async def operation(guild_id: int, name: str):
+        async with manager.acquire(guild_id, name):
+            events.append(("début", name))
+            await asyncio.sleep(0.05)
+            events.append(("fin", name))
+
+    await asyncio.wait_for(asyncio.gather(operation(1, "a1"), operation(1, "a2"), operation(2, "b1")), timeout=1)
+
+    # Le serveur 2 n'attend pas le serveur 1 ; sur le serveur 1, a2 attend la fin de a1.
+    assert events[:2] == [("début", "a1"), ("début", "b1")]
+    assert events.index(("fin", "a1")) < events.index(("début", "a2"))
+    stats = manager.stats()
+    assert stats["acquisitions"] == 3 and stats["contended"] == 1 and stats["wait"]["count"] == 3
+    assert stats["wait"]["max"] >= 0.04
+
+async def test_global_cap_is_fair_and_locks_are_released():
+    manager = GuildLockManager(max_heavy=2)
+    started, release = [], asyncio.Event()
+
+    async def operation(guild_id: int):
+        async with manager.acquire(guild_id, "start"):
+            started.append(guild_id)
+            await release.wait()
+
+    tasks = [asyncio.create_task(operation(guild_id)) for guild_id in range(5)]
+    await asyncio.sleep(0.01)
+    assert started == [0, 1] and manager.stats()["active_heavy"] == 2
+    # Le serveur 4 tient son verrou en attendant une place globale : il est déjà occupé pour ses propres commandes.
+    assert manager.busy(0) == manager.busy(4) == "start" and manager.busy(5) is None
+    # Une opération légère n'est pas soumise au plafond global.
+    async with manager.acquire(99, "config", heavy=False):
+        pass
+    release.set()
+    await asyncio.gather(*tasks)
+    assert started == [0, 1, 2, 3, 4]
+
+    del tasks
+    gc.collect()
+    assert len(manager) == 0  # Les verrous inutilisés disparaissent d'eux-mêmes
+
+async def test_timeout_frees_the_waiting_slot():
+    manager = GuildLockManager(max_heavy=1)
+    async with manager.acquire(1, "restore"):
+        with pytest.raises(asyncio.TimeoutError):
+            async with manager.acquire(1, "start", timeout=0.01):
+                pass
+        with pytest.raises(asyncio.TimeoutError):
+            async with manager.acquire(2, "start", timeout=0.01):
+                pass
+    async with manager.acquire(2, "start", timeout=1):
+        pass
+    assert manager.stats()["timeouts"] == 2 and manager.stats()["waiting"] == 0
+    assert 'guild_lock_timeouts_total 2' in manager.prometheus().splitlines()
+
+async def test_fifo_semaphore_hands_slots_over_in_order():
+    semaphore = FifoSemaphore(1)
+    await semaphore.acquire()
+    order = []
+
+    async def waiter(name: str):
+        await semaphore.acquire()
+        order.append(name)
+        semaphore.release()
+
+    first = asyncio.create_task(waiter("premier"))
+    cancelled = asyncio.create_task(waiter("annulé"))
+    last = asyncio.create_task(waiter("dernier"))
+    await asyncio.sleep(0)
+    cancelled.cancel()
+    semaphore.release()
+    await asyncio.gather(first, last)
+    assert order == ["premier", "dernier"] and not semaphore.locked()
@@ -0,0 +1,61 @@
+import pytest
+import sys
+import os
+import asyncio
+
+# Ajoute le répertoire racine du projet au path pour permettre les imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from idle_timer import IdleTimers
+
+pytestmark = pytest.mark.anyio
+
+@pytest.fixture
+def anyio_backend():
+    return 'asyncio'
+
+async def test_armed_timer_fires_once_after_delay():
+    timers = IdleTimers()
+    fired = []
+    async def disconnect():
+        fired.append(1)
+
+    timers.arm(1, 0.01, disconnect)
+    assert timers.is_armed(1)
+    await asyncio.sleep(0.03)
+    assert fired == [1]
+    assert not timers.is_armed(1)
+
+async def test_disarm_cancels_and_rearm_does_not_postpone():
+    timers = IdleTimers()
+    fired = []
+    async def disconnect(guild_id):
+        fired.append(guild_id)
+
+    timers.arm(1, 0.01, lambda: disconnect(1))
+    timers.disarm(1)
+    # Un second événement d'inactivité ne repousse pas l'échéance du premier.
+    timers.arm(2, 0.02, lambda: disconnect(2))
+    await asyncio.sleep(0.01)
+    timers.arm(2, 1.0, lambda: disconnect(2))
+    await asyncio.sleep(0.03)
+
+    assert fired == [2]
+
+async def test_failing_callback_does_not_break_other_timers():
+    timers = IdleTimers()
+    fired = []
+    async def broken():
+        raise RuntimeError("lecteur déjà détruit")
+    async def disconnect():
+        fired.append(2)
+
+    timers.arm(1, 0.01, broken)
+    timers.arm(2, 0.01, disconnect)
+    await asyncio.sleep(0.03)
+    assert fired == [2]
+
+    timers.arm(3, 0.01, disconnect)
+    timers.cancel_all()
+    await asyncio.sleep(0.02)
+    assert fired == [2]
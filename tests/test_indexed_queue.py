@@ -0,0 +1,69 @@
+import pytest
+import sys
+import os
+import random
+import types
+
+# Ajoute le répertoire racine du projet au path pour permettre les imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import indexed_queue
+from indexed_queue import IndexedQueue
+from lazy_queue import LazyTrack
+
+def entry(name: str, length: int = 1000) -> LazyTrack:
+    return LazyTrack(name, length=length)
+
+@pytest.fixture
+def small_chunks(monkeypatch):
+    """Petits blocs, pour que les tests traversent coupures et disparitions de blocs."""
+    monkeypatch.setattr(indexed_queue, "CHUNK_SIZE", 4)
+
+def test_matches_a_list_under_random_operations(small_chunks):
+    rng = random.Random(0)
+    queue, expected = IndexedQueue(), []
+    for step in range(3000):
+        operation = rng.random()
+        if operation < 0.35 or not expected:
+            new = [entry(f"{step}-{i}", rng.choice((0, 1000, 2000))) for i in range(rng.randint(1, 12))]
+            index = rng.randint(0, len(expected) + 2)
+            queue.insert(index, new)
+            expected[index:index] = new
+        elif operation < 0.6:
+            index = rng.randrange(len(expected))
+            assert queue.pop(index) is expected.pop(index)
+        elif operation < 0.8:
+            source, destination = rng.randrange(len(expected)), rng.randrange(len(expected))
+            moved = expected.pop(source)
+            expected.insert(destination, moved)
+            assert queue.move(source, destination) is moved
+        else:
+            start = rng.randint(-2, len(expected))
+            assert queue.slice(start, start + 10) == expected[max(start, 0):start + 10]
+
+        assert len(queue) == len(expected)
+        if expected:
+            index = rng.randrange(len(expected))
+            assert queue[index] is expected[index]
+    assert list(queue) == expected
+    assert queue.total_length == sum(e.length for e in expected)
+    assert queue.unknown_length == sum(1 for e in expected if not e.length)
+
+def test_counters_and_bounds():
+    queue = IndexedQueue([entry("a", 1000), entry("b", 0), types.SimpleNamespace(title="direct", length=5000, is_stream=True)])
+    assert (queue.total_length, queue.unknown_length) == (1000, 2)
+    assert queue[-1].title == "direct"
+    queue.popleft()
+    assert (queue.total_length, queue.unknown_length) == (0, 2)
+    with pytest.raises(IndexError):
+        queue.pop(5)
+    queue.clear()
+    assert (len(queue), queue.total_length, queue.unknown_length, queue.slice(0, 10)) == (0, 0, 0, [])
+
+def test_large_queue_touches_few_chunks():
+    queue = IndexedQueue(entry(f"piste-{i}") for i in range(100_000))
+    assert len(queue._chunks) == 100_000 // indexed_queue.CHUNK_SIZE + 1
+    assert queue.slice(73_210, 73_220)[0].title == "piste-73210"
+    queue.move(99_999, 0)
+    assert queue[0].title == "piste-99999" and queue[1].title == "piste-0"
+    assert queue.total_length == 100_000 * 1000
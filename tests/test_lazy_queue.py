@@ -0,0 +1,152 @@
+import pytest
+import sys
+import os
+import asyncio
+import types
+import wavelink
+
+# Ajoute le répertoire racine du projet au path pour permettre les imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from lazy_queue import LazyQueue, LazyTrack
+
+pytestmark = pytest.mark.anyio
+
+@pytest.fixture
+def anyio_backend():
+    return 'asyncio'
+
+def make_track(identifier: str) -> wavelink.Playable:
+    return wavelink.Playable({
+        "encoded": f"QAAA{identifier}",
+        "info": {
+            "identifier": identifier, "isSeekable": True, "author": "Artiste", "length": 180000, "isStream": False,
+            "position": 0, "title": identifier, "uri": f"https://soundcloud.com/artiste/{identifier}", "sourceName": "soundcloud",
+        },
+        "pluginInfo": {},
+    })
+
+@pytest.fixture
+def player():
+    return types.SimpleNamespace(queue=wavelink.Queue())
+
+def make_lazy_queue(player, resolved: list, window: int = 3) -> LazyQueue:
+    """File paresseuse dont la résolution est simulée (délai inverse de l'ordre, pour détecter les inversions)."""
+    async def resolve(entry: LazyTrack):
+        resolved.append(entry.uri)
+        await asyncio.sleep(0.001)
+        return None if entry.uri == "introuvable" else make_track(entry.uri)
+    return LazyQueue(player, resolve, window=window)
+
+async def test_only_the_window_is_resolved(player):
+    resolved = []
+    lazy = make_lazy_queue(player, resolved)
+    lazy.extend(LazyTrack(f"piste-{i}") for i in range(50))
+
+    assert await lazy.wait_next()
+    await lazy._task
+    assert [t.title for t in player.queue] == ["piste-0", "piste-1", "piste-2"]
+    assert len(resolved) == 3 and len(lazy) == 47
+
+    # Une piste jouée libère une place dans la fenêtre : seule la suivante est résolue.
+    player.queue.get()
+    lazy.refill()
+    await lazy._task
+    assert [t.title for t in player.queue] == ["piste-1", "piste-2", "piste-3"]
+    assert len(resolved) == 4
+
+async def test_unresolvable_entries_are_skipped_in_order(player):
+    resolved = []
+    lazy = make_lazy_queue(player, resolved, window=5)
+    lazy.extend([LazyTrack("a"), LazyTrack("introuvable"), LazyTrack("b")])
+    await lazy.wait_next()
+    await lazy._task
+    assert [t.title for t in player.queue] == ["a", "b"]
+
+async def test_insert_moves_resolved_tail_behind_new_entries(player):
+    resolved = []
+    lazy = make_lazy_queue(player, resolved)
+    lazy.extend(LazyTrack(name) for name in ("a", "b", "c", "d"))
+    await lazy.wait_next()
+    await lazy._task
+
+    lazy.insert(1, [LazyTrack("x"), LazyTrack("y")])
+    await lazy._task
+    while lazy.pending:
+        player.queue.get()
+        lazy.refill()
+        await lazy._task
+
+    order = ["a", "x", "y", "b", "c", "d"]
+    assert [t.title for t in player.queue] == order[-3:]
+    # Les pistes déjà résolues ne sont pas recherchées une seconde fois.
+    assert resolved.count("b") == 1
+
+async def test_entry_being_resolved_keeps_its_place(player):
+    release, started = asyncio.Event(), []
+
+    async def resolve(entry: LazyTrack):
+        started.append(entry.uri)
+        if entry.uri == "a":
+            await release.wait()
+        return make_track(entry.uri)
+
+    lazy = LazyQueue(player, resolve, window=3)
+    lazy.extend([LazyTrack("a"), LazyTrack("b")])
+    await asyncio.sleep(0)
+    assert started == ["a"]
+    # Pendant la recherche, l'entrée reste visible à son index...
+    assert [entry.title for entry in lazy.slice(0, 2)] == ["a", "b"]
+    # ... et une insertion en tête ("jouer ensuite") passe bien devant elle.
+    lazy.insert(0, [LazyTrack("x")])
+    release.set()
+    await lazy._task
+
+    assert [t.title for t in player.queue] == ["x", "a", "b"]
+
+    # Une entrée retirée pendant sa recherche n'est pas ajoutée à la fenêtre.
+    release.clear()
+    player.queue.clear()
+    lazy.extend([LazyTrack("a"), LazyTrack("c")])
+    await asyncio.sleep(0)
+    lazy.pop(0)
+    release.set()
+    await lazy._task
+    assert [t.title for t in player.queue] == ["c"]
+
+async def test_shuffle_and_wait_next_on_empty_queue(player):
+    resolved = []
+    lazy = make_lazy_queue(player, resolved)
+    assert not await lazy.wait_next()
+
+    lazy.extend(LazyTrack(f"piste-{i}") for i in range(10))
+    await lazy.wait_next()
+    await lazy._task
+    lazy.shuffle()
+    await lazy._task
+
+    titles = [t.title for t in player.queue] + [entry.title for entry in lazy]
+    assert sorted(titles) == sorted(f"piste-{i}" for i in range(10))
+    assert len(player.queue) == 3
+
+    lazy.clear()
+    assert len(lazy) == 0
+
+async def test_index_operations_span_resolved_and_pending_entries(player):
+    resolved = []
+    lazy = make_lazy_queue(player, resolved)
+    lazy.extend(LazyTrack(f"piste-{i}", length=1000) for i in range(10))
+    await lazy.wait_next()
+    await lazy._task
+
+    assert [t.title for t in lazy.slice(2, 5)] == ["piste-2", "piste-3", "piste-4"]
+    # Pistes résolues (180 s chacune) + entrées en attente (1 s chacune).
+    assert lazy.total_length == 3 * 180000 + 7 * 1000
+
+    assert lazy.pop(1).title == "piste-1"  # Depuis la fenêtre résolue
+    assert lazy.pop(5).title == "piste-6"  # Depuis l'attente
+    lazy.move(6, 0)
+    await lazy._task
+    titles = [t.title for t in player.queue] + [entry.title for entry in lazy]
+    assert titles == ["piste-8", "piste-0", "piste-2", "piste-3", "piste-4", "piste-5", "piste-7", "piste-9"]
+    assert lazy.unknown_length == 0
@@ -0,0 +1,52 @@
+import pytest
+import sys
+import os
+import discord
+from unittest.mock import MagicMock, AsyncMock
+
+# Ajoute le répertoire racine du projet au path pour permettre les imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import mod_log
+from mod_log import ModLogDispatcher
+
+pytestmark = pytest.mark.anyio
+
+@pytest.fixture
+def anyio_backend():
+    return 'asyncio'
+
+@pytest.fixture
+def log_channel(monkeypatch):
+    """Simule un salon de logs configuré pour le serveur 1."""
+    channel = MagicMock()
+    channel.id = 500
+    channel.send = AsyncMock()
+
+    settings_cache = MagicMock()
+    settings_cache.get = AsyncMock(return_value={'mod_log_channel_id': 500})
+    monkeypatch.setattr(mod_log, "guild_settings", settings_cache)
+    return channel
+
+@pytest.fixture
+def dispatcher(log_channel):
+    bot = MagicMock()
+    bot.get_channel.return_value = log_channel
+    return ModLogDispatcher(bot, use_webhooks=False, flush_deadline=60)
+
+async def test_embeds_are_packed_ten_per_message(dispatcher, log_channel):
+    for i in range(23):
+        dispatcher.enqueue(1, discord.Embed(title=f"Log {i}"))
+
+    await dispatcher.close()
+
+    sizes = [len(call.kwargs['embeds']) for call in log_channel.send.call_args_list]
+    assert sizes == [10, 10, 3]
+    # L'ordre des logs est conservé.
+    assert log_channel.send.call_args_list[0].kwargs['embeds'][0].title == "Log 0"
+
+async def test_batch_respects_total_embed_size():
+    pending = [discord.Embed(description="x" * 2500) for _ in range(3)]
+    batch = ModLogDispatcher._take_batch(pending)
+    assert len(batch) == 2
+    assert len(pending) == 1
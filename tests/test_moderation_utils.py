@@ -0,0 +1,16 @@
+import sys
+import os
+
+# Ajoute le répertoire racine du projet au path pour permettre les imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from commandes.moderation import parse_message_reference
+
+def test_parse_message_reference_accepts_ids_and_links():
+    assert parse_message_reference("123456789012345678") == 123456789012345678
+    assert parse_message_reference("https://discord.com/channels/1/2/123456789012345678") == 123456789012345678
+    assert parse_message_reference(" 123456789012345678/ ") == 123456789012345678
+
+def test_parse_message_reference_rejects_invalid_input():
+    assert parse_message_reference("bonjour") is None
+    assert parse_message_reference("12345") is None
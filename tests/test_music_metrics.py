@@ -0,0 +1,44 @@
+import pytest
+import sys
+import os
+
+# Ajoute le répertoire racine du projet au path pour permettre les imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from music_metrics import LatencyHistogram, MusicMetrics
+
+def test_percentiles_follow_the_buckets():
+    histogram = LatencyHistogram(buckets=(0.1, 0.5, 1.0))
+    assert histogram.percentile(50) is None
+    for seconds in [0.05] * 90 + [0.4] * 9 + [3.0]:
+        histogram.observe(seconds)
+    assert histogram.percentile(50) == 0.1
+    assert histogram.percentile(95) == 0.5
+    assert histogram.percentile(100) == 3.0  # Au-delà du dernier intervalle : le maximum observé
+    snapshot = histogram.snapshot()
+    assert snapshot["count"] == 100 and snapshot["max"] == 3.0
+    assert snapshot["mean"] == pytest.approx((0.05 * 90 + 0.4 * 9 + 3.0) / 100)
+
+def test_spans_are_recorded_even_on_error():
+    metrics = MusicMetrics()
+    with metrics.span("search"):
+        pass
+    with pytest.raises(TimeoutError):
+        with metrics.span("connect"):
+            raise TimeoutError
+    assert metrics.stages["search"].count == 1 and metrics.stages["connect"].count == 1
+
+def test_prometheus_exposition_is_cumulative():
+    metrics = MusicMetrics()
+    metrics.observe("play", 0.02)
+    metrics.observe("play", 0.2)
+    metrics.observe_search("principal", 0.3)
+    metrics.observe_search("principal", 7.0, failed=True)
+
+    lines = metrics.prometheus().splitlines()
+    assert 'music_stage_duration_seconds_bucket{stage="play",le="0.025"} 1' in lines
+    assert 'music_stage_duration_seconds_bucket{stage="play",le="+Inf"} 2' in lines
+    assert 'music_stage_duration_seconds_count{stage="play"} 2' in lines
+    assert 'lavalink_search_duration_seconds_bucket{node="principal",le="5.0"} 1' in lines
+    assert 'lavalink_search_errors_total{node="principal"} 1' in lines
+    assert metrics.snapshot()["nodes"]["principal"]["errors"] == 1
@@ -0,0 +1,118 @@
+import pytest
+import sys
+import os
+import types
+import wavelink
+
+# Ajoute le répertoire racine du projet au path pour permettre les imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import music_state
+from lazy_queue import LazyTrack
+
+pytestmark = pytest.mark.anyio
+
+@pytest.fixture
+def anyio_backend():
+    return 'asyncio'
+
+@pytest.fixture
+def backup_dir(tmp_path, monkeypatch):
+    """Redirige les sauvegardes vers un dossier temporaire."""
+    monkeypatch.setattr(music_state, "STATE_BACKUP_DIR", str(tmp_path / "backups"))
+    return tmp_path / "backups"
+
+def make_track_payload(identifier: str) -> dict:
+    return {
+        "encoded": f"QAAA{identifier}",
+        "info": {
+            "identifier": identifier, "isSeekable": True, "author": "Artiste", "length": 180000, "isStream": False,
+            "position": 0, "title": f"Titre {identifier}", "uri": f"https://soundcloud.com/artiste/{identifier}", "sourceName": "soundcloud",
+        },
+        "pluginInfo": {},
+    }
+
+def make_track(identifier: str, requester_id: int = 42) -> wavelink.Playable:
+    track = wavelink.Playable(make_track_payload(identifier))
+    track.extras = {"requester_id": requester_id}
+    return track
+
+class FakeNode:
+    """Nœud Lavalink simulé : décode les pistes encodées connues et compte les requêtes."""
+    def __init__(self, fail: bool = False):
+        self.fail = fail
+        self.requests = []
+
+    async def send(self, method, *, path, data=None):
+        self.requests.append((method, path, list(data)))
+        if self.fail:
+            raise RuntimeError("nœud indisponible")
+        return [make_track_payload(encoded.removeprefix("QAAA")) for encoded in data]
+
+async def test_state_roundtrip_keeps_encoded_tracks_and_position(backup_dir):
+    player = types.SimpleNamespace(
+        current=make_track("a"), position=61234.7, volume=40, queue=types.SimpleNamespace(mode=wavelink.QueueMode.loop_all)
+    )
+    await music_state.save_state(player, 123, [make_track("b"), LazyTrack("scsearch:plus tard", requester_id=7)])
+
+    # Format compact, sans fichier temporaire résiduel.
+    assert os.listdir(backup_dir) == ["123.json"]
+    assert "\n" not in (backup_dir / "123.json").read_text(encoding="utf-8")
+
+    state = await music_state.load_state(123)
+    assert state["version"] == music_state.STATE_FORMAT_VERSION
+    assert state["position"] == 61234 and state["loop_mode"] == "loop_all" and state["volume"] == 40
+    assert [entry["encoded"] for entry in state["queue"]] == ["QAAAa", "QAAAb", None]
+    assert [entry["requester_id"] for entry in state["queue"]] == [42, 42, 7]
+
+    music_state.delete_state(123)
+    assert await music_state.load_state(123) is None
+
+async def test_failed_write_keeps_previous_backup(backup_dir, monkeypatch):
+    music_state.write_state_file(1, {"queue": ["ancienne"]})
+    def broken_dump(*args, **kwargs):
+        raise OSError("disque plein")
+    with monkeypatch.context() as patch:
+        patch.setattr(music_state.json, "dump", broken_dump)
+        with pytest.raises(OSError):
+            music_state.write_state_file(1, {"queue": ["nouvelle"]})
+
+    assert music_state.read_state_file(1) == {"queue": ["ancienne"]}
+    assert os.listdir(backup_dir) == ["1.json"]
+
+async def test_decode_entries_uses_a_single_request():
+    node = FakeNode()
+    queue_data = [
+        {"encoded": "QAAAa", "uri": "https://soundcloud.com/artiste/a", "requester_id": 1},
+        {"encoded": None, "uri": "scsearch:pas encore résolue", "title": "pas encore résolue", "requester_id": 2},
+        {"encoded": "QAAAc", "uri": "https://soundcloud.com/artiste/c", "requester_id": 3},
+    ]
+    entries = await music_state.decode_entries(node, queue_data)
+
+    assert len(node.requests) == 1 and node.requests[0][2] == ["QAAAa", "QAAAc"]
+    assert [type(entry) for entry in entries] == [wavelink.Playable, LazyTrack, wavelink.Playable]
+    assert [dict(entry.extras)["requester_id"] for entry in entries] == [1, 2, 3]
+    assert entries[2].title == "Titre c"
+
+async def test_decode_failure_falls_back_to_lazy_entries():
+    # Ancien format (sans pistes encodées) et nœud en échec : tout redevient recherche par URI.
+    entries = await music_state.decode_entries(FakeNode(fail=True), [
+        {"encoded": "QAAAa", "uri": "https://soundcloud.com/artiste/a", "title": "A"},
+        {"uri": "https://soundcloud.com/artiste/b", "title": "B", "duration": 1000},
+    ])
+    assert all(isinstance(entry, LazyTrack) for entry in entries)
+    assert [entry.title for entry in entries] == ["A", "B"]
+
+def test_sessions_file_is_read_once_and_expires(backup_dir, monkeypatch):
+    sessions = [{"guild_id": 1, "channel_id": 2, "home_channel_id": None, "paused": False, "state": {"queue": []}}]
+    music_state.write_sessions_file(sessions)
+    assert music_state.take_sessions_file() == sessions
+    # Lu une seule fois : un plantage pendant la reprise ne la rejoue pas au démarrage suivant.
+    assert music_state.take_sessions_file() == []
+
+    music_state.write_sessions_file(sessions)
+    monkeypatch.setattr(music_state.time, "time", lambda: 10**10)
+    assert music_state.take_sessions_file() == []
+    # Trop ancien pour une reprise automatique : la file reste proposée à la restauration.
+    assert os.listdir(backup_dir) == ["1.json"]
+    assert music_state.read_state_file(1) == {"queue": []}
@@ -0,0 +1,102 @@
+import pytest
+import sys
+import os
+import asyncio
+import types
+import wavelink
+
+# Ajoute le répertoire racine du projet au path pour permettre les imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from node_manager import NodeManager, MAX_CONSECUTIVE_FAILURES
+
+pytestmark = pytest.mark.anyio
+
+@pytest.fixture
+def anyio_backend():
+    return 'asyncio'
+
+def make_stats(playing: int = 0, system_load: float = 0.1, nulled: int = 0, deficit: int = 0):
+    return types.SimpleNamespace(
+        players=playing, playing=playing,
+        cpu=types.SimpleNamespace(system_load=system_load, lavalink_load=system_load / 2),
+        frames=types.SimpleNamespace(sent=3000 * playing, nulled=nulled, deficit=deficit) if playing else None,
+    )
+
+class FakeNode:
+    def __init__(self, identifier: str, latency: float = 0.0, stats=None, fail: bool = False):
+        self.identifier = identifier
+        self.status = wavelink.NodeStatus.CONNECTED
+        self.players = {}
+        self.latency = latency
+        self.stats = stats or make_stats()
+        self.fail = fail
+
+    async def fetch_stats(self):
+        await asyncio.sleep(self.latency)
+        if self.fail:
+            raise ConnectionError("nœud injoignable")
+        return self.stats
+
+class FakePlayer:
+    def __init__(self, guild_id: int, node: FakeNode):
+        self.guild = types.SimpleNamespace(id=guild_id)
+        self.node = node
+        node.players[guild_id] = self
+
+    async def switch_node(self, new_node: FakeNode):
+        self.node.players.pop(self.guild.id)
+        self.node = new_node
+        new_node.players[self.guild.id] = self
+
+async def test_routes_to_fastest_least_loaded_node():
+    slow = FakeNode("lent", latency=0.05)
+    busy = FakeNode("chargé", stats=make_stats(playing=40, system_load=0.8))
+    idle = FakeNode("libre")
+    manager = NodeManager(nodes=lambda: [slow, busy, idle])
+    await manager.probe_all()
+
+    assert manager.best_node() is idle
+    assert manager.health["lent"].rtt >= 0.05
+    assert manager.best_node(exclude=idle) is slow
+
+async def test_new_players_are_spread_between_probes():
+    a, b = FakeNode("a"), FakeNode("b")
+    manager = NodeManager(nodes=lambda: [a, b])
+    await manager.probe_all()
+
+    chosen = []
+    for _ in range(4):
+        node = manager.best_node()
+        manager.health[node.identifier].assigned += 1
+        chosen.append(node.identifier)
+    assert sorted(chosen) == ["a", "a", "b", "b"]
+
+async def test_degraded_node_players_are_migrated():
+    failing, healthy = FakeNode("instable"), FakeNode("sain")
+    players = [FakePlayer(guild_id, failing) for guild_id in (1, 2, 3)]
+    manager = NodeManager(nodes=lambda: [failing, healthy])
+    await manager.probe_all()
+    assert failing.players
+
+    failing.fail = True
+    for _ in range(MAX_CONSECUTIVE_FAILURES):
+        await manager.probe_all()
+
+    assert not failing.players
+    assert all(player.node is healthy for player in players)
+    # Un sondage réussi remet le compteur d'échecs à zéro.
+    failing.fail = False
+    await manager.probe_all()
+    assert manager.is_healthy(failing)
+
+async def test_frame_loss_marks_node_degraded_and_no_target_keeps_players():
+    lossy = FakeNode("saccadé", stats=make_stats(playing=2, nulled=500, deficit=400))
+    player = FakePlayer(1, lossy)
+    manager = NodeManager(nodes=lambda: [lossy])
+    await manager.probe_all()
+
+    assert manager.health["saccadé"].degraded
+    # Seul nœud connecté : il reste utilisable plutôt que de couper la musique.
+    assert manager.best_node() is lossy
+    assert player.node is lossy
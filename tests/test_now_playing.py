@@ -0,0 +1,102 @@
+import pytest
+import sys
+import os
+import asyncio
+import types
+import wavelink
+
+# Ajoute le répertoire racine du projet au path pour permettre les imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from now_playing import EDIT_BUCKET, MAX_REFRESH, MIN_REFRESH, NowPlayingUpdater, progress_cell, refresh_delay
+from rate_limiter import RateLimit
+
+pytestmark = pytest.mark.anyio
+
+@pytest.fixture
+def anyio_backend():
+    return 'asyncio'
+
+def make_track(identifier: str, length: int = 200000) -> wavelink.Playable:
+    return wavelink.Playable({
+        "encoded": f"QAAA{identifier}",
+        "info": {
+            "identifier": identifier, "isSeekable": True, "author": "Artiste", "length": length, "isStream": False,
+            "position": 0, "title": identifier, "uri": f"https://soundcloud.com/artiste/{identifier}", "sourceName": "soundcloud",
+        },
+        "pluginInfo": {},
+    })
+
+class FakeMessage:
+    def __init__(self, channel_id: int):
+        self.channel = types.SimpleNamespace(id=channel_id)
+        self.edits = 0
+
+    async def edit(self, embed):
+        self.edits += 1
+
+def make_player(guild_id: int, channel_id: int = 1, position: int = 0):
+    return types.SimpleNamespace(
+        guild=types.SimpleNamespace(id=guild_id), current=make_track(f"piste-{guild_id}"), position=position,
+        paused=False, connected=True, queue=wavelink.Queue(), now_playing_message=FakeMessage(channel_id),
+    )
+
+async def settle():
+    # Laisse l'ordonnanceur traiter les demandes immédiates et les modifications lancées.
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+def test_refresh_follows_the_progress_bar():
+    # Piste de 10 minutes : une case toutes les 30 s ; piste de 1 minute : bornée au minimum.
+    assert refresh_delay(0, 600000) == 30.0
+    assert refresh_delay(25000, 600000) == MIN_REFRESH
+    assert refresh_delay(0, 60000) == MIN_REFRESH
+    assert refresh_delay(0, 4 * 3600 * 1000) == MAX_REFRESH
+    assert refresh_delay(0, 0) is None
+    assert progress_cell(599999, 600000) == 19
+
+async def test_unchanged_state_is_not_edited():
+    updater = NowPlayingUpdater()
+    player = make_player(1)
+    updater.register(player, render=lambda p: "embed")
+
+    updater.request_update(1)
+    await settle()
+    assert player.now_playing_message.edits == 0 and updater.skipped == 1
+
+    # Le prochain titre change : une seule modification, même si plusieurs demandes arrivent.
+    player.queue.put(make_track("suivante"))
+    for _ in range(3):
+        updater.request_update(1)
+    await settle()
+    assert player.now_playing_message.edits == 1
+    await updater.close()
+
+async def test_edits_respect_channel_budget_and_are_deferred():
+    updater = NowPlayingUpdater(limits={EDIT_BUCKET: [RateLimit(1, 0.05)]})
+    players = [make_player(guild_id, channel_id=1) for guild_id in (1, 2)]
+    for player in players:
+        updater.register(player, render=lambda p: "embed")
+        player.paused = True  # Change la signature
+
+    for player in players:
+        updater.request_update(player.guild.id)
+    await settle()
+    assert sum(p.now_playing_message.edits for p in players) == 1
+    assert updater.deferred == 1
+
+    # Le lecteur refusé est reprogrammé dès qu'un jeton se libère.
+    await asyncio.sleep(0.08)
+    await settle()
+    assert [p.now_playing_message.edits for p in players] == [1, 1]
+    await updater.close()
+
+async def test_finished_player_is_dropped():
+    updater = NowPlayingUpdater()
+    player = make_player(1)
+    updater.register(player, render=lambda p: "embed")
+    player.current = None
+    updater.request_update(1)
+    await settle()
+    assert updater.stats()["tracked"] == 0
+    await updater.close()
@@ -0,0 +1,106 @@
+import pytest
+import sys
+import os
+import wavelink
+
+# Ajoute le répertoire racine du projet au path pour permettre les imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import db_manager
+from play_history import PlayHistory
+
+pytestmark = pytest.mark.anyio
+
+@pytest.fixture
+def anyio_backend():
+    return 'asyncio'
+
+def make_track(identifier: str, requester_id: int | None = None, length: int = 180000) -> wavelink.Playable:
+    track = wavelink.Playable({
+        "encoded": f"QAAA{identifier}",
+        "info": {
+            "identifier": identifier, "isSeekable": True, "author": "Artiste", "length": length, "isStream": False,
+            "position": 0, "title": f"Titre {identifier}", "uri": f"https://soundcloud.com/artiste/{identifier}", "sourceName": "soundcloud",
+        },
+        "pluginInfo": {},
+    })
+    track.extras = {"requester_id": requester_id}
+    return track
+
+def play(history: PlayHistory, guild_id: int, track: wavelink.Playable, reason: str = "finished"):
+    history.track_started(guild_id, track)
+    history.track_ended(guild_id, track, reason)
+
+async def count_rows(table: str) -> int:
+    async with db_manager.get_db_connection() as conn:
+        async with conn.execute(f"SELECT COUNT(*) FROM {table}") as cursor:
+            return (await cursor.fetchone())[0]
+
+async def test_plays_are_batched_and_listed_newest_first(temp_db):
+    history = PlayHistory(flush_deadline=60)
+    play(history, 1, make_track("a", requester_id=10))
+    play(history, 1, make_track("b", requester_id=20), reason="stopped")
+    play(history, 1, make_track("a", requester_id=20))
+    play(history, 2, make_track("c"))
+
+    # Rien n'est écrit avant la fin du délai (ou une lecture) : tout part ensuite en une fois.
+    assert await count_rows("play_history") == 0
+    recent = await history.recent(1)
+
+    assert [entry.title for entry in recent] == ["Titre a", "Titre b", "Titre a"]
+    assert [entry.finished for entry in recent] == [True, False, True]
+    assert recent[0].encoded == "QAAAa"
+    assert await count_rows("track_metadata") == 3  # Une seule ligne par URI
+    assert [entry.title for entry in await history.recent(1, requester_id=20)] == ["Titre a", "Titre b"]
+    assert (await history.get_entry(1, 2)).title == "Titre b"
+    assert await history.get_entry(1, 4) is None
+    await history.close()
+
+async def test_top_tracks_use_counters(temp_db):
+    history = PlayHistory(flush_deadline=60)
+    for identifier, plays in (("a", 1), ("b", 3), ("c", 2)):
+        for _ in range(plays):
+            play(history, 1, make_track(identifier))
+    play(history, 2, make_track("a"))
+
+    top = await history.top_tracks(1)
+
+    assert [(track.title, track.plays) for track in top] == [("Titre b", 3), ("Titre c", 2), ("Titre a", 1)]
+    assert [track.plays for track in await history.top_tracks(2)] == [1]
+    await history.close()
+
+async def test_out_of_order_events(temp_db):
+    history = PlayHistory(flush_deadline=60)
+    first, second = make_track("a"), make_track("b")
+    history.track_started(1, first)
+    # Le début de la piste suivante arrive avant la fin de la précédente (remplacement).
+    history.track_started(1, second)
+    history.track_ended(1, first, "replaced")
+    history.track_ended(1, second, "finished")
+
+    recent = await history.recent(1)
+    assert [(entry.title, entry.finished) for entry in recent] == [("Titre b", True), ("Titre a", False)]
+    await history.close()
+
+async def test_pending_plays_flush_early_when_batch_is_full(temp_db):
+    history = PlayHistory(flush_deadline=60, max_pending=3)
+    for identifier in "abc":
+        play(history, 1, make_track(identifier))
+    await history._task
+
+    assert await count_rows("play_history") == 3
+    await history.close()
+
+async def test_history_queries_do_not_scan(temp_db):
+    queries = {
+        "idx_play_history_guild": "SELECT h.id FROM play_history h JOIN track_metadata t ON t.id = h.track_id WHERE h.guild_id = 1 ORDER BY h.id DESC LIMIT 10",
+        "idx_play_history_requester": "SELECT h.id FROM play_history h JOIN track_metadata t ON t.id = h.track_id WHERE h.guild_id = 1 AND h.requester_id = 2 ORDER BY h.id DESC LIMIT 10",
+        "idx_track_play_counts_top": "SELECT t.uri FROM track_play_counts c JOIN track_metadata t ON t.id = c.track_id WHERE c.guild_id = 1 ORDER BY c.plays DESC, c.last_played_at DESC LIMIT 10",
+    }
+    async with db_manager.get_db_connection() as conn:
+        for index, query in queries.items():
+            async with conn.execute(f"EXPLAIN QUERY PLAN {query}") as cursor:
+                plan = [row[-1] for row in await cursor.fetchall()]
+            # Parcours d'index dans l'ordre voulu : ni parcours de table, ni tri temporaire.
+            assert index in plan[0], plan
+            assert not any(step.startswith("SCAN") or "TEMP B-TREE" in step for step in plan), plan
@@ -0,0 +1,53 @@
+import pytest
+import sys
+import os
+import asyncio
+
+# Ajoute le répertoire racine du projet au path pour permettre les imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from playlist_resolver import resolve_in_order
+
+pytestmark = pytest.mark.anyio
+
+@pytest.fixture
+def anyio_backend():
+    return 'asyncio'
+
+async def test_first_result_starts_early_and_rest_stays_in_order():
+    # Les délais sont inversés : la dernière requête répond la première.
+    delays = {f"piste {i}": 0.001 * (10 - i) for i in range(10)}
+    running, max_running = 0, 0
+    async def resolve(query, index):
+        nonlocal running, max_running
+        running += 1
+        max_running = max(max_running, running)
+        await asyncio.sleep(delays[query])
+        running -= 1
+        return None if query == "piste 5" else query.upper()
+
+    first, queued = [], []
+    async def on_first(result):
+        first.append(result)
+    async def on_ready(results):
+        queued.extend(results)
+
+    failed = await resolve_in_order(list(delays), resolve, concurrency=4, on_first=on_first, on_ready=on_ready)
+
+    assert max_running <= 4
+    assert len(first) == 1
+    expected = [f"PISTE {i}" for i in range(10) if i != 5 and f"PISTE {i}" != first[0]]
+    assert queued == expected
+    assert failed == ["piste 5"]
+
+async def test_without_on_first_everything_is_delivered_in_order():
+    async def resolve(query, index):
+        await asyncio.sleep(0.001 * (5 - index))
+        return index
+
+    delivered = []
+    async def on_ready(results):
+        delivered.extend(results)
+
+    assert await resolve_in_order(list("abcde"), resolve, concurrency=5, on_ready=on_ready) == []
+    assert delivered == [0, 1, 2, 3, 4]
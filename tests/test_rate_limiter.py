@@ -0,0 +1,46 @@
+import sys
+import os
+
+# Ajoute le répertoire racine du projet au path pour permettre les imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from rate_limiter import CommandRateLimiter, RateLimit, DEFAULT_COMMAND_LIMITS
+
+def test_user_bucket_refills_lazily():
+    limiter = CommandRateLimiter({"getlog": [RateLimit(2, 10)]})
+
+    assert limiter.check("getlog", 1, 100, now=0) is None
+    assert limiter.check("getlog", 1, 100, now=0) is None
+    assert limiter.check("getlog", 1, 100, now=0) == 5.0
+    # Un autre utilisateur a son propre seau.
+    assert limiter.check("getlog", 2, 100, now=0) is None
+    # Un jeton revient toutes les 5 secondes.
+    assert limiter.check("getlog", 1, 100, now=5) is None
+
+def test_guild_limit_is_shared_and_rejection_consumes_nothing():
+    limiter = CommandRateLimiter({"musique play": [RateLimit(5, 10), RateLimit(2, 60, "guild")]})
+
+    assert limiter.check("musique play", 1, 100, now=0) is None
+    assert limiter.check("musique play", 2, 100, now=0) is None
+    assert limiter.check("musique play", 3, 100, now=0) == 30.0
+    assert limiter.check("musique play", 3, 200, now=0) is None
+    # Le refus précédent n'a pas entamé le seau personnel de l'utilisateur 3.
+    assert limiter._buckets[("musique play", "user", 3, 5, 10)][0] == 4
+
+def test_wildcard_limit_and_pruning():
+    limiter = CommandRateLimiter({"*": [RateLimit(1, 1)]}, max_buckets=2)
+    for user_id in range(3):
+        assert limiter.check("ping", user_id, None, now=0) is None
+    assert limiter.check("ping", 0, None, now=0) is not None
+
+    limiter.check("ping", 3, None, now=10)
+    assert list(limiter._buckets) == [("ping", "user", 3, 1, 1)]
+
+def test_discordmaker_start_limit_is_charged_on_apply():
+    limiter = CommandRateLimiter(DEFAULT_COMMAND_LIMITS)
+    # Aperçus et plans annulés : seule la limite générale s'applique.
+    assert limiter.check("discordmaker start", 1, 100, now=0) is None
+    assert limiter.check("discordmaker start", 1, 100, now=2) is None
+    # Une seule application du plan toutes les 10 minutes par serveur.
+    assert limiter.check("discordmaker start:apply", 1, 100, now=3) is None
+    assert limiter.check("discordmaker start:apply", 2, 100, now=4) is not None
@@ -0,0 +1,68 @@
+import pytest
+import sys
+import os
+import time
+import asyncio
+
+# Ajoute le répertoire racine du projet au path pour permettre les imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import db_manager
+from sanction_scheduler import SanctionScheduler
+
+pytestmark = pytest.mark.anyio
+
+@pytest.fixture
+def anyio_backend():
+    return 'asyncio'
+
+async def count_pending_actions():
+    async with db_manager.get_db_connection() as conn:
+        async with conn.execute("SELECT COUNT(*) FROM scheduled_actions") as cursor:
+            return (await cursor.fetchone())[0]
+
+async def test_overdue_actions_run_after_restart_in_bounded_batches(temp_db):
+    """Des actions échues avant un redémarrage sont exécutées au démarrage, par lots bornés."""
+    first_run = SanctionScheduler({})
+    for target_id in range(25):
+        await first_run.schedule(1, "unban", target_id, time.time() - 60)
+
+    running, max_running, done = 0, 0, []
+    async def fake_unban(action):
+        nonlocal running, max_running
+        running += 1
+        max_running = max(max_running, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        done.append(action["target_id"])
+
+    # Nouveau planificateur = redémarrage du bot : il relit la table.
+    scheduler = SanctionScheduler({"unban": fake_unban}, window=10, batch_size=5)
+    scheduler.start()
+    # On attend aussi la suppression du dernier lot, faite après l'exécution des handlers.
+    for _ in range(100):
+        if len(done) == 25 and await count_pending_actions() == 0:
+            break
+        await asyncio.sleep(0.02)
+    scheduler.stop()
+
+    assert sorted(done) == list(range(25))
+    assert max_running <= 5
+    assert await count_pending_actions() == 0
+
+async def test_only_the_nearest_actions_are_kept_in_memory(temp_db):
+    scheduler = SanctionScheduler({}, window=3)
+    now = time.time()
+    for delay in (500, 100, 400, 300, 200):
+        await scheduler.schedule(1, "unlock", delay, now + delay)
+
+    assert sorted(entry[2]["target_id"] for entry in scheduler._heap) == [100, 200, 300]
+    assert await count_pending_actions() == 5
+
+async def test_cancel_removes_pending_action(temp_db):
+    scheduler = SanctionScheduler({})
+    await scheduler.schedule(1, "unlock", 42, time.time() + 3600)
+
+    assert await scheduler.cancel(1, "unlock", 42) == 1
+    assert scheduler._heap == []
+    assert await count_pending_actions() == 0
@@ -0,0 +1,61 @@
+import pytest
+import sys
+import os
+import threading
+import spotipy
+
+# Ajoute le répertoire racine du projet au path pour permettre les imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from fake_spotify import FakeSpotify, make_spotify_track
+from spotify_resolver import SpotifyResolver, SpotifyTrack, parse_spotify_link
+
+pytestmark = pytest.mark.anyio
+
+@pytest.fixture
+def anyio_backend():
+    return 'asyncio'
+
+def test_links_are_recognised():
+    assert parse_spotify_link("https://open.spotify.com/playlist/37i9dQZF1DXcBWIGoYBM5M?si=abc") == ("playlist", "37i9dQZF1DXcBWIGoYBM5M")
+    assert parse_spotify_link("https://open.spotify.com/intl-fr/album/4aawyAB9vmqN3uQ7FjRGTy") == ("album", "4aawyAB9vmqN3uQ7FjRGTy")
+    assert parse_spotify_link("spotify:track:6rqhFgbbKwnb9MLmUQDhG6") == ("track", "6rqhFgbbKwnb9MLmUQDhG6")
+    assert parse_spotify_link("https://open.spotify.com/artist/0TnOYISbd1XYRBk9myaseg") is None
+    assert parse_spotify_link("daft punk one more time") is None
+
+async def test_playlist_pages_are_fetched_in_parallel_off_the_loop():
+    items = [make_spotify_track(i, isrc=i % 2 == 0) for i in range(250)]
+    items[3] = {**items[3], "is_local": True}
+    client = FakeSpotify(playlists={"liste": ("Ma playlist", items)})
+
+    name, tracks = await SpotifyResolver(client).fetch("https://open.spotify.com/playlist/liste")
+
+    assert name == "Ma playlist"
+    assert len(tracks) == 249  # Le fichier local est ignoré
+    assert [t.title for t in tracks[:3]] == ["Titre 0", "Titre 1", "Titre 2"] and tracks[-1].title == "Titre 249"
+    assert tracks[0] == SpotifyTrack("Titre 0", "Artiste 0, Invité", 180000, "FRZ000000000")
+    assert sorted(client.calls) == [("playlist", 0), ("playlist_items", 100), ("playlist_items", 200)]
+    assert threading.get_ident() not in client.threads
+
+async def test_album_tracks_are_completed_with_isrc_in_batches():
+    client = FakeSpotify(albums={"album": ("Mon album", [make_spotify_track(i) for i in range(120)])})
+
+    name, tracks = await SpotifyResolver(client).fetch("https://open.spotify.com/album/album")
+
+    assert name == "Mon album" and len(tracks) == 120
+    assert all(track.isrc for track in tracks)
+    assert sorted(client.calls) == [("album", 0), ("album_tracks", 50), ("album_tracks", 100), ("tracks", 0), ("tracks", 0), ("tracks", 0)]
+
+async def test_single_track_and_errors():
+    client = FakeSpotify(playlists={"liste": ("Ma playlist", [make_spotify_track(7)])})
+    resolver = SpotifyResolver(client)
+
+    assert await resolver.fetch("spotify:track:track7") == ("Titre 7", [SpotifyTrack("Titre 7", "Artiste 7, Invité", 180007, "FRZ000000007")])
+    with pytest.raises(spotipy.SpotifyException):
+        await resolver.fetch("https://open.spotify.com/playlist/privee")
+    with pytest.raises(ValueError):
+        await resolver.fetch("https://open.spotify.com/artist/x")
+
+def test_cache_keys_prefer_isrc():
+    assert SpotifyTrack("Titre", "Artiste", 1, "FRZ1").cache_key == "spotify:isrc:FRZ1"
+    assert SpotifyTrack("Un  Titre", "Artiste", 1, None).cache_key == SpotifyTrack("un titre", "ARTISTE", 2, None).cache_key
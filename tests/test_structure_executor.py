@@ -0,0 +1,98 @@
+import pytest
+import sys
+import os
+import asyncio
+import types
+import discord
+from unittest.mock import MagicMock
+
+# Ajoute le répertoire racine du projet au path pour permettre les imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from fake_guild import FakeGuild
+from structure_executor import StructuralExecutor, StructuralOperation
+from commandes.discordmaker import CHANNEL_STRUCTURE, DiscordMakerCog, ROLE_DATA
+
+pytestmark = pytest.mark.anyio
+
+@pytest.fixture
+def anyio_backend():
+    return 'asyncio'
+
+def make_http_exception(status: int, headers: dict | None = None) -> discord.HTTPException:
+    response = MagicMock()
+    response.status = status
+    response.headers = headers or {}
+    return discord.HTTPException(response, "erreur simulée")
+
+FULL_CONFIG = {"roles": list(ROLE_DATA), "channel_categories": list(CHANNEL_STRUCTURE), "cleanup_policy": "keep", "verification_system": "enabled"}
+
+async def test_phases_run_in_order_with_parallel_operations():
+    events, attempts = [], {}
+
+    def operation(phase: int, name: str, fail_with=None):
+        async def call():
+            attempts[name] = attempts.get(name, 0) + 1
+            if fail_with and (fail_with.status != 429 or attempts[name] == 1):
+                raise fail_with
+            events.append(("début", phase, name))
+            await asyncio.sleep(0.01)
+            events.append(("fin", phase, name))
+        return StructuralOperation("create", "role", name, call)
+
+    phases = [
+        [operation(1, "a"), operation(1, "b"), operation(1, "limité", make_http_exception(429, {"Retry-After": "0.01"}))],
+        [operation(2, "c"), operation(2, "interdit", make_http_exception(403))],
+    ]
+    reports = []
+    async def on_progress(report):
+        reports.append(report.done)
+
+    report = await StructuralExecutor(progress_interval=0).run(phases, on_progress=on_progress)
+
+    assert (report.total, report.done) == (5, 5)
+    assert [operation.name for operation, _ in report.failed] == ["interdit"]
+    assert attempts["limité"] == 2
+    # Les opérations d'une phase se chevauchent ; la phase 2 attend la fin de la phase 1.
+    assert events[:2] == [("début", 1, "a"), ("début", 1, "b")]
+    last_phase_1 = max(i for i, event in enumerate(events) if event[1] == 1)
+    assert all(event[1] == 1 for event in events[:last_phase_1 + 1])
+    assert reports == sorted(reports) and reports[-1] == 5
+
+async def test_plan_preview_sends_nothing(temp_db):
+    guild = FakeGuild()
+    cog = DiscordMakerCog(types.SimpleNamespace())
+    plan = await cog._plan_build(guild, FULL_CONFIG)
+
+    assert guild.calls == []
+    channel_count = sum(len(s["text"]) + len(s["voice"]) for s in CHANNEL_STRUCTURE.values())
+    assert plan.counts()[("create", "role")] == len(ROLE_DATA)
+    assert plan.counts()[("create", "category")] == len(CHANNEL_STRUCTURE)
+    assert plan.counts()[("create", "text")] + plan.counts()[("create", "voice")] == channel_count
+    embed = cog._plan_embed("Simulation", plan)
+    assert "Créer le rôle `Owner`" in embed.description
+
+async def test_server_build_is_parallel_ordered_and_tracked(temp_db):
+    guild = FakeGuild(latency=0.01)
+    cog = DiscordMakerCog(types.SimpleNamespace())
+    plan = await cog._plan_build(guild, FULL_CONFIG)
+    created, tracked = plan.created, plan.tracked
+
+    report = await StructuralExecutor().run(plan.phases)
+    await cog._track_created(guild.id, tracked, plan.removed)
+
+    assert report.failed == []
+    assert guild.max_in_flight > 1  # Plus de pause fixe : plusieurs requêtes en vol à la fois
+    # La hiérarchie des rôles suit ROLE_DATA malgré les créations en parallèle.
+    built_roles = [role.name for role in reversed(guild.roles) if role.name in ROLE_DATA]
+    assert built_roles == list(ROLE_DATA)
+    assert guild.calls.count("edit_role_positions") == 1
+    staff = created[("category", "╭───┤ STAFF ├───╮")]
+    assert created[("channel", "🔒・staff-discussion")].category is staff
+    assert created[("role", "Admin")] in staff.overwrites and guild.default_role in staff.overwrites
+    assert [c.name for c in sorted(guild.categories, key=lambda c: c.position)] == list(CHANNEL_STRUCTURE)
+
+    # /discordmaker reset retrouve tout ce qui a été créé, et le supprime.
+    cleanup = await cog._cleanup_guild(guild)
+    assert cleanup.total == len(tracked) and cleanup.failed == []
+    assert guild.channels == [] and [role.name for role in guild.roles] == ["@everyone", "FunBot"]
@@ -0,0 +1,88 @@
+import pytest
+import sys
+import os
+import types
+import discord
+
+# Ajoute le répertoire racine du projet au path pour permettre les imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from fake_guild import FakeGuild
+from structure_executor import StructuralExecutor
+from structure_planner import channel_name
+from commandes.discordmaker import CHANNEL_STRUCTURE, DiscordMakerCog, ROLE_DATA
+
+pytestmark = pytest.mark.anyio
+
+@pytest.fixture
+def anyio_backend():
+    return 'asyncio'
+
+FULL_CONFIG = {"roles": list(ROLE_DATA), "channel_categories": list(CHANNEL_STRUCTURE), "cleanup_policy": "keep", "verification_system": "enabled"}
+
+async def build(cog: DiscordMakerCog, guild: FakeGuild, config: dict):
+    plan = await cog._plan_build(guild, config)
+    report = await StructuralExecutor().run(plan.phases)
+    await cog._track_created(guild.id, plan.tracked, plan.removed)
+    assert report.failed == []
+    return plan
+
+async def test_rebuilding_a_built_guild_makes_no_api_call(temp_db):
+    guild = FakeGuild()
+    cog = DiscordMakerCog(types.SimpleNamespace())
+    await build(cog, guild, FULL_CONFIG)
+    guild.calls.clear()
+
+    plan = await build(cog, guild, FULL_CONFIG)
+
+    assert plan.total == 0 and guild.calls == []
+    assert channel_name("#✅・vérification", "text") == "✅・vérification"
+    assert channel_name("🔊 Général 1", "voice") == "🔊 Général 1"
+
+async def test_plan_contains_only_the_drift(temp_db):
+    guild = FakeGuild()
+    cog = DiscordMakerCog(types.SimpleNamespace())
+    built = await build(cog, guild, FULL_CONFIG)
+    guild.calls.clear()
+
+    # Dérives : permissions d'un rôle modifiées, un salon supprimé, deux salons inversés, un rôle créé à la main.
+    await built.created[("role", "VIP")].edit(permissions=discord.Permissions.none())
+    await built.created[("channel", "💡・suggestions")].delete()
+    general, medias = built.created[("channel", "💬・général")], built.created[("channel", "🖼・médias")]
+    general.position, medias.position = medias.position, general.position
+    hand_made = await guild.create_role(name="Muted")
+    guild.calls.clear()
+
+    plan = await cog._plan_build(guild, FULL_CONFIG)
+
+    assert sorted((operation.action, operation.kind, operation.name) for operation in plan.operations) == [
+        ("create", "text", "💡・suggestions"),
+        ("edit", "role", "VIP"),
+        ("reorder", "channels", "💬・général, 🖼・médias, 🤖・commandes-bots, 📊・sondages"),
+    ]
+    await StructuralExecutor().run(plan.phases)
+    assert set(guild.calls) == {"create_text", "edit_channel", "edit_role"}
+    assert hand_made.permissions == discord.Permissions.none()  # Homonyme créé à la main : jamais modifié
+    assert (await cog._plan_build(guild, FULL_CONFIG)).total == 0
+
+async def test_cleanup_policies_prune_what_left_the_config(temp_db):
+    guild = FakeGuild()
+    cog = DiscordMakerCog(types.SimpleNamespace())
+    await build(cog, guild, FULL_CONFIG)
+    manual = await guild.create_text_channel("salon-manuel")
+    smaller = {**FULL_CONFIG, "roles": [r for r in ROLE_DATA if r != "Fortnite"],
+               "channel_categories": [c for c in CHANNEL_STRUCTURE if c != "╭───┤ LOGS ├───╮"]}
+
+    # "keep" : rien n'est supprimé.
+    assert (await cog._plan_build(guild, smaller)).deletes == []
+
+    # "smart_delete" : seuls les éléments créés par le bot et retirés de la configuration disparaissent.
+    plan = await build(cog, guild, {**smaller, "cleanup_policy": "smart_delete"})
+    assert sorted(operation.name for operation in plan.deletes) == sorted(["Fortnite", "╭───┤ LOGS ├───╮", *(channel_name(name, "text") for name in CHANNEL_STRUCTURE["╭───┤ LOGS ├───╮"]["text"])])
+    assert manual in guild.channels
+    assert (await cog._plan_build(guild, {**smaller, "cleanup_policy": "smart_delete"})).total == 0
+
+    # "full_delete" : tout ce qui n'est pas dans la configuration, y compris les éléments créés à la main.
+    plan = await build(cog, guild, {**smaller, "cleanup_policy": "full_delete"})
+    assert [operation.name for operation in plan.deletes] == ["salon-manuel"]
+    assert manual not in guild.channels and "FunBot" in [role.name for role in guild.roles]
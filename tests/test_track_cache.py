@@ -0,0 +1,80 @@
+import pytest
+import sys
+import os
+import wavelink
+
+# Ajoute le répertoire racine du projet au path pour permettre les imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from track_cache import TrackSearchCache, normalize_query
+
+pytestmark = pytest.mark.anyio
+
+@pytest.fixture
+def anyio_backend():
+    return 'asyncio'
+
+def make_track_payload(identifier: str) -> dict:
+    return {
+        "encoded": f"QAAA{identifier}",
+        "info": {
+            "identifier": identifier, "isSeekable": True, "author": "Artiste", "length": 180000, "isStream": False,
+            "position": 0, "title": f"Titre {identifier}", "uri": f"https://soundcloud.com/artiste/{identifier}", "sourceName": "soundcloud",
+        },
+        "pluginInfo": {},
+    }
+
+@pytest.fixture
+def lavalink_calls(monkeypatch):
+    """Remplace la recherche Lavalink par une fausse recherche qui compte les appels."""
+    calls = []
+    async def fake_search(query, **kwargs):
+        # Une requête préfixée doit arriver telle quelle à Lavalink (sans le "ytsearch:" ajouté par wavelink).
+        assert kwargs.get("source", "défaut") is None or not query.split(":")[0].endswith("search")
+        calls.append(query)
+        return [wavelink.Playable(make_track_payload(f"{len(calls)}-{i}")) for i in range(3)]
+    monkeypatch.setattr(wavelink.Playable, "search", fake_search)
+    return calls
+
+def test_normalize_query_keeps_urls_intact():
+    assert normalize_query("  scsearch:Daft   PUNK ") == "scsearch:daft punk"
+    assert normalize_query("https://youtu.be/dQw4w9WgXcQ") == "https://youtu.be/dQw4w9WgXcQ"
+
+async def test_repeated_search_skips_lavalink(temp_db, lavalink_calls):
+    cache = TrackSearchCache()
+    first = await cache.search("scsearch:daft punk")
+    second = await cache.search("scsearch:Daft Punk")
+
+    assert lavalink_calls == ["scsearch:daft punk"]
+    assert [t.encoded for t in second] == [t.encoded for t in first]
+    # Des objets neufs à chaque accès : les extras d'un serveur ne fuient pas vers un autre.
+    first[0].extras = {"requester_id": 1}
+    assert second[0] is not first[0]
+    assert "requester_id" not in second[0].extras
+    assert cache.stats()["memory_hits"] == 1 and cache.stats()["misses"] == 1
+    # L'écriture SQLite en arrière-plan ne doit pas survivre à la boucle du test.
+    await cache.flush()
+
+async def test_results_survive_restart_and_are_indexed_by_uri(temp_db, lavalink_calls):
+    cache = TrackSearchCache()
+    tracks = await cache.search("scsearch:daft punk")
+    await cache.flush()
+
+    restarted = TrackSearchCache()
+    again = await restarted.search("scsearch:daft punk")
+    by_uri = await restarted.search(tracks[1].uri)
+
+    assert len(lavalink_calls) == 1
+    assert again[0].encoded == tracks[0].encoded
+    assert by_uri[0].encoded == tracks[1].encoded
+    assert restarted.stats()["db_hits"] == 2
+
+async def test_memory_tier_is_bounded_and_expires(temp_db, lavalink_calls):
+    cache = TrackSearchCache(capacity=2, ttl=-1)
+    for query in ("scsearch:a", "scsearch:b", "scsearch:c"):
+        await cache.search(query)
+    await cache.flush()
+    assert cache.stats()["memory_size"] == 2
+    # TTL négatif : l'entrée mémoire est expirée, la base prend le relais.
+    await cache.search("scsearch:c")
+    assert cache.db_hits == 1
@@ -0,0 +1,73 @@
+import pytest
+import sys
+import os
+import time
+
+# Ajoute le répertoire racine du projet au path pour permettre les imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import db_manager
+import warning_stats
+
+pytestmark = pytest.mark.anyio
+
+@pytest.fixture
+def anyio_backend():
+    return 'asyncio'
+
+async def add_warning(user_id: int, days_ago: int = 0) -> int:
+    timestamp = time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(time.time() - days_ago * 86400))
+    async with db_manager.get_db_connection() as conn:
+        cursor = await conn.execute(
+            "INSERT INTO warnings (guild_id, user_id, moderator_id, reason, timestamp) VALUES (1, ?, 99, 'test', ?)",
+            (user_id, timestamp)
+        )
+        await conn.commit()
+        return cursor.lastrowid
+
+async def test_counters_follow_inserts_and_deletes(temp_db):
+    await add_warning(10)
+    await add_warning(10)
+    await add_warning(10, days_ago=10)
+    old_id = await add_warning(10, days_ago=100)
+
+    assert await warning_stats.get_warning_summary(1, 10) == (4, 2, 3)
+
+    async with db_manager.get_db_connection() as conn:
+        await conn.execute("DELETE FROM warnings WHERE id = ?", (old_id,))
+        await conn.commit()
+        async with conn.execute("SELECT COUNT(*) FROM warning_counts WHERE count <= 0") as cursor:
+            assert (await cursor.fetchone())[0] == 0
+
+    assert await warning_stats.get_warning_summary(1, 10) == (3, 2, 3)
+    assert await warning_stats.get_warning_summary(1, 11) == (0, 0, 0)
+
+async def test_existing_warnings_are_counted_on_migration(temp_db):
+    await add_warning(10, days_ago=3)
+    async with db_manager.get_db_connection() as conn:
+        await conn.execute("DELETE FROM warning_counts")
+        await conn.commit()
+
+    await db_manager.initialize_database()
+    assert await warning_stats.count_warnings_since(1, 10, 7) == 1
+
+async def test_history_is_paged_newest_first(temp_db):
+    ids = [await add_warning(10) for _ in range(12)]
+
+    first_page = await warning_stats.fetch_warnings_page(1, 10, 0, page_size=5)
+    last_page = await warning_stats.fetch_warnings_page(1, 10, 2, page_size=5)
+    assert [row[0] for row in first_page] == ids[::-1][:5]
+    assert [row[0] for row in last_page] == ids[:2][::-1]
+
+async def test_highest_reached_threshold_wins(temp_db):
+    await warning_stats.add_escalation_rule(1, 2, 30, "timeout", 3600)
+    await warning_stats.add_escalation_rule(1, 3, 30, "ban", None)
+    await warning_stats.add_escalation_rule(1, 3, 7, "kick", None)
+
+    await add_warning(10, days_ago=20)
+    await add_warning(10)
+    assert (await warning_stats.find_escalation(1, 10))["action"] == "timeout"
+
+    await add_warning(10)
+    assert (await warning_stats.find_escalation(1, 10))["action"] == "ban"
+    assert await warning_stats.find_escalation(1, 11) is None
@@ -0,0 +1,46 @@
+import pytest
+import sys
+import os
+from unittest.mock import MagicMock
+
+# Ajoute le répertoire racine du projet au path pour permettre les imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from welcome_template import (
+    compile_welcome_template, compile_welcome_template_or_default,
+    WelcomeTemplateError, DEFAULT_WELCOME_MESSAGE
+)
+
+@pytest.fixture
+def mock_member():
+    """Crée un faux membre qui vient de rejoindre un serveur."""
+    member = MagicMock()
+    member.mention = "<@42>"
+    member.name = "alice"
+    member.guild.name = "Mon Serveur"
+    member.guild.member_count = 128
+    return member
+
+def test_render_supports_both_placeholder_styles(mock_member):
+    template = compile_welcome_template("Salut {user.mention} ({user_name}) sur {server_name}, membre n°{member_count} !")
+    assert template.render(mock_member) == "Salut <@42> (alice) sur Mon Serveur, membre n°128 !"
+
+def test_escaped_braces_are_kept_literally(mock_member):
+    template = compile_welcome_template("{{bienvenue}} {user.name}")
+    assert template.render(mock_member) == "{bienvenue} alice"
+
+@pytest.mark.parametrize("source", [
+    "Bonjour {user.__class__}",  # accès arbitraire aux attributs, possible avec .format()
+    "Bonjour {0}",
+    "Bonjour {user.mention",
+    "",
+])
+def test_invalid_templates_are_rejected(source):
+    with pytest.raises(WelcomeTemplateError):
+        compile_welcome_template(source)
+
+def test_invalid_stored_template_falls_back_to_default(mock_member):
+    """Un ancien modèle invalide venant de la DB ne doit jamais faire échouer l'accueil."""
+    template = compile_welcome_template_or_default("Bonjour {user.id}")
+    assert template.source == DEFAULT_WELCOME_MESSAGE
+    assert template.render(mock_member) == "Bienvenue <@42> sur Mon Serveur !"
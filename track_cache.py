@@ -0,0 +1,212 @@
+import asyncio
+import json
+import re
+import time
+from collections import OrderedDict
+import wavelink
+from db_manager import get_db_connection
+from music_metrics import music_metrics
+
+# Nombre de recherches gardées en mémoire (LRU) et leur durée de validité.
+MEMORY_CAPACITY = 500
+MEMORY_TTL = 3600
+# Durée de validité des résultats stockés en base (les résultats d'une recherche finissent par changer).
+PERSISTENT_TTL = 7 * 86400
+# Seuls les premiers résultats d'une recherche textuelle sont utiles (le bot joue le premier).
+SEARCH_RESULTS_KEPT = 5
+
+def normalize_query(query: str) -> str:
+    """Clé de cache : les recherches textuelles sont insensibles à la casse et aux espaces, les URL restent intactes."""
+    query = query.strip()
+    if re.match(r'^[a-z]+://', query, re.IGNORECASE):
+        return query
+    return re.sub(r'\s+', ' ', query).lower()
+
+def _dump_result(result: wavelink.Search) -> dict:
+    """Convertit un résultat de recherche en données brutes Lavalink (pistes encodées + infos), sérialisables en JSON."""
+    if isinstance(result, wavelink.Playlist):
+        plugin = {"type": result.type, "url": result.url, "artworkUrl": result.artwork, "author": result.author}
+        return {
+            "playlist": {"name": result.name, "selectedTrack": result.selected, "pluginInfo": {k: v for k, v in plugin.items() if v is not None}},
+            "tracks": [track.raw_data for track in result.tracks],
+        }
+    return {"playlist": None, "tracks": [track.raw_data for track in result[:SEARCH_RESULTS_KEPT]]}
+
+def _build_result(payload: dict) -> wavelink.Search:
+    """Reconstruit des objets neufs à chaque accès : les `extras` (demandeur...) ne sont jamais partagés entre serveurs."""
+    if payload["playlist"] is not None:
+        info = payload["playlist"]
+        return wavelink.Playlist({
+            "info": {"name": info["name"], "selectedTrack": info["selectedTrack"]},
+            "pluginInfo": info["pluginInfo"],
+            "tracks": payload["tracks"],
+        })
+    return [wavelink.Playable(data) for data in payload["tracks"]]
+
+def _default_node() -> wavelink.Node | None:
+    """Le nœud que wavelink choisirait (le moins chargé), ou None sans nœud connecté (wavelink lèvera alors son erreur habituelle)."""
+    try:
+        return wavelink.Pool.get_node()
+    except wavelink.InvalidNodeException:
+        return None
+
+class TrackSearchCache:
+    """
+    Cache à deux niveaux pour `wavelink.Playable.search` :
+    1. un LRU en mémoire avec durée de vie (TTL), pour les recherches répétées à chaud ;
+    2. la table `track_search_cache`, qui conserve les pistes encodées de Lavalink et survit aux redémarrages.
+    Les pistes d'un résultat sont aussi indexées par leur URI, pour que la restauration d'une file d'attente
+    (qui recherche chaque URI sauvegardée) profite des recherches déjà faites.
+    """
+    def __init__(self, capacity: int = MEMORY_CAPACITY, ttl: float = MEMORY_TTL, persistent_ttl: float = PERSISTENT_TTL):
+        self.capacity = capacity
+        self.ttl = ttl
+        self.persistent_ttl = persistent_ttl
+        self._entries = OrderedDict()  # clé -> (expire_à, payload)
+        self.memory_hits = 0
+        self.db_hits = 0
+        self.misses = 0
+        self._pending_rows = []  # Lignes en attente d'écriture en base
+        self._flush_task = None
+
+    async def search(self, query: str, node: wavelink.Node | None = None) -> wavelink.Search:
+        """
+        Équivalent de `wavelink.Playable.search(query)`, sans aller-retour vers Lavalink si le résultat est en cache.
+        `node` permet de choisir le nœud Lavalink interrogé en cas de miss (par défaut, le moins chargé).
+        """
+        key = normalize_query(query)
+        payload = self._get_memory(key)
+        if payload is not None:
+            self.memory_hits += 1
+            return _build_result(payload)
+
+        payload = await self._get_persistent(key)
+        if payload is not None:
+            self.db_hits += 1
+            self._put_memory(key, payload)
+            return _build_result(payload)
+
+        self.misses += 1
+        # Le nœud est choisi ici (et non par wavelink) pour attribuer la durée de la recherche au bon nœud.
+        node = node or _default_node()
+        node_id = node.identifier if node else "aucun"
+        started = time.perf_counter()
+        try:
+            # wavelink ajoute "ytsearch:" devant toute requête qui n'est pas une URL : une requête déjà préfixée
+            # ("scsearch:...", "ytsearch:...") doit être transmise telle quelle (source=None).
+            if re.match(r'^\w+search:', query):
+                result = await wavelink.Playable.search(query, source=None, node=node)
+            else:
+                result = await wavelink.Playable.search(query, node=node)
+        except Exception:
+            music_metrics.observe_search(node_id, time.perf_counter() - started, failed=True)
+            raise
+        music_metrics.observe_search(node_id, time.perf_counter() - started)
+        # Les résultats vides et les flux en direct ne sont pas mis en cache.
+        if result and not (isinstance(result, list) and any(track.is_stream for track in result)):
+            payload = _dump_result(result)
+            self._put_memory(key, payload)
+            # L'écriture en base se fait en arrière-plan : la lecture n'a pas à attendre le verrou SQLite,
+            # et les résultats de recherches simultanées partent dans une seule transaction.
+            self._queue_persistent(key, payload)
+        return result
+
+    async def get_alias(self, key: str) -> wavelink.Playable | None:
+        """
+        Piste mémorisée sous une clé d'alias par `remember` (ex. l'ISRC d'un morceau Spotify), ou None.
+        Jamais d'appel à Lavalink : un alias inconnu n'est pas une requête de recherche.
+        """
+        key = normalize_query(key)
+        payload = self._get_memory(key)
+        if payload is not None:
+            self.memory_hits += 1
+        else:
+            payload = await self._get_persistent(key)
+            if payload is None:
+                return None
+            self.db_hits += 1
+            self._put_memory(key, payload)
+        tracks = _build_result(payload)
+        return tracks[0] if tracks else None
+
+    def remember(self, key: str, track: wavelink.Playable):
+        """Associe une clé d'alias à une piste déjà résolue (écriture en base en arrière-plan, comme les recherches)."""
+        if track.is_stream:
+            return
+        key = normalize_query(key)
+        payload = {"playlist": None, "tracks": [track.raw_data]}
+        self._put_memory(key, payload)
+        self._queue_persistent(key, payload)
+
+    def stats(self) -> dict:
+        lookups = self.memory_hits + self.db_hits + self.misses
+        return {
+            "memory_hits": self.memory_hits,
+            "db_hits": self.db_hits,
+            "misses": self.misses,
+            "hit_rate": (self.memory_hits + self.db_hits) / lookups if lookups else 0.0,
+            "memory_size": len(self._entries),
+        }
+
+    def _get_memory(self, key: str) -> dict | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry[1]
+
+    def _put_memory(self, key: str, payload: dict):
+        self._entries[key] = (time.monotonic() + self.ttl, payload)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.capacity:
+            self._entries.popitem(last=False)
+
+    async def _get_persistent(self, key: str) -> dict | None:
+        async with get_db_connection() as conn:
+            async with conn.execute(
+                "SELECT payload FROM track_search_cache WHERE query = ? AND created_at >= ?",
+                (key, int(time.time() - self.persistent_ttl))
+            ) as cursor:
+                row = await cursor.fetchone()
+        return json.loads(row[0]) if row else None
+
+    def _queue_persistent(self, key: str, payload: dict):
+        now = int(time.time())
+        self._pending_rows.append((key, json.dumps(payload), now))
+        # Chaque piste est aussi accessible directement par son URI.
+        for track_data in payload["tracks"]:
+            uri = track_data["info"].get("uri")
+            if uri and normalize_query(uri) != key:
+                self._pending_rows.append((normalize_query(uri), json.dumps({"playlist": None, "tracks": [track_data]}), now))
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._write_pending())
+
+    async def _write_pending(self):
+        while self._pending_rows:
+            rows, self._pending_rows = self._pending_rows, []
+            try:
+                async with get_db_connection() as conn:
+                    await conn.executemany("INSERT OR REPLACE INTO track_search_cache (query, payload, created_at) VALUES (?, ?, ?)", rows)
+                    await conn.commit()
+            except Exception as e:
+                print(f"[Cache] Impossible d'enregistrer {len(rows)} résultat(s) de recherche en base : {e}")
+
+    async def flush(self):
+        """Attend la fin des écritures en base en attente (avant un arrêt, ou pour relire la base aussitôt)."""
+        # Une tâche terminée (ou annulée avec la boucle d'un test, d'un arrêt) n'a plus rien à écrire.
+        if self._flush_task and not self._flush_task.done():
+            await self._flush_task
+
+    async def purge_expired(self) -> int:
+        """Supprime de la base les résultats expirés. Renvoie le nombre de lignes supprimées."""
+        async with get_db_connection() as conn:
+            cursor = await conn.execute("DELETE FROM track_search_cache WHERE created_at < ?", (int(time.time() - self.persistent_ttl),))
+            deleted = cursor.rowcount
+            await conn.commit()
+        return deleted
+
+# Instance partagée (exposée sur `bot.track_cache`).
+track_cache = TrackSearchCache()
@@ -0,0 +1,118 @@
+import time
+from typing import NamedTuple
+import aiosqlite
+from db_manager import get_db_connection
+
+# Nombre d'avertissements affichés par page dans /warnings.
+WARNINGS_PAGE_SIZE = 10
+# Sanctions possibles pour une règle d'escalade (et leur libellé).
+ESCALATION_ACTIONS = {"timeout": "timeout", "kick": "expulsion", "ban": "bannissement"}
+
+class WarningSummary(NamedTuple):
+    """Nombre d'avertissements d'un membre : au total et sur les périodes récentes."""
+    total: int
+    last_7_days: int
+    last_30_days: int
+
+def current_day(now: float | None = None) -> int:
+    """Numéro du jour (UTC) utilisé comme clé dans la table `warning_counts`."""
+    return int((time.time() if now is None else now) // 86400)
+
+async def get_warning_summary(guild_id: int, user_id: int, now: float | None = None) -> WarningSummary:
+    """Résumé instantané calculé à partir des compteurs journaliers (jamais depuis l'historique complet)."""
+    today = current_day(now)
+    async with get_db_connection() as conn:
+        async with conn.execute(
+            """
+            SELECT COALESCE(SUM(count), 0),
+                   COALESCE(SUM(CASE WHEN day > ? THEN count END), 0),
+                   COALESCE(SUM(CASE WHEN day > ? THEN count END), 0)
+            FROM warning_counts WHERE guild_id = ? AND user_id = ?
+            """,
+            (today - 7, today - 30, guild_id, user_id)
+        ) as cursor:
+            total, last_7_days, last_30_days = await cursor.fetchone()
+    return WarningSummary(total, last_7_days, last_30_days)
+
+async def count_warnings_since(guild_id: int, user_id: int, window_days: int | None, now: float | None = None) -> int:
+    """Nombre d'avertissements sur les `window_days` derniers jours (aujourd'hui compris), ou au total si None."""
+    first_day = current_day(now) - window_days + 1 if window_days else 0
+    async with get_db_connection() as conn:
+        async with conn.execute(
+            "SELECT COALESCE(SUM(count), 0) FROM warning_counts WHERE guild_id = ? AND user_id = ? AND day >= ?",
+            (guild_id, user_id, first_day)
+        ) as cursor:
+            return (await cursor.fetchone())[0]
+
+async def fetch_warnings_page(guild_id: int, user_id: int, page: int, page_size: int = WARNINGS_PAGE_SIZE) -> list:
+    """Renvoie une page de l'historique (du plus récent au plus ancien), via l'index (guild_id, user_id, id)."""
+    async with get_db_connection() as conn:
+        async with conn.execute(
+            "SELECT id, moderator_id, reason, timestamp FROM warnings WHERE guild_id = ? AND user_id = ? ORDER BY id DESC LIMIT ? OFFSET ?",
+            (guild_id, user_id, page_size, page * page_size)
+        ) as cursor:
+            return await cursor.fetchall()
+
+async def get_escalation_rules(guild_id: int) -> list:
+    async with get_db_connection() as conn:
+        conn.row_factory = aiosqlite.Row
+        async with conn.execute(
+            "SELECT id, threshold, window_days, action, duration_seconds FROM warning_escalations WHERE guild_id = ? ORDER BY threshold, id",
+            (guild_id,)
+        ) as cursor:
+            return [dict(row) for row in await cursor.fetchall()]
+
+async def add_escalation_rule(guild_id: int, threshold: int, window_days: int | None, action: str, duration_seconds: int | None) -> int:
+    if action not in ESCALATION_ACTIONS:
+        raise ValueError(f"Action d'escalade inconnue : {action}")
+    async with get_db_connection() as conn:
+        cursor = await conn.execute(
+            "INSERT INTO warning_escalations (guild_id, threshold, window_days, action, duration_seconds) VALUES (?, ?, ?, ?, ?)",
+            (guild_id, threshold, window_days, action, duration_seconds)
+        )
+        rule_id = cursor.lastrowid
+        await conn.commit()
+    return rule_id
+
+async def delete_escalation_rule(guild_id: int, rule_id: int) -> bool:
+    async with get_db_connection() as conn:
+        cursor = await conn.execute("DELETE FROM warning_escalations WHERE id = ? AND guild_id = ?", (rule_id, guild_id))
+        deleted = cursor.rowcount
+        await conn.commit()
+    return deleted > 0
+
+async def find_escalation(guild_id: int, user_id: int, now: float | None = None, rules: list | None = None) -> dict | None:
+    """
+    Renvoie la règle d'escalade atteinte par un membre (ou None). Si plusieurs règles sont atteintes,
+    celle au seuil le plus élevé l'emporte. La règle reste active tant que le seuil est dépassé :
+    chaque nouvel avertissement réapplique la sanction.
+    """
+    if rules is None:
+        rules = await get_escalation_rules(guild_id)
+    reached = None
+    counts = {}
+    for rule in rules:
+        window = rule["window_days"]
+        if window not in counts:
+            counts[window] = await count_warnings_since(guild_id, user_id, window, now)
+        if counts[window] >= rule["threshold"] and (reached is None or rule["threshold"] >= reached["threshold"]):
+            reached = rule
+    return reached
+
+def format_duration(seconds: int) -> str:
+    """Formate une durée en secondes au format accepté par les commandes (ex: 3690 -> "1h1m30s")."""
+    parts = []
+    for unit, size in (("d", 86400), ("h", 3600), ("m", 60), ("s", 1)):
+        value, seconds = divmod(seconds, size)
+        if value:
+            parts.append(f"{value}{unit}")
+    return "".join(parts) or "0s"
+
+def describe_escalation_rule(rule: dict) -> str:
+    period = f"sur {rule['window_days']} jour(s)" if rule["window_days"] else "au total"
+    action = ESCALATION_ACTIONS[rule["action"]]
+    if rule["duration_seconds"]:
+        action += f" ({format_duration(rule['duration_seconds'])})"
+    elif rule["action"] == "ban":
+        action += " (définitif)"
+    return f"{rule['threshold']} avertissement(s) {period} → {action}"
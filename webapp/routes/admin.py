@@ -41,7 +41,15 @@ def dashboard():
     if request.method == 'POST':
         if 'maintenance_mode_submitted' in request.form:
             maintenance_mode = '1' if 'maintenance_mode' in request.form else '0'
-            run_async(get_db_async().then(lambda db: db.execute("INSERT OR REPLACE INTO global_settings (key, value) VALUES ('maintenance_mode', ?)", (maintenance_mode,)).then(db.commit).then(db.close)))
+
+            async def _set_maintenance():
+                db = await get_db_async()
+                await db.execute("INSERT OR REPLACE INTO global_settings (key, value) VALUES ('maintenance_mode', ?)", (maintenance_mode,))
+                await db.commit()
+                await db.close()
+                # Push vers le cache mémoire du bot : la prochaine commande voit le changement sans relire la DB.
+                bot.global_settings.apply('maintenance_mode', maintenance_mode)
+            run_async(_set_maintenance())
             flash("Mode maintenance mis à jour.", "success")
 
         elif 'update_vlog_submitted' in request.form:
@@ -60,6 +68,7 @@ def dashboard():
                 await db.execute("DELETE FROM update_vlog_history WHERE id NOT IN (SELECT id FROM update_vlog_history ORDER BY timestamp DESC LIMIT 5)")
                 await db.commit()
                 await db.close()
+                bot.global_settings.apply('update_vlog_content', vlog_content)
             run_async(_set_vlog())
             flash("Journal des mises à jour sauvegardé.", "success")
 
@@ -130,7 +139,8 @@ def dashboard():
         command_logs=command_logs,
         maintenance_mode_on=maintenance_mode_on,
         update_vlog_content=update_vlog_content,
-        vlog_history=vlog_history
+        vlog_history=vlog_history,
+        search_cache_stats=bot.track_cache.stats()
     )
 
 @admin_bp.route('/user-lookup')
@@ -7,6 +7,7 @@ from ..utils import (
     check_admin_permissions, refresh_token, get_guild_details, get_db_async, 
     run_async, fetch_user_details_http, GUILDS_URL, is_valid_url
 )
+from welcome_template import compile_welcome_template, WelcomeTemplateError, DEFAULT_WELCOME_MESSAGE
 
 dashboard_bp = Blueprint('dashboard', __name__, url_prefix='/dashboard')
 
@@ -193,12 +194,14 @@ def settings(server_id):
     guild_details = get_guild_details(server_id)
 
     if request.method == 'POST':
+        # Un champ laissé vide revient au message par défaut, sans bloquer l'enregistrement des autres réglages.
+        welcome_message = request.form.get('welcome_message', '').strip()
         form_data = {
             'mod_log_channel_id': request.form.get('mod_log_channel_id') or None,
             'ticket_category_id': request.form.get('ticket_category_id') or None,
             'welcome_enabled': 1 if 'welcome_enabled' in request.form else 0,
             'welcome_channel_id': request.form.get('welcome_channel_id') or None,
-            'welcome_message': request.form.get('welcome_message', 'Bienvenue {user.mention} sur {server.name} !'),
+            'welcome_message': welcome_message or DEFAULT_WELCOME_MESSAGE,
             'autorole_id': request.form.get('autorole_id') or None,
             'antispam_invites_enabled': 1 if 'antispam_invites_enabled' in request.form else 0,
             'leveling_enabled': 1 if 'leveling_enabled' in request.form else 0,
@@ -207,6 +210,15 @@ def settings(server_id):
             'leveling_blacklisted_channels': ",".join(request.form.getlist('blacklisted_channels'))
         }
 
+        # Le modèle de bienvenue est validé et compilé une seule fois, ici, au moment de l'enregistrement.
+        try:
+            welcome_template = compile_welcome_template(form_data['welcome_message'])
+        except WelcomeTemplateError as e:
+            flash(f"Message de bienvenue invalide : {e}", "danger")
+            return redirect(url_for('dashboard.settings', server_id=server_id))
+
+        bot = current_app.config['BOT_INSTANCE']
+
         def save_settings():
             async def _save():
                 db = await get_db_async()
@@ -222,7 +234,11 @@ def settings(server_id):
                     WHERE guild_id = :server_id
                 """, {'server_id': server_id, **form_data})
                 await db.commit()
+                cursor = await db.execute("SELECT * FROM guild_settings WHERE guild_id = ?", (server_id,))
+                saved_settings = await cursor.fetchone()
                 await db.close()
+                # Push vers le cache du bot, avec le modèle déjà compilé.
+                bot.guild_settings.store(int(server_id), saved_settings, welcome_template=welcome_template)
             run_async(_save())
         
         save_settings()
@@ -143,8 +143,17 @@ def status_page():
         lavalink_nodes_status.append({"identifier": "Aucun nœud", "status": "error", "text": "Non configuré", "heartbeat": -1})
 
     overall_status = "ok" if bot_is_ready and db_status['status'] == 'ok' and all_nodes_ok else "error"
+    music_latency = bot.music_metrics.snapshot() if hasattr(bot, 'music_metrics') else None
 
-    return render_template('status.html', bot_name=bot.user.name if bot_is_ready else "FunBot", overall_status=overall_status, last_checked=datetime.now().strftime('%H:%M:%S UTC'), bot_status=bot_status, bot_latency=bot_latency, guild_count=guild_count, db_status=db_status, lavalink_nodes=lavalink_nodes_status)
+    return render_template('status.html', bot_name=bot.user.name if bot_is_ready else "FunBot", overall_status=overall_status, last_checked=datetime.now().strftime('%H:%M:%S UTC'), bot_status=bot_status, bot_latency=bot_latency, guild_count=guild_count, db_status=db_status, lavalink_nodes=lavalink_nodes_status, music_latency=music_latency)
+
+@public_bp.route('/metrics')
+def metrics():
+    """Histogrammes de latence (musique, verrous des serveurs) : format texte Prometheus, ou résumé JSON avec `?format=json`."""
+    bot = current_app.config['BOT_INSTANCE']
+    if request.args.get('format') == 'json':
+        return jsonify({**bot.music_metrics.snapshot(), "guild_locks": bot.guild_locks.stats()})
+    return Response(bot.music_metrics.prometheus() + bot.guild_locks.prometheus(), mimetype='text/plain; version=0.0.4')
 
 @public_bp.route('/privacy-policy')
 def privacy_policy_page():
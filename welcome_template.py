@@ -0,0 +1,89 @@
+import re
+
+# Message utilisé quand un serveur n'a pas personnalisé son message de bienvenue.
+DEFAULT_WELCOME_MESSAGE = "Bienvenue {user.mention} sur {server.name} !"
+# Longueur maximale d'un modèle, pour garder une marge sous la limite de 2000 caractères de Discord.
+MAX_TEMPLATE_LENGTH = 1500
+MAX_MESSAGE_LENGTH = 2000
+
+# Liste fermée des placeholders autorisés. Chaque entrée associe le nom à une fonction
+# qui extrait la valeur depuis le membre : aucun accès arbitraire aux attributs (contrairement à `.format()`).
+WELCOME_PLACEHOLDERS = {
+    "user.mention": lambda member: member.mention,
+    "user.name": lambda member: member.name,
+    "server.name": lambda member: member.guild.name,
+    "user_mention": lambda member: member.mention,
+    "user_name": lambda member: member.name,
+    "server_name": lambda member: member.guild.name,
+    "member_count": lambda member: member.guild.member_count,
+}
+
+# `{{` et `}}` sont des accolades littérales, `{nom}` est un placeholder, une accolade seule est une erreur.
+_TOKEN_REGEX = re.compile(r'\{\{|\}\}|\{([^{}]*)\}|[{}]')
+
+class WelcomeTemplateError(ValueError):
+    """Levée lorsqu'un modèle de message de bienvenue est invalide (message lisible pour le dashboard)."""
+
+class CompiledWelcomeTemplate:
+    """
+    Modèle de bienvenue pré-compilé : une liste de morceaux de texte fixes et de placeholders.
+    Le rendu n'est qu'une concaténation, il ne peut pas échouer au moment de l'arrivée d'un membre.
+    """
+    __slots__ = ("source", "_parts")
+
+    def __init__(self, source: str, parts: list):
+        self.source = source
+        self._parts = parts
+
+    def render(self, member) -> str:
+        """Produit le message final pour un membre donné."""
+        message = "".join(part if isinstance(part, str) else str(part(member)) for part in self._parts)
+        return message[:MAX_MESSAGE_LENGTH]
+
+def compile_welcome_template(source: str) -> CompiledWelcomeTemplate:
+    """Valide et compile un modèle de bienvenue. Lève `WelcomeTemplateError` si le modèle est invalide."""
+    if not source or not source.strip():
+        raise WelcomeTemplateError("Le message de bienvenue ne peut pas être vide.")
+    if len(source) > MAX_TEMPLATE_LENGTH:
+        raise WelcomeTemplateError(f"Le message de bienvenue ne peut pas dépasser {MAX_TEMPLATE_LENGTH} caractères.")
+
+    parts = []
+    literal = []
+    position = 0
+    for match in _TOKEN_REGEX.finditer(source):
+        literal.append(source[position:match.start()])
+        position = match.end()
+        token = match.group(0)
+        if token in ("{{", "}}"):
+            literal.append(token[0])
+            continue
+
+        name = match.group(1)
+        if name is None:
+            raise WelcomeTemplateError(f"Accolade isolée à la position {match.start() + 1}. Utilisez `{{{{` ou `}}}}` pour afficher une accolade.")
+        name = name.strip()
+        if name not in WELCOME_PLACEHOLDERS:
+            allowed = ", ".join(f"{{{key}}}" for key in WELCOME_PLACEHOLDERS)
+            raise WelcomeTemplateError(f"Placeholder inconnu : `{{{name}}}`. Placeholders autorisés : {allowed}.")
+
+        # On regroupe le texte fixe accumulé en un seul morceau avant d'ajouter le placeholder.
+        if any(literal):
+            parts.append("".join(literal))
+        literal = []
+        parts.append(WELCOME_PLACEHOLDERS[name])
+
+    literal.append(source[position:])
+    if any(literal):
+        parts.append("".join(literal))
+    return CompiledWelcomeTemplate(source, parts)
+
+def compile_welcome_template_or_default(source: str | None) -> CompiledWelcomeTemplate:
+    """
+    Compile un modèle venant de la base de données. Les anciens modèles (enregistrés avant la validation)
+    qui seraient invalides sont remplacés par le message par défaut plutôt que de faire échouer l'accueil.
+    """
+    try:
+        return compile_welcome_template(source or DEFAULT_WELCOME_MESSAGE)
+    except WelcomeTemplateError as e:
+        print(f"[Welcome] Modèle de bienvenue invalide ignoré ({e}). Utilisation du message par défaut.")
+        return compile_welcome_template(DEFAULT_WELCOME_MESSAGE)